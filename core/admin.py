@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile, Pole, Projet, Tache, Document
+from .models import Profile, Pole, Projet, Tache, Document, OdooOutbox, OdooWebhookEvent
 
 
 class TacheInline(admin.TabularInline):
@@ -32,7 +32,8 @@ class PoleAdmin(admin.ModelAdmin):
 
 @admin.register(Projet)
 class ProjetAdmin(admin.ModelAdmin):
-    list_display = ['titre', 'type', 'statut', 'pole', 'client', 'chef_projet', 'created_at']
+    list_display = ['titre', 'type', 'statut', 'pole', 'client', 'chef_projet', 'get_nombre_taches', 'get_nombre_membres', 'created_at']
+    list_select_related = ['pole', 'client', 'chef_projet']
     list_filter = ['type', 'statut', 'pole', 'created_at']
     search_fields = ['titre', 'description', 'client__username']
     filter_horizontal = ['membres']
@@ -56,6 +57,19 @@ class ProjetAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_counts()
+
+    def get_nombre_taches(self, obj):
+        return obj.nombre_taches
+    get_nombre_taches.short_description = 'Tâches'
+    get_nombre_taches.admin_order_field = 'nombre_taches'
+
+    def get_nombre_membres(self, obj):
+        return obj.nombre_membres
+    get_nombre_membres.short_description = 'Membres'
+    get_nombre_membres.admin_order_field = 'nombre_membres'
+
 
 @admin.register(Tache)
 class TacheAdmin(admin.ModelAdmin):
@@ -83,3 +97,23 @@ class DocumentAdmin(admin.ModelAdmin):
     raw_id_fields = ['projet', 'uploade_par']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
+
+
+@admin.register(OdooOutbox)
+class OdooOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'entity', 'entity_id', 'operation', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['entity', 'operation', 'status']
+    search_fields = ['entity_id', 'error']
+    readonly_fields = [
+        'entity', 'entity_id', 'operation', 'odoo_id', 'attempts', 'error', 'created_at', 'processed_at',
+    ]
+
+
+@admin.register(OdooWebhookEvent)
+class OdooWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['event_id', 'error']
+    readonly_fields = [
+        'event_id', 'kind', 'payload', 'params', 'attempts', 'error', 'received_at', 'claimed_at', 'processed_at',
+    ]
@@ -0,0 +1,207 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from core.models import OdooOutbox, Profile, Projet, Tache
+from core.odoo_fake import FakeOdooServer, percentile
+from core.odoo_gateway import OdooRateLimitError, odoo_gateway
+from core.odoo_rate_limit import PENALTY_KEY
+from core.services.odoo_sync_service import OdooSyncService
+from core.tasks import batch_sync_odoo_pending, sync_projet_to_odoo, sync_tache_to_odoo, sync_user_to_odoo
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit de synchronisation Odoo (entités/s, appels RPC, latences) "
+        "contre un serveur Odoo factice. Les données créées sont annulées à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['batch', 'tasks', 'all'], default='all',
+                            help='batch_sync_odoo_pending, tâches unitaires, ou les deux (défaut)')
+        parser.add_argument('--users', type=int, default=200, help='Utilisateurs à synchroniser (défaut: 200)')
+        parser.add_argument('--projets', type=int, default=50, help='Projets à synchroniser (défaut: 50)')
+        parser.add_argument('--taches', type=int, default=200, help='Tâches à synchroniser (défaut: 200)')
+        parser.add_argument('--updates', type=int, default=50,
+                            help='Projets modifiés 3 fois après la synchronisation initiale (défaut: 50)')
+        parser.add_argument('--latency', type=float, default=5.0, help='Latence Odoo par requête en ms (défaut: 5)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Variation de latence +/- en ms (défaut: 0)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Probabilité de 429 Too Many Requests par requête (défaut: 0)')
+        parser.add_argument('--penalty', type=float, default=1.0,
+                            help='Pause globale après un 429, en secondes (défaut: 1, production: 60)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire (défaut: 42)')
+        parser.add_argument('--rate-limit', action='store_true',
+                            help='Appliquer ODOO_RATE_LIMIT* (désactivé par défaut pour mesurer le débit brut)')
+
+    def handle(self, *args, **options):
+        server = FakeOdooServer(
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        overrides = {'ODOO_OUTBOX_SAFETY_LAG': 0}
+        if not options['rate_limit']:
+            overrides.update(ODOO_RATE_LIMIT=1_000_000, ODOO_RATE_LIMIT_BURST=1_000_000, ODOO_RATE_LIMIT_MODELS={})
+
+        results = []
+        with server, override_settings(**server.settings(), **overrides):
+            odoo_gateway.reset_pool()
+            odoo_gateway._rate_limit_penalty = options['penalty']
+            cache.delete(PENALTY_KEY)
+            try:
+                with transaction.atomic():
+                    if options['mode'] in ('batch', 'all'):
+                        results += self.bench_batch(server, options)
+                    if options['mode'] in ('tasks', 'all'):
+                        results.append(self.bench_tasks(server, options))
+                    # Benchmark sans effet sur la base
+                    transaction.set_rollback(True)
+            finally:
+                del odoo_gateway._rate_limit_penalty
+                cache.delete(PENALTY_KEY)
+                odoo_gateway.reset_pool()
+
+        self.stdout.write(
+            f"Odoo factice : latence {options['latency']:g} ms (+/- {options['jitter']:g}), "
+            f"429 {options['error_rate']:.1%}, rate limit {'on' if options['rate_limit'] else 'off'}\n"
+        )
+        for result in results:
+            self.write_result(result)
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark de synchronisation Odoo terminé'))
+
+    # ========================================
+    # SCÉNARIOS
+    # ========================================
+
+    def seed(self, prefix, options):
+        """Crée utilisateurs, projets et tâches (bulk_create : aucun événement d'outbox)"""
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}_{i}', first_name='Bench', last_name=str(i), email=f'{prefix}_{i}@example.com')
+            for i in range(options['users'])
+        ])
+        users = list(User.objects.filter(username__startswith=f'{prefix}_').order_by('id'))
+        Profile.objects.bulk_create([Profile(user=user, role='client') for user in users])
+
+        Projet.objects.bulk_create([
+            Projet(titre=f'{prefix} projet {i}', type='autre', client=users[i % len(users)] if users else None)
+            for i in range(options['projets'])
+        ])
+        projets = list(Projet.objects.filter(titre__startswith=f'{prefix} projet ').order_by('id'))
+
+        if projets:
+            Tache.objects.bulk_create([
+                Tache(projet=projets[i % len(projets)], titre=f'{prefix} tâche {i}', priorite='normale')
+                for i in range(options['taches'])
+            ])
+        taches = list(Tache.objects.filter(titre__startswith=f'{prefix} tâche ').values_list('id', flat=True))
+        return [user.id for user in users], [projet.id for projet in projets], taches
+
+    def drain(self, options):
+        """Appelle batch_sync_odoo_pending comme Celery Beat jusqu'à vider l'outbox"""
+        for _ in range(100):
+            if not OdooOutbox.objects.filter(status='pending').exists():
+                return
+            if batch_sync_odoo_pending() is None:
+                # Limité (429) : le prochain passage de Beat attend la fin de la pause
+                time.sleep(options['penalty'])
+        raise RuntimeError("Odoo outbox not drained after 100 passes")
+
+    def measure(self, server, name, entities, run):
+        server.reset_metrics()
+        start = time.perf_counter()
+        operations = run()
+        duration = time.perf_counter() - start
+        return {
+            'name': name,
+            'entities': entities,
+            'duration': duration,
+            'rpc': server.rpc_count,
+            'rpc_by_call': dict(server.calls),
+            'errors_429': server.errors_429,
+            'rpc_latency': server.latency_percentiles(),
+            'operations': operations,
+        }
+
+    def bench_batch(self, server, options):
+        # Seuls les événements du benchmark sont drainés
+        OdooOutbox.objects.filter(status='pending').update(status='done', processed_at=timezone.now())
+
+        user_ids, projet_ids, tache_ids = self.seed('bench_batch', options)
+        OdooSyncService.enqueue('partner', user_ids)
+        OdooSyncService.enqueue('project', projet_ids)
+        OdooSyncService.enqueue('task', tache_ids)
+        initial = self.measure(
+            server, 'batch_sync_odoo_pending (création)', len(user_ids) + len(projet_ids) + len(tache_ids),
+            lambda: self.drain(options),
+        )
+
+        # Modifications répétées : regroupées en une écriture par projet
+        updated = list(Projet.objects.filter(id__in=projet_ids[:options['updates']]))
+        for version in range(3):
+            for projet in updated:
+                projet.titre = f'{projet.titre.split(" v")[0]} v{version + 2}'
+                projet.save()
+        updates = self.measure(
+            server, 'batch_sync_odoo_pending (3 modifications / projet)', len(updated),
+            lambda: self.drain(options),
+        )
+        return [initial, updates]
+
+    def bench_tasks(self, server, options):
+        user_ids, projet_ids, tache_ids = self.seed('bench_tasks', options)
+        calls = (
+            [(sync_user_to_odoo, user_id) for user_id in user_ids]
+            + [(sync_projet_to_odoo, projet_id) for projet_id in projet_ids]
+            + [(sync_tache_to_odoo, tache_id) for tache_id in tache_ids]
+        )
+
+        def run():
+            durations = []
+            for task, entity_id in calls:
+                start = time.perf_counter()
+                # Exécution directe : un retry Celery relève l'exception d'origine
+                while True:
+                    try:
+                        task(entity_id)
+                        break
+                    except OdooRateLimitError as e:
+                        time.sleep(e.retry_after)
+                durations.append(time.perf_counter() - start)
+            return sorted(durations)
+
+        return self.measure(server, 'sync_*_to_odoo (tâches unitaires)', len(calls), run)
+
+    # ========================================
+    # AFFICHAGE
+    # ========================================
+
+    def write_result(self, result):
+        rate = result['entities'] / result['duration'] if result['duration'] else 0
+        rpc_latency = result['rpc_latency']
+        lines = [
+            f"▶ {result['name']}",
+            f"  Entités: {result['entities']} en {result['duration']:.3f}s ({rate:.1f} entités/s)",
+            f"  Appels RPC: {result['rpc']} ({result['rpc'] / max(result['entities'], 1):.2f} / entité), "
+            f"429: {result['errors_429']}",
+            f"  Latence RPC (serveur): p50 {rpc_latency[50] * 1000:.1f} ms, "
+            f"p95 {rpc_latency[95] * 1000:.1f} ms, p99 {rpc_latency[99] * 1000:.1f} ms",
+        ]
+        operations = result['operations']
+        if operations:
+            lines.append(
+                f"  Latence par entité: p50 {percentile(operations, 50) * 1000:.1f} ms, "
+                f"p95 {percentile(operations, 95) * 1000:.1f} ms, p99 {percentile(operations, 99) * 1000:.1f} ms"
+            )
+        lines.append("  Détail: " + ", ".join(
+            f"{model}.{method}={count}" for (model, method), count in sorted(result['rpc_by_call'].items())
+        ))
+        self.stdout.write("\n".join(lines) + "\n")
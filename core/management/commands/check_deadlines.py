@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.deadline_service import DeadlineNotificationEngine
+
+
+class Command(BaseCommand):
+    help = 'Crée les notifications de deadline du jour (ou les simule avec --dry-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcule les notifications sans les écrire (mode benchmark)',
+        )
+        parser.add_argument(
+            '--date',
+            help='Date de référence au format AAAA-MM-JJ (défaut: aujourd\'hui)',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Date invalide: {options['date']}")
+
+        result = DeadlineNotificationEngine(today=today, dry_run=options['dry_run']).run()
+
+        self.stdout.write(
+            f"Date: {result['date']}{' (dry-run)' if result['dry_run'] else ''}\n"
+            f"Candidats: {result['candidates']}\n"
+            f"Déjà notifiés: {result['existing']}\n"
+            f"{'À créer' if result['dry_run'] else 'Créées'}: {result['created']}\n"
+            f"Durée: {result['duration']:.3f}s ({result['rows_per_second']:.0f} lignes/s)"
+        )
+        self.stdout.write(self.style.SUCCESS('✓ Vérification des deadlines terminée'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Profile, Projet, Tache
+from core.services.odoo_sync_service import OdooSyncService
+
+
+class Command(BaseCommand):
+    help = (
+        "Publie dans l'outbox Odoo les entités jamais synchronisées "
+        "(ou toutes avec --all), ex: après un import en masse (bulk_create, update)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Republie toutes les entités, y compris celles déjà présentes dans Odoo',
+        )
+        parser.add_argument(
+            '--entity',
+            choices=['partner', 'project', 'task'],
+            action='append',
+            help='Limite à un type d\'entité (répétable, défaut: tous)',
+        )
+
+    def handle(self, *args, **options):
+        querysets = {
+            'partner': (Profile.objects, 'odoo_partner_id', 'user_id'),
+            'project': (Projet.objects, 'odoo_project_id', 'id'),
+            'task': (Tache.objects, 'odoo_task_id', 'id'),
+        }
+
+        for entity in options['entity'] or list(querysets):
+            manager, odoo_field, id_field = querysets[entity]
+            queryset = manager.all() if options['all'] else manager.filter(**{f'{odoo_field}__isnull': True})
+            count = OdooSyncService.enqueue(entity, queryset.values_list(id_field, flat=True).iterator(chunk_size=1000))
+            self.stdout.write(f"{entity}: {count} événement(s)")
+
+        self.stdout.write(self.style.SUCCESS('✓ Entités publiées dans l\'outbox Odoo'))
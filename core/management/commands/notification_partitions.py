@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.services.notification_retention_service import NotificationRetentionService
+
+
+class Command(BaseCommand):
+    help = "Partitionne par mois l'archive des notifications (PostgreSQL) et entretient ses partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help="Convertit la table d'archive en table partitionnée (une seule fois)",
+        )
+        parser.add_argument(
+            '--sql',
+            action='store_true',
+            help='Affiche le SQL de conversion sans l\'exécuter',
+        )
+
+    def handle(self, *args, **options):
+        if options['sql']:
+            for statement in NotificationRetentionService.convert_archive_sql():
+                self.stdout.write(f'{statement};')
+            return
+
+        if connection.vendor != 'postgresql':
+            raise CommandError("Le partitionnement de l'archive nécessite PostgreSQL")
+
+        if options['convert']:
+            if NotificationRetentionService.is_partitioned():
+                self.stdout.write("L'archive est déjà partitionnée")
+            else:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    for statement in NotificationRetentionService.convert_archive_sql():
+                        cursor.execute(statement)
+                self.stdout.write(self.style.SUCCESS("✓ Archive convertie en table partitionnée"))
+
+        if not NotificationRetentionService.is_partitioned():
+            raise CommandError("L'archive n'est pas partitionnée (utiliser --convert)")
+
+        result = NotificationRetentionService.maintain_partitions()
+        dropped = ', '.join(result['dropped']) or 'aucune'
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Partitions à jour ({result['created']} mois assurés), supprimées : {dropped}")
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.odoo_mirror import MIRRORS
+
+
+class Command(BaseCommand):
+    help = "Affiche les métriques du miroir Odoo en cache (hits, stale, misses, refreshes, errors)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Remet les compteurs à zéro après affichage',
+        )
+
+    def handle(self, *args, **options):
+        for mirror in MIRRORS:
+            stats = mirror.stats()
+            ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else '-'
+            self.stdout.write(
+                f"{mirror.model}: {stats['hits']} hits, {stats['stale']} stale, {stats['misses']} misses "
+                f"(hit ratio {ratio}), {stats['refreshes']} refreshes, {stats['errors']} errors"
+            )
+            if options['reset']:
+                mirror.reset_stats()
+
+        self.stdout.write(self.style.SUCCESS('✓ Métriques du miroir Odoo'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.services.notification_retention_service import NotificationRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Purge par lots les notifications lues ou expirées (voir NOTIFICATION_*_RETENTION_DAYS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Lignes par lot')
+        parser.add_argument('--max-batches', type=int, help='Nombre maximum de lots')
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            default=None,
+            help='Copie les notifications dans NotificationArchive avant suppression',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compte les notifications à purger sans rien supprimer',
+        )
+
+    def handle(self, *args, **options):
+        stats = NotificationRetentionService.prune(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            archive=options['archive'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{stats['pending']} notification(s) à purger")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['deleted']} notification(s) purgée(s) en {stats['batches']} lot(s), "
+                f"{stats['archived']} archivée(s)"
+            )
+        )
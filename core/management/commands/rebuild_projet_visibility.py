@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.services.visibility_service import VisibilityService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de visibilité des projets (ProjetVisibility)'
+
+    def handle(self, *args, **options):
+        created = VisibilityService.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Index de visibilité reconstruit : {created} ligne(s)')
+        )
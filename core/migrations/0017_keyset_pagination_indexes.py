@@ -0,0 +1,24 @@
+# Index composites pour la pagination keyset (created_at, id)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_fix_notification_type_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['-created_at', '-id'], name='core_projet_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['-created_at', '-id'], name='core_tache_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-created_at', '-id'], name='core_docume_created_id_idx'),
+        ),
+    ]
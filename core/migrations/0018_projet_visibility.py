@@ -0,0 +1,58 @@
+# Index matérialisé de visibilité des projets + remplissage initial
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_visibility(apps, schema_editor):
+    Profile = apps.get_model('core', 'Profile')
+    Projet = apps.get_model('core', 'Projet')
+    ProjetVisibility = apps.get_model('core', 'ProjetVisibility')
+
+    chefs_by_pole = {}
+    for user_id, pole_id in Profile.objects.filter(role='chef_pole', pole__isnull=False).values_list('user_id', 'pole_id'):
+        chefs_by_pole.setdefault(pole_id, []).append(user_id)
+
+    rows = []
+    for projet_id, created_by_id, chef_projet_id, client_id, pole_id in Projet.objects.values_list(
+        'id', 'created_by_id', 'chef_projet_id', 'client_id', 'pole_id'
+    ).iterator(chunk_size=1000):
+        for user_id, reason in [(created_by_id, 'creator'), (chef_projet_id, 'chef_projet'), (client_id, 'client')]:
+            if user_id:
+                rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason=reason))
+        for user_id in chefs_by_pole.get(pole_id, []):
+            rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason='chef_pole'))
+
+    for projet_id, user_id in Projet.membres.through.objects.values_list('projet_id', 'user_id').iterator(chunk_size=1000):
+        rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason='membre'))
+
+    ProjetVisibility.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjetVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('creator', 'Créateur'), ('membre', 'Membre'), ('chef_projet', 'Chef de projet'), ('client', 'Client'), ('chef_pole', 'Chef de pôle')], max_length=20)),
+                ('projet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibilites', to='core.projet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projets_visibles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Visibilité projet',
+                'verbose_name_plural': 'Visibilités projets',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='projetvisibility',
+            constraint=models.UniqueConstraint(fields=('user', 'projet', 'reason'), name='core_projetvisibility_unique'),
+        ),
+        migrations.RunPython(backfill_visibility, migrations.RunPython.noop),
+    ]
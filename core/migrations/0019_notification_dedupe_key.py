@@ -0,0 +1,45 @@
+# Clé de déduplication des notifications + contrainte unique (user, dedupe_key)
+from django.db import migrations, models
+
+
+ONCE_TYPES = ['task_assigned', 'project_assigned']
+
+
+def backfill_dedupe_keys(apps, schema_editor):
+    """Renseigne la clé des notifications existantes (la plus ancienne garde la clé en cas de doublon)"""
+    Notification = apps.get_model('core', 'Notification')
+
+    seen = set()
+    to_update = []
+    rows = Notification.objects.order_by('id').values_list(
+        'id', 'user_id', 'type', 'tache_id', 'projet_id', 'created_at'
+    )
+    for pk, user_id, notification_type, tache_id, projet_id, created_at in rows.iterator(chunk_size=1000):
+        window = 'once' if notification_type in ONCE_TYPES else created_at.date().isoformat()
+        key = f"{notification_type}:t{tache_id or ''}:p{projet_id or ''}:{window}"
+        if (user_id, key) in seen:
+            continue
+        seen.add((user_id, key))
+        to_update.append(Notification(id=pk, dedupe_key=key))
+
+    Notification.objects.bulk_update(to_update, ['dedupe_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_projet_visibility'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_dedupe_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'dedupe_key'), name='core_notification_dedupe_unique'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Outbox transactionnelle de synchronisation Odoo + curseur durable
+from django.db import migrations, models
+
+
+def enqueue_unsynced(apps, schema_editor):
+    """Publie les entités jamais synchronisées (auparavant reprises par le polling des IDs NULL)"""
+    OdooOutbox = apps.get_model('core', 'OdooOutbox')
+    Profile = apps.get_model('core', 'Profile')
+    Projet = apps.get_model('core', 'Projet')
+    Tache = apps.get_model('core', 'Tache')
+
+    pending = [
+        ('partner', Profile.objects.filter(odoo_partner_id__isnull=True).values_list('user_id', flat=True)),
+        ('project', Projet.objects.filter(odoo_project_id__isnull=True).values_list('id', flat=True)),
+        ('task', Tache.objects.filter(odoo_task_id__isnull=True).values_list('id', flat=True)),
+    ]
+    for entity, ids in pending:
+        OdooOutbox.objects.bulk_create(
+            (OdooOutbox(entity=entity, entity_id=entity_id, operation='upsert') for entity_id in ids.iterator(chunk_size=1000)),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_notification_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdooOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('partner', 'Contact (utilisateur)'), ('project', 'Projet'), ('task', 'Tâche')], max_length=20)),
+                ('entity_id', models.BigIntegerField(help_text='ID local : utilisateur, projet ou tâche')),
+                ('operation', models.CharField(choices=[('upsert', 'Création / mise à jour'), ('delete', 'Suppression')], default='upsert', max_length=10)),
+                ('changed_fields', models.JSONField(blank=True, default=list)),
+                ('odoo_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Événement Odoo (outbox)',
+                'verbose_name_plural': 'Événements Odoo (outbox)',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OdooSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Curseur de synchronisation Odoo',
+                'verbose_name_plural': 'Curseurs de synchronisation Odoo',
+            },
+        ),
+        migrations.RunPython(enqueue_unsynced, migrations.RunPython.noop),
+    ]
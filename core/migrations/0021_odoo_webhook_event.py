@@ -0,0 +1,33 @@
+# Inbox des webhooks Odoo (traitement asynchrone par lots)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_odoo_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdooWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=128, unique=True)),
+                ('kind', models.CharField(choices=[('deadline', 'Notification de deadline'), ('task_assigned', 'Assignation de tâche')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('params', models.JSONField(blank=True, default=dict, help_text="Paramètres de l'URL (ex: ?type=)")),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('done', 'Traité'), ('failed', 'Échec')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Odoo (inbox)',
+                'verbose_name_plural': 'Webhooks Odoo (inbox)',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='core_webhook_status_id_idx')],
+            },
+        ),
+    ]
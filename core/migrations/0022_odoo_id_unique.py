@@ -0,0 +1,46 @@
+# Index uniques partiels sur les IDs Odoo (lookups des webhooks et de la synchronisation)
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def clear_duplicate_odoo_ids(apps, schema_editor):
+    """
+    Un même ID Odoo lié à plusieurs lignes : garde la plus ancienne, vide les autres
+
+    Les lignes vidées ne sont pas republiées dans l'outbox : leur external ID
+    peut désigner le même enregistrement Odoo. Elles restent visibles par
+    enqueue_odoo_sync (ID NULL) pour une reprise manuelle.
+    """
+    for model_name, field in (('Profile', 'odoo_partner_id'), ('Projet', 'odoo_project_id'), ('Tache', 'odoo_task_id')):
+        model = apps.get_model('core', model_name)
+        duplicates = (
+            model.objects.filter(**{f'{field}__isnull': False})
+            .values(field)
+            .annotate(count=Count('pk'), keep=Min('pk'))
+            .filter(count__gt=1)
+        )
+        for duplicate in duplicates:
+            model.objects.filter(**{field: duplicate[field]}).exclude(pk=duplicate['keep']).update(**{field: None})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_odoo_webhook_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_odoo_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='profile',
+            constraint=models.UniqueConstraint(condition=models.Q(('odoo_partner_id__isnull', False)), fields=('odoo_partner_id',), name='core_profile_odoo_partner_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='projet',
+            constraint=models.UniqueConstraint(condition=models.Q(('odoo_project_id__isnull', False)), fields=('odoo_project_id',), name='core_projet_odoo_project_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tache',
+            constraint=models.UniqueConstraint(condition=models.Q(('odoo_task_id__isnull', False)), fields=('odoo_task_id',), name='core_tache_odoo_task_uniq'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Compteur dénormalisé des notifications non lues
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    """Initialise les compteurs des utilisateurs ayant des notifications non lues"""
+    Notification = apps.get_model('core', 'Notification')
+    NotificationCounter = apps.get_model('core', 'NotificationCounter')
+
+    counts = (
+        Notification.objects.filter(is_read=False)
+        .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+    )
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(user_id=user_id, unread=count) for user_id, count in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_odoo_id_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Compteur de notifications',
+                'verbose_name_plural': 'Compteurs de notifications',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
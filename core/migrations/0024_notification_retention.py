@@ -0,0 +1,62 @@
+# Rétention des notifications : archive, index de purge, alertes de retard regroupées
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def collapse_overdue(apps, schema_editor):
+    """
+    Une seule notification de retard par (utilisateur, tâche)
+
+    La plus récente est conservée sous la clé '...:current' (voir
+    NotificationWriter.UPDATABLE_TYPES) ; les compteurs de non lues sont
+    corrigés par la réconciliation périodique.
+    """
+    Notification = apps.get_model('core', 'Notification')
+    overdue = Notification.objects.filter(type='deadline_overdue')
+
+    keep = set(overdue.values('user_id', 'tache_id').annotate(keep=Max('id')).values_list('keep', flat=True))
+    stale = [pk for pk in overdue.values_list('id', flat=True).iterator() if pk not in keep]
+    for start in range(0, len(stale), 1000):
+        Notification.objects.filter(id__in=stale[start:start + 1000]).delete()
+
+    keep = sorted(keep)
+    for start in range(0, len(keep), 1000):
+        rows = list(Notification.objects.filter(id__in=keep[start:start + 1000]))
+        for row in rows:
+            row.dedupe_key = f"deadline_overdue:t{row.tache_id or ''}:p{row.projet_id or ''}:current"
+        Notification.objects.bulk_update(rows, ['dedupe_key'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_notification_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text="ID de la notification d'origine", primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('type', models.CharField(max_length=30)),
+                ('titre', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('tache_id', models.BigIntegerField(blank=True, null=True)),
+                ('projet_id', models.BigIntegerField(blank=True, null=True)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notification archivée',
+                'verbose_name_plural': 'Notifications archivées',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='core_notif_created_idx'),
+        ),
+        migrations.RunPython(collapse_overdue, migrations.RunPython.noop),
+    ]
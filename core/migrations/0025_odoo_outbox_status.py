@@ -0,0 +1,47 @@
+# Statut par événement de l'outbox Odoo (essais, erreur, abandon)
+from django.db import migrations, models
+
+
+def mark_processed(apps, schema_editor):
+    """Les événements déjà passés par le curseur sont traités"""
+    OdooOutbox = apps.get_model('core', 'OdooOutbox')
+    OdooSyncCursor = apps.get_model('core', 'OdooSyncCursor')
+
+    cursor = OdooSyncCursor.objects.filter(name='odoo_outbox').first()
+    if cursor is not None:
+        OdooOutbox.objects.filter(id__lte=cursor.position).update(status='done', processed_at=cursor.updated_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='odoooutbox',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('done', 'Traité'), ('failed', 'Échec')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='odoooutbox',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='odoooutbox',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='odoooutbox',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='odoooutbox',
+            index=models.Index(fields=['status', 'id'], name='core_outbox_status_id_idx'),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Réclamation des lots de l'inbox des webhooks Odoo (statut 'processing')
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_odoo_outbox_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='odoowebhookevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('done', 'Traité'), ('failed', 'Échec')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='odoowebhookevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
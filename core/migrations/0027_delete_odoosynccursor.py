@@ -0,0 +1,15 @@
+# Suppression du curseur de l'outbox Odoo : remplacé par le statut par événement
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_odoo_webhook_claim'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='OdooSyncCursor',
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Les upserts Odoo envoient tous les champs synchronisés : la liste des champs modifiés n'est pas lue
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_delete_odoosynccursor'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='odoooutbox',
+            name='changed_fields',
+        ),
+    ]
@@ -1,11 +1,90 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, m2m_changed
 from django.dispatch import receiver
 
 User = get_user_model()
 
 
+class OdooSyncedModel(models.Model):
+    """
+    Modèle synchronisé vers Odoo via l'outbox (voir OdooOutbox)
+
+    save() écrit la ligne et l'événement d'outbox dans la même transaction :
+    une modification commitée est toujours publiée, une modification annulée
+    ne l'est jamais. Seules les modifications des champs `odoo_fields` sont
+    enregistrées (les écritures des IDs Odoo ne relancent pas de synchronisation).
+
+    Non couverts : QuerySet.update() et bulk_create/bulk_update
+    (voir la commande enqueue_odoo_sync).
+    """
+
+    odoo_entity = None
+    odoo_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._odoo_initial = instance._get_odoo_values()
+        return instance
+
+    def _get_odoo_values(self):
+        # Champs différés (only/defer) absents du __dict__ : ignorés
+        values = {}
+        for name in self.odoo_fields:
+            attname = self._meta.get_field(name).attname
+            if attname in self.__dict__:
+                values[name] = self.__dict__[attname]
+        return values
+
+    def get_odoo_entity_id(self):
+        """ID local de l'entité Odoo (l'ID de l'external ID)"""
+        return self.pk
+
+    def get_odoo_changes(self, update_fields=None):
+        """
+        Champs synchronisés modifiés depuis le chargement
+
+        Args:
+            update_fields: update_fields du save() (None = tous les champs)
+
+        Returns:
+            list: Noms des champs modifiés
+        """
+        fields = list(self.odoo_fields)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            fields = [
+                name for name in fields
+                if name in update_fields or self._meta.get_field(name).attname in update_fields
+            ]
+
+        initial = getattr(self, '_odoo_initial', None)
+        if initial is None:
+            # Création, ou instance construite hors de la base : tout publier
+            return fields
+
+        current = self._get_odoo_values()
+        return [name for name in fields if name not in initial or initial[name] != current.get(name)]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            # L'upsert envoie tous les champs : seul compte le fait qu'un champ synchronisé ait changé
+            if adding or self.get_odoo_changes(kwargs.get('update_fields')):
+                OdooOutbox.objects.create(
+                    entity=self.odoo_entity,
+                    entity_id=self.get_odoo_entity_id(),
+                    operation='upsert',
+                )
+        self._odoo_initial = self._get_odoo_values()
+
+
 class Pole(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -15,7 +94,7 @@ class Pole(models.Model):
         return self.name
 
 
-class Profile(models.Model):
+class Profile(OdooSyncedModel):
     ROLE_CHOICES = [
         ('super_admin', 'Super Administrateur'),
         ('admin', 'Administrateur'),
@@ -78,6 +157,22 @@ class Profile(models.Model):
     # Photo de profil
     photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
 
+    # Contact Odoo (res.partner) : nom et email viennent de l'utilisateur (voir record_user_odoo_changes)
+    odoo_entity = 'partner'
+    odoo_fields = ('phone',)
+
+    def get_odoo_entity_id(self):
+        return self.user_id
+
+    class Meta:
+        constraints = [
+            # Un partner Odoo par profil ; sert aussi d'index aux lookups partner -> utilisateur
+            models.UniqueConstraint(
+                fields=['odoo_partner_id'], condition=models.Q(odoo_partner_id__isnull=False),
+                name='core_profile_odoo_partner_uniq',
+            ),
+        ]
+
     def __str__(self):
         return self.user.get_full_name() or self.user.username
 
@@ -89,7 +184,29 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance, role='membre')
 
 
-class Projet(models.Model):
+class ProjetQuerySet(models.QuerySet):
+    def with_counts(self):
+        """
+        Annote nombre_taches et nombre_membres via des sous-requêtes COUNT
+
+        Évite 2 requêtes COUNT par projet dans ProjetListSerializer.
+        Des sous-requêtes (et non des JOIN + Count) pour ne pas multiplier
+        les lignes tâches x membres avant le GROUP BY.
+        """
+        taches = Tache.objects.filter(projet=models.OuterRef('pk')).order_by().values('projet').annotate(
+            n=models.Count('pk')
+        ).values('n')
+        membres = Projet.membres.through.objects.filter(projet=models.OuterRef('pk')).order_by().values('projet').annotate(
+            n=models.Count('pk')
+        ).values('n')
+
+        return self.annotate(
+            nombre_taches=Coalesce(models.Subquery(taches), 0),
+            nombre_membres=Coalesce(models.Subquery(membres), 0),
+        )
+
+
+class Projet(OdooSyncedModel):
     TYPE_CHOICES = [
         ('film', 'Film'),
         ('court_metrage', 'Court métrage'),
@@ -141,16 +258,31 @@ class Projet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjetQuerySet.as_manager()
+
+    odoo_entity = 'project'
+    odoo_fields = ('titre', 'description', 'client', 'date_debut', 'date_fin_prevue')
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Projet'
         verbose_name_plural = 'Projets'
+        indexes = [
+            # Pagination keyset (voir core/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='core_projet_created_id_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['odoo_project_id'], condition=models.Q(odoo_project_id__isnull=False),
+                name='core_projet_odoo_project_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.titre} ({self.get_type_display()})"
 
 
-class Tache(models.Model):
+class Tache(OdooSyncedModel):
     STATUT_CHOICES = [
         ('a_faire', 'À faire'),
         ('en_cours', 'En cours'),
@@ -181,10 +313,24 @@ class Tache(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    odoo_entity = 'task'
+    odoo_fields = ('titre', 'description', 'projet', 'deadline', 'priorite')
+
     class Meta:
         ordering = ['deadline', '-priorite']
         verbose_name = 'Tâche'
         verbose_name_plural = 'Tâches'
+        indexes = [
+            # Pagination keyset (voir core/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='core_tache_created_id_idx'),
+        ]
+        constraints = [
+            # Sert aussi d'index aux lookups des webhooks (odoo_task_id__in)
+            models.UniqueConstraint(
+                fields=['odoo_task_id'], condition=models.Q(odoo_task_id__isnull=False),
+                name='core_tache_odoo_task_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.titre} - {self.projet.titre}"
@@ -220,6 +366,10 @@ class Document(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Document'
         verbose_name_plural = 'Documents'
+        indexes = [
+            # Pagination keyset (voir core/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='core_docume_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.titre} - {self.projet.titre}"
@@ -236,6 +386,9 @@ class Notification(models.Model):
     - deadline_overdue: Tâche en retard
     - project_assigned: Nouveau projet assigné
     - task_assigned: Nouvelle tâche assignée
+
+    Déduplication : dedupe_key (voir core/services/notification_writer.py)
+    est unique par utilisateur, les doublons sont ignorés à l'insertion.
     """
 
     TYPE_CHOICES = [
@@ -262,6 +415,9 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
 
+    # Clé de déduplication : type, tâche, projet et fenêtre (jour ou unique)
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Notification'
@@ -269,6 +425,11 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['user', 'is_read']),
+            # Purge par date (NotificationRetentionService)
+            models.Index(fields=['created_at'], name='core_notif_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dedupe_key'], name='core_notification_dedupe_unique'),
         ]
 
     def __str__(self):
@@ -276,12 +437,204 @@ class Notification(models.Model):
         return f"{status} {self.user.username}: {self.titre}"
 
     def mark_as_read(self):
-        """Marquer la notification comme lue"""
+        """
+        Marquer la notification comme lue
+
+        UPDATE conditionnel (is_read=False) : le compteur n'est décrémenté
+        qu'une fois, même si la notification est lue en parallèle.
+        """
         from django.utils import timezone
         if not self.is_read:
+            # Import ici pour éviter les imports circulaires
+            from core.services.notification_counter_service import NotificationCounterService
+
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
+            with transaction.atomic():
+                updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+                    is_read=True, read_at=self.read_at
+                )
+                NotificationCounterService.add({self.user_id: -updated})
+
+
+class NotificationCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur (dénormalisé)
+
+    Maintenu par NotificationCounterService (création, lecture, suppression),
+    lu depuis le cache et réconcilié périodiquement avec la table des
+    notifications. Créé à la première lecture.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Compteur de notifications'
+        verbose_name_plural = 'Compteurs de notifications'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} non lue(s)"
+
+
+class NotificationArchive(models.Model):
+    """
+    Notifications purgées conservées hors de la table principale (optionnel)
+
+    Alimentée par NotificationRetentionService quand NOTIFICATION_ARCHIVE_ENABLED
+    est actif. Pas de clés étrangères : l'archive survit aux suppressions
+    d'utilisateurs, tâches et projets. Sur PostgreSQL, la table peut être
+    partitionnée par mois d'archivage (commande notification_partitions).
+    """
+
+    id = models.BigIntegerField(primary_key=True, help_text="ID de la notification d'origine")
+    user_id = models.IntegerField(db_index=True)
+    type = models.CharField(max_length=30)
+    titre = models.CharField(max_length=200)
+    message = models.TextField()
+    tache_id = models.BigIntegerField(null=True, blank=True)
+    projet_id = models.BigIntegerField(null=True, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Notification archivée'
+        verbose_name_plural = 'Notifications archivées'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.titre}"
+
+
+class ProjetVisibility(models.Model):
+    """
+    Index matérialisé (utilisateur, projet, raison) des personnes associées à un projet
+
+    Maintenu par les signaux ci-dessous (voir core/services/visibility_service.py).
+    Utilisé par les vérifications de permission à la place des requêtes
+    membres/chef/client/pôle faites projet par projet.
+    """
+
+    REASON_CHOICES = [
+        ('creator', 'Créateur'),
+        ('membre', 'Membre'),
+        ('chef_projet', 'Chef de projet'),
+        ('client', 'Client'),
+        ('chef_pole', 'Chef de pôle'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projets_visibles')
+    projet = models.ForeignKey(Projet, on_delete=models.CASCADE, related_name='visibilites')
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+
+    class Meta:
+        verbose_name = 'Visibilité projet'
+        verbose_name_plural = 'Visibilités projets'
+        constraints = [
+            # Sert aussi d'index (user_id, projet_id, reason) pour les lookups
+            models.UniqueConstraint(fields=['user', 'projet', 'reason'], name='core_projetvisibility_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} → {self.projet_id} ({self.reason})"
+
+
+class OdooOutbox(models.Model):
+    """
+    Outbox transactionnelle des modifications à synchroniser vers Odoo
+
+    Écrite dans la même transaction que la modification (voir OdooSyncedModel).
+    Vidée dans l'ordre des IDs par batch_sync_odoo_pending, qui regroupe
+    les événements d'une même entité en une seule écriture Odoo et marque
+    chaque événement traité (ou en échec après ODOO_OUTBOX_MAX_ATTEMPTS).
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('done', 'Traité'),
+        ('failed', 'Échec'),
+    ]
+
+    ENTITY_CHOICES = [
+        ('partner', 'Contact (utilisateur)'),
+        ('project', 'Projet'),
+        ('task', 'Tâche'),
+    ]
+
+    OPERATION_CHOICES = [
+        ('upsert', 'Création / mise à jour'),
+        ('delete', 'Suppression'),
+    ]
+
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    entity_id = models.BigIntegerField(help_text="ID local : utilisateur, projet ou tâche")
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES, default='upsert')
+    # Connu pour les suppressions : la ligne locale n'existe plus
+    odoo_id = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Événement Odoo (outbox)'
+        verbose_name_plural = 'Événements Odoo (outbox)'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='core_outbox_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.operation} {self.entity} {self.entity_id}"
+
+
+class OdooWebhookEvent(models.Model):
+    """
+    Inbox des webhooks reçus d'Odoo
+
+    Les endpoints vérifient le token, enregistrent l'événement brut et
+    répondent 202 immédiatement ; process_odoo_webhooks les traite par lots
+    (voir OdooWebhookService). L'ID d'événement unique ignore les rejeux.
+    Un lot réclamé passe en 'processing' ; s'il n'est pas terminé après
+    ODOO_WEBHOOK_CLAIM_TIMEOUT (worker interrompu), il est réclamé à nouveau.
+    """
+
+    KIND_CHOICES = [
+        ('deadline', 'Notification de deadline'),
+        ('task_assigned', 'Assignation de tâche'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('processing', 'En cours'),
+        ('done', 'Traité'),
+        ('failed', 'Échec'),
+    ]
+
+    event_id = models.CharField(max_length=128, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    params = models.JSONField(default=dict, blank=True, help_text="Paramètres de l'URL (ex: ?type=)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Webhook Odoo (inbox)'
+        verbose_name_plural = 'Webhooks Odoo (inbox)'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='core_webhook_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.status})"
 
 
 # Signal pour créer automatiquement un profil lors de la création d'un utilisateur
@@ -298,95 +651,119 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
 
 # Signal pour ajouter automatiquement les utilisateurs assignés à une tâche comme membres du projet
 @receiver(m2m_changed, sender=Tache.assigne_a.through)
-def auto_add_task_assignees_to_project(sender, instance, action, pk_set, **kwargs):
+def auto_add_task_assignees_to_project(sender, instance, action, reverse, pk_set, **kwargs):
     """
     Lorsqu'on assigne une personne à une tâche, si la personne n'était pas assignée au projet,
     elle le devient automatiquement.
+
+    Traitement ensembliste : un diff entre pk_set et les membres existants,
+    puis un seul membres.add (un seul signal de notification).
     """
-    if action == 'post_add' and pk_set:
-        # instance est la tâche
-        # pk_set contient les IDs des utilisateurs qui viennent d'être ajoutés
-        projet = instance.projet
+    if action != 'post_add' or not pk_set:
+        return
 
-        # Récupérer les utilisateurs assignés à la tâche
-        users_to_add = User.objects.filter(pk__in=pk_set)
+    membres_through = Projet.membres.through
+
+    if reverse:
+        # instance est l'utilisateur, pk_set contient les tâches
+        projet_ids = set(Tache.objects.filter(pk__in=pk_set).values_list('projet_id', flat=True))
+        existing = set(
+            membres_through.objects.filter(user_id=instance.pk, projet_id__in=projet_ids).values_list('projet_id', flat=True)
+        )
+        missing = projet_ids - existing
+        if missing:
+            instance.projets_membre.add(*missing)
+        return
 
-        # Ajouter chaque utilisateur au projet s'il n'est pas déjà membre
-        for user in users_to_add:
-            if not projet.membres.filter(pk=user.pk).exists():
-                projet.membres.add(user)
+    # instance est la tâche, pk_set contient les utilisateurs qui viennent d'être ajoutés
+    existing = set(
+        membres_through.objects.filter(projet_id=instance.projet_id, user_id__in=pk_set).values_list('user_id', flat=True)
+    )
+    missing = pk_set - existing
+    if missing:
+        instance.projet.membres.add(*missing)
 
 
 # ========================================
 # SIGNAUX POUR ODOO SYNC ET NOTIFICATIONS
 # ========================================
 
-@receiver(post_save, sender=Profile)
-def sync_profile_to_odoo(sender, instance, created, **kwargs):
+# Champs utilisateur repris dans le contact Odoo
+USER_ODOO_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+@receiver(post_save, sender=User)
+def record_user_odoo_changes(sender, instance, created, **kwargs):
     """
-    Synchronise automatiquement le profil vers Odoo quand il est modifié
+    Enregistre dans l'outbox les modifications du nom / email d'un utilisateur
 
-    Déclenché quand l'utilisateur édite son profil (nom, email, téléphone, etc.)
+    La création est publiée par le profil (OdooSyncedModel).
+    Les sauvegardes partielles sans champ synchronisé (ex: last_login) sont ignorées.
     """
-    # Ne pas sync lors de la création du profil (registration)
-    # Le batch sync s'en chargera plus tard
     if created:
         return
 
-    # Éviter les boucles infinies (si on sauvegarde odoo_partner_id)
     update_fields = kwargs.get('update_fields')
-    if update_fields and 'odoo_partner_id' in update_fields:
-        return
+    if update_fields is None or set(USER_ODOO_FIELDS) & set(update_fields):
+        OdooOutbox.objects.create(entity='partner', entity_id=instance.pk)
 
-    # Import ici pour éviter les imports circulaires
-    from core.tasks import sync_user_to_odoo
 
-    # Lancer la sync en async
-    # Si Celery n'est pas connecté, ne pas crasher l'opération
-    try:
-        sync_user_to_odoo.delay(instance.user.id)
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f"⚠️ Failed to queue Odoo sync for user {instance.user.id}: {e}")
+def _delay_on_commit(task, *args):
+    """
+    Enfile une tâche Celery après le commit de la transaction courante
+
+    Les workers ne voient ainsi jamais de lignes non commitées.
+    Si Celery n'est pas connecté, ne pas crasher l'opération.
+    """
+    def dispatch():
+        try:
+            task.delay(*args)
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.warning(f"⚠️ Failed to queue {task.name}: {e}")
+
+    transaction.on_commit(dispatch)
 
 
 @receiver(m2m_changed, sender=Tache.assigne_a.through)
-def notify_task_assignment(sender, instance, action, pk_set, **kwargs):
+def notify_task_assignment(sender, instance, action, reverse, pk_set, **kwargs):
     """
     Crée une notification quand un utilisateur est assigné à une tâche
+
+    Une seule tâche Celery par modification m2m, avec tous les couples (tâche, utilisateur)
     """
     if action == 'post_add' and pk_set:
         # Import ici pour éviter les imports circulaires
-        from core.tasks import create_task_assigned_notification
-        import logging
-        logger = logging.getLogger(__name__)
+        from core.tasks import create_task_assigned_notifications
 
-        # Créer une notification pour chaque utilisateur assigné
-        for user_id in pk_set:
-            try:
-                create_task_assigned_notification.delay(instance.id, user_id)
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to queue task assignment notification: {e}")
+        # reverse : instance est l'utilisateur, pk_set contient des tâches
+        if reverse:
+            pairs = [(tache_id, instance.pk) for tache_id in sorted(pk_set)]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in sorted(pk_set)]
+
+        _delay_on_commit(create_task_assigned_notifications, pairs)
 
 
 @receiver(m2m_changed, sender=Projet.membres.through)
-def notify_project_assignment(sender, instance, action, pk_set, **kwargs):
+def notify_project_assignment(sender, instance, action, reverse, pk_set, **kwargs):
     """
     Crée une notification quand un utilisateur est ajouté à un projet
+
+    Une seule tâche Celery par modification m2m, avec tous les couples (projet, utilisateur)
     """
     if action == 'post_add' and pk_set:
         # Import ici pour éviter les imports circulaires
-        from core.tasks import create_project_assigned_notification
-        import logging
-        logger = logging.getLogger(__name__)
+        from core.tasks import create_project_assigned_notifications
 
-        # Créer une notification pour chaque membre ajouté
-        for user_id in pk_set:
-            try:
-                create_project_assigned_notification.delay(instance.id, user_id)
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to queue project assignment notification: {e}")
+        # reverse : instance est l'utilisateur, pk_set contient des projets
+        if reverse:
+            pairs = [(projet_id, instance.pk) for projet_id in sorted(pk_set)]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in sorted(pk_set)]
+
+        _delay_on_commit(create_project_assigned_notifications, pairs)
 
 
 @receiver(post_save, sender=Projet)
@@ -395,11 +772,8 @@ def notify_chef_projet_assignment(sender, instance, created, **kwargs):
     Crée une notification quand un chef de projet est assigné à un projet
 
     Déclenché quand le champ chef_projet est modifié
-    Note: Utilise une vérification dans la tâche Celery pour éviter les doublons (24h)
+    Note: La tâche Celery déduplique la notification (NotificationWriter)
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
     # Seulement si un chef de projet est défini
     if instance.chef_projet:
         # Vérifier si update_fields est spécifié et ne contient pas chef_projet
@@ -410,10 +784,7 @@ def notify_chef_projet_assignment(sender, instance, created, **kwargs):
         # Import ici pour éviter les imports circulaires
         from core.tasks import create_project_leader_notification
 
-        try:
-            create_project_leader_notification.delay(instance.id, instance.chef_projet.id)
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to queue chef projet notification: {e}")
+        _delay_on_commit(create_project_leader_notification, instance.id, instance.chef_projet_id)
 
 
 @receiver(pre_delete, sender=User)
@@ -422,35 +793,201 @@ def delete_user_from_odoo(sender, instance, **kwargs):
     Supprime automatiquement le contact Odoo quand un utilisateur est supprimé
 
     Déclenché AVANT qu'un admin supprime un utilisateur de l'app
-    Utilise pre_delete pour avoir accès au profil avant sa suppression en cascade
+    Utilise pre_delete pour avoir accès au profil avant sa suppression en cascade.
+    L'événement d'outbox est écrit dans la transaction de la suppression.
     """
-    import logging
-    logger = logging.getLogger(__name__)
+    # Lecture en base : le profil en cache sur l'instance peut être périmé
+    odoo_partner_ids = list(Profile.objects.filter(user=instance).values_list('odoo_partner_id', flat=True))
+    if not odoo_partner_ids:
+        # L'utilisateur n'avait pas de profil
+        return
 
-    # Vérifier si l'utilisateur a un profil avec un ID Odoo
-    try:
-        profile = instance.profile
-        if profile and profile.odoo_partner_id:
-            odoo_partner_id = profile.odoo_partner_id
+    # odoo_id inconnu : le contact est retrouvé par son external ID
+    OdooOutbox.objects.create(
+        entity='partner', entity_id=instance.pk, operation='delete', odoo_id=odoo_partner_ids[0]
+    )
 
-            # Import ici pour éviter les imports circulaires
-            from core.tasks import delete_user_from_odoo_task
-            from django.conf import settings
-
-            # Essayer d'abord en async via Celery
-            try:
-                delete_user_from_odoo_task.delay(odoo_partner_id)
-                logger.info(f"🗑️ Queued Odoo deletion for partner ID {odoo_partner_id}")
-            except Exception as celery_error:
-                # Si Celery n'est pas disponible, essayer en synchrone
-                logger.warning(f"⚠️ Celery unavailable, attempting sync deletion: {celery_error}")
-                if settings.ODOO_ENABLED:
-                    try:
-                        from core.odoo_gateway import odoo_gateway
-                        odoo_gateway.delete_partner(odoo_partner_id)
-                        logger.info(f"✅ Deleted Odoo partner {odoo_partner_id} (sync)")
-                    except Exception as sync_error:
-                        logger.error(f"❌ Failed to delete from Odoo: {sync_error}")
-    except Profile.DoesNotExist:
-        # L'utilisateur n'avait pas de profil
-        logger.debug(f"User {instance.username} has no profile, skipping Odoo deletion")
+
+# ========================================
+# SIGNAUX POUR L'INDEX DE VISIBILITÉ DES PROJETS
+# ========================================
+
+@receiver(post_save, sender=Projet)
+def sync_projet_visibility(sender, instance, **kwargs):
+    """
+    Met à jour les lignes créateur / chef de projet / client / chef de pôle du projet
+    """
+    # Import ici pour éviter les imports circulaires
+    from core.services.visibility_service import VisibilityService
+    VisibilityService.sync_projet(instance)
+
+
+@receiver(m2m_changed, sender=Projet.membres.through)
+def sync_membres_visibility(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Met à jour les lignes 'membre' quand les membres d'un projet changent
+
+    Gère les deux sens de la relation : projet.membres.add(...) et
+    user.projets_membre.add(...)
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    from core.services.visibility_service import VisibilityService
+
+    if action == 'post_clear':
+        if reverse:
+            VisibilityService.remove_membres(user_ids=[instance.pk])
+        else:
+            VisibilityService.remove_membres(projet_ids=[instance.pk])
+        return
+
+    if not pk_set:
+        return
+
+    if reverse:
+        pairs = [(projet_id, instance.pk) for projet_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+
+    if action == 'post_add':
+        VisibilityService.add_membres(pairs)
+    elif reverse:
+        VisibilityService.remove_membres(projet_ids=pk_set, user_ids=[instance.pk])
+    else:
+        VisibilityService.remove_membres(projet_ids=[instance.pk], user_ids=pk_set)
+
+
+@receiver(post_save, sender=Profile)
+def sync_profile_pole_visibility(sender, instance, **kwargs):
+    """
+    Met à jour les lignes 'chef_pole' quand le rôle ou le pôle d'un profil change
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'role', 'pole'} & set(update_fields):
+        return
+
+    from core.services.visibility_service import VisibilityService
+    VisibilityService.sync_user_pole(instance)
+
+
+@receiver(pre_delete, sender=Pole)
+def remove_pole_visibility(sender, instance, **kwargs):
+    """
+    Supprime les lignes 'chef_pole' d'un pôle supprimé
+
+    Les FK vers le pôle passent à NULL sans déclencher post_save
+    """
+    from core.services.visibility_service import VisibilityService
+    VisibilityService.remove_pole(instance.pk)
+
+
+# ========================================
+# INVALIDATION DU CACHE DES PROJETS
+# ========================================
+
+def _invalidate_projet_cache(projet_ids):
+    """Invalide le cache de détail des projets après le commit de la transaction"""
+    projet_ids = {projet_id for projet_id in projet_ids if projet_id}
+    if not projet_ids:
+        return
+
+    # Import ici pour éviter les imports circulaires
+    from core.services.projet_cache_service import ProjetCacheService
+    transaction.on_commit(lambda: ProjetCacheService.invalidate(projet_ids))
+
+
+def _invalidate_shared_projet_cache():
+    """Invalide le cache de tous les projets (données imbriquées partagées)"""
+    from core.services.projet_cache_service import ProjetCacheService
+    transaction.on_commit(ProjetCacheService.invalidate_shared)
+
+
+@receiver(post_init, sender=Tache)
+@receiver(post_init, sender=Document)
+def remember_initial_projet(sender, instance, **kwargs):
+    """
+    Mémorise le projet d'origine pour invalider aussi l'ancien projet en cas de déplacement
+
+    __dict__ : ne pas déclencher le chargement d'un champ différé
+    """
+    instance._initial_projet_id = instance.__dict__.get('projet_id')
+
+
+@receiver(post_save, sender=Projet)
+@receiver(post_delete, sender=Projet)
+def invalidate_projet_cache(sender, instance, **kwargs):
+    _invalidate_projet_cache([instance.pk])
+
+
+@receiver(post_save, sender=Tache)
+@receiver(post_delete, sender=Tache)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_projet_cache_for_child(sender, instance, **kwargs):
+    _invalidate_projet_cache([instance.projet_id, getattr(instance, '_initial_projet_id', None)])
+    instance._initial_projet_id = instance.projet_id
+
+
+@receiver(m2m_changed, sender=Projet.membres.through)
+def invalidate_projet_cache_for_membres(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalide les projets dont les membres changent (dans les deux sens de la relation)"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _invalidate_projet_cache([instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        _invalidate_projet_cache(pk_set)
+    elif action == 'pre_clear':
+        _invalidate_projet_cache(instance.projets_membre.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Tache.assigne_a.through)
+def invalidate_projet_cache_for_assignees(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalide les projets dont les assignations de tâches changent"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _invalidate_projet_cache([instance.projet_id])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        _invalidate_projet_cache(Tache.objects.filter(pk__in=pk_set).values_list('projet_id', flat=True))
+    elif action == 'pre_clear':
+        _invalidate_projet_cache(instance.taches_assignees.values_list('projet_id', flat=True))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=Pole)
+@receiver(post_delete, sender=Pole)
+def invalidate_shared_projet_cache(sender, instance, **kwargs):
+    """Profils et pôles sont imbriqués dans le détail de tous les projets"""
+    _invalidate_shared_projet_cache()
+
+
+# ========================================
+# CORRESPONDANCE PARTNER ODOO <-> UTILISATEUR
+# ========================================
+
+@receiver(post_init, sender=Profile)
+def remember_initial_partner(sender, instance, **kwargs):
+    """Mémorise le partner d'origine pour oublier l'ancienne correspondance"""
+    instance._initial_partner_id = instance.__dict__.get('odoo_partner_id')
+
+
+@receiver(post_save, sender=Profile)
+def refresh_partner_map(sender, instance, **kwargs):
+    """Met à jour la correspondance partner <-> utilisateur après le commit"""
+    if 'odoo_partner_id' not in instance.__dict__:
+        return
+
+    # Import ici pour éviter les imports circulaires
+    from core.services.partner_map_service import PartnerMapService
+    user_id, partner_id = instance.user_id, instance.odoo_partner_id
+    stale = [instance._initial_partner_id]
+    transaction.on_commit(lambda: PartnerMapService.refresh({user_id: partner_id}, stale))
+    instance._initial_partner_id = partner_id
+
+
+@receiver(post_delete, sender=Profile)
+def forget_partner_map(sender, instance, **kwargs):
+    from core.services.partner_map_service import PartnerMapService
+    user_id, partner_id = instance.user_id, instance.__dict__.get('odoo_partner_id')
+    transaction.on_commit(lambda: PartnerMapService.forget(user_id, partner_id))
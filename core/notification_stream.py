@@ -0,0 +1,272 @@
+"""
+Diffusion en temps réel des notifications (Server-Sent Events)
+
+Les nouvelles notifications et les changements du nombre de non lues sont
+publiés sur un canal par utilisateur ('notifications:user:<id>') ; la vue
+SSE (core/views/notification_stream.py) s'y abonne et les pousse au
+navigateur, qui n'a plus besoin de polling.
+
+Deux brokers :
+- Redis pub/sub si REDIS_URL est configuré : partagé par les workers Celery
+  (qui écrivent la plupart des notifications) et tous les processus web.
+  Chaque processus web garde une seule connexion pub/sub (RedisListener),
+  qui distribue les messages aux flux ouverts
+- en mémoire sinon (développement) : seuls les événements publiés dans le
+  processus qui sert le flux sont reçus
+
+Les publications sont best-effort : une erreur est loguée, jamais propagée
+à l'écriture des notifications.
+
+Usage:
+    from core.notification_stream import notification_stream
+
+    if notification_stream.listening([user_id]):
+        notification_stream.publish(user_id, 'unread_count', {'count': 3})
+
+    subscription = await notification_stream.subscribe(user_id)
+    message = await subscription.get(timeout=25)  # None si rien dans le délai
+    await subscription.close()
+"""
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'notifications:user:'
+
+
+def channel_name(user_id):
+    return f'{CHANNEL_PREFIX}{user_id}'
+
+
+class MemorySubscription:
+    """Abonnement en mémoire : une file asyncio alimentée par MemoryBroker.publish"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._remove(self)
+
+
+class MemoryBroker:
+    """Broker par processus (sans Redis)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def listening(self, channels):
+        with self._lock:
+            return {channel for channel in channels if self._subscriptions.get(channel)}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            # publish() est appelé depuis des threads synchrones (vues, tâches)
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # Boucle fermée sans close() : abonnement abandonné
+                self._remove(subscription)
+        return len(subscriptions)
+
+    async def subscribe(self, channel):
+        subscription = MemorySubscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+class RedisSubscription:
+    """Abonnement d'un flux : une file asyncio alimentée par RedisListener"""
+
+    def __init__(self, listener, channel):
+        self.listener = listener
+        self.channel = channel
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        await self.listener.remove(self)
+
+
+class RedisListener:
+    """
+    Connexion pub/sub partagée par tous les flux d'une boucle asyncio
+
+    Un canal est abonné au premier flux ouvert d'un utilisateur et désabonné
+    au dernier ; une tâche de lecture distribue les messages aux files des
+    flux, comme MemoryBroker. Une seule connexion Redis par processus, quel
+    que soit le nombre d'onglets ouverts.
+    """
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+        self.subscriptions = defaultdict(set)
+        self.lock = asyncio.Lock()
+        self.reader = None
+
+    async def subscribe(self, channel):
+        subscription = RedisSubscription(self, channel)
+        async with self.lock:
+            if channel not in self.subscriptions:
+                await self.pubsub.subscribe(channel)
+            self.subscriptions[channel].add(subscription)
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.ensure_future(self.read())
+        return subscription
+
+    async def remove(self, subscription):
+        async with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.channel]
+                await self.pubsub.unsubscribe(subscription.channel)
+
+    async def read(self):
+        """Distribue les messages tant qu'au moins un flux est ouvert"""
+        while self.subscriptions:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py se reconnecte et réabonne les canaux à l'appel suivant
+                logger.warning(f"⚠️ Notification stream connection lost: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+
+            channel = message['channel']
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            data = json.loads(message['data'])
+            for subscription in list(self.subscriptions.get(channel, ())):
+                subscription.queue.put_nowait(data)
+
+
+class RedisBroker:
+    """Broker Redis pub/sub, partagé par tous les processus"""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        # Une connexion pub/sub par boucle asyncio (une par processus ASGI)
+        self._listeners = weakref.WeakKeyDictionary()
+
+    def listening(self, channels):
+        channels = list(channels)
+        if not channels:
+            return set()
+        return {
+            channel.decode() if isinstance(channel, bytes) else channel
+            for channel, count in self.client.pubsub_numsub(*channels) if count
+        }
+
+    def publish(self, channel, message):
+        return self.client.publish(channel, json.dumps(message))
+
+    def listener(self):
+        """Connexion pub/sub partagée de la boucle asyncio courante"""
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._listeners:
+                self._listeners[loop] = RedisListener(redis.asyncio.Redis.from_url(self.url).pubsub())
+            return self._listeners[loop]
+
+    async def subscribe(self, channel):
+        return await self.listener().subscribe(channel)
+
+
+class NotificationStream:
+    """Canaux de notifications par utilisateur, sur le broker configuré"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._brokers = {}
+
+    @property
+    def broker(self):
+        """Broker Redis si REDIS_URL est configuré, sinon en mémoire"""
+        url = settings.REDIS_URL
+        key = url if url.startswith(('redis://', 'rediss://')) else 'memory'
+        with self._lock:
+            if key not in self._brokers:
+                self._brokers[key] = MemoryBroker() if key == 'memory' else RedisBroker(url)
+            return self._brokers[key]
+
+    def listening(self, user_ids):
+        """
+        Utilisateurs ayant au moins un flux ouvert
+
+        Évite de préparer des événements que personne ne reçoit.
+
+        Returns:
+            set: IDs des utilisateurs abonnés
+        """
+        try:
+            channels = self.broker.listening(channel_name(user_id) for user_id in user_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Notification stream unavailable: {e}")
+            return set()
+        return {int(channel[len(CHANNEL_PREFIX):]) for channel in channels}
+
+    def publish(self, user_id, event, data):
+        """
+        Publie un événement sur le canal d'un utilisateur
+
+        Args:
+            user_id: Destinataire
+            event: Nom de l'événement SSE ('notification', 'unread_count')
+            data: Contenu JSON-sérialisable
+        """
+        try:
+            self.broker.publish(channel_name(user_id), {'event': event, 'data': data})
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish {event} for user {user_id}: {e}")
+
+    async def subscribe(self, user_id):
+        """Ouvre un abonnement au canal d'un utilisateur (à fermer avec close())"""
+        return await self.broker.subscribe(channel_name(user_id))
+
+
+# Instance globale
+notification_stream = NotificationStream()
@@ -0,0 +1,341 @@
+"""
+Serveur Odoo factice (JSON-RPC) pour les tests et benchmarks de synchronisation
+
+Serveur HTTP en mémoire, dans un thread du processus, qui répond aux appels
+odoorpc utilisés par OdooGateway :
+- /web/webclient/version_info, /jsonrpc (login, context_get, execute_kw),
+  /web/session/get_session_info (health check du pool)
+- res.partner, project.project, project.task, res.users, ir.model.data :
+  create, write, unlink, read, search_read, load
+
+Latence configurable par requête et 429 Too Many Requests injectables
+(taux aléatoire ou nombre fixe de réponses).
+
+Usage:
+    from core.odoo_fake import FakeOdooServer
+
+    with FakeOdooServer(latency=0.005, error_rate=0.01) as server:
+        with override_settings(**server.settings()):
+            ...
+        print(server.rpc_count, server.latency_percentiles())
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SERVER_VERSION = '17.0'
+FAKE_UID = 2
+SUPPORTED_METHODS = {'create', 'write', 'unlink', 'read', 'search_read', 'load', 'context_get'}
+
+
+class FakeOdooError(Exception):
+    """Erreur métier renvoyée au client comme une erreur RPC Odoo"""
+    pass
+
+
+class FakeOdooDatabase:
+    """Enregistrements Odoo en mémoire : {modèle: {id: vals}}"""
+
+    def __init__(self):
+        self.records = {}
+        self.xmlids = {}  # (module, name) -> (model, res_id)
+        self._next_id = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, model, vals):
+        record_id = self._next_id.get(model, 1)
+        self._next_id[model] = record_id + 1
+        self.records.setdefault(model, {})[record_id] = dict(vals)
+        if model == 'ir.model.data':
+            self.xmlids[(vals['module'], vals['name'])] = (vals['model'], vals['res_id'])
+        return record_id
+
+    def _ids(self, model, ids):
+        return [record_id for record_id in ids if record_id in self.records.get(model, {})]
+
+    @staticmethod
+    def _matches(vals, domain):
+        for field, operator, value in domain:
+            current = vals.get(field)
+            if operator == '=' and current != value:
+                return False
+            if operator == 'in' and current not in value:
+                return False
+        return True
+
+    def call(self, model, method, args, kwargs):
+        """Exécute model.method(*args, **kwargs) comme execute_kw"""
+        if method not in SUPPORTED_METHODS:
+            raise FakeOdooError(f"Method {model}.{method} is not supported by the fake Odoo server")
+        with self._lock:
+            return getattr(self, f'_{method}')(model, *args, **kwargs)
+
+    def _create(self, model, vals):
+        if isinstance(vals, list):
+            return [self._insert(model, v) for v in vals]
+        return self._insert(model, vals)
+
+    def _write(self, model, ids, vals):
+        for record_id in self._ids(model, ids):
+            self.records[model][record_id].update(vals)
+        return True
+
+    def _unlink(self, model, ids):
+        for record_id in self._ids(model, ids):
+            del self.records[model][record_id]
+        return True
+
+    def _read(self, model, ids, fields=None):
+        if isinstance(ids, int):
+            ids = [ids]
+        return [
+            {'id': record_id, **{f: self.records[model][record_id].get(f, False) for f in (fields or [])}}
+            for record_id in self._ids(model, ids)
+        ]
+
+    def _search_read(self, model, domain, fields=None):
+        return [
+            {'id': record_id, **{f: vals.get(f, False) for f in (fields or [])}}
+            for record_id, vals in self.records.get(model, {}).items()
+            if self._matches(vals, domain)
+        ]
+
+    def _load(self, model, fields, data):
+        """Import par external ID : crée ou met à jour chaque ligne (tout ou rien)"""
+        rows = []
+        for index, row in enumerate(data):
+            vals = {}
+            xmlid = None
+            for field, value in zip(fields, row):
+                if field == 'id':
+                    xmlid = value
+                elif field.endswith('/.id'):
+                    vals[field[:-len('/.id')]] = int(value) if value else False
+                else:
+                    vals[field] = value if value != '' else False
+            if not vals.get('name'):
+                return {'ids': False, 'messages': [
+                    {'type': 'error', 'record': index, 'message': "Missing required value for the field 'name'"}
+                ]}
+            rows.append((xmlid, vals))
+
+        ids = []
+        for xmlid, vals in rows:
+            module, name = xmlid.split('.', 1)
+            existing = self.xmlids.get((module, name))
+            if existing and existing[1] in self.records.get(model, {}):
+                record_id = existing[1]
+                self.records[model][record_id].update(vals)
+            else:
+                record_id = self._insert(model, vals)
+                self._insert('ir.model.data', {'module': module, 'name': name, 'model': model, 'res_id': record_id})
+            ids.append(record_id)
+        return {'ids': ids, 'messages': []}
+
+    def _context_get(self, model):
+        return {'lang': 'fr_FR', 'tz': 'Europe/Paris', 'uid': FAKE_UID}
+
+
+class FakeOdooServer:
+    """
+    Serveur JSON-RPC Odoo factice dans un thread du processus
+
+    Args:
+        latency: Latence ajoutée à chaque requête (secondes)
+        jitter: Variation aléatoire de la latence (+/- secondes)
+        error_rate: Probabilité qu'une requête execute_kw reçoive un 429
+        seed: Graine du générateur aléatoire (benchmarks reproductibles)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.db = FakeOdooDatabase()
+        self.calls = Counter()  # (model, method) -> nombre d'appels
+        self.durations = []  # durée de traitement de chaque requête execute_kw
+        self.errors_429 = 0
+        self._forced_429 = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    # ========================================
+    # CYCLE DE VIE
+    # ========================================
+
+    def start(self):
+        """Démarre le serveur sur un port libre de 127.0.0.1"""
+        server = self
+
+        class Handler(FakeOdooRequestHandler):
+            fake = server
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def settings(self):
+        """Réglages ODOO_* pointant vers ce serveur (pour override_settings)"""
+        return {
+            'ODOO_ENABLED': True,
+            'ODOO_HOST': '127.0.0.1',
+            'ODOO_PORT': self.port,
+            'ODOO_PROTOCOL': 'jsonrpc',
+            'ODOO_DB': 'fake',
+            'ODOO_USERNAME': 'admin',
+            'ODOO_PASSWORD': 'admin',
+        }
+
+    # ========================================
+    # INJECTION D'ERREURS ET MÉTRIQUES
+    # ========================================
+
+    def inject_429(self, count=1):
+        """Les `count` prochaines requêtes execute_kw reçoivent un 429"""
+        with self._lock:
+            self._forced_429 += count
+
+    def _should_throttle(self):
+        with self._lock:
+            if self._forced_429:
+                self._forced_429 -= 1
+            elif not (self.error_rate and self._random.random() < self.error_rate):
+                return False
+            self.errors_429 += 1
+            return True
+
+    def _sleep(self):
+        if self.latency or self.jitter:
+            with self._lock:
+                delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(0.0, delay))
+
+    def record(self, model, method, duration):
+        with self._lock:
+            self.calls[(model, method)] += 1
+            self.durations.append(duration)
+
+    @property
+    def rpc_count(self):
+        return sum(self.calls.values())
+
+    def reset_metrics(self):
+        with self._lock:
+            self.calls.clear()
+            self.durations.clear()
+            self.errors_429 = 0
+
+    def latency_percentiles(self, percentiles=(50, 95, 99)):
+        """Percentiles de durée des requêtes execute_kw (secondes)"""
+        with self._lock:
+            durations = sorted(self.durations)
+        return {p: percentile(durations, p) for p in percentiles}
+
+    # ========================================
+    # RPC
+    # ========================================
+
+    def dispatch(self, path, params):
+        """
+        Traite une requête JSON-RPC
+
+        Returns:
+            tuple: (statut HTTP, résultat) ; statut 429 si la requête est limitée
+        """
+        if path == '/web/webclient/version_info':
+            return 200, {'server_version': SERVER_VERSION, 'server_version_info': [17, 0, 0, 'final', 0, '']}
+
+        if path == '/web/session/get_session_info':
+            return 200, {'uid': FAKE_UID, 'db': 'fake'}
+
+        if path != '/jsonrpc':
+            raise FakeOdooError(f"Unsupported path {path}")
+
+        service, method, args = params['service'], params['method'], params.get('args', [])
+        if service == 'common' and method == 'login':
+            return 200, FAKE_UID if all(args) else False
+
+        if service == 'object' and method == 'execute':
+            return 200, self.db.call(args[3], args[4], args[5:], {})
+
+        if service == 'object' and method == 'execute_kw':
+            model, model_method, call_args, call_kwargs = args[3], args[4], args[5], args[6]
+            if self._should_throttle():
+                return 429, None
+
+            start = time.perf_counter()
+            self._sleep()
+            result = self.db.call(model, model_method, call_args, call_kwargs)
+            self.record(model, model_method, time.perf_counter() - start)
+            return 200, result
+
+        raise FakeOdooError(f"Unsupported call {service}.{method}")
+
+
+class FakeOdooRequestHandler(BaseHTTPRequestHandler):
+    """Handler HTTP : décode la requête JSON-RPC et délègue au FakeOdooServer"""
+
+    fake = None
+
+    def log_message(self, format, *args):
+        # Silencieux : les benchmarks envoient des milliers de requêtes
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        body = {'jsonrpc': '2.0', 'id': payload.get('id')}
+        try:
+            status, result = self.fake.dispatch(self.path, payload.get('params', {}))
+            body['result'] = result
+        except Exception as e:
+            status = 200
+            body['error'] = {
+                'code': 200,
+                'message': 'Odoo Server Error',
+                'data': {'name': type(e).__name__, 'message': str(e), 'debug': ''},
+            }
+
+        if status == 429:
+            self.send_response(429, 'Too Many Requests')
+            self.send_header('Retry-After', '1')
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def percentile(values, p):
+    """Percentile p (0-100) d'une liste triée, par rang le plus proche (0 si vide)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
@@ -2,11 +2,13 @@
 Odoo Gateway - Couche d'abstraction pour toutes les interactions avec Odoo
 
 Ce module gère:
-- Connexion singleton à Odoo
-- Rate limiting automatique (max 10 req/sec)
-- Cache Redis pour les lectures
+- Pool de sessions Odoo authentifiées (thread-safe, sûr après fork)
+- Reconnexion automatique (session expirée, réseau)
+- Rate limiting distribué (token bucket partagé par tous les workers)
+- Miroir en cache des lectures (get_many, single-flight, stale-while-revalidate)
 - Retries avec backoff exponentiel
-- Détection et gestion des 429 Too Many Requests
+- Détection et gestion des 429 Too Many Requests (sans bloquer les workers)
+- Upserts batch (load + external IDs) pour les contacts, projets et tâches
 
 Usage:
     from core.odoo_gateway import odoo_gateway
@@ -16,12 +18,26 @@ Usage:
 
     # Récupérer un projet (avec cache)
     project = odoo_gateway.get_project(odoo_project_id)
+
+    # Récupérer plusieurs contacts (un seul read pour les absents du cache)
+    partners = odoo_gateway.get_partners(odoo_partner_ids)  # {partner_id: partner}
+
+    # Créer ou mettre à jour des contacts en batch
+    partner_ids = odoo_gateway.upsert_partners(users_data)  # {user_id: partner_id}
 """
+import os
+import queue
+import threading
 import time
 import logging
-from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 from django.conf import settings
 
+from .odoo_mirror import partner_mirror, project_mirror, task_mirror, user_mirror
+from .odoo_rate_limit import odoo_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,139 +47,331 @@ class OdooNotConfiguredError(Exception):
 
 
 class OdooRateLimitError(Exception):
-    """Exception levée quand Odoo renvoie un 429 Too Many Requests"""
+    """
+    Exception levée quand le budget d'appels Odoo est épuisé (ou qu'Odoo renvoie un 429)
+
+    retry_after : secondes à attendre avant de réessayer (countdown Celery)
+    """
+
+    def __init__(self, message, retry_after=60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OdooConnectionError(Exception):
+    """Exception levée quand la connexion à Odoo échoue (réessayée automatiquement plus tard)"""
+    pass
+
+
+class OdooPoolTimeoutError(Exception):
+    """Exception levée quand aucune session Odoo ne se libère à temps"""
     pass
 
 
+class OdooLoadError(Exception):
+    """Exception levée quand Odoo rejette toutes les lignes d'un import batch (load)"""
+    pass
+
+
+# Odoo indisponible ou limité (réseau, HTTP, pool, 429) : l'opération est à
+# rejouer plus tard, sans compter d'essai contre l'événement concerné
+TRANSIENT_ERRORS = (
+    OdooNotConfiguredError, OdooRateLimitError, OdooConnectionError, OdooPoolTimeoutError, OSError,
+)
+
+
+# Module des external IDs (ir.model.data) des enregistrements créés par Genius Harmony
+# Ex: 'genius_harmony.user_12' -> res.partner, 'genius_harmony.projet_3' -> project.project
+EXTERNAL_ID_MODULE = 'genius_harmony'
+
+
+def is_session_error(error):
+    """
+    Indique si une erreur rend la session inutilisable (à fermer et recréer)
+
+    Les erreurs métier Odoo (RPCError : droits, validation...) laissent la
+    session valide, sauf l'expiration de session. Toute autre erreur
+    (réseau, HTTP, timeout) invalide la session.
+    """
+    try:
+        from odoorpc.error import RPCError
+    except ImportError:
+        return True
+
+    if isinstance(error, RPCError):
+        message = str(error).lower()
+        return 'session' in message and 'expired' in message
+    return True
+
+
+class OdooSessionPool:
+    """
+    Pool de sessions Odoo authentifiées
+
+    - Au plus `size` sessions par processus, partagées entre threads
+    - Sessions inactives depuis plus de `health_check_interval` secondes
+      revérifiées avant réutilisation (remplacées si mortes)
+    - Après un fork (workers Celery prefork), les sessions héritées du
+      processus parent sont abandonnées et recréées dans l'enfant
+
+    Usage:
+        pool = OdooSessionPool(factory=login, size=4)
+        with pool.session() as odoo:
+            odoo.execute_kw('res.partner', 'read', [[1]])
+    """
+
+    def __init__(self, factory, size=4, timeout=30, health_check_interval=60, health_check=None):
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._health_check = health_check or self._default_health_check
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _check_pid(self):
+        # Processus enfant : ne jamais partager les sockets du parent
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    logger.info(f"🔁 Odoo pool reset after fork (pid {os.getpid()})")
+                    self._reset()
+
+    @staticmethod
+    def _default_health_check(odoo):
+        """Session valide si Odoo renvoie encore un utilisateur connecté"""
+        info = odoo.json('/web/session/get_session_info', {})
+        return bool(info.get('result', {}).get('uid'))
+
+    def _is_healthy(self, odoo):
+        try:
+            return self._health_check(odoo)
+        except Exception as e:
+            logger.warning(f"⚠️ Odoo session health check failed: {e}")
+            return False
+
+    @staticmethod
+    def _close(odoo):
+        try:
+            odoo.logout()
+        except Exception:
+            pass
+
+    def _checkout(self, idle):
+        """Retourne une session saine (réutilisée ou nouvelle)"""
+        while True:
+            try:
+                odoo, last_used = idle.get_nowait()
+            except queue.Empty:
+                return self._factory()
+
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(odoo):
+                return odoo
+            self._close(odoo)
+
+    @contextmanager
+    def session(self):
+        """
+        Emprunte une session pour la durée du bloc
+
+        Raises:
+            OdooPoolTimeoutError: si toutes les sessions restent occupées
+        """
+        self._check_pid()
+        # Références locales : un reset concurrent ne doit pas mélanger les pools
+        idle, slots, pid = self._idle, self._slots, self._pid
+
+        if not slots.acquire(timeout=self.timeout):
+            raise OdooPoolTimeoutError(f"No Odoo session available after {self.timeout}s (pool size {self.size})")
+
+        try:
+            odoo = self._checkout(idle)
+            try:
+                yield odoo
+            except Exception as e:
+                if is_session_error(e):
+                    logger.warning(f"⚠️ Discarding Odoo session: {e}")
+                    self._close(odoo)
+                else:
+                    idle.put((odoo, time.monotonic()))
+                raise
+            else:
+                if pid == os.getpid():
+                    idle.put((odoo, time.monotonic()))
+        finally:
+            slots.release()
+
+    def close_all(self):
+        """Ferme toutes les sessions inactives"""
+        while True:
+            try:
+                odoo, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(odoo)
+
+
 class OdooGateway:
     """
     Gateway centralisé pour toutes les interactions avec Odoo
 
     Features:
-    - Connexion singleton (une seule connexion réutilisée)
-    - Rate limiting automatique (100ms entre chaque appel)
+    - Pool de sessions (ODOO_POOL_SIZE), utilisable depuis plusieurs threads
+    - Reconnexion automatique, avec un délai (ODOO_RECONNECT_COOLDOWN) après un échec
+    - Rate limiting distribué : budget global + par modèle (voir core/odoo_rate_limit.py)
     - Cache Redis intégré (TTL configurables)
     - Retries automatiques avec backoff exponentiel
-    - Gestion des erreurs 429 Too Many Requests
+    - Gestion des erreurs 429 Too Many Requests : OdooRateLimitError(retry_after)
     """
 
     _instance = None
-    _odoo = None
-    _last_call_time = 0
-    _min_call_interval = 0.1  # 100ms entre chaque appel = max 10 req/sec
-    _connection_attempted = False
-    _connection_failed = False
+    _rate_limit_penalty = 60  # pause globale après un 429 d'Odoo (secondes)
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._pool = None
+            cls._instance._pool_lock = threading.Lock()
+            cls._instance._last_failure = None
         return cls._instance
 
     def __init__(self):
         # Ne pas se connecter automatiquement lors de l'import
-        # La connexion sera établie lors du premier appel à _ensure_connected()
+        # Les sessions sont ouvertes à la demande par le pool
         pass
 
-    def _connect(self):
-        """Établit la connexion à Odoo via XML-RPC"""
-        if self._connection_attempted:
-            if self._connection_failed:
-                raise OdooNotConfiguredError("Odoo connection failed previously")
-            return
-
-        self._connection_attempted = True
-
+    def _check_configured(self):
+        """Vérifie la configuration (réévaluée à chaque appel : pas de verrou permanent)"""
         if not settings.ODOO_ENABLED:
-            self._connection_failed = True
             raise OdooNotConfiguredError("Odoo is not enabled. Set ODOO_ENABLED=True in settings.")
 
         if not all([settings.ODOO_HOST, settings.ODOO_DB, settings.ODOO_USERNAME, settings.ODOO_PASSWORD]):
-            self._connection_failed = True
             raise OdooNotConfiguredError("Missing Odoo configuration. Check ODOO_* settings.")
 
+    def _login(self):
+        """Ouvre une nouvelle session Odoo authentifiée (factory du pool)"""
+        cooldown = settings.ODOO_RECONNECT_COOLDOWN
+        if self._last_failure is not None and time.monotonic() - self._last_failure < cooldown:
+            raise OdooConnectionError(f"Odoo connection failed less than {cooldown}s ago")
+
         try:
             import odoorpc
 
-            self._odoo = odoorpc.ODOO(
+            odoo = odoorpc.ODOO(
                 settings.ODOO_HOST,
                 port=settings.ODOO_PORT,
                 protocol=settings.ODOO_PROTOCOL
             )
-            self._odoo.login(
+            odoo.login(
                 settings.ODOO_DB,
                 settings.ODOO_USERNAME,
                 settings.ODOO_PASSWORD
             )
-            logger.info(f"✅ Connected to Odoo: {settings.ODOO_HOST} (DB: {settings.ODOO_DB})")
-            self._connection_failed = False
         except Exception as e:
+            self._last_failure = time.monotonic()
             logger.error(f"❌ Odoo connection failed: {e}")
-            self._connection_failed = True
-            raise OdooNotConfiguredError(f"Failed to connect to Odoo: {e}")
-
-    def _ensure_connected(self):
-        """Vérifie que la connexion Odoo est active"""
-        if not settings.ODOO_ENABLED:
-            raise OdooNotConfiguredError("Odoo integration is disabled")
-        if not self._odoo:
-            self._connect()
-
-    def _throttle(self):
-        """
-        Rate limiting : max 10 req/sec
-        Attend si nécessaire pour respecter le délai minimal entre appels
+            raise OdooConnectionError(f"Failed to connect to Odoo: {e}")
+
+        self._last_failure = None
+        logger.info(f"✅ Connected to Odoo: {settings.ODOO_HOST} (DB: {settings.ODOO_DB}, pid {os.getpid()})")
+        return odoo
+
+    @property
+    def pool(self):
+        """Pool de sessions (créé au premier appel)"""
+        self._check_configured()
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = OdooSessionPool(
+                        factory=self._login,
+                        size=settings.ODOO_POOL_SIZE,
+                        timeout=settings.ODOO_POOL_TIMEOUT,
+                        health_check_interval=settings.ODOO_HEALTH_CHECK_INTERVAL,
+                    )
+        return self._pool
+
+    def reset_pool(self):
+        """Ferme les sessions du pool ; le suivant est créé avec la configuration courante"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close_all()
+            self._pool = None
+            self._last_failure = None
+
+    def _throttle(self, model):
         """
-        current_time = time.time()
-        elapsed = current_time - self._last_call_time
+        Rate limiting distribué : consomme un jeton pour ce modèle
 
-        if elapsed < self._min_call_interval:
-            sleep_time = self._min_call_interval - elapsed
-            time.sleep(sleep_time)
+        Les attentes courtes (<= ODOO_RATE_LIMIT_MAX_WAIT) sont absorbées sur place,
+        les autres remontent à l'appelant pour qu'il se replanifie.
 
-        self._last_call_time = time.time()
-
-    def _call_with_retry(self, method, *args, **kwargs):
+        Raises:
+            OdooRateLimitError: budget épuisé (retry_after = délai avant le prochain jeton)
+        """
+        while True:
+            wait = odoo_rate_limiter.acquire(model)
+            if not wait:
+                return
+            if wait > settings.ODOO_RATE_LIMIT_MAX_WAIT:
+                raise OdooRateLimitError(f"Odoo call budget exhausted for {model}", retry_after=wait)
+            time.sleep(wait)
+
+    def _execute(self, model, method, *args, **kwargs):
+        """Exécute model.method(*args, **kwargs) sur une session du pool"""
+        with self.pool.session() as odoo:
+            return odoo.execute_kw(model, method, list(args), kwargs)
+
+    def _call_with_retry(self, model, method, *args, **kwargs):
         """
         Appel Odoo avec retry automatique
 
         Features:
-        - Max 3 tentatives
+        - Max 3 tentatives, chacune sur une session du pool
+          (une session morte est fermée : la tentative suivante se reconnecte)
         - Backoff exponentiel: 1s, 2s, 4s
-        - Détecte 429 Too Many Requests et attend plus longtemps
+        - 429 Too Many Requests : pause globale de tous les workers et
+          OdooRateLimitError immédiate (aucune attente dans le worker)
         - Logs toutes les erreurs
 
         Args:
-            method: callable - Méthode Odoo à appeler
+            model: str - Modèle Odoo (ex: 'res.partner')
+            method: str - Méthode du modèle (ex: 'create')
             *args, **kwargs: Arguments de la méthode
 
         Returns:
             Résultat de l'appel Odoo
 
         Raises:
-            OdooRateLimitError: Si rate limit atteint après tous les retries
+            OdooRateLimitError: Budget épuisé ou 429 d'Odoo (voir retry_after)
             Exception: Pour les autres erreurs après 3 tentatives
         """
         max_retries = 3
 
         for attempt in range(max_retries):
             try:
-                self._throttle()  # Rate limiting
-                result = method(*args, **kwargs)
-                return result
+                self._throttle(model)  # Rate limiting distribué
+                return self._execute(model, method, *args, **kwargs)
+
+            except (OdooNotConfiguredError, OdooPoolTimeoutError, OdooRateLimitError):
+                raise
 
             except Exception as e:
                 error_msg = str(e).lower()
 
                 # Détecte rate limiting Odoo (429 ou "too many requests")
                 if '429' in error_msg or 'too many' in error_msg or 'rate limit' in error_msg:
-                    wait_time = (2 ** attempt) * 60  # 1min, 2min, 4min
-                    logger.warning(f"⚠️ Odoo rate limit hit, retry {attempt+1}/{max_retries} in {wait_time}s")
-
-                    if attempt < max_retries - 1:
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        raise OdooRateLimitError(f"Odoo rate limit exceeded after {max_retries} attempts")
+                    # Pause partagée : les autres workers arrêtent aussi d'appeler Odoo
+                    odoo_rate_limiter.penalize(self._rate_limit_penalty)
+                    logger.warning(f"⚠️ Odoo rate limit hit, pausing Odoo calls for {self._rate_limit_penalty}s")
+                    raise OdooRateLimitError(
+                        f"Odoo rate limit hit on {model}.{method}", retry_after=self._rate_limit_penalty
+                    )
 
                 # Autres erreurs (network, timeout, etc.)
                 if attempt < max_retries - 1:
@@ -176,24 +384,135 @@ class OdooGateway:
                     logger.error(f"❌ Odoo call failed after {max_retries} attempts: {e}")
                     raise
 
+    def map_concurrent(self, func, items):
+        """
+        Applique func à chaque élément en parallèle (un thread par session du pool)
+
+        Args:
+            func: callable - utilise les méthodes du gateway (ex: self.get_partner)
+            items: iterable d'arguments
+
+        Returns:
+            list: Résultats dans l'ordre des éléments
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.pool.size, len(items))) as executor:
+            return list(executor.map(func, items))
+
     # ========================================
-    # PARTNERS (Contacts Odoo)
+    # BATCH UPSERTS (external IDs)
     # ========================================
 
-    def create_partner(self, user_data):
+    def get_external_ids(self, model, names):
         """
-        Crée un contact dans Odoo
+        Résout des external IDs Genius Harmony en IDs Odoo (un appel)
 
         Args:
-            user_data: dict avec 'id', 'username', 'first_name', 'last_name', 'email', 'phone'
+            model: str - Modèle Odoo (ex: 'res.partner')
+            names: Noms sans le module (ex: ['user_12', 'user_13'])
 
         Returns:
-            int: Odoo partner ID
+            dict: {name: Odoo ID} pour les external IDs existants
+        """
+        names = list(names)
+        if not names:
+            return {}
+
+        records = self._call_with_retry(
+            'ir.model.data', 'search_read',
+            [('module', '=', EXTERNAL_ID_MODULE), ('model', '=', model), ('name', 'in', names)],
+            fields=['name', 'res_id'],
+        )
+        return {record['name']: record['res_id'] for record in records}
+
+    def _register_external_ids(self, model, names, known_ids):
+        """
+        Rattache les enregistrements déjà connus (créés sans external ID) à leur
+        external ID, pour que load() les mette à jour au lieu de les dupliquer
+        """
+        existing = self.get_external_ids(model, [names[local_id] for local_id in known_ids])
+        missing = [
+            {'module': EXTERNAL_ID_MODULE, 'model': model, 'name': names[local_id], 'res_id': odoo_id}
+            for local_id, odoo_id in known_ids.items()
+            if names[local_id] not in existing
+        ]
+        if missing:
+            self._call_with_retry('ir.model.data', 'create', missing)
+            logger.info(f"🔗 Registered {len(missing)} external IDs on {model}")
+
+    def _load(self, model, fields, data):
+        """
+        Import batch via load() : crée ou met à jour chaque ligne selon son external ID
+
+        load() est transactionnel : une ligne invalide annule tout le lot.
+        Les lignes rejetées sont écartées et le reste du lot est réimporté.
+
+        Returns:
+            list: Lignes importées
         """
-        self._ensure_connected()
-        Partner = self._odoo.env['res.partner']
+        while data:
+            result = self._call_with_retry(model, 'load', fields, data)
+            if result.get('ids'):
+                return data
+
+            errors = [m for m in result.get('messages', []) if m.get('type') == 'error']
+            failed = {m['record'] for m in errors if m.get('record') is not None}
+            if not failed:
+                raise OdooLoadError(f"Odoo rejected {model} batch: {errors}")
+
+            for index in sorted(failed):
+                logger.error(f"❌ Odoo rejected {data[index][0]}: {[m['message'] for m in errors if m.get('record') == index]}")
+            data = [row for index, row in enumerate(data) if index not in failed]
+        return data
+
+    def _upsert(self, model, prefix, fields, rows, known_ids):
+        """
+        Crée ou met à jour des enregistrements par lots de ODOO_BATCH_SIZE
+
+        Par lot : un load() puis un search_read des external IDs pour associer
+        chaque ligne à son ID Odoo (indépendamment de l'ordre de la réponse).
+
+        Args:
+            model: str - Modèle Odoo
+            prefix: Préfixe des external IDs ('user' -> 'genius_harmony.user_<id>')
+            fields: Colonnes de load() (hors 'id')
+            rows: {local_id: [valeurs des colonnes]}
+            known_ids: {local_id: ID Odoo} déjà enregistrés côté Django
+
+        Returns:
+            dict: {local_id: ID Odoo}
+        """
+        names = {local_id: f"{prefix}_{local_id}" for local_id in rows}
+        local_by_name = {name: local_id for local_id, name in names.items()}
+        local_ids = list(rows)
+        batch_size = settings.ODOO_BATCH_SIZE
+        odoo_ids = {}
+
+        for start in range(0, len(local_ids), batch_size):
+            batch = local_ids[start:start + batch_size]
+            batch_known = {local_id: known_ids[local_id] for local_id in batch if local_id in known_ids}
+            if batch_known:
+                self._register_external_ids(model, names, batch_known)
+
+            data = [[f"{EXTERNAL_ID_MODULE}.{names[local_id]}"] + rows[local_id] for local_id in batch]
+            imported = self._load(model, ['id'] + fields, data)
+
+            imported_names = [row[0].split('.', 1)[1] for row in imported]
+            for name, odoo_id in self.get_external_ids(model, imported_names).items():
+                odoo_ids[local_by_name[name]] = odoo_id
+
+        return odoo_ids
+
+    # ========================================
+    # PARTNERS (Contacts Odoo)
+    # ========================================
 
-        # Construire le nom complet (fallback sur username si pas de prénom/nom)
+    @staticmethod
+    def _partner_vals(user_data):
+        """Champs res.partner d'un utilisateur (fallback sur username si pas de prénom/nom)"""
         first_name = user_data.get('first_name', '').strip()
         last_name = user_data.get('last_name', '').strip()
 
@@ -202,15 +521,27 @@ class OdooGateway:
         else:
             name = user_data.get('username', 'Unknown User')
 
-        vals = {
+        return {
             'name': name,
             'email': user_data.get('email', ''),
             'phone': user_data.get('phone', ''),
             'comment': f"Genius Harmony User ID: {user_data.get('id')} | Username: {user_data.get('username')}",
         }
 
-        partner_id = self._call_with_retry(Partner.create, vals)
-        logger.info(f"✅ Created Odoo partner {partner_id} for user {user_data.get('id')} ({name})")
+    def create_partner(self, user_data):
+        """
+        Crée un contact dans Odoo
+
+        Args:
+            user_data: dict avec 'id', 'username', 'first_name', 'last_name', 'email', 'phone'
+
+        Returns:
+            int: Odoo partner ID
+        """
+        vals = self._partner_vals(user_data)
+
+        partner_id = self._call_with_retry('res.partner', 'create', vals)
+        logger.info(f"✅ Created Odoo partner {partner_id} for user {user_data.get('id')} ({vals['name']})")
         return partner_id
 
     def update_partner(self, odoo_partner_id, user_data):
@@ -221,29 +552,42 @@ class OdooGateway:
             odoo_partner_id: int - ID Odoo du partner
             user_data: dict avec les nouvelles données
         """
-        self._ensure_connected()
-        Partner = self._odoo.env['res.partner']
+        vals = self._partner_vals(user_data)
+        del vals['comment']
 
-        # Construire le nom complet
-        first_name = user_data.get('first_name', '').strip()
-        last_name = user_data.get('last_name', '').strip()
+        self._call_with_retry('res.partner', 'write', [odoo_partner_id], vals)
+        logger.info(f"✅ Updated Odoo partner {odoo_partner_id}")
 
-        if first_name or last_name:
-            name = f"{first_name} {last_name}".strip()
-        else:
-            name = user_data.get('username', 'Unknown User')
+        # Invalider le cache
+        partner_mirror.invalidate([odoo_partner_id])
 
-        vals = {
-            'name': name,
-            'email': user_data.get('email', ''),
-            'phone': user_data.get('phone', ''),
-        }
+    def upsert_partners(self, users_data):
+        """
+        Crée ou met à jour plusieurs contacts (BATCH)
+        Optimisation : 2 appels API par lot de ODOO_BATCH_SIZE au lieu de N
 
-        self._call_with_retry(Partner.write, [odoo_partner_id], vals)
-        logger.info(f"✅ Updated Odoo partner {odoo_partner_id}")
+        Chaque contact est identifié par son external ID 'genius_harmony.user_<id>' :
+        rejouer un lot (retry, workers concurrents) ne crée jamais de doublon.
 
-        # Invalider le cache
-        cache.delete(f"odoo:partner:{odoo_partner_id}")
+        Args:
+            users_data: list of dict (voir create_partner), avec 'odoo_partner_id' si déjà connu
+
+        Returns:
+            dict: {user_id: Odoo partner ID} pour les contacts importés
+        """
+        fields = ['name', 'email', 'phone', 'comment']
+        rows = {}
+        known_ids = {}
+        for user_data in users_data:
+            vals = self._partner_vals(user_data)
+            rows[user_data['id']] = [vals[field] or '' for field in fields]
+            if user_data.get('odoo_partner_id'):
+                known_ids[user_data['id']] = user_data['odoo_partner_id']
+
+        partner_ids = self._upsert('res.partner', 'user', fields, rows, known_ids)
+        partner_mirror.invalidate(partner_ids.values())
+        logger.info(f"✅ Batch upserted {len(partner_ids)} Odoo partners")
+        return partner_ids
 
     def delete_partner(self, odoo_partner_id):
         """
@@ -252,67 +596,58 @@ class OdooGateway:
         Args:
             odoo_partner_id: int - ID Odoo du partner à supprimer
         """
-        self._ensure_connected()
-        Partner = self._odoo.env['res.partner']
-
         # Supprimer le partner dans Odoo
-        self._call_with_retry(Partner.unlink, [odoo_partner_id])
+        self._call_with_retry('res.partner', 'unlink', [odoo_partner_id])
         logger.info(f"✅ Deleted Odoo partner {odoo_partner_id}")
 
         # Invalider le cache
-        cache.delete(f"odoo:partner:{odoo_partner_id}")
+        partner_mirror.invalidate([odoo_partner_id])
 
-    def get_partner(self, odoo_partner_id, use_cache=True):
+    def delete_partners(self, odoo_partner_ids):
         """
-        Récupère un contact Odoo (avec cache Redis 5 min)
+        Supprime plusieurs contacts Odoo (un appel)
 
         Args:
-            odoo_partner_id: int
-            use_cache: bool - utiliser le cache Redis (default: True)
-
-        Returns:
-            dict: Partner data {'id', 'name', 'email', 'phone', 'comment'}
+            odoo_partner_ids: list - IDs Odoo des partners à supprimer
         """
-        cache_key = f"odoo:partner:{odoo_partner_id}"
-
-        if use_cache:
-            cached = cache.get(cache_key)
-            if cached:
-                logger.debug(f"📦 Cache hit: {cache_key}")
-                return cached
-
-        self._ensure_connected()
-        Partner = self._odoo.env['res.partner']
+        odoo_partner_ids = list(odoo_partner_ids)
+        if not odoo_partner_ids:
+            return
 
-        partner = self._call_with_retry(
-            Partner.read,
-            [odoo_partner_id],
-            ['name', 'email', 'phone', 'comment']
-        )[0]
+        self._call_with_retry('res.partner', 'unlink', odoo_partner_ids)
+        logger.info(f"✅ Deleted {len(odoo_partner_ids)} Odoo partners")
 
-        if use_cache:
-            cache.set(cache_key, partner, timeout=300)  # 5 minutes
-            logger.debug(f"💾 Cached: {cache_key}")
+        partner_mirror.invalidate(odoo_partner_ids)
 
-        return partner
+    def get_partner(self, odoo_partner_id, use_cache=True):
+        """
+        Récupère un contact Odoo (miroir en cache, voir core/odoo_mirror.py)
 
-    # ========================================
-    # PROJECTS (Projets Odoo)
-    # ========================================
+        Args:
+            odoo_partner_id: int
+            use_cache: bool - False pour relire Odoo (le miroir est mis à jour)
 
-    def create_project(self, projet_data):
+        Returns:
+            dict: Partner data {'id', 'name', 'email', 'phone', 'comment'} ou None
         """
-        Crée un projet dans Odoo
+        return partner_mirror.get(odoo_partner_id, refresh=not use_cache)
 
-        Args:
-            projet_data: dict avec 'id', 'titre', 'description', 'client_odoo_id', 'date_debut', 'date_fin_prevue'
+    def get_partners(self, odoo_partner_ids):
+        """
+        Récupère plusieurs contacts Odoo (un seul read pour les absents du cache)
 
         Returns:
-            int: Odoo project ID
+            dict: {partner_id: partner data}
         """
-        self._ensure_connected()
-        Project = self._odoo.env['project.project']
+        return partner_mirror.get_many(odoo_partner_ids)
+
+    # ========================================
+    # PROJECTS (Projets Odoo)
+    # ========================================
 
+    @staticmethod
+    def _project_vals(projet_data):
+        """Champs project.project d'un projet (dates optionnelles)"""
         vals = {
             'name': projet_data['titre'],
             'description': projet_data.get('description', ''),
@@ -324,49 +659,77 @@ class OdooGateway:
             vals['date_start'] = str(projet_data['date_debut'])
         if projet_data.get('date_fin_prevue'):
             vals['date'] = str(projet_data['date_fin_prevue'])
+        return vals
 
-        project_id = self._call_with_retry(Project.create, vals)
+    def create_project(self, projet_data):
+        """
+        Crée un projet dans Odoo
+
+        Args:
+            projet_data: dict avec 'id', 'titre', 'description', 'client_odoo_id', 'date_debut', 'date_fin_prevue'
+
+        Returns:
+            int: Odoo project ID
+        """
+        vals = self._project_vals(projet_data)
+
+        project_id = self._call_with_retry('project.project', 'create', vals)
         logger.info(f"✅ Created Odoo project {project_id} for projet {projet_data.get('id')} ({projet_data['titre']})")
         return project_id
 
     def update_project(self, odoo_project_id, projet_data):
         """Met à jour un projet Odoo existant"""
-        self._ensure_connected()
-        Project = self._odoo.env['project.project']
-
         vals = {
             'name': projet_data['titre'],
             'description': projet_data.get('description', ''),
         }
 
-        self._call_with_retry(Project.write, [odoo_project_id], vals)
+        self._call_with_retry('project.project', 'write', [odoo_project_id], vals)
         logger.info(f"✅ Updated Odoo project {odoo_project_id}")
 
         # Invalider le cache
-        cache.delete(f"odoo:project:{odoo_project_id}")
+        project_mirror.invalidate([odoo_project_id])
 
-    def get_project(self, odoo_project_id, use_cache=True):
-        """Récupère un projet Odoo (avec cache 5 min)"""
-        cache_key = f"odoo:project:{odoo_project_id}"
+    def upsert_projects(self, projets_data):
+        """
+        Crée ou met à jour plusieurs projets (BATCH)
+        Optimisation : 2 appels API par lot de ODOO_BATCH_SIZE au lieu de N
+
+        Chaque projet est identifié par son external ID 'genius_harmony.projet_<id>'.
 
-        if use_cache:
-            cached = cache.get(cache_key)
-            if cached:
-                return cached
+        Args:
+            projets_data: list of dict (voir create_project), avec 'odoo_project_id' si déjà connu
 
-        self._ensure_connected()
-        Project = self._odoo.env['project.project']
+        Returns:
+            dict: {projet_id: Odoo project ID} pour les projets importés
+        """
+        fields = ['name', 'description', 'partner_id/.id', 'date_start', 'date']
+        rows = {}
+        known_ids = {}
+        for projet_data in projets_data:
+            vals = self._project_vals(projet_data)
+            vals['partner_id/.id'] = vals.pop('partner_id')
+            rows[projet_data['id']] = [str(vals.get(field) or '') for field in fields]
+            if projet_data.get('odoo_project_id'):
+                known_ids[projet_data['id']] = projet_data['odoo_project_id']
+
+        project_ids = self._upsert('project.project', 'projet', fields, rows, known_ids)
+        project_mirror.invalidate(project_ids.values())
+        logger.info(f"✅ Batch upserted {len(project_ids)} Odoo projects")
+        return project_ids
 
-        project = self._call_with_retry(
-            Project.read,
-            [odoo_project_id],
-            ['name', 'description', 'date_start', 'date', 'partner_id']
-        )[0]
+    def get_project(self, odoo_project_id, use_cache=True):
+        """Récupère un projet Odoo (miroir en cache), None s'il n'existe pas"""
+        return project_mirror.get(odoo_project_id, refresh=not use_cache)
 
-        if use_cache:
-            cache.set(cache_key, project, timeout=300)
+    def get_projects(self, odoo_project_ids):
+        """
+        Récupère plusieurs projets Odoo (un seul read pour les absents du cache)
 
-        return project
+        Returns:
+            dict: {project_id: project data}
+        """
+        return project_mirror.get_many(odoo_project_ids)
 
     # ========================================
     # TASKS (Tâches Odoo)
@@ -382,9 +745,6 @@ class OdooGateway:
         Returns:
             int: Odoo task ID
         """
-        self._ensure_connected()
-        Task = self._odoo.env['project.task']
-
         vals = {
             'name': tache_data['titre'],
             'description': tache_data.get('description', ''),
@@ -395,41 +755,71 @@ class OdooGateway:
         if tache_data.get('deadline'):
             vals['date_deadline'] = str(tache_data['deadline'])
 
-        task_id = self._call_with_retry(Task.create, vals)
+        task_id = self._call_with_retry('project.task', 'create', vals)
         logger.info(f"✅ Created Odoo task {task_id} for tache {tache_data.get('id')}")
         return task_id
 
-    def batch_create_tasks(self, taches_data_list):
+    def upsert_tasks(self, taches_data):
+        """
+        Crée ou met à jour plusieurs tâches (BATCH)
+        Optimisation : 2 appels API par lot de ODOO_BATCH_SIZE au lieu de N
+
+        Chaque tâche est identifiée par son external ID 'genius_harmony.tache_<id>'.
+
+        Args:
+            taches_data: list of dict (voir create_task), avec 'odoo_task_id' si déjà connu
+
+        Returns:
+            dict: {tache_id: Odoo task ID} pour les tâches importées
+        """
+        fields = ['name', 'description', 'project_id/.id', 'priority', 'date_deadline']
+        rows = {}
+        known_ids = {}
+        for t in taches_data:
+            rows[t['id']] = [
+                t['titre'],
+                t.get('description', '') or '',
+                str(t.get('projet_odoo_id') or ''),
+                self._map_priorite(t.get('priorite', 'normale')),
+                str(t.get('deadline') or ''),
+            ]
+            if t.get('odoo_task_id'):
+                known_ids[t['id']] = t['odoo_task_id']
+
+        task_ids = self._upsert('project.task', 'tache', fields, rows, known_ids)
+        task_mirror.invalidate(task_ids.values())
+        logger.info(f"✅ Batch upserted {len(task_ids)} Odoo tasks")
+        return task_ids
+
+    def get_task_partners(self, odoo_task_id):
         """
-        Crée plusieurs tâches en une seule requête (BATCH)
-        Optimisation : 1 appel API au lieu de N
+        Partners Odoo concernés par une tâche (utilisé par les webhooks)
 
         Args:
-            taches_data_list: list of dict
+            odoo_task_id: int - ID Odoo de la tâche
 
         Returns:
-            list: Odoo task IDs
-        """
-        if not taches_data_list:
-            return []
-
-        self._ensure_connected()
-        Task = self._odoo.env['project.task']
-
-        vals_list = [
-            {
-                'name': t['titre'],
-                'description': t.get('description', ''),
-                'project_id': t.get('projet_odoo_id'),
-                'date_deadline': str(t.get('deadline', '')),
-                'priority': self._map_priorite(t.get('priorite', 'normale')),
-            }
-            for t in taches_data_list
-        ]
+            tuple: (partner IDs des personnes assignées, partner ID du chef de projet ou None)
+        """
+        task = task_mirror.get(odoo_task_id)
+        if not task:
+            return [], None
+
+        manager_user_id = None
+        if task['project_id']:
+            project = project_mirror.get(task['project_id'][0])
+            manager_user_id = project['user_id'][0] if project and project['user_id'] else None
+
+        # Un seul read (absents du miroir) pour les partners des assignés et du chef de projet
+        user_ids = list(task['user_ids']) + ([manager_user_id] if manager_user_id else [])
+        partner_by_user = {
+            user_id: user['partner_id'][0]
+            for user_id, user in user_mirror.get_many(user_ids).items()
+            if user['partner_id']
+        }
 
-        task_ids = self._call_with_retry(Task.create, vals_list)
-        logger.info(f"✅ Batch created {len(task_ids)} Odoo tasks")
-        return task_ids
+        partner_ids = [partner_by_user[user_id] for user_id in task['user_ids'] if user_id in partner_by_user]
+        return partner_ids, partner_by_user.get(manager_user_id)
 
     def _map_priorite(self, priorite):
         """Map Genius priorité vers Odoo priority"""
@@ -0,0 +1,236 @@
+"""
+Miroir en cache des enregistrements Odoo (lecture à travers le cache)
+
+Chaque modèle Odoo lu par l'application a son miroir : les enregistrements
+sont stockés dans le cache Django (Redis en production), partagés par tous
+les workers et processus web.
+
+- get_many() : un aller-retour cache pour tous les IDs, puis un seul
+  `read` Odoo pour les IDs absents
+- Single-flight : un verrou par enregistrement (cache.add) ; un seul worker
+  interroge Odoo, les autres attendent son résultat (ODOO_MIRROR_LOCK_WAIT)
+- Stale-while-revalidate : après ODOO_MIRROR_TTL, l'enregistrement est encore
+  servi pendant ODOO_MIRROR_STALE_TTL et rafraîchi en arrière-plan
+- Métriques partagées (hits, stale, misses, refreshes, errors) : stats()
+
+Les écritures du gateway (upserts, suppressions) invalident les entrées
+concernées.
+
+Usage:
+    from core.odoo_mirror import partner_mirror
+
+    partners = partner_mirror.get_many([12, 13])  # {odoo_id: record}
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'odoo:mirror'
+METRICS = ('hits', 'stale', 'misses', 'refreshes', 'errors')
+LOCK_POLL_INTERVAL = 0.05
+
+# Rafraîchissements en arrière-plan (stale-while-revalidate)
+revalidation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='odoo-mirror')
+
+
+class OdooMirrorCache:
+    """
+    Miroir en cache d'un modèle Odoo
+
+    Args:
+        model: Modèle Odoo (ex: 'res.partner')
+        fields: Champs lus et mis en cache
+        ttl: Durée de fraîcheur en secondes (défaut: ODOO_MIRROR_TTL)
+    """
+
+    def __init__(self, model, fields, ttl=None):
+        self.model = model
+        self.fields = list(fields)
+        self._ttl = ttl
+
+    @property
+    def ttl(self):
+        return self._ttl or settings.ODOO_MIRROR_TTL
+
+    def _key(self, odoo_id):
+        return f'{KEY_PREFIX}:{self.model}:{odoo_id}'
+
+    def _lock_key(self, odoo_id):
+        return f'{KEY_PREFIX}:lock:{self.model}:{odoo_id}'
+
+    def _stats_key(self, metric):
+        return f'{KEY_PREFIX}:stats:{self.model}:{metric}'
+
+    # ========================================
+    # LECTURE
+    # ========================================
+
+    def get(self, odoo_id, refresh=False):
+        """Un enregistrement (None s'il n'existe pas dans Odoo)"""
+        return self.get_many([odoo_id], refresh=refresh).get(odoo_id)
+
+    def get_many(self, odoo_ids, refresh=False):
+        """
+        Enregistrements Odoo, depuis le cache ou en un seul `read`
+
+        Args:
+            odoo_ids: IDs Odoo
+            refresh: Ignorer le cache et relire Odoo (le résultat est remis en cache)
+
+        Returns:
+            dict: {odoo_id: record} pour les enregistrements existants
+        """
+        odoo_ids = list(dict.fromkeys(odoo_id for odoo_id in odoo_ids if odoo_id))
+        if not odoo_ids:
+            return {}
+
+        entries = {} if refresh else cache.get_many([self._key(odoo_id) for odoo_id in odoo_ids])
+        now = time.time()
+        records, missing, stale = {}, [], []
+        for odoo_id in odoo_ids:
+            entry = entries.get(self._key(odoo_id))
+            if entry is None:
+                missing.append(odoo_id)
+                continue
+            records[odoo_id] = entry['record']
+            if now - entry['fetched_at'] > self.ttl:
+                stale.append(odoo_id)
+
+        self._count(hits=len(odoo_ids) - len(missing) - len(stale), stale=len(stale), misses=len(missing))
+        if missing:
+            records.update(self._fetch(missing))
+        if stale:
+            self._revalidate(stale)
+
+        # None : enregistrement absent d'Odoo (mis en cache pour ne pas le relire)
+        return {odoo_id: record for odoo_id, record in records.items() if record is not None}
+
+    def _fetch(self, odoo_ids):
+        """Lit les IDs absents du cache ; un seul worker par enregistrement interroge Odoo"""
+        owned = [odoo_id for odoo_id in odoo_ids if self._acquire(odoo_id)]
+        records = self._refresh(owned) if owned else {}
+
+        waiting = [odoo_id for odoo_id in odoo_ids if odoo_id not in records]
+        if waiting:
+            records.update(self._wait_for(waiting))
+
+        # Verrou expiré ou worker en échec : lecture directe
+        late = [odoo_id for odoo_id in waiting if odoo_id not in records]
+        if late:
+            records.update(self._refresh(late, locked=False))
+        return records
+
+    def _wait_for(self, odoo_ids):
+        """Attend les enregistrements rafraîchis par un autre worker"""
+        keys = {self._key(odoo_id): odoo_id for odoo_id in odoo_ids}
+        records = {}
+        deadline = time.monotonic() + settings.ODOO_MIRROR_LOCK_WAIT
+        while keys and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            for key, entry in cache.get_many(list(keys)).items():
+                records[keys.pop(key)] = entry['record']
+        return records
+
+    # ========================================
+    # RAFRAÎCHISSEMENT
+    # ========================================
+
+    def _acquire(self, odoo_id):
+        return cache.add(self._lock_key(odoo_id), 1, timeout=settings.ODOO_MIRROR_LOCK_TIMEOUT)
+
+    def _refresh(self, odoo_ids, locked=True):
+        """
+        Relit des enregistrements dans Odoo (un appel) et les met en cache
+
+        Returns:
+            dict: {odoo_id: record ou None}
+        """
+        from .odoo_gateway import odoo_gateway
+
+        try:
+            found = {
+                record['id']: record
+                for record in odoo_gateway._call_with_retry(self.model, 'read', odoo_ids, self.fields)
+            }
+            records = {odoo_id: found.get(odoo_id) for odoo_id in odoo_ids}
+            now = time.time()
+            cache.set_many(
+                {self._key(odoo_id): {'record': record, 'fetched_at': now} for odoo_id, record in records.items()},
+                timeout=self.ttl + settings.ODOO_MIRROR_STALE_TTL,
+            )
+            self._count(refreshes=1)
+            logger.debug(f"🔄 Odoo mirror refreshed {len(odoo_ids)} {self.model} record(s)")
+            return records
+        except Exception:
+            self._count(errors=1)
+            raise
+        finally:
+            if locked:
+                cache.delete_many([self._lock_key(odoo_id) for odoo_id in odoo_ids])
+
+    def _revalidate(self, odoo_ids):
+        """Rafraîchit en arrière-plan les enregistrements périmés (un seul worker)"""
+        owned = [odoo_id for odoo_id in odoo_ids if self._acquire(odoo_id)]
+        if owned:
+            revalidation_executor.submit(self._revalidate_quietly, owned)
+
+    def _revalidate_quietly(self, odoo_ids):
+        try:
+            self._refresh(odoo_ids)
+        except Exception as e:
+            # L'entrée périmée reste servie jusqu'à ODOO_MIRROR_STALE_TTL
+            logger.warning(f"⚠️ Odoo mirror revalidation failed for {self.model} {odoo_ids}: {e}")
+
+    def invalidate(self, odoo_ids):
+        """Supprime des enregistrements du miroir (après une écriture dans Odoo)"""
+        keys = [self._key(odoo_id) for odoo_id in odoo_ids if odoo_id]
+        if keys:
+            cache.delete_many(keys)
+
+    # ========================================
+    # MÉTRIQUES
+    # ========================================
+
+    def _count(self, **counts):
+        for metric, count in counts.items():
+            if not count:
+                continue
+            key = self._stats_key(metric)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                # Compteur absent : add() évite d'écraser celui d'un autre worker
+                if not cache.add(key, count, timeout=None):
+                    cache.incr(key, count)
+
+    def stats(self):
+        """
+        Compteurs du miroir, tous workers confondus
+
+        Returns:
+            dict: hits, stale, misses, refreshes, errors et hit_ratio
+        """
+        keys = {self._stats_key(metric): metric for metric in METRICS}
+        found = cache.get_many(list(keys))
+        stats = {metric: found.get(key, 0) for key, metric in keys.items()}
+        reads = stats['hits'] + stats['stale'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale']) / reads, 3) if reads else None
+        return stats
+
+    def reset_stats(self):
+        cache.delete_many([self._stats_key(metric) for metric in METRICS])
+
+
+# Miroirs des modèles lus par l'application
+partner_mirror = OdooMirrorCache('res.partner', ['name', 'email', 'phone', 'comment'])
+project_mirror = OdooMirrorCache('project.project', ['name', 'description', 'date_start', 'date', 'partner_id', 'user_id'])
+# Assignations modifiées dans Odoo sans passer par Django : fraîcheur courte
+task_mirror = OdooMirrorCache('project.task', ['name', 'user_ids', 'project_id', 'date_deadline'], ttl=60)
+user_mirror = OdooMirrorCache('res.users', ['partner_id'])
+
+MIRRORS = [partner_mirror, project_mirror, task_mirror, user_mirror]
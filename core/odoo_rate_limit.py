@@ -0,0 +1,152 @@
+"""
+Rate limiter distribué pour les appels Odoo (token bucket)
+
+Les seaux sont stockés dans le cache Django (Redis en production) et donc
+partagés par tous les workers Celery et processus web :
+- un seau global (ODOO_RATE_LIMIT requêtes/s, rafale ODOO_RATE_LIMIT_BURST)
+- un seau optionnel par modèle Odoo (ODOO_RATE_LIMIT_MODELS)
+
+acquire() ne bloque pas : il retourne le délai avant qu'un jeton soit
+disponible. Le gateway en fait une OdooRateLimitError(retry_after=...) et les
+tâches Celery se replanifient avec ce délai au lieu de dormir.
+
+Avec Redis, la vérification et la consommation des jetons sont atomiques
+(script Lua). Les autres backends (LocMemCache, par processus) utilisent
+un verrou local.
+
+Usage:
+    from core.odoo_rate_limit import odoo_rate_limiter
+
+    wait = odoo_rate_limiter.acquire('res.partner')
+    if wait:
+        ...  # réessayer dans `wait` secondes
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+KEY_PREFIX = 'odoo:ratelimit'
+PENALTY_KEY = f'{KEY_PREFIX}:penalty'
+
+# Tous les seaux sont vérifiés avant d'en consommer un seul :
+# un refus ne consomme aucun jeton
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    available = math.min(burst, available + math.max(0, now - ts) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', key, tostring(math.ceil(burst / rate) + 1))
+end
+return '0'
+"""
+
+
+class OdooRateLimiter:
+    """Token bucket partagé entre workers pour les appels Odoo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._script = None
+
+    def get_buckets(self, model=None):
+        """
+        Seaux à consommer pour un appel
+
+        Returns:
+            list: [(clé, requêtes/s, rafale)]
+        """
+        buckets = [(f'{KEY_PREFIX}:global', settings.ODOO_RATE_LIMIT, settings.ODOO_RATE_LIMIT_BURST)]
+        if model in settings.ODOO_RATE_LIMIT_MODELS:
+            rate, burst = settings.ODOO_RATE_LIMIT_MODELS[model]
+            buckets.append((f'{KEY_PREFIX}:model:{model}', rate, burst))
+        return buckets
+
+    def _redis_script(self):
+        """Script Lua enregistré si le cache est django-redis (None sinon)"""
+        if self._script is None:
+            client_factory = getattr(getattr(cache, 'client', None), 'get_client', None)
+            if client_factory is None:
+                return None
+            self._script = client_factory(write=True).register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def _acquire_redis(self, script, buckets, now):
+        keys = [cache.make_key(key) for key, _, _ in buckets]
+        args = [now]
+        for _, rate, burst in buckets:
+            args.extend([rate, burst])
+        return float(script(keys=keys, args=args))
+
+    def _acquire_local(self, buckets, now):
+        with self._lock:
+            states = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                tokens, ts = cache.get(key) or (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+                states.append((key, rate, burst, tokens))
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+
+            if wait > 0:
+                return wait
+
+            for key, rate, burst, tokens in states:
+                cache.set(key, (tokens - 1, now), timeout=int(burst / rate) + 1)
+            return 0.0
+
+    def acquire(self, model=None):
+        """
+        Consomme un jeton (global + modèle) si disponible
+
+        Args:
+            model: Modèle Odoo appelé (ex: 'res.partner')
+
+        Returns:
+            float: 0 si l'appel peut partir, sinon secondes avant le prochain jeton
+        """
+        penalty_until = cache.get(PENALTY_KEY)
+        now = time.time()
+        if penalty_until and penalty_until > now:
+            return penalty_until - now
+
+        buckets = self.get_buckets(model)
+        script = self._redis_script()
+        if script is not None:
+            return self._acquire_redis(script, buckets, now)
+        return self._acquire_local(buckets, now)
+
+    def penalize(self, seconds):
+        """
+        Suspend tous les appels Odoo pendant `seconds` (après un 429 d'Odoo)
+
+        Args:
+            seconds: Durée de la pause, pour tous les workers
+        """
+        cache.set(PENALTY_KEY, time.time() + seconds, timeout=int(seconds) + 1)
+
+
+# Instance globale
+# Usage: from core.odoo_rate_limit import odoo_rate_limiter
+odoo_rate_limiter = OdooRateLimiter()
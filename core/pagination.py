@@ -0,0 +1,193 @@
+"""
+Pagination par curseur (keyset) pour les grandes listes
+
+Les listes projets / tâches / documents sont triées sur (created_at, id) et
+paginées avec un curseur opaque : chaque page est une simple requête
+`WHERE (created_at, id) < (curseur) ORDER BY ... LIMIT n`, donc le coût reste
+constant quelle que soit la profondeur de la page ou la taille de la table.
+
+La pagination est opt-in pour ne pas casser les clients existants qui
+attendent une liste JSON :
+- ?page_size=<n> et/ou ?cursor=<curseur> : réponse paginée
+- ?stream=1 : export NDJSON (un objet JSON par ligne), lu par chunks
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    """Encode la position (created_at, id) en curseur opaque"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(value):
+    """
+    Décode un curseur produit par encode_cursor
+
+    Returns:
+        tuple: (created_at, pk)
+
+    Raises:
+        ValueError: si le curseur est invalide
+    """
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at_raw, pk_raw = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at_raw)
+        pk = int(pk_raw)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {value!r}")
+
+    if created_at is None:
+        raise ValueError(f"Invalid cursor: {value!r}")
+
+    return created_at, pk
+
+
+def filter_before_cursor(queryset, created_at, pk):
+    """Garde les lignes strictement après la position dans l'ordre (-created_at, -id)"""
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+    )
+
+
+def filter_after_cursor(queryset, created_at, pk):
+    """Garde les lignes strictement avant la position dans l'ordre (-created_at, -id) (plus récentes)"""
+    return queryset.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination keyset sur l'ordre (-created_at, -id)
+
+    Réponse paginée :
+    {
+        "next": "<url de la page suivante ou null>",
+        "next_cursor": "<curseur ou null>",
+        "results": [...]
+    }
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+
+    def is_requested(self, request):
+        """La pagination n'est active que si le client la demande"""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def apply_cursor(self, queryset, request):
+        """Trie le queryset et applique le curseur de la requête (si présent)"""
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return queryset
+
+        try:
+            created_at, pk = decode_cursor(cursor)
+        except ValueError:
+            raise NotFound("Curseur invalide")
+
+        return filter_before_cursor(queryset, created_at, pk)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        # On lit une ligne de plus pour savoir s'il existe une page suivante
+        rows = list(self.apply_cursor(queryset, request)[:self.page_size + 1])
+        page = rows[:self.page_size]
+
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            last = page[-1]
+            self.next_cursor = encode_cursor(last.created_at, last.pk)
+
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class NDJSONStreamMixin:
+    """
+    Ajoute le mode ?stream=1 à une ListAPIView paginée par KeysetPagination
+
+    Les objets sont lus par chunks (`iterator(chunk_size=...)`, les
+    prefetch_related sont appliqués par chunk) et sérialisés un par un,
+    la mémoire reste donc constante quelle que soit la taille de l'export.
+    Le curseur ?cursor=... est respecté pour reprendre un export interrompu.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param) in ('1', 'true'):
+            return self.stream_list(request)
+        return super().list(request, *args, **kwargs)
+
+    def stream_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = self.paginator.apply_cursor(queryset, request)
+
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        chunk_size = self.stream_chunk_size
+
+        def rows():
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                data = serializer_class(obj, context=context).data
+                yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+        return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
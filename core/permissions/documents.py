@@ -2,6 +2,7 @@
 Permissions for document-related views
 """
 from rest_framework import permissions
+from ..services.permission_context import get_permission_context
 
 
 class CanDeleteDocument(permissions.BasePermission):
@@ -17,7 +18,7 @@ class CanDeleteDocument(permissions.BasePermission):
         if not user or not user.is_authenticated:
             return False
 
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         if not profile:
             return False
 
@@ -26,7 +27,7 @@ class CanDeleteDocument(permissions.BasePermission):
             return True
 
         # Le propriétaire du document peut le supprimer
-        if obj.uploade_par == user:
+        if obj.uploade_par_id == user.id:
             return True
 
         return False
@@ -2,6 +2,7 @@
 Permissions for pole-related views
 """
 from rest_framework import permissions
+from ..services.permission_context import get_permission_context
 from ..utils.helpers import is_admin_or_super
 
 
@@ -16,7 +17,7 @@ class CanViewPoles(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         if not profile:
             return False
 
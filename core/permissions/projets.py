@@ -2,7 +2,8 @@
 Permissions for projet-related views
 """
 from rest_framework import permissions
-from ..utils.helpers import is_admin_or_super, is_super_admin
+from ..services.permission_context import get_permission_context
+from ..services.projet_service import ProjetService
 
 
 class CanViewProjet(permissions.BasePermission):
@@ -19,38 +20,8 @@ class CanViewProjet(permissions.BasePermission):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        profile = getattr(user, 'profile', None)
-
-        if not profile:
-            return False
-
-        # Admin et Super Admin voient tout
-        if is_admin_or_super(profile):
-            return True
-
-        # Le créateur voit tous ses projets (peu importe le statut)
-        if obj.created_by == user:
-            return True
-
-        # Projets "brouillon" et "en_attente" : visibles uniquement par admin et créateur
-        if obj.statut in ['brouillon', 'en_attente']:
-            return False
-
-        # Projets publics : visibles par les personnes associées
-        if obj.statut in ['en_cours', 'en_revision', 'termine', 'annule']:
-            # Membres, chef de projet, client peuvent voir
-            if (obj.membres.filter(id=user.id).exists() or
-                obj.chef_projet == user or
-                obj.client == user):
-                return True
-
-            # Chef de pôle peut voir les projets de son pôle
-            if profile.role == 'chef_pole' and profile.pole:
-                if obj.pole == profile.pole:
-                    return True
-
-        return False
+        context = get_permission_context(request)
+        return ProjetService.can_user_view_projet(request.user, obj, context=context)
 
 
 class CanManageProjet(permissions.BasePermission):
@@ -66,7 +37,7 @@ class CanManageProjet(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
 
-        profile = getattr(request.user, 'profile', None)
+        profile = get_permission_context(request).profile
         if not profile:
             return False
 
@@ -74,26 +45,11 @@ class CanManageProjet(permissions.BasePermission):
         return profile.role in ['admin', 'super_admin', 'chef_pole']
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        profile = getattr(user, 'profile', None)
-
-        if not profile:
-            return False
+        context = get_permission_context(request)
 
         # DELETE: Seul super_admin peut supprimer
         if request.method == 'DELETE':
-            return is_super_admin(profile)
-
-        # Modifier: Admin et Super Admin peuvent tout modifier
-        if is_admin_or_super(profile):
-            return True
-
-        # Créateur du projet peut modifier son projet
-        if obj.created_by == user:
-            return True
-
-        # Chef de pôle peut gérer les projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole:
-            return obj.pole == profile.pole
+            return ProjetService.can_user_delete_projet(request.user, obj, context=context)
 
-        return False
+        # Modifier: admin, créateur du projet, chef de pôle du pôle du projet
+        return ProjetService.can_user_manage_projet(request.user, obj, context=context)
@@ -2,7 +2,7 @@
 Permissions for tache-related views
 """
 from rest_framework import permissions
-from ..utils.helpers import is_admin_or_super
+from ..services.permission_context import get_permission_context
 
 
 class CanViewTache(permissions.BasePermission):
@@ -16,29 +16,30 @@ class CanViewTache(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         user = request.user
-        profile = getattr(user, 'profile', None)
+        context = get_permission_context(request)
+        profile = context.profile
 
         if not profile:
             return False
 
         # Admin et Super Admin voient tout
-        if is_admin_or_super(profile):
+        if context.is_admin:
             return True
 
         # Chef de pôle voit les tâches des projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole:
-            return obj.projet.pole == profile.pole
+        if profile.role == 'chef_pole' and profile.pole_id:
+            return obj.projet.pole_id == profile.pole_id
 
         # Chef de projet voit les tâches de son projet
-        if obj.projet.chef_projet == user:
+        if obj.projet.chef_projet_id == user.id:
             return True
 
         # Membres du projet voient les tâches
-        if obj.projet.membres.filter(id=user.id).exists():
+        if context.is_membre(obj.projet_id):
             return True
 
         # Personne assignée voit la tâche
-        if obj.assigne_a.filter(id=user.id).exists():
+        if context.is_assigned(obj.pk):
             return True
 
         return False
@@ -58,7 +59,7 @@ class CanCreateTache(permissions.BasePermission):
         if not user or not user.is_authenticated:
             return False
 
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         if not profile:
             return False
 
@@ -87,29 +88,30 @@ class CanManageTache(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         user = request.user
-        profile = getattr(user, 'profile', None)
+        context = get_permission_context(request)
+        profile = context.profile
 
         if not profile:
             return False
 
         # Admin et Super Admin peuvent tout faire
-        if is_admin_or_super(profile):
+        if context.is_admin:
             return True
 
         # Créateur du projet peut gérer toutes les tâches de son projet
-        if obj.projet.created_by == user:
+        if obj.projet.created_by_id == user.id:
             return True
 
         # Chef de pôle peut gérer les tâches des projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole:
-            return obj.projet.pole == profile.pole
+        if profile.role == 'chef_pole' and profile.pole_id:
+            return obj.projet.pole_id == profile.pole_id
 
         # Chef de projet peut gérer les tâches de son projet
-        if obj.projet.chef_projet == user:
+        if obj.projet.chef_projet_id == user.id:
             return True
 
         # Personne assignée peut modifier le statut uniquement
-        if obj.assigne_a.filter(id=user.id).exists():
+        if context.is_assigned(obj.pk):
             # Vérifier que c'est uniquement pour modifier le statut
             if request.method in ['PUT', 'PATCH']:
                 return True
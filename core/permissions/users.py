@@ -2,6 +2,7 @@
 Permissions for user-related views
 """
 from rest_framework import permissions
+from ..services.permission_context import get_permission_context
 from ..utils.helpers import is_admin_or_super
 
 
@@ -14,7 +15,7 @@ class IsAdminUserProfile(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         return is_admin_or_super(profile)
 
 
@@ -33,7 +34,7 @@ class CanEditOwnProfile(permissions.BasePermission):
             return True
 
         # Les admins peuvent modifier n'importe quel profil
-        profile = getattr(request.user, 'profile', None)
+        profile = get_permission_context(request).profile
         if profile and is_admin_or_super(profile):
             return True
 
@@ -51,7 +52,7 @@ class CanViewUsers(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         if not profile:
             return False
 
@@ -256,9 +256,14 @@ class ProjetListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
     def get_nombre_taches(self, obj):
+        # Annoté par Projet.objects.with_counts() dans les vues de liste
+        if hasattr(obj, 'nombre_taches'):
+            return obj.nombre_taches
         return obj.taches.count()
 
     def get_nombre_membres(self, obj):
+        if hasattr(obj, 'nombre_membres'):
+            return obj.nombre_membres
         return obj.membres.count()
 
 
@@ -332,4 +337,17 @@ class NotificationSerializer(serializers.ModelSerializer):
             'projet', 'projet_titre',
             'is_read', 'created_at', 'read_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'read_at']
\ No newline at end of file
+        read_only_fields = ['id', 'user', 'created_at', 'read_at']
+
+
+class NotificationCompactSerializer(serializers.ModelSerializer):
+    """Serializer compact des notifications (sans jointure tâche / projet)"""
+
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'type', 'titre', 'message',
+            'tache', 'projet',
+            'is_read', 'created_at', 'read_at'
+        ]
+        read_only_fields = fields
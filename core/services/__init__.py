@@ -1,6 +1,13 @@
 """
 Services module for business logic
 """
+from .notification_writer import NotificationWriter
+from .permission_context import PermissionContext, get_permission_context
+from .projet_cache_service import ProjetCacheService
 from .projet_service import ProjetService
+from .user_profile_service import UserProfileService
 
-__all__ = ['ProjetService']
+__all__ = [
+    'NotificationWriter', 'PermissionContext', 'get_permission_context',
+    'ProjetCacheService', 'ProjetService', 'UserProfileService',
+]
@@ -0,0 +1,167 @@
+"""
+Service layer for deadline notifications
+
+Moteur ensembliste utilisé par core.tasks.check_deadline_notifications :
+1. une requête calcule tous les candidats (utilisateur, tâche, type) du jour
+2. une requête récupère les notifications déjà envoyées, par clé de
+   déduplication (anti-jointure)
+3. NotificationWriter écrit les notifications manquantes (doublons ignorés
+   par la contrainte unique, y compris entre workers concurrents) ; une
+   tâche en retard n'a qu'une notification par destinataire, rafraîchie
+   chaque jour
+
+Le nombre de requêtes ne dépend donc plus du nombre de tâches ni de destinataires.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Notification, Tache
+from .notification_writer import UPDATABLE_TYPES, NotificationWriter
+
+logger = logging.getLogger(__name__)
+
+
+# Statuts des tâches encore ouvertes
+OPEN_STATUTS = ['a_faire', 'en_cours']
+
+
+class DeadlineNotificationEngine:
+    """
+    Calcule et écrit les notifications de deadline d'une journée
+
+    Usage:
+        result = DeadlineNotificationEngine().run()
+        result = DeadlineNotificationEngine(dry_run=True).run()
+    """
+
+    def __init__(self, today=None, dry_run=False, batch_size=500):
+        self.today = today or timezone.localdate()
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+
+    def get_type(self, deadline):
+        """Type de notification pour une deadline (None si aucune notification)"""
+        delta = (deadline - self.today).days
+        if delta < 0:
+            return 'deadline_overdue'
+        return {
+            0: 'deadline_today',
+            1: 'deadline_1day',
+            3: 'deadline_3days',
+        }.get(delta)
+
+    def build_content(self, notification_type, titre, deadline):
+        """Retourne (titre, message) de la notification"""
+        if notification_type == 'deadline_3days':
+            return "Deadline dans 3 jours", f"{titre} • {deadline.strftime('%d/%m/%Y')}"
+        if notification_type == 'deadline_1day':
+            return "Deadline demain", f"{titre} • Échéance demain"
+        if notification_type == 'deadline_today':
+            return "Deadline AUJOURD'HUI", f"{titre} • À terminer aujourd'hui"
+        days_overdue = (self.today - deadline).days
+        return "Tâche en retard", f"{titre} • Retard de {days_overdue} jour(s)"
+
+    def get_candidates(self):
+        """
+        Calcule en une requête tous les couples (utilisateur, tâche, type) du jour
+
+        Destinataires : personnes assignées + chef de projet
+
+        Returns:
+            dict: {(user_id, tache_id, type): Notification préparée par NotificationWriter}
+        """
+        tomorrow = self.today + timedelta(days=1)
+        in_3_days = self.today + timedelta(days=3)
+
+        # Une ligne par personne assignée (LEFT JOIN : None si aucune)
+        rows = Tache.objects.filter(
+            Q(deadline__lte=self.today) | Q(deadline__in=[tomorrow, in_3_days]),
+            statut__in=OPEN_STATUTS,
+        ).order_by().values_list(
+            'id', 'titre', 'deadline', 'projet_id', 'projet__chef_projet_id', 'assigne_a'
+        )
+
+        candidates = {}
+        for tache_id, titre, deadline, projet_id, chef_projet_id, assigne_id in rows:
+            notification_type = self.get_type(deadline)
+            if notification_type is None:
+                continue
+
+            for user_id in (assigne_id, chef_projet_id):
+                key = (user_id, tache_id, notification_type)
+                if user_id is None or key in candidates:
+                    continue
+                notif_titre, message = self.build_content(notification_type, titre, deadline)
+                candidates[key] = NotificationWriter.build(
+                    user_id, notification_type, notif_titre, message,
+                    tache_id=tache_id, projet_id=projet_id, day=self.today,
+                )
+
+        return candidates
+
+    def get_existing_keys(self, candidates):
+        """
+        Candidats déjà notifiés (une requête)
+
+        Comparaison par clé de déduplication : celle d'une alerte quotidienne
+        porte le jour traité (self.today, y compris avec --date). Une alerte
+        de retard (une ligne par tâche) compte comme envoyée si elle a déjà
+        été créée ou rafraîchie aujourd'hui, comme dans NotificationWriter.refresh.
+
+        Args:
+            candidates: Résultat de get_candidates()
+
+        Returns:
+            set: Couples (user_id, dedupe_key) déjà notifiés
+        """
+        rows = Notification.objects.filter(
+            dedupe_key__in={notification.dedupe_key for notification in candidates.values()},
+        ).values_list('user_id', 'dedupe_key', 'type', 'created_at')
+
+        today = timezone.localdate()
+        return {
+            (user_id, dedupe_key)
+            for user_id, dedupe_key, notification_type, created_at in rows
+            if notification_type not in UPDATABLE_TYPES or timezone.localdate(created_at) >= today
+        }
+
+    def run(self):
+        """
+        Exécute le moteur
+
+        Returns:
+            dict: candidates, existing, created, duration (s), rows_per_second
+        """
+        started = time.perf_counter()
+
+        candidates = self.get_candidates()
+        existing = self.get_existing_keys(candidates)
+        to_create = [
+            notification for notification in candidates.values()
+            if (notification.user_id, notification.dedupe_key) not in existing
+        ]
+
+        if to_create and not self.dry_run:
+            NotificationWriter.write(to_create, batch_size=self.batch_size)
+
+        duration = time.perf_counter() - started
+        result = {
+            'date': self.today.isoformat(),
+            'dry_run': self.dry_run,
+            'candidates': len(candidates),
+            'existing': len(candidates) - len(to_create),
+            'created': len(to_create),
+            'duration': duration,
+            'rows_per_second': len(candidates) / duration if duration > 0 else 0.0,
+        }
+
+        logger.info(
+            f"🔔 Deadline notifications {self.today}: {result['created']} created, "
+            f"{result['existing']} already sent ({result['rows_per_second']:.0f} rows/s)"
+            + (" [dry-run]" if self.dry_run else "")
+        )
+        return result
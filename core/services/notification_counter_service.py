@@ -0,0 +1,142 @@
+"""
+Service layer for the denormalized unread notification counters
+
+Le nombre de non lues d'un utilisateur est lu sans toucher la table des
+notifications :
+- cache 'notifications:unread:<user_id>' (incr/decr atomiques après le commit)
+- sinon la ligne NotificationCounter (une requête sur la clé primaire)
+- sinon (première lecture) un COUNT, qui crée la ligne
+
+Les écritures mettent à jour la ligne (UPDATE ... SET unread = unread + n)
+dans leur transaction, puis le cache après le commit :
+- NotificationWriter.write : +n pour les notifications réellement insérées
+  ou redevenues non lues (alerte de retard rafraîchie)
+- Notification.mark_as_read, mark_all_as_read, suppression d'une non lue : -n
+- NotificationRetentionService.prune : -n pour les non lues expirées
+
+Les suppressions en cascade (tâche, projet) et les écritures directes ne
+passent pas par là : reconcile() (Celery Beat) corrige les écarts.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import Notification, NotificationCounter
+
+KEY_PREFIX = 'notifications:unread:'
+
+
+class NotificationCounterService:
+    """Service class for per-user unread notification counters"""
+
+    @staticmethod
+    def key(user_id):
+        return f'{KEY_PREFIX}{user_id}'
+
+    @staticmethod
+    def get_many(user_ids):
+        """
+        Nombre de non lues de plusieurs utilisateurs
+
+        Returns:
+            dict: {user_id: count}
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+
+        cached = cache.get_many([NotificationCounterService.key(user_id) for user_id in user_ids])
+        counts = {int(key[len(KEY_PREFIX):]): max(0, value) for key, value in cached.items()}
+
+        missing = user_ids - counts.keys()
+        if missing:
+            loaded = dict(NotificationCounter.objects.filter(user_id__in=missing).values_list('user_id', 'unread'))
+            absent = missing - loaded.keys()
+            if absent:
+                # Première lecture : compteur initialisé depuis la table des notifications
+                initial = dict(
+                    Notification.objects.filter(user_id__in=absent, is_read=False)
+                    .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+                )
+                NotificationCounter.objects.bulk_create(
+                    [NotificationCounter(user_id=user_id, unread=initial.get(user_id, 0)) for user_id in absent],
+                    ignore_conflicts=True,
+                )
+                loaded.update({user_id: initial.get(user_id, 0) for user_id in absent})
+
+            cache.set_many(
+                {NotificationCounterService.key(user_id): count for user_id, count in loaded.items()},
+                timeout=settings.NOTIFICATION_COUNTER_TTL,
+            )
+            counts.update(loaded)
+
+        return counts
+
+    @staticmethod
+    def get(user_id):
+        """Nombre de non lues d'un utilisateur"""
+        return NotificationCounterService.get_many([user_id])[user_id]
+
+    @staticmethod
+    def add(deltas):
+        """
+        Ajoute des variations aux compteurs (dans la transaction en cours)
+
+        Une requête par valeur de variation distincte (en pratique +1 ou -n).
+        Les compteurs absents ne sont pas créés : ils seront initialisés à la
+        première lecture.
+
+        Args:
+            deltas: {user_id: variation}
+        """
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        by_delta = defaultdict(list)
+        for user_id, delta in deltas.items():
+            by_delta[delta].append(user_id)
+        for delta, user_ids in by_delta.items():
+            NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=Greatest(F('unread') + delta, 0))
+
+        transaction.on_commit(lambda: NotificationCounterService._apply_to_cache(deltas))
+
+    @staticmethod
+    def _apply_to_cache(deltas):
+        for user_id, delta in deltas.items():
+            try:
+                cache.incr(NotificationCounterService.key(user_id), delta)
+            except ValueError:
+                # Absent du cache : relu depuis la base au prochain accès
+                pass
+
+    @staticmethod
+    def reconcile(batch_size=500):
+        """
+        Corrige les compteurs qui diffèrent du nombre réel de non lues
+
+        Returns:
+            int: Nombre de compteurs corrigés
+        """
+        actual = Coalesce(
+            Subquery(
+                Notification.objects.filter(user_id=OuterRef('user_id'), is_read=False)
+                .order_by().values('user_id').annotate(count=Count('id')).values('count')
+            ),
+            0,
+        )
+        drifted = list(
+            NotificationCounter.objects.annotate(actual=actual).exclude(unread=F('actual')).values_list('user_id', flat=True)
+        )
+
+        for start in range(0, len(drifted), batch_size):
+            user_ids = drifted[start:start + batch_size]
+            # Recalcul dans l'UPDATE : pas de fenêtre entre la lecture et l'écriture
+            NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=actual)
+            cache.delete_many([NotificationCounterService.key(user_id) for user_id in user_ids])
+
+        return len(drifted)
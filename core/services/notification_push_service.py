@@ -0,0 +1,58 @@
+"""
+Service layer for real-time notification push
+
+Publie sur le flux SSE (core/notification_stream.py) :
+- 'notification' : chaque nouvelle notification (format NotificationSerializer)
+- 'unread_count' : le nombre de non lues après une écriture ou une lecture
+
+Seuls les utilisateurs ayant un flux ouvert coûtent des requêtes : un
+aller-retour broker (PUBSUB NUMSUB) filtre les destinataires avant toute
+lecture en base. Les compteurs viennent de NotificationCounterService.
+"""
+from ..models import Notification
+from ..notification_stream import notification_stream
+from ..serializers import NotificationSerializer
+from .notification_counter_service import NotificationCounterService
+
+
+class NotificationPushService:
+    """Service class for publishing notification events"""
+
+    @staticmethod
+    def publish_created(user_ids, notification_ids):
+        """
+        Publie les notifications créées et les nouveaux compteurs
+
+        Appelé après le commit par NotificationWriter.write avec les lignes
+        que son écriture a insérées ou rafraîchies : les doublons ignorés et
+        les lignes d'un écrivain concurrent ne sont pas republiés.
+
+        Args:
+            user_ids: Destinataires du lot
+            notification_ids: IDs des notifications insérées ou rafraîchies
+        """
+        listening = notification_stream.listening(set(user_ids))
+        if not listening:
+            return
+
+        notifications = (
+            Notification.objects.filter(id__in=notification_ids, user_id__in=listening)
+            .select_related('tache__projet', 'projet')
+            .order_by('created_at', 'id')
+        )
+        for notification in notifications:
+            notification_stream.publish(
+                notification.user_id, 'notification', NotificationSerializer(notification).data
+            )
+        for user_id, count in NotificationCounterService.get_many(listening).items():
+            notification_stream.publish(user_id, 'unread_count', {'count': count})
+
+    @staticmethod
+    def publish_unread_counts(user_ids):
+        """Publie le nombre de non lues (après lecture ou suppression)"""
+        listening = notification_stream.listening(set(user_ids))
+        if not listening:
+            return
+
+        for user_id, count in NotificationCounterService.get_many(listening).items():
+            notification_stream.publish(user_id, 'unread_count', {'count': count})
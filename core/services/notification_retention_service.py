@@ -0,0 +1,225 @@
+"""
+Service layer for notification retention
+
+Garde la table des notifications (et ses index) à taille constante :
+- notifications lues depuis plus de NOTIFICATION_READ_RETENTION_DAYS
+- toutes les notifications de plus de NOTIFICATION_UNREAD_RETENTION_DAYS (expirées)
+
+sont supprimées par lots de taille bornée (une transaction courte par lot),
+et copiées avant dans NotificationArchive si NOTIFICATION_ARCHIVE_ENABLED.
+Les compteurs de non lues sont décrémentés des notifications expirées : les
+lignes du lot sont verrouillées à la lecture, un marquage comme lue concurrent
+attend la suppression et ne décrémente pas une seconde fois.
+
+Sur PostgreSQL, l'archive peut être partitionnée par mois d'archivage : les
+partitions anciennes se suppriment sans DELETE (voir commande notification_partitions).
+"""
+import logging
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Notification, NotificationArchive
+from .notification_counter_service import NotificationCounterService
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = NotificationArchive._meta.db_table
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'type', 'titre', 'message', 'tache_id', 'projet_id', 'is_read', 'created_at', 'read_at',
+]
+
+
+def add_months(day, months):
+    """Premier jour du mois décalé de `months` mois"""
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+class NotificationRetentionService:
+    """Service class for pruning, archiving and partitioning notifications"""
+
+    @staticmethod
+    def expired(now=None):
+        """
+        Notifications à purger
+
+        Returns:
+            QuerySet: lues et anciennes, ou expirées
+        """
+        now = now or timezone.now()
+        read_cutoff = now - timedelta(days=settings.NOTIFICATION_READ_RETENTION_DAYS)
+        unread_cutoff = now - timedelta(days=settings.NOTIFICATION_UNREAD_RETENTION_DAYS)
+        return Notification.objects.filter(
+            Q(is_read=True, created_at__lt=read_cutoff) | Q(created_at__lt=unread_cutoff)
+        )
+
+    @staticmethod
+    def prune(now=None, batch_size=None, max_batches=None, archive=None, dry_run=False):
+        """
+        Purge les notifications expirées par lots
+
+        Args:
+            now: Date de référence (défaut: maintenant)
+            batch_size: Lignes par lot (défaut: NOTIFICATION_RETENTION_BATCH_SIZE)
+            max_batches: Lots au plus par passage (défaut: NOTIFICATION_RETENTION_MAX_BATCHES),
+                le reste est repris au passage suivant
+            archive: Copie dans NotificationArchive (défaut: NOTIFICATION_ARCHIVE_ENABLED)
+            dry_run: Compte les notifications à purger sans rien supprimer
+
+        Returns:
+            dict: deleted, archived, batches (ou pending en dry-run)
+        """
+        queryset = NotificationRetentionService.expired(now)
+        if dry_run:
+            return {'pending': queryset.count()}
+
+        batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+        max_batches = max_batches or settings.NOTIFICATION_RETENTION_MAX_BATCHES
+        archive = settings.NOTIFICATION_ARCHIVE_ENABLED if archive is None else archive
+        stats = {'deleted': 0, 'archived': 0, 'batches': 0}
+
+        while stats['batches'] < max_batches:
+            with transaction.atomic():
+                # Verrou : is_read ne change pas entre la lecture et le DELETE
+                rows = list(queryset.select_for_update().order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+                if not rows:
+                    break
+
+                if archive:
+                    NotificationArchive.objects.bulk_create(
+                        [NotificationArchive(**row) for row in rows], ignore_conflicts=True,
+                    )
+                    stats['archived'] += len(rows)
+
+                Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+                unread = {}
+                for row in rows:
+                    if not row['is_read']:
+                        unread[row['user_id']] = unread.get(row['user_id'], 0) - 1
+                NotificationCounterService.add(unread)
+
+            stats['deleted'] += len(rows)
+            stats['batches'] += 1
+            if len(rows) < batch_size:
+                break
+
+        if stats['deleted']:
+            logger.info(f"🧹 Pruned {stats['deleted']} notifications in {stats['batches']} batch(es)")
+        return stats
+
+    # ========================================
+    # PARTITIONNEMENT DE L'ARCHIVE (PostgreSQL)
+    # ========================================
+
+    @staticmethod
+    def partition_name(month):
+        return f"{ARCHIVE_TABLE}_{month:%Y_%m}"
+
+    @staticmethod
+    def is_partitioned():
+        """True si l'archive est une table partitionnée PostgreSQL"""
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [ARCHIVE_TABLE])
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def convert_archive_sql(today=None):
+        """
+        DDL de conversion de l'archive en table partitionnée par mois d'archivage
+
+        Partitionnée sur archived_at (croissant) et non created_at : les
+        notifications archivées ont déjà plusieurs semaines. La clé primaire
+        d'une table partitionnée doit inclure la clé de partition :
+        (id, archived_at). Les partitions à venir sont créées avant la copie
+        des lignes existantes, qui vont sinon dans la partition par défaut.
+        """
+        table = ARCHIVE_TABLE
+        return [
+            f'ALTER TABLE "{table}" RENAME TO "{table}_old"',
+            f'CREATE TABLE "{table}" (LIKE "{table}_old" INCLUDING DEFAULTS) PARTITION BY RANGE (archived_at)',
+            f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, archived_at)',
+            f'CREATE INDEX "{table}_user_created_idx" ON "{table}" (user_id, created_at DESC)',
+            f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT',
+            *NotificationRetentionService.ensure_partitions_sql(today),
+            f'INSERT INTO "{table}" SELECT * FROM "{table}_old"',
+            f'DROP TABLE "{table}_old"',
+        ]
+
+    @staticmethod
+    def ensure_partitions_sql(today=None, months_ahead=None):
+        """DDL des partitions du mois courant et des `months_ahead` mois suivants"""
+        months_ahead = settings.NOTIFICATION_ARCHIVE_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+        first = add_months(today or timezone.localdate(), 0)
+        statements = []
+        for offset in range(months_ahead + 1):
+            month, next_month = add_months(first, offset), add_months(first, offset + 1)
+            statements.append(
+                f'CREATE TABLE IF NOT EXISTS "{NotificationRetentionService.partition_name(month)}" '
+                f'PARTITION OF "{ARCHIVE_TABLE}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+        return statements
+
+    @staticmethod
+    def old_partitions(today=None, keep_months=None):
+        """
+        Partitions entièrement antérieures à la durée de conservation de l'archive
+
+        La partition par défaut (lignes antérieures à la conversion) est conservée.
+
+        Returns:
+            list: Noms des partitions à supprimer
+        """
+        keep_months = settings.NOTIFICATION_ARCHIVE_RETENTION_MONTHS if keep_months is None else keep_months
+        cutoff = add_months(today or timezone.localdate(), -keep_months)
+        prefix = f"{ARCHIVE_TABLE}_"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass",
+                [ARCHIVE_TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        old = []
+        for name in names:
+            try:
+                month = datetime.strptime(name[len(prefix):], '%Y_%m').date()
+            except ValueError:
+                continue
+            if add_months(month, 1) <= cutoff:
+                old.append(name)
+        return sorted(old)
+
+    @staticmethod
+    def maintain_partitions(today=None):
+        """
+        Crée les partitions à venir et supprime celles hors conservation
+
+        Sans effet si l'archive n'est pas partitionnée.
+
+        Returns:
+            dict: created (instructions exécutées), dropped (partitions supprimées)
+        """
+        if not NotificationRetentionService.is_partitioned():
+            return {'created': 0, 'dropped': []}
+
+        statements = NotificationRetentionService.ensure_partitions_sql(today)
+        dropped = NotificationRetentionService.old_partitions(today)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+            for name in dropped:
+                cursor.execute(f'DROP TABLE "{name}"')
+
+        if dropped:
+            logger.info(f"🗂️ Dropped notification archive partitions: {', '.join(dropped)}")
+        return {'created': len(statements), 'dropped': dropped}
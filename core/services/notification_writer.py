@@ -0,0 +1,240 @@
+"""
+Service layer for notification writes
+
+Point d'écriture unique de toutes les notifications (tâches Celery, webhooks
+Odoo, moteur de deadlines). Chaque notification reçoit une clé de
+déduplication et la contrainte unique (user, dedupe_key) garantit l'absence
+de doublons : l'insertion se fait en une seule requête
+(INSERT ... ON CONFLICT DO NOTHING RETURNING sur PostgreSQL et SQLite),
+sans vérification préalable, et reste sûre avec plusieurs workers Celery
+concurrents : chaque écrivain ne compte et ne publie que les lignes que sa
+requête a insérées.
+
+Les alertes répétées chaque jour (UPDATABLE_TYPES, ex: tâche en retard)
+n'ont qu'une ligne par (utilisateur, tâche) : elle est rafraîchie (message,
+non lue, date) au plus une fois par jour au lieu d'une nouvelle ligne.
+
+Les compteurs de non lues sont incrémentés des notifications réellement
+insérées ou redevenues non lues (NotificationCounterService) ; après le
+commit, elles sont poussées aux utilisateurs ayant un flux ouvert
+(NotificationPushService).
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import Notification
+from .notification_counter_service import NotificationCounterService
+from .notification_push_service import NotificationPushService
+
+
+# Types notifiés une seule fois par (tâche, projet) ; les autres une fois par jour
+ONCE_TYPES = ['task_assigned', 'project_assigned']
+
+# Types à une seule ligne par (tâche, projet), rafraîchie au plus une fois par jour
+UPDATABLE_TYPES = ['deadline_overdue']
+
+# Bases avec INSERT ... ON CONFLICT DO NOTHING RETURNING (voir NotificationWriter.insert)
+INSERT_RETURNING_VENDORS = ['postgresql', 'sqlite']
+
+# Colonnes écrites par NotificationWriter.insert, dans l'ordre des paramètres
+INSERT_FIELDS = [
+    'user', 'type', 'titre', 'message', 'tache', 'projet', 'is_read', 'created_at', 'read_at', 'dedupe_key',
+]
+
+
+class NotificationWriter:
+    """Service class for deduplicated notification inserts"""
+
+    @staticmethod
+    def build_key(notification_type, tache_id=None, projet_id=None, day=None):
+        """
+        Construit la clé de déduplication d'une notification
+
+        Args:
+            notification_type: Type de notification
+            tache_id: ID de la tâche (optionnel)
+            projet_id: ID du projet (optionnel)
+            day: Date de la fenêtre journalière (défaut: aujourd'hui)
+
+        Returns:
+            str: Clé du type 'deadline_today:t12:p3:2026-03-10', 'task_assigned:t12:p3:once'
+                 ou 'deadline_overdue:t12:p3:current'
+        """
+        if notification_type in ONCE_TYPES:
+            window = 'once'
+        elif notification_type in UPDATABLE_TYPES:
+            window = 'current'
+        else:
+            window = (day or timezone.localdate()).isoformat()
+        return f"{notification_type}:t{tache_id or ''}:p{projet_id or ''}:{window}"
+
+    @staticmethod
+    def build(user_id, notification_type, titre, message, tache_id=None, projet_id=None, day=None):
+        """
+        Prépare une notification (non sauvegardée) avec sa clé de déduplication
+
+        Returns:
+            Notification: Instance à passer à write()
+        """
+        return Notification(
+            user_id=user_id,
+            type=notification_type,
+            titre=titre,
+            message=message,
+            tache_id=tache_id,
+            projet_id=projet_id,
+            dedupe_key=NotificationWriter.build_key(notification_type, tache_id, projet_id, day),
+        )
+
+    @staticmethod
+    def write(notifications, batch_size=500):
+        """
+        Insère les notifications en ignorant celles déjà présentes
+
+        Les notifications des UPDATABLE_TYPES déjà présentes rafraîchissent
+        la ligne existante (voir refresh).
+
+        Args:
+            notifications: Liste d'instances préparées par build()
+            batch_size: Taille des lots d'insertion
+
+        Returns:
+            int: Nombre de notifications soumises
+        """
+        notifications = list(notifications)
+        if not notifications:
+            return 0
+
+        # Sans savepoint : pas de requêtes supplémentaires dans une transaction existante
+        with transaction.atomic(savepoint=False):
+            since = timezone.now()
+            inserted = NotificationWriter.insert(notifications, since, batch_size)
+
+            deltas = {}
+            for user_id, _ in inserted:
+                deltas[user_id] = deltas.get(user_id, 0) + 1
+            existing = [
+                notification for notification in notifications
+                if notification.type in UPDATABLE_TYPES and (notification.user_id, notification.dedupe_key) not in inserted
+            ]
+            reopened, refreshed_ids = NotificationWriter.refresh(existing, since, batch_size)
+            for user_id, count in reopened.items():
+                deltas[user_id] = deltas.get(user_id, 0) + count
+            NotificationCounterService.add(deltas)
+
+        created_ids = [*inserted.values(), *refreshed_ids]
+        if created_ids:
+            user_ids = {notification.user_id for notification in notifications}
+            transaction.on_commit(lambda: NotificationPushService.publish_created(user_ids, created_ids))
+        return len(notifications)
+
+    @staticmethod
+    def insert(notifications, since, batch_size=500):
+        """
+        Insère les notifications en ignorant les doublons, datées de `since`
+
+        PostgreSQL et SQLite >= 3.35 : INSERT ... ON CONFLICT DO NOTHING RETURNING,
+        seules les lignes insérées par cette requête sont renvoyées (une
+        requête par lot). bulk_create(ignore_conflicts=True) ne renvoie pas
+        les IDs des lignes insérées.
+
+        Autres bases (MySQL, MariaDB : pas de ON CONFLICT ; SQLite plus ancien) :
+        bulk_create(ignore_conflicts=True), puis inserted_keys.
+
+        Returns:
+            dict: {(user_id, dedupe_key): id} des notifications insérées
+        """
+        if connection.vendor not in INSERT_RETURNING_VENDORS or not connection.features.can_return_rows_from_bulk_insert:
+            Notification.objects.bulk_create(notifications, batch_size=batch_size, ignore_conflicts=True)
+            return NotificationWriter.inserted_keys(notifications, since)
+
+        meta = Notification._meta
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(meta.get_field(name).column) for name in INSERT_FIELDS)
+        placeholders = f"({', '.join(['%s'] * len(INSERT_FIELDS))})"
+        returning = ', '.join(quote(meta.get_field(name).column) for name in [meta.pk.name, 'user', 'dedupe_key'])
+        created_at = connection.ops.adapt_datetimefield_value(since)
+        batch_size = min(batch_size, connection.ops.bulk_batch_size(INSERT_FIELDS, notifications))
+
+        inserted = {}
+        with connection.cursor() as cursor:
+            for start in range(0, len(notifications), batch_size):
+                batch = notifications[start:start + batch_size]
+                params = []
+                for notification in batch:
+                    params += [
+                        notification.user_id, notification.type, notification.titre, notification.message,
+                        notification.tache_id, notification.projet_id, False, created_at, None,
+                        notification.dedupe_key,
+                    ]
+                cursor.execute(
+                    f"INSERT INTO {quote(meta.db_table)} ({columns}) "
+                    f"VALUES {', '.join([placeholders] * len(batch))} "
+                    f"ON CONFLICT DO NOTHING RETURNING {returning}",
+                    params,
+                )
+                for notification_id, user_id, dedupe_key in cursor.fetchall():
+                    inserted[(user_id, dedupe_key)] = notification_id
+        return inserted
+
+    @staticmethod
+    def inserted_keys(notifications, since):
+        """
+        Notifications insérées, sans RETURNING (une requête)
+
+        Approximation : bulk_create(ignore_conflicts=True) ne dit pas quelles
+        lignes ont été ignorées, les clés du lot créées depuis `since` sont
+        retenues. Deux écrivains concurrents insérant la même clé la comptent
+        tous les deux : le compteur de non lues peut dériver vers le haut
+        jusqu'au passage de reconcile_notification_counters, seule correction.
+
+        Returns:
+            dict: {(user_id, dedupe_key): id}
+        """
+        submitted = {(notification.user_id, notification.dedupe_key) for notification in notifications}
+        rows = Notification.objects.filter(
+            user_id__in={user_id for user_id, _ in submitted}, created_at__gte=since,
+        ).values_list('user_id', 'dedupe_key', 'id')
+        return {(user_id, key): notification_id for user_id, key, notification_id in rows if (user_id, key) in submitted}
+
+    @staticmethod
+    def refresh(notifications, now, batch_size=500):
+        """
+        Rafraîchit les lignes existantes des UPDATABLE_TYPES
+
+        Titre et message sont remplacés, la ligne redevient non lue et
+        remonte en tête (created_at). Une ligne déjà rafraîchie aujourd'hui
+        n'est pas modifiée : l'alerte reste quotidienne.
+
+        Args:
+            notifications: Instances préparées par build() dont la clé existe déjà
+            now: Nouvelle date de la ligne
+
+        Returns:
+            tuple: ({user_id: nombre de lignes lues redevenues non lues}, IDs des lignes rafraîchies)
+        """
+        if not notifications:
+            return {}, []
+
+        updates = {(notification.user_id, notification.dedupe_key): notification for notification in notifications}
+        rows = Notification.objects.filter(
+            user_id__in={user_id for user_id, _ in updates},
+            dedupe_key__in={key for _, key in updates},
+        )
+
+        today = timezone.localdate(now)
+        changed, reopened = [], {}
+        for row in rows:
+            update = updates.get((row.user_id, row.dedupe_key))
+            if update is None or timezone.localdate(row.created_at) >= today:
+                continue
+            if row.is_read:
+                reopened[row.user_id] = reopened.get(row.user_id, 0) + 1
+            row.titre, row.message = update.titre, update.message
+            row.is_read, row.read_at, row.created_at = False, None, now
+            changed.append(row)
+
+        Notification.objects.bulk_update(
+            changed, ['titre', 'message', 'is_read', 'read_at', 'created_at'], batch_size=batch_size,
+        )
+        return reopened, [row.id for row in changed]
@@ -0,0 +1,572 @@
+"""
+Service layer for Django -> Odoo synchronization
+
+Prépare les données envoyées à Odoo et synchronise les contacts, projets et
+tâches par lots : un upsert batch (load + external IDs) par lot de
+ODOO_BATCH_SIZE, puis un bulk_update des IDs Odoo côté Django.
+
+Les modifications à synchroniser viennent de l'outbox (OdooOutbox), écrite
+dans la transaction de chaque modification. drain_outbox() lit les
+événements en attente dans l'ordre des IDs et regroupe ceux d'une même
+entité : le coût suit le volume de modifications, pas la taille des tables.
+Les appels Odoo se font hors transaction ; seuls les IDs Odoo et le statut
+des événements sont écrits ensuite, dans une transaction courte.
+"""
+import logging
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import OdooOutbox, Profile, Projet, Tache
+from ..odoo_gateway import TRANSIENT_ERRORS, odoo_gateway
+from .partner_map_service import PartnerMapService
+from .projet_cache_service import ProjetCacheService
+
+logger = logging.getLogger(__name__)
+
+
+DRAIN_LOCK_KEY = 'odoo:outbox:draining'
+
+
+class OdooSyncService:
+    """Service class for batched Odoo synchronization"""
+
+    @staticmethod
+    def user_data(profile):
+        """
+        Données d'un contact Odoo
+
+        Args:
+            profile: Profile avec son user (select_related('user'))
+
+        Returns:
+            dict: Données attendues par odoo_gateway.upsert_partners
+        """
+        user = profile.user
+        return {
+            'id': user.id,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'phone': profile.phone,
+            'odoo_partner_id': profile.odoo_partner_id,
+        }
+
+    @staticmethod
+    def projet_data(projet):
+        """
+        Données d'un projet Odoo
+
+        Args:
+            projet: Projet avec son client (select_related('client__profile'))
+
+        Returns:
+            dict: Données attendues par odoo_gateway.upsert_projects
+        """
+        client_odoo_id = None
+        if projet.client_id:
+            client_profile = getattr(projet.client, 'profile', None)
+            client_odoo_id = client_profile.odoo_partner_id if client_profile else None
+
+        return {
+            'id': projet.id,
+            'titre': projet.titre,
+            'description': projet.description,
+            'client_odoo_id': client_odoo_id,
+            'date_debut': projet.date_debut,
+            'date_fin_prevue': projet.date_fin_prevue,
+            'odoo_project_id': projet.odoo_project_id,
+        }
+
+    @staticmethod
+    def push_profiles(profiles):
+        """
+        Crée ou met à jour les contacts Odoo de plusieurs profils (appels Odoo uniquement)
+
+        Les IDs Odoo sont reportés sur les instances ; save_profiles les enregistre.
+
+        Args:
+            profiles: Profils avec leur user (select_related('user'))
+
+        Returns:
+            tuple: (IDs des utilisateurs acceptés par Odoo, profils dont l'ID a changé, anciens IDs partner)
+        """
+        profiles = list(profiles)
+        partner_ids = odoo_gateway.upsert_partners([OdooSyncService.user_data(profile) for profile in profiles])
+
+        changed, stale = [], []
+        for profile in profiles:
+            partner_id = partner_ids.get(profile.user_id)
+            if partner_id and partner_id != profile.odoo_partner_id:
+                stale.append(profile.odoo_partner_id)
+                profile.odoo_partner_id = partner_id
+                changed.append(profile)
+        return set(partner_ids), changed, stale
+
+    @staticmethod
+    def save_profiles(changed, stale):
+        """Enregistre les IDs Odoo reportés par push_profiles"""
+        # bulk_update : une requête par lot, sans relancer le signal de synchronisation
+        Profile.objects.bulk_update(changed, ['odoo_partner_id'], batch_size=settings.ODOO_WRITEBACK_BATCH_SIZE)
+        if changed:
+            # Pas de signal post_save : correspondance partner <-> utilisateur mise à jour ici
+            partners_by_user = {profile.user_id: profile.odoo_partner_id for profile in changed}
+            transaction.on_commit(lambda: PartnerMapService.refresh(partners_by_user, stale))
+
+    @staticmethod
+    def sync_profiles(profiles):
+        """
+        Crée ou met à jour les contacts Odoo de plusieurs profils
+
+        Args:
+            profiles: Profils avec leur user (select_related('user'))
+
+        Returns:
+            int: Nombre de profils dont l'ID Odoo a été enregistré
+        """
+        _, changed, stale = OdooSyncService.push_profiles(profiles)
+        OdooSyncService.save_profiles(changed, stale)
+        return len(changed)
+
+    @staticmethod
+    def push_projets(projets):
+        """
+        Crée ou met à jour les projets Odoo de plusieurs projets (appels Odoo uniquement)
+
+        Args:
+            projets: Projets avec leur client (select_related('client__profile'))
+
+        Returns:
+            tuple: (IDs des projets acceptés par Odoo, projets dont l'ID a changé)
+        """
+        projets = list(projets)
+        project_ids = odoo_gateway.upsert_projects([OdooSyncService.projet_data(projet) for projet in projets])
+
+        changed = []
+        for projet in projets:
+            project_id = project_ids.get(projet.id)
+            if project_id and project_id != projet.odoo_project_id:
+                projet.odoo_project_id = project_id
+                changed.append(projet)
+        return set(project_ids), changed
+
+    @staticmethod
+    def save_projets(changed):
+        """Enregistre les IDs Odoo reportés par push_projets"""
+        Projet.objects.bulk_update(changed, ['odoo_project_id'], batch_size=settings.ODOO_WRITEBACK_BATCH_SIZE)
+        # bulk_update ne déclenche pas post_save : odoo_project_id fait partie du payload en cache
+        ProjetCacheService.invalidate([projet.id for projet in changed])
+
+    @staticmethod
+    def sync_projets(projets):
+        """
+        Crée ou met à jour les projets Odoo de plusieurs projets
+
+        Args:
+            projets: Projets avec leur client (select_related('client__profile'))
+
+        Returns:
+            int: Nombre de projets dont l'ID Odoo a été enregistré
+        """
+        _, changed = OdooSyncService.push_projets(projets)
+        OdooSyncService.save_projets(changed)
+        return len(changed)
+
+    @staticmethod
+    def tache_data(tache):
+        """
+        Données d'une tâche Odoo
+
+        Args:
+            tache: Tache avec son projet (select_related('projet'))
+
+        Returns:
+            dict: Données attendues par odoo_gateway.upsert_tasks
+        """
+        return {
+            'id': tache.id,
+            'titre': tache.titre,
+            'description': tache.description,
+            'projet_odoo_id': tache.projet.odoo_project_id,
+            'deadline': tache.deadline,
+            'priorite': tache.priorite,
+            'odoo_task_id': tache.odoo_task_id,
+        }
+
+    @staticmethod
+    def push_taches(taches):
+        """
+        Crée ou met à jour les tâches Odoo de plusieurs tâches (appels Odoo uniquement)
+
+        Les tâches dont le projet n'est pas encore dans Odoo sont ignorées.
+
+        Args:
+            taches: Tâches avec leur projet (select_related('projet'))
+
+        Returns:
+            tuple: (IDs des tâches acceptées par Odoo, tâches dont l'ID a changé)
+        """
+        taches = [tache for tache in taches if tache.projet.odoo_project_id]
+        task_ids = odoo_gateway.upsert_tasks([OdooSyncService.tache_data(tache) for tache in taches])
+
+        changed = []
+        for tache in taches:
+            task_id = task_ids.get(tache.id)
+            if task_id and task_id != tache.odoo_task_id:
+                tache.odoo_task_id = task_id
+                changed.append(tache)
+        return set(task_ids), changed
+
+    @staticmethod
+    def save_taches(changed):
+        """Enregistre les IDs Odoo reportés par push_taches"""
+        Tache.objects.bulk_update(changed, ['odoo_task_id'], batch_size=settings.ODOO_WRITEBACK_BATCH_SIZE)
+
+    @staticmethod
+    def sync_taches(taches):
+        """
+        Crée ou met à jour les tâches Odoo de plusieurs tâches
+
+        Les tâches dont le projet n'est pas encore dans Odoo sont ignorées.
+
+        Args:
+            taches: Tâches avec leur projet (select_related('projet'))
+
+        Returns:
+            int: Nombre de tâches dont l'ID Odoo a été enregistré
+        """
+        _, changed = OdooSyncService.push_taches(taches)
+        OdooSyncService.save_taches(changed)
+        return len(changed)
+
+    # ========================================
+    # OUTBOX
+    # ========================================
+
+    @staticmethod
+    def coalesce(events):
+        """
+        Regroupe les événements par entité : une seule écriture Odoo par entité
+
+        La dernière opération l'emporte (une suppression annule les mises à jour
+        précédentes) ; un upsert envoie tous les champs synchronisés de l'entité.
+
+        Args:
+            events: Événements OdooOutbox dans l'ordre des IDs
+
+        Returns:
+            dict: {(entity, entity_id): {'operation', 'odoo_id'}}
+        """
+        coalesced = {}
+        for event in events:
+            previous = coalesced.get((event.entity, event.entity_id))
+            odoo_id = event.odoo_id
+            if previous:
+                odoo_id = odoo_id or previous['odoo_id']
+            coalesced[(event.entity, event.entity_id)] = {
+                'operation': event.operation,
+                'odoo_id': odoo_id,
+            }
+        return coalesced
+
+    @staticmethod
+    def push_changes(coalesced):
+        """
+        Envoie à Odoo des modifications regroupées (appels Odoo uniquement, aucune écriture en base)
+
+        Les dépendances sont synchronisées dans le même passage : le projet
+        d'une tâche et le client d'un projet s'ils n'existent pas encore dans Odoo.
+
+        Args:
+            coalesced: Résultat de coalesce()
+
+        Returns:
+            dict: profiles, stale, projets, taches (instances à enregistrer, voir save_changes),
+                  deleted (contacts supprimés), rejected ({(entity, entity_id): raison})
+        """
+        ids = {'partner': set(), 'project': set(), 'task': set()}
+        deleted = {}
+        for (entity, entity_id), change in coalesced.items():
+            if change['operation'] == 'delete':
+                deleted[entity_id] = change['odoo_id']
+            else:
+                ids[entity].add(entity_id)
+
+        taches = list(Tache.objects.filter(id__in=ids['task']).select_related('projet'))
+        requested_projets = set(ids['project'])
+        ids['project'] |= {tache.projet_id for tache in taches if not tache.projet.odoo_project_id}
+
+        projets = Projet.objects.filter(id__in=ids['project']).select_related('client__profile').in_bulk()
+        for tache in taches:
+            # Même instance : l'ID Odoo écrit par push_projets est vu par push_taches
+            tache.projet = projets.get(tache.projet_id, tache.projet)
+
+        profiles = {
+            profile.user_id: profile
+            for profile in Profile.objects.filter(user_id__in=ids['partner']).select_related('user')
+        }
+        requested_profiles = set(profiles)
+        for projet in projets.values():
+            client_profile = getattr(projet.client, 'profile', None) if projet.client_id else None
+            if client_profile is None:
+                continue
+            # Une seule instance par client : l'ID Odoo écrit par push_profiles est vu par tous ses projets
+            if projet.client_id in profiles:
+                projet.client.profile = profiles[projet.client_id]
+            elif not client_profile.odoo_partner_id:
+                profiles[projet.client_id] = client_profile
+
+        if deleted:
+            OdooSyncService.delete_partners(deleted)
+
+        accepted_partners, changed_profiles, stale = (
+            OdooSyncService.push_profiles(profiles.values()) if profiles else (set(), [], [])
+        )
+        accepted_projets, changed_projets = OdooSyncService.push_projets(projets.values()) if projets else (set(), [])
+        accepted_taches, changed_taches = OdooSyncService.push_taches(taches) if taches else (set(), [])
+
+        # Entités demandées qui existent encore mais qu'Odoo n'a pas acceptées (ligne rejetée par load(),
+        # projet d'une tâche absent d'Odoo)
+        rejected = {}
+        for entity, requested, accepted in [
+            ('partner', requested_profiles, accepted_partners),
+            ('project', requested_projets & set(projets), accepted_projets),
+            ('task', {tache.id for tache in taches}, accepted_taches),
+        ]:
+            for entity_id in requested - accepted:
+                rejected[(entity, entity_id)] = "Not accepted by Odoo"
+
+        return {
+            'profiles': changed_profiles,
+            'stale': stale,
+            'projets': changed_projets,
+            'taches': changed_taches,
+            'deleted': len(deleted),
+            'rejected': rejected,
+        }
+
+    @staticmethod
+    def apply_events(events):
+        """
+        Applique un lot d'événements de l'outbox à Odoo (appels Odoo uniquement)
+
+        Si le lot échoue (hors erreur transitoire), les entités sont réessayées
+        une par une : seule l'entité fautive est en erreur.
+
+        Args:
+            events: Événements OdooOutbox dans l'ordre des IDs
+
+        Returns:
+            tuple: (modifications à enregistrer par save_changes, {event_id: erreur})
+
+        Raises:
+            TRANSIENT_ERRORS: Odoo indisponible ou limité, le lot reste à rejouer
+        """
+        coalesced = OdooSyncService.coalesce(events)
+        event_ids = {}
+        for event in events:
+            event_ids.setdefault((event.entity, event.entity_id), []).append(event.id)
+
+        failures = {}
+        try:
+            results = [OdooSyncService.push_changes(coalesced)]
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Odoo outbox batch failed ({e}), retrying entities one by one")
+            results = []
+            for key, change in coalesced.items():
+                try:
+                    results.append(OdooSyncService.push_changes({key: change}))
+                except TRANSIENT_ERRORS:
+                    raise
+                except Exception as entity_error:
+                    failures[key] = str(entity_error) or entity_error.__class__.__name__
+
+        merged = {'profiles': [], 'stale': [], 'projets': [], 'taches': [], 'deleted': 0}
+        for result in results:
+            for key in ['profiles', 'stale', 'projets', 'taches']:
+                merged[key] += result[key]
+            merged['deleted'] += result['deleted']
+            failures.update(result['rejected'])
+
+        errors = {}
+        for key, error in failures.items():
+            for event_id in event_ids.get(key, []):
+                errors[event_id] = error
+        return merged, errors
+
+    @staticmethod
+    def save_changes(changes):
+        """
+        Enregistre les IDs Odoo obtenus par apply_events
+
+        Returns:
+            dict: Nombre d'entités enregistrées par type et de contacts supprimés
+        """
+        OdooSyncService.save_profiles(changes['profiles'], changes['stale'])
+        OdooSyncService.save_projets(changes['projets'])
+        OdooSyncService.save_taches(changes['taches'])
+        return {
+            'partners': len(changes['profiles']),
+            'projets': len(changes['projets']),
+            'taches': len(changes['taches']),
+            'deleted': changes['deleted'],
+        }
+
+    @staticmethod
+    def mark_events(events, errors):
+        """
+        Met à jour le statut des événements d'un lot (une requête)
+
+        Un événement en erreur reste en attente jusqu'à ODOO_OUTBOX_MAX_ATTEMPTS
+        essais, puis est abandonné (failed) pour ne plus bloquer l'outbox.
+
+        Returns:
+            dict: failed (abandonnés), retried
+        """
+        now = timezone.now()
+        stats = {'failed': 0, 'retried': 0}
+        for event in events:
+            event.attempts += 1
+            if event.id in errors:
+                event.error = errors[event.id]
+                if event.attempts >= settings.ODOO_OUTBOX_MAX_ATTEMPTS:
+                    event.status, event.processed_at = 'failed', now
+                    stats['failed'] += 1
+                    logger.error(f"❌ Odoo outbox event {event} failed: {event.error}")
+                else:
+                    stats['retried'] += 1
+            else:
+                event.status, event.error, event.processed_at = 'done', '', now
+        OdooOutbox.objects.bulk_update(events, ['status', 'attempts', 'error', 'processed_at'])
+        return stats
+
+    @staticmethod
+    def delete_partners(deleted):
+        """
+        Supprime les contacts des utilisateurs supprimés
+
+        Args:
+            deleted: {user_id: Odoo partner ID ou None (retrouvé par external ID)}
+        """
+        unknown = {f"user_{user_id}": user_id for user_id, partner_id in deleted.items() if not partner_id}
+        partner_ids = {partner_id for partner_id in deleted.values() if partner_id}
+        partner_ids |= set(odoo_gateway.get_external_ids('res.partner', unknown).values())
+        odoo_gateway.delete_partners(sorted(partner_ids))
+
+    @staticmethod
+    def drain_outbox(batch_size=None, max_events=None):
+        """
+        Vide l'outbox par lots, dans l'ordre des IDs
+
+        Un seul consommateur à la fois : verrou en cache portant un jeton
+        propre au passage, prolongé avant chaque lot. Un passage qui a perdu
+        son verrou (expiré puis repris par un autre worker) s'arrête et ne
+        supprime pas le verrou de l'autre. Pour chaque lot :
+        1. lecture des événements en attente
+        2. appels Odoo, hors transaction (apply_events)
+        3. une transaction courte : IDs Odoo et statut des événements
+
+        Chaque événement est marqué traité : un événement commité en retard
+        (ID plus petit qu'un événement déjà traité) reste en attente et est lu
+        au passage suivant. ODOO_OUTBOX_SAFETY_LAG laisse seulement le temps
+        de regrouper les modifications rapprochées d'une même entité.
+
+        Une erreur transitoire (Odoo indisponible, 429) interrompt le passage
+        sans compter d'essai : le lot est rejoué (upserts idempotents par
+        external ID). Les autres erreurs sont isolées par entité.
+
+        Args:
+            batch_size: Événements par lot (défaut: ODOO_OUTBOX_BATCH_SIZE)
+            max_events: Plafond du passage (défaut: ODOO_OUTBOX_MAX_EVENTS_PER_RUN) ;
+                le reste est repris au passage suivant
+
+        Returns:
+            dict: events, partners, projets, taches, deleted, failed, retried
+        """
+        batch_size = batch_size or settings.ODOO_OUTBOX_BATCH_SIZE
+        max_events = max_events or settings.ODOO_OUTBOX_MAX_EVENTS_PER_RUN
+        stats = {'events': 0, 'partners': 0, 'projets': 0, 'taches': 0, 'deleted': 0, 'failed': 0, 'retried': 0}
+
+        token = secrets.token_hex(16)
+        if not cache.add(DRAIN_LOCK_KEY, token, timeout=settings.ODOO_OUTBOX_LOCK_TIMEOUT):
+            logger.info("⏭️ Odoo outbox already being drained by another worker")
+            return stats
+
+        try:
+            # Chaque événement est essayé au plus une fois par passage
+            last_id = 0
+            while stats['events'] < max_events:
+                if not OdooSyncService._renew_drain_lock(token):
+                    logger.warning("⚠️ Odoo outbox lock lost, another worker resumes the drain")
+                    return stats
+
+                cutoff = timezone.now() - timedelta(seconds=settings.ODOO_OUTBOX_SAFETY_LAG)
+                limit = min(batch_size, max_events - stats['events'])
+                events = list(
+                    OdooOutbox.objects.filter(status='pending', id__gt=last_id, created_at__lte=cutoff)[:limit]
+                )
+                if not events:
+                    return stats
+
+                logger.info(f"📦 Draining {len(events)} Odoo outbox events (from #{events[0].id})...")
+                changes, errors = OdooSyncService.apply_events(events)
+
+                with transaction.atomic():
+                    for key, count in OdooSyncService.save_changes(changes).items():
+                        stats[key] += count
+                    for key, count in OdooSyncService.mark_events(events, errors).items():
+                        stats[key] += count
+
+                stats['events'] += len(events)
+                last_id = events[-1].id
+
+            logger.info(f"⏸️ Odoo outbox run capped at {max_events} events, resuming on next run")
+            return stats
+        finally:
+            if cache.get(DRAIN_LOCK_KEY) == token:
+                cache.delete(DRAIN_LOCK_KEY)
+
+    @staticmethod
+    def _renew_drain_lock(token):
+        """Prolonge le verrou du drain s'il porte encore ce jeton"""
+        if cache.get(DRAIN_LOCK_KEY) != token:
+            return False
+        cache.touch(DRAIN_LOCK_KEY, settings.ODOO_OUTBOX_LOCK_TIMEOUT)
+        return True
+
+    @staticmethod
+    def prune_outbox():
+        """
+        Supprime les événements traités ou abandonnés depuis plus de ODOO_OUTBOX_RETENTION_DAYS
+
+        Returns:
+            int: Nombre d'événements supprimés
+        """
+        cutoff = timezone.now() - timedelta(days=settings.ODOO_OUTBOX_RETENTION_DAYS)
+        deleted, _ = OdooOutbox.objects.filter(status__in=['done', 'failed'], created_at__lt=cutoff).delete()
+        return deleted
+
+    @staticmethod
+    def enqueue(entity, entity_ids):
+        """
+        Publie des entités dans l'outbox (rattrapage, écritures hors save())
+
+        Args:
+            entity: 'partner' (IDs utilisateurs), 'project' ou 'task'
+            entity_ids: IDs locaux
+
+        Returns:
+            int: Nombre d'événements créés
+        """
+        events = OdooOutbox.objects.bulk_create(
+            (OdooOutbox(entity=entity, entity_id=entity_id) for entity_id in entity_ids),
+            batch_size=1000,
+        )
+        return len(events)
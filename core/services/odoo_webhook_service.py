@@ -0,0 +1,377 @@
+"""
+Service layer for Odoo webhooks (inbox)
+
+Les endpoints vérifient le token, enregistrent l'événement brut (receive)
+et répondent 202. process_pending() traite l'inbox par lots :
+- un lot est réclamé dans une courte transaction (statut 'processing') ;
+  les appels Odoo se font hors transaction, puis notifications et statuts
+  sont écrits dans une seconde transaction courte
+- rejeux ignorés : ID d'événement unique (en-tête X-Odoo-Event-Id, sinon
+  empreinte du contenu et du jour de réception)
+- une requête pour les tâches, une pour les membres des projets, quel que
+  soit le nombre d'événements ; les partners -> utilisateurs sont résolus
+  par la correspondance en cache (PartnerMapService)
+- un seul insert des notifications (NotificationWriter)
+- un événement en échec est réessayé jusqu'à ODOO_WEBHOOK_MAX_ATTEMPTS ;
+  Odoo indisponible ou limité ne compte pas d'essai (lot remis en attente)
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import OdooWebhookEvent, Projet, Tache
+from ..odoo_gateway import TRANSIENT_ERRORS, odoo_gateway
+from .notification_writer import NotificationWriter
+from .partner_map_service import PartnerMapService
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = 'odoo:webhooks:scheduled'
+
+DEADLINE_TITLES = {
+    'deadline_3days': "Deadline dans 3 jours",
+    'deadline_1day': "Deadline demain",
+    'deadline_today': "Deadline AUJOURD'HUI",
+    'deadline_overdue': "Tâche en retard",
+}
+
+
+class OdooWebhookError(Exception):
+    """Événement invalide : marqué en échec sans nouvel essai"""
+    pass
+
+
+class OdooWebhookService:
+    """Service class for the Odoo webhook inbox"""
+
+    # ========================================
+    # RÉCEPTION
+    # ========================================
+
+    @staticmethod
+    def event_id(kind, payload, params, header_id=None):
+        """
+        ID de déduplication d'un événement
+
+        Args:
+            kind: 'deadline' ou 'task_assigned'
+            payload: Corps de la requête
+            params: Paramètres de l'URL
+            header_id: En-tête X-Odoo-Event-Id s'il est fourni par Odoo
+
+        Returns:
+            str: '<kind>:<id>' ; sans en-tête, empreinte du contenu et du jour
+                 (un rejeu le même jour est ignoré)
+        """
+        if header_id:
+            return f"{kind}:{header_id}"[:128]
+        content = json.dumps([payload, params], sort_keys=True, default=str)
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        return f"{kind}:{timezone.localdate().isoformat()}:{digest}"
+
+    @staticmethod
+    def receive(kind, payload, params, header_id=None):
+        """
+        Enregistre un webhook dans l'inbox (une requête, rejeux ignorés)
+
+        Le consommateur est planifié après le commit.
+
+        Returns:
+            str: ID de l'événement
+        """
+        event_id = OdooWebhookService.event_id(kind, payload, params, header_id)
+        OdooWebhookEvent.objects.bulk_create(
+            [OdooWebhookEvent(event_id=event_id, kind=kind, payload=payload, params=params)],
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(OdooWebhookService.schedule)
+        return event_id
+
+    @staticmethod
+    def schedule():
+        """
+        Planifie process_odoo_webhooks dans ODOO_WEBHOOK_SCHEDULE_DELAY secondes
+
+        Une rafale de webhooks ne planifie qu'un consommateur, qui traite
+        tous les événements reçus entre-temps. Celery Beat rattrape les
+        événements si la planification échoue.
+        """
+        from ..tasks import process_odoo_webhooks
+
+        delay = settings.ODOO_WEBHOOK_SCHEDULE_DELAY
+        if not cache.add(SCHEDULE_KEY, 1, timeout=delay + 60):
+            return
+        try:
+            process_odoo_webhooks.apply_async(countdown=delay)
+        except Exception as e:
+            cache.delete(SCHEDULE_KEY)
+            logger.warning(f"⚠️ Failed to queue process_odoo_webhooks: {e}")
+
+    # ========================================
+    # TRAITEMENT
+    # ========================================
+
+    @staticmethod
+    def parse(event):
+        """
+        Extrait la tâche et les partners concernés d'un événement
+
+        Supporte deux formats de deadline :
+        1. Format personnalisé : {"task_id": 123, "type": "deadline_3days", "users": [...], "project_manager": 7}
+        2. Format Odoo Studio : {"_id": 123, "_model": "project.task"} + ?type=deadline_3days
+           (partners lus dans Odoo via le miroir en cache)
+
+        Returns:
+            dict: odoo_task_id, type, partner_ids, manager_id
+
+        Raises:
+            OdooWebhookError: si l'événement ne désigne aucune tâche
+        """
+        payload = event.payload
+        if event.kind == 'task_assigned':
+            if not payload.get('task_id') or not payload.get('user_id'):
+                raise OdooWebhookError("Missing task_id or user_id")
+            return {
+                'odoo_task_id': payload['task_id'],
+                'type': 'task_assigned',
+                'partner_ids': [payload['user_id']],
+                'manager_id': None,
+            }
+
+        if 'task_id' in payload:
+            partner_ids, manager_id = payload.get('users') or [], payload.get('project_manager')
+            odoo_task_id, notification_type = payload['task_id'], payload.get('type')
+        else:
+            odoo_task_id = payload.get('_id') or payload.get('id')
+            notification_type = event.params.get('type', 'deadline_notification')
+            if odoo_task_id:
+                partner_ids, manager_id = odoo_gateway.get_task_partners(odoo_task_id)
+
+        if not odoo_task_id:
+            raise OdooWebhookError("Missing task ID")
+        return {
+            'odoo_task_id': odoo_task_id,
+            'type': notification_type,
+            'partner_ids': list(partner_ids),
+            'manager_id': manager_id,
+        }
+
+    @staticmethod
+    def deadline_message(tache, notification_type):
+        """Titre et message d'une notification de deadline"""
+        deadline = tache.deadline.strftime('%d/%m') if tache.deadline else 'Sans deadline'
+        messages = {
+            'deadline_3days': f"{tache.titre} • {deadline}",
+            'deadline_1day': f"{tache.titre} • Échéance demain",
+            'deadline_today': f"{tache.titre} • À terminer aujourd'hui",
+            'deadline_overdue': f"{tache.titre} • Retard",
+        }
+        return DEADLINE_TITLES.get(notification_type, "Notification"), messages.get(notification_type, tache.titre)
+
+    @staticmethod
+    def claim(batch_size, after_id=0):
+        """
+        Réclame un lot d'événements dans une courte transaction
+
+        Les événements en attente, ou réclamés depuis plus de
+        ODOO_WEBHOOK_CLAIM_TIMEOUT (worker interrompu), passent en 'processing' :
+        un autre worker ne les reprend pas pendant leur traitement.
+
+        Args:
+            batch_size: Nombre maximal d'événements
+            after_id: Ignore les événements déjà vus pendant ce passage
+
+        Returns:
+            list: Événements réclamés, par ID croissant
+        """
+        stale = timezone.now() - timedelta(seconds=settings.ODOO_WEBHOOK_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            events = list(
+                OdooWebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='pending') | Q(status='processing', claimed_at__lt=stale), id__gt=after_id)
+                [:batch_size]
+            )
+            if events:
+                now = timezone.now()
+                OdooWebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+                    status='processing', claimed_at=now,
+                )
+                for event in events:
+                    event.status, event.claimed_at = 'processing', now
+        return events
+
+    @staticmethod
+    def release(events):
+        """Remet un lot réclamé en attente, sans compter d'essai"""
+        OdooWebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+            status='pending', claimed_at=None,
+        )
+
+    @staticmethod
+    def parse_events(events):
+        """
+        Analyse un lot d'événements (hors transaction : peut appeler Odoo)
+
+        Raises:
+            OdooRateLimitError, OdooConnectionError...: Odoo indisponible ou
+                limité (TRANSIENT_ERRORS), le lot est à rejouer tel quel
+
+        Returns:
+            tuple: (parsed par ID d'événement, erreurs par ID, IDs en échec définitif)
+        """
+        parsed, errors, permanent = {}, {}, set()
+        for event in events:
+            try:
+                parsed[event.id] = OdooWebhookService.parse(event)
+            except TRANSIENT_ERRORS:
+                raise
+            except OdooWebhookError as e:
+                errors[event.id] = str(e)
+                permanent.add(event.id)
+            except Exception as e:
+                errors[event.id] = str(e)
+        return parsed, errors, permanent
+
+    @staticmethod
+    def write_events(events, parsed, errors, permanent):
+        """
+        Écrit les notifications d'un lot analysé et met à jour les statuts
+
+        Appelé dans une transaction, sans appel à Odoo.
+
+        Returns:
+            dict: notifications, failed (abandonnés), retried
+        """
+        # Une requête par type d'objet pour tout le lot
+        taches = {
+            tache.odoo_task_id: tache
+            for tache in Tache.objects.filter(
+                odoo_task_id__in={p['odoo_task_id'] for p in parsed.values()}
+            ).select_related('projet')
+        }
+        partner_ids = set()
+        for p in parsed.values():
+            partner_ids.update(p['partner_ids'])
+            if p['manager_id']:
+                partner_ids.add(p['manager_id'])
+        users_by_partner = PartnerMapService.users_for_partners(partner_ids)
+        deadline_projets = {
+            taches[p['odoo_task_id']].projet_id
+            for p in parsed.values() if p['type'] != 'task_assigned' and p['odoo_task_id'] in taches
+        }
+        members = set(
+            Projet.membres.through.objects.filter(
+                projet_id__in=deadline_projets, user_id__in=set(users_by_partner.values())
+            ).values_list('projet_id', 'user_id')
+        ) if deadline_projets and users_by_partner else set()
+
+        notifications = []
+        for event_id, p in parsed.items():
+            tache = taches.get(p['odoo_task_id'])
+            if tache is None:
+                errors[event_id] = f"Task not found in Django: odoo_task_id={p['odoo_task_id']}"
+                continue
+
+            if p['type'] == 'task_assigned':
+                user_id = users_by_partner.get(p['partner_ids'][0])
+                if user_id is None:
+                    errors[event_id] = f"User not found for Odoo partner {p['partner_ids'][0]}"
+                    continue
+                deadline = tache.deadline.strftime('%d/%m') if tache.deadline else 'Sans deadline'
+                notifications.append(NotificationWriter.build(
+                    user_id, 'task_assigned', "Nouvelle tâche assignée", f"{tache.titre} • {deadline}",
+                    tache_id=tache.id, projet_id=tache.projet_id,
+                ))
+                continue
+
+            # Deadline : membres du projet et chef de projet uniquement
+            titre, message = OdooWebhookService.deadline_message(tache, p['type'])
+            recipients = {
+                users_by_partner[partner_id]
+                for partner_id in p['partner_ids'] + ([p['manager_id']] if p['manager_id'] else [])
+                if partner_id in users_by_partner
+            }
+            for user_id in recipients:
+                if (tache.projet_id, user_id) in members or user_id == tache.projet.chef_projet_id:
+                    notifications.append(NotificationWriter.build(
+                        user_id, p['type'], titre, message, tache_id=tache.id, projet_id=tache.projet_id,
+                    ))
+
+        count = NotificationWriter.write(notifications)
+
+        now = timezone.now()
+        stats = {'notifications': count, 'failed': 0, 'retried': 0}
+        for event in events:
+            event.attempts += 1
+            if event.id in errors:
+                event.error = errors[event.id]
+                if event.id in permanent or event.attempts >= settings.ODOO_WEBHOOK_MAX_ATTEMPTS:
+                    event.status, event.processed_at = 'failed', now
+                    stats['failed'] += 1
+                    logger.error(f"❌ Odoo webhook {event.event_id} failed: {event.error}")
+                else:
+                    event.status = 'pending'
+                    stats['retried'] += 1
+            else:
+                event.status, event.error, event.processed_at = 'done', '', now
+        OdooWebhookEvent.objects.bulk_update(events, ['status', 'attempts', 'error', 'processed_at'])
+        return stats
+
+    @staticmethod
+    def process_pending(batch_size=None):
+        """
+        Traite les événements en attente par lots
+
+        Chaque lot est réclamé, analysé hors transaction (appels Odoo) puis
+        écrit dans une transaction courte. Chaque événement est traité au
+        plus une fois par passage ; ceux en échec sont repris au passage suivant.
+
+        Raises:
+            OdooRateLimitError, OdooConnectionError...: Odoo indisponible ou
+                limité (TRANSIENT_ERRORS), le lot en cours est remis en attente
+
+        Returns:
+            dict: events, notifications, failed, retried
+        """
+        # Les webhooks reçus à partir de maintenant planifient un nouveau passage
+        cache.delete(SCHEDULE_KEY)
+        batch_size = batch_size or settings.ODOO_WEBHOOK_BATCH_SIZE
+        stats = {'events': 0, 'notifications': 0, 'failed': 0, 'retried': 0}
+        last_id = 0
+
+        while True:
+            events = OdooWebhookService.claim(batch_size, last_id)
+            if not events:
+                return stats
+
+            logger.info(f"📥 Processing {len(events)} Odoo webhook events...")
+            try:
+                parsed, errors, permanent = OdooWebhookService.parse_events(events)
+            except TRANSIENT_ERRORS:
+                OdooWebhookService.release(events)
+                raise
+
+            with transaction.atomic():
+                for key, count in OdooWebhookService.write_events(events, parsed, errors, permanent).items():
+                    stats[key] += count
+            stats['events'] += len(events)
+            last_id = events[-1].id
+
+    @staticmethod
+    def prune():
+        """
+        Supprime les événements traités ou abandonnés depuis plus de ODOO_WEBHOOK_RETENTION_DAYS
+
+        Returns:
+            int: Nombre d'événements supprimés
+        """
+        cutoff = timezone.now() - timedelta(days=settings.ODOO_WEBHOOK_RETENTION_DAYS)
+        deleted, _ = OdooWebhookEvent.objects.filter(status__in=['done', 'failed'], processed_at__lt=cutoff).delete()
+        return deleted
@@ -0,0 +1,110 @@
+"""
+Service layer for the Odoo partner <-> Django user map
+
+Les webhooks Odoo désignent les destinataires par leur partner Odoo
+(res.partner) : la correspondance partner_id <-> user_id est mise en cache
+dans les deux sens, une clé par ID :
+- 'odoo:partner_map:partner:<partner_id>' -> user_id
+- 'odoo:partner_map:user:<user_id>' -> partner_id
+
+Les IDs inconnus sont aussi mis en cache (valeur 0) : un lot d'événements
+est résolu en un aller-retour cache, et une seule requête (index unique
+partiel sur Profile.odoo_partner_id) pour les IDs absents du cache.
+
+Le cache est rafraîchi à l'enregistrement d'un profil (signaux Profile) et
+après l'écriture des IDs par la synchronisation (OdooSyncService.sync_profiles).
+Les écritures par QuerySet.update() ne passent pas par là : elles sont
+rattrapées à l'expiration (ODOO_PARTNER_MAP_TTL).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import Profile
+
+PARTNER_PREFIX = 'odoo:partner_map:partner:'
+USER_PREFIX = 'odoo:partner_map:user:'
+MISSING = 0
+
+
+class PartnerMapService:
+    """Service class for the cached partner_id <-> user_id map"""
+
+    @staticmethod
+    def _resolve(ids, prefix, field, value_field):
+        """
+        Résout des IDs par le cache, puis une requête pour les IDs manquants
+
+        Returns:
+            dict: {id: valeur} pour les IDs connus uniquement
+        """
+        ids = {int(i) for i in ids if i}
+        if not ids:
+            return {}
+
+        cached = cache.get_many([f'{prefix}{i}' for i in ids])
+        resolved = {int(key[len(prefix):]): value for key, value in cached.items()}
+
+        missing = ids - resolved.keys()
+        if missing:
+            found = dict(
+                Profile.objects.filter(**{f'{field}__in': missing}).values_list(field, value_field)
+            )
+            cache.set_many(
+                {f'{prefix}{i}': found.get(i, MISSING) for i in missing},
+                timeout=settings.ODOO_PARTNER_MAP_TTL,
+            )
+            resolved.update(found)
+
+        return {key: value for key, value in resolved.items() if value != MISSING}
+
+    @staticmethod
+    def users_for_partners(partner_ids):
+        """
+        Utilisateurs Django de plusieurs partners Odoo
+
+        Args:
+            partner_ids: IDs Odoo (res.partner)
+
+        Returns:
+            dict: {partner_id: user_id} (partners sans utilisateur omis)
+        """
+        return PartnerMapService._resolve(partner_ids, PARTNER_PREFIX, 'odoo_partner_id', 'user_id')
+
+    @staticmethod
+    def partners_for_users(user_ids):
+        """
+        Partners Odoo de plusieurs utilisateurs Django
+
+        Returns:
+            dict: {user_id: partner_id} (utilisateurs non synchronisés omis)
+        """
+        return PartnerMapService._resolve(user_ids, USER_PREFIX, 'user_id', 'odoo_partner_id')
+
+    @staticmethod
+    def refresh(partners_by_user, stale_partner_ids=()):
+        """
+        Met à jour le cache après un changement d'odoo_partner_id
+
+        Args:
+            partners_by_user: {user_id: partner_id ou None}
+            stale_partner_ids: Anciens partners de ces utilisateurs, à oublier
+        """
+        stale = {partner_id for partner_id in stale_partner_ids if partner_id} - set(partners_by_user.values())
+        if stale:
+            cache.delete_many([f'{PARTNER_PREFIX}{partner_id}' for partner_id in stale])
+
+        values = {}
+        for user_id, partner_id in partners_by_user.items():
+            values[f'{USER_PREFIX}{user_id}'] = partner_id or MISSING
+            if partner_id:
+                values[f'{PARTNER_PREFIX}{partner_id}'] = user_id
+        if values:
+            cache.set_many(values, timeout=settings.ODOO_PARTNER_MAP_TTL)
+
+    @staticmethod
+    def forget(user_id, partner_id=None):
+        """Oublie un utilisateur supprimé (et son partner)"""
+        keys = [f'{USER_PREFIX}{user_id}']
+        if partner_id:
+            keys.append(f'{PARTNER_PREFIX}{partner_id}')
+        cache.delete_many(keys)
@@ -0,0 +1,82 @@
+"""
+Request-scoped permission context
+
+Charge une seule fois par requête le profil (avec son pôle), les projets
+auxquels l'utilisateur est associé (index ProjetVisibility) et les tâches
+qui lui sont assignées. Les classes de permission, les vues et
+ProjetService lisent ces données au lieu de refaire des requêtes
+`membres.filter(id=user.id).exists()` / `assigne_a.filter(...).exists()`.
+"""
+from django.utils.functional import cached_property
+
+from ..models import Profile, ProjetVisibility, Tache
+from ..utils.helpers import is_admin_or_super
+
+
+class PermissionContext:
+    """Données de permission d'un utilisateur, chargées paresseusement et mises en cache"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def profile(self):
+        """Profil de l'utilisateur avec son pôle (1 requête)"""
+        if not self.user or not self.user.is_authenticated:
+            return None
+        return Profile.objects.select_related('pole').filter(user_id=self.user.pk).first()
+
+    @cached_property
+    def is_admin(self):
+        return bool(is_admin_or_super(self.profile))
+
+    @cached_property
+    def projet_reasons(self):
+        """{projet_id: {raisons}} pour tous les projets associés (1 requête)"""
+        reasons = {}
+        if not self.profile:
+            return reasons
+        rows = ProjetVisibility.objects.filter(user_id=self.user.pk).values_list('projet_id', 'reason')
+        for projet_id, reason in rows:
+            reasons.setdefault(projet_id, set()).add(reason)
+        return reasons
+
+    @cached_property
+    def tache_ids(self):
+        """IDs des tâches assignées à l'utilisateur (1 requête)"""
+        if not self.profile:
+            return frozenset()
+        return frozenset(
+            Tache.assigne_a.through.objects.filter(user_id=self.user.pk).values_list('tache_id', flat=True)
+        )
+
+    def reasons_for(self, projet_id):
+        return self.projet_reasons.get(projet_id, set())
+
+    def is_membre(self, projet_id):
+        return 'membre' in self.reasons_for(projet_id)
+
+    def is_assigned(self, tache_id):
+        return tache_id in self.tache_ids
+
+    def is_chef_pole_of(self, pole_id):
+        """Chef de pôle du pôle donné"""
+        profile = self.profile
+        return bool(profile and profile.role == 'chef_pole' and profile.pole_id and profile.pole_id == pole_id)
+
+
+def get_permission_context(request):
+    """
+    Retourne le PermissionContext de la requête (créé au premier appel)
+
+    Args:
+        request: La requête DRF (ou Django)
+
+    Returns:
+        PermissionContext
+    """
+    context = getattr(request, '_permission_context', None)
+    if context is None or context.user is not request.user:
+        context = PermissionContext(request.user)
+        request._permission_context = context
+    return context
@@ -0,0 +1,128 @@
+"""
+Service layer for the cached project detail payload
+
+Le payload de ProjetDetailSerializer (projet + tâches + documents + membres)
+est mis en cache sous une clé qui inclut deux versions :
+- 'projet:<id>' : incrémentée par les signaux Projet, Tache, Document et membres
+- 'projet_detail:shared' : incrémentée par les signaux Profile et Pole,
+  dont les données sont imbriquées dans tous les projets
+- 'projets:listings' : incrémentée avec toute version de projet, pour les
+  caches qui agrègent plusieurs projets (voir UserProfileService)
+
+Les mêmes versions servent de validateurs HTTP (ETag, Last-Modified) :
+une requête conditionnelle à jour est résolue sans sérialisation, après la
+seule vérification des permissions (voir ProjetDetailView.retrieve).
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+
+from ..utils.cache import bump_cache_version, get_cache_versions
+
+
+SHARED_NAMESPACE = 'projet_detail:shared'
+LISTINGS_NAMESPACE = 'projets:listings'
+PAYLOAD_TIMEOUT = 300
+
+
+class ProjetCacheService:
+    """Service class for ProjetDetailView caching and HTTP validators"""
+
+    @staticmethod
+    def namespace(projet_id):
+        return f'projet:{projet_id}'
+
+    @staticmethod
+    def get_versions(projet_id):
+        """
+        Retourne (version du projet, version partagée) en un aller-retour cache
+
+        Returns:
+            tuple: (int, int)
+        """
+        namespace = ProjetCacheService.namespace(projet_id)
+        versions = get_cache_versions([namespace, SHARED_NAMESPACE])
+        return versions[namespace], versions[SHARED_NAMESPACE]
+
+    @staticmethod
+    def get_validators(projet_id, user_id, versions):
+        """
+        Calcule l'ETag et la date Last-Modified d'un projet pour un utilisateur
+
+        L'ETag dépend de l'utilisateur : il ne peut pas être réutilisé
+        par quelqu'un qui n'a jamais obtenu le projet.
+
+        Args:
+            projet_id: ID du projet
+            user_id: ID de l'utilisateur
+            versions: Résultat de get_versions
+
+        Returns:
+            tuple: (etag entre guillemets, timestamp Last-Modified en secondes)
+        """
+        projet_version, shared_version = versions
+        digest = hashlib.md5(f'{projet_id}:{user_id}:{projet_version}:{shared_version}'.encode()).hexdigest()
+        last_modified = max(projet_version, shared_version) // 1_000_000_000
+        return f'"{digest}"', last_modified
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        """
+        Vérifie les en-têtes If-None-Match / If-Modified-Since de la requête
+
+        If-None-Match est prioritaire (RFC 9110)
+
+        Returns:
+            bool: True si le client possède déjà la version courante
+        """
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and last_modified <= if_modified_since
+
+    @staticmethod
+    def set_headers(response, etag, last_modified):
+        """Ajoute les validateurs HTTP à la réponse (revalidation obligatoire)"""
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @staticmethod
+    def payload_key(projet_id, host, versions):
+        # Versions lues AVANT la requête en base : une modification concurrente
+        # change la clé au lieu d'y associer des données périmées
+        projet_version, shared_version = versions
+        # L'hôte fait partie de la clé : fichier_url est une URL absolue
+        return f'projet_detail:{projet_id}:{projet_version}:{shared_version}:{host}'
+
+    @staticmethod
+    def get_payload(projet_id, host, versions):
+        """Retourne le payload sérialisé en cache (None si absent)"""
+        return cache.get(ProjetCacheService.payload_key(projet_id, host, versions))
+
+    @staticmethod
+    def set_payload(projet_id, host, versions, payload):
+        """Met en cache le payload sérialisé d'un projet"""
+        cache.set(ProjetCacheService.payload_key(projet_id, host, versions), payload, PAYLOAD_TIMEOUT)
+
+    @staticmethod
+    def invalidate(projet_ids):
+        """
+        Invalide le cache d'un ou plusieurs projets
+
+        Args:
+            projet_ids: IDs des projets modifiés
+        """
+        namespaces = [ProjetCacheService.namespace(projet_id) for projet_id in projet_ids if projet_id]
+        if namespaces:
+            bump_cache_version(LISTINGS_NAMESPACE, *namespaces)
+
+    @staticmethod
+    def invalidate_shared():
+        """Invalide tous les projets (profil ou pôle imbriqué modifié)"""
+        bump_cache_version(SHARED_NAMESPACE)
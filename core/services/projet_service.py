@@ -3,24 +3,28 @@ Service layer for Projet business logic
 Centralizes permissions checks and business rules
 """
 from ..utils.helpers import is_admin_or_super, is_super_admin
+from .permission_context import PermissionContext
+from .visibility_service import VisibilityService
 
 
 class ProjetService:
     """Service class for Projet-related business logic"""
 
     @staticmethod
-    def can_user_view_projet(user, projet):
+    def can_user_view_projet(user, projet, context=None):
         """
         Vérifie si un utilisateur peut voir un projet
 
         Args:
             user: L'utilisateur Django
             projet: L'instance du projet
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             bool: True si l'utilisateur peut voir le projet
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return False
 
@@ -28,40 +32,25 @@ class ProjetService:
         if is_admin_or_super(profile):
             return True
 
-        # Le créateur voit tous ses projets
-        if projet.created_by == user:
-            return True
-
-        # Projets brouillon et en_attente : uniquement admin et créateur
-        if projet.statut in ['brouillon', 'en_attente']:
-            return False
-
-        # Projets publics : membres, chef, client peuvent voir
-        if projet.statut in ['en_cours', 'en_revision', 'termine', 'annule']:
-            if (projet.membres.filter(id=user.id).exists() or
-                projet.chef_projet == user or
-                projet.client == user):
-                return True
-
-            # Chef de pôle peut voir les projets de son pôle
-            if profile.role == 'chef_pole' and profile.pole:
-                return projet.pole == profile.pole
-
-        return False
+        # Créateur : tous ses projets
+        # Membres, chef, client, chef de pôle : projets publics uniquement
+        return VisibilityService.can_view(context.reasons_for(projet.pk), projet.statut)
 
     @staticmethod
-    def can_user_manage_projet(user, projet):
+    def can_user_manage_projet(user, projet, context=None):
         """
         Vérifie si un utilisateur peut modifier un projet
 
         Args:
             user: L'utilisateur Django
             projet: L'instance du projet
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             bool: True si l'utilisateur peut modifier le projet
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return False
 
@@ -70,17 +59,17 @@ class ProjetService:
             return True
 
         # Créateur du projet peut modifier
-        if projet.created_by == user:
+        if projet.created_by_id == user.id:
             return True
 
         # Chef de pôle peut gérer les projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole:
-            return projet.pole == profile.pole
+        if context.is_chef_pole_of(projet.pole_id):
+            return True
 
         return False
 
     @staticmethod
-    def can_user_delete_projet(user, projet):
+    def can_user_delete_projet(user, projet, context=None):
         """
         Vérifie si un utilisateur peut supprimer un projet
         Seul super_admin peut supprimer
@@ -88,18 +77,20 @@ class ProjetService:
         Args:
             user: L'utilisateur Django
             projet: L'instance du projet
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             bool: True si l'utilisateur peut supprimer le projet
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return False
 
         return is_super_admin(profile)
 
     @staticmethod
-    def can_user_change_statut(user, projet, nouveau_statut=None):
+    def can_user_change_statut(user, projet, nouveau_statut=None, context=None):
         """
         Vérifie si un utilisateur peut changer le statut d'un projet
 
@@ -107,11 +98,13 @@ class ProjetService:
             user: L'utilisateur Django
             projet: L'instance du projet
             nouveau_statut: Le nouveau statut souhaité (optionnel)
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             bool: True si l'utilisateur peut changer le statut
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return False
 
@@ -120,15 +113,15 @@ class ProjetService:
             return True
 
         # Créateur du projet peut changer le statut
-        if projet.created_by == user:
+        if projet.created_by_id == user.id:
             return True
 
         # Chef de pôle peut changer le statut des projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole and projet.pole == profile.pole:
+        if context.is_chef_pole_of(projet.pole_id):
             return True
 
         # Chef de projet peut mettre en_revision, termine, annule uniquement
-        if projet.chef_projet == user:
+        if projet.chef_projet_id == user.id:
             if nouveau_statut and nouveau_statut in ['en_revision', 'termine', 'annule']:
                 return True
             elif not nouveau_statut:  # Si on ne spécifie pas le statut, on vérifie juste le droit général
@@ -137,18 +130,20 @@ class ProjetService:
         return False
 
     @staticmethod
-    def get_available_statuts_for_user(user, projet):
+    def get_available_statuts_for_user(user, projet, context=None):
         """
         Retourne les statuts disponibles pour un utilisateur sur un projet
 
         Args:
             user: L'utilisateur Django
             projet: L'instance du projet
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             list: Liste des statuts disponibles
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return []
 
@@ -159,28 +154,30 @@ class ProjetService:
             return all_statuts
 
         # Créateur et chef de pôle peuvent accéder à tous les statuts
-        if projet.created_by == user or (profile.role == 'chef_pole' and profile.pole == projet.pole):
+        if projet.created_by_id == user.id or (profile.role == 'chef_pole' and profile.pole_id == projet.pole_id):
             return all_statuts
 
         # Chef de projet peut seulement mettre en_revision, termine, annule
-        if projet.chef_projet == user:
+        if projet.chef_projet_id == user.id:
             return ['en_revision', 'termine', 'annule']
 
         return []
 
     @staticmethod
-    def can_user_manage_membres(user, projet):
+    def can_user_manage_membres(user, projet, context=None):
         """
         Vérifie si un utilisateur peut gérer les membres d'un projet
 
         Args:
             user: L'utilisateur Django
             projet: L'instance du projet
+            context: PermissionContext de la requête (optionnel)
 
         Returns:
             bool: True si l'utilisateur peut gérer les membres
         """
-        profile = getattr(user, 'profile', None)
+        context = context or PermissionContext(user)
+        profile = context.profile
         if not profile:
             return False
 
@@ -189,11 +186,11 @@ class ProjetService:
             return True
 
         # Chef de pôle peut gérer les projets de son pôle
-        if profile.role == 'chef_pole' and profile.pole == projet.pole:
+        if profile.role == 'chef_pole' and profile.pole_id == projet.pole_id:
             return True
 
         # Chef de projet peut gérer son projet
-        if projet.chef_projet == user:
+        if projet.chef_projet_id == user.id:
             return True
 
         return False
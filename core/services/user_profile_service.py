@@ -0,0 +1,127 @@
+"""
+Service layer for the user profile page (UserProfileDetailView)
+
+- une seule requête pour tous les projets liés à l'utilisateur, annotée
+  avec ses rôles (client, chef de projet, membre, créateur)
+- une requête d'agrégats conditionnels pour les statistiques des tâches
+- payload complet mis en cache par utilisateur ; la clé inclut les versions
+  invalidées par les signaux (voir ProjetCacheService)
+"""
+from django.core.cache import cache
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, OuterRef, Q
+
+from ..models import Projet, Tache
+from ..serializers import ProjetListSerializer, TacheSerializer
+from ..utils.cache import get_cache_versions
+from ..utils.prefetch import prefetch_users
+from .projet_cache_service import LISTINGS_NAMESPACE, SHARED_NAMESPACE
+
+
+PAYLOAD_TIMEOUT = 300
+
+# Liste du payload -> annotation de rôle sur le projet
+PROJET_ROLES = {
+    'projets_client': 'is_client',
+    'projets_chef': 'is_chef',
+    'projets_membre': 'is_membre',
+    'projets_crees': 'is_createur',
+}
+
+
+class UserProfileService:
+    """Service class for the aggregated user profile payload"""
+
+    @staticmethod
+    def get_projets(user):
+        """
+        Tous les projets liés à l'utilisateur en une requête, annotés avec ses rôles
+
+        Returns:
+            QuerySet: Projets avec is_client, is_chef, is_membre, is_createur
+        """
+        is_membre = Exists(Projet.membres.through.objects.filter(projet_id=OuterRef('pk'), user_id=user.pk))
+
+        def flag(condition):
+            return ExpressionWrapper(condition, output_field=BooleanField())
+
+        return Projet.objects.with_counts().annotate(
+            is_client=flag(Q(client_id=user.pk)),
+            is_chef=flag(Q(chef_projet_id=user.pk)),
+            is_createur=flag(Q(created_by_id=user.pk)),
+            is_membre=is_membre,
+        ).filter(
+            Q(client_id=user.pk) | Q(chef_projet_id=user.pk) | Q(created_by_id=user.pk) | Q(is_membre=True)
+        ).select_related('pole', 'client', 'chef_projet', 'created_by').prefetch_related('membres')
+
+    @staticmethod
+    def get_taches_stats(user):
+        """
+        Statistiques des tâches assignées en une requête (agrégats conditionnels)
+
+        Returns:
+            dict: total, a_faire, en_cours, termine
+        """
+        return Tache.objects.filter(assigne_a=user).aggregate(
+            total=Count('id'),
+            a_faire=Count('id', filter=Q(statut='a_faire')),
+            en_cours=Count('id', filter=Q(statut='en_cours')),
+            termine=Count('id', filter=Q(statut='termine')),
+        )
+
+    @staticmethod
+    def build_relations(user):
+        """
+        Construit les listes de projets, les tâches et les statistiques
+
+        Returns:
+            dict: projets_client, projets_chef, projets_membre, projets_crees,
+                  taches_assignees, stats
+        """
+        data = {key: [] for key in PROJET_ROLES}
+
+        # Chaque projet n'est sérialisé qu'une fois, puis réparti selon les rôles
+        projets = list(UserProfileService.get_projets(user))
+        for projet, serialized in zip(projets, ProjetListSerializer(projets, many=True).data):
+            for key, role in PROJET_ROLES.items():
+                if getattr(projet, role):
+                    data[key].append(serialized)
+
+        taches = Tache.objects.filter(assigne_a=user).select_related(
+            'projet', 'projet__pole'
+        ).prefetch_related(prefetch_users('assigne_a'))
+        data['taches_assignees'] = TacheSerializer(taches, many=True).data
+
+        taches_stats = UserProfileService.get_taches_stats(user)
+        data['stats'] = {
+            "total_projets_client": len(data['projets_client']),
+            "total_projets_chef": len(data['projets_chef']),
+            "total_projets_membre": len(data['projets_membre']),
+            "total_projets_crees": len(data['projets_crees']),
+            "total_taches_assignees": taches_stats['total'],
+            "taches_a_faire": taches_stats['a_faire'],
+            "taches_en_cours": taches_stats['en_cours'],
+            "taches_terminees": taches_stats['termine'],
+        }
+        return data
+
+    @staticmethod
+    def cache_key(user_id, host):
+        """
+        Clé du payload d'un utilisateur
+
+        Versions incluses : projets/tâches (LISTINGS_NAMESPACE) et
+        profils/pôles (SHARED_NAMESPACE), incrémentées par les signaux.
+        """
+        versions = get_cache_versions([LISTINGS_NAMESPACE, SHARED_NAMESPACE])
+        # L'hôte fait partie de la clé : photo_url est une URL absolue
+        return f'user_profile:{user_id}:{versions[LISTINGS_NAMESPACE]}:{versions[SHARED_NAMESPACE]}:{host}'
+
+    @staticmethod
+    def get_cached(key):
+        """Retourne le payload en cache (None si absent)"""
+        return cache.get(key)
+
+    @staticmethod
+    def set_cached(key, payload):
+        """Met en cache le payload d'un utilisateur"""
+        cache.set(key, payload, PAYLOAD_TIMEOUT)
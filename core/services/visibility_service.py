@@ -0,0 +1,184 @@
+"""
+Service layer for the per-user project visibility index
+
+La table ProjetVisibility matérialise, pour chaque projet, les utilisateurs
+qui y sont associés et pourquoi (créateur, membre, chef de projet, client,
+chef du pôle). Elle est maintenue par les signaux de core/models.py et
+remplace les requêtes `membres.filter(id=user.id).exists()` des
+vérifications de permission par une seule lecture indexée.
+"""
+from django.db import transaction
+
+from ..models import Profile, Projet, ProjetVisibility
+
+
+# Statuts visibles par les personnes associées au projet
+# (brouillon et en_attente : créateur uniquement)
+PUBLIC_STATUTS = ['en_cours', 'en_revision', 'termine', 'annule']
+
+# Raisons dérivées directement des colonnes du projet (hors membres)
+DIRECT_REASONS = ['creator', 'chef_projet', 'client', 'chef_pole']
+
+
+class VisibilityService:
+    """Service class for ProjetVisibility maintenance and lookups"""
+
+    @staticmethod
+    def get_reasons(user, projet_id):
+        """
+        Retourne les raisons pour lesquelles un utilisateur est associé à un projet
+
+        Args:
+            user: L'utilisateur Django
+            projet_id: ID du projet
+
+        Returns:
+            set: Raisons ('creator', 'membre', 'chef_projet', 'client', 'chef_pole')
+        """
+        return set(
+            ProjetVisibility.objects.filter(user=user, projet_id=projet_id).values_list('reason', flat=True)
+        )
+
+    @staticmethod
+    def can_view(reasons, statut):
+        """
+        Applique les règles de visibilité à un ensemble de raisons
+
+        Args:
+            reasons: Raisons retournées par get_reasons
+            statut: Statut du projet
+
+        Returns:
+            bool: True si ces raisons donnent accès au projet
+        """
+        # Le créateur voit tous ses projets (peu importe le statut)
+        if 'creator' in reasons:
+            return True
+
+        # Projets publics : visibles par les personnes associées
+        return statut in PUBLIC_STATUTS and bool(reasons)
+
+    @staticmethod
+    def _direct_rows(projet):
+        """Lignes attendues pour un projet, hors membres"""
+        rows = set()
+        if projet.created_by_id:
+            rows.add((projet.created_by_id, 'creator'))
+        if projet.chef_projet_id:
+            rows.add((projet.chef_projet_id, 'chef_projet'))
+        if projet.client_id:
+            rows.add((projet.client_id, 'client'))
+        if projet.pole_id:
+            chefs = Profile.objects.filter(role='chef_pole', pole_id=projet.pole_id).values_list('user_id', flat=True)
+            rows.update((user_id, 'chef_pole') for user_id in chefs)
+        return rows
+
+    @staticmethod
+    @transaction.atomic
+    def sync_projet(projet):
+        """
+        Resynchronise les lignes non-membres d'un projet (créateur, chef, client, chef de pôle)
+
+        Args:
+            projet: L'instance du projet
+        """
+        expected = VisibilityService._direct_rows(projet)
+        existing = set(
+            ProjetVisibility.objects.filter(projet=projet, reason__in=DIRECT_REASONS).values_list('user_id', 'reason')
+        )
+
+        for user_id, reason in existing - expected:
+            ProjetVisibility.objects.filter(projet=projet, user_id=user_id, reason=reason).delete()
+
+        ProjetVisibility.objects.bulk_create(
+            [ProjetVisibility(projet=projet, user_id=user_id, reason=reason) for user_id, reason in expected - existing],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def add_membres(pairs):
+        """
+        Ajoute des lignes 'membre'
+
+        Args:
+            pairs: iterable de (projet_id, user_id)
+        """
+        ProjetVisibility.objects.bulk_create(
+            [ProjetVisibility(projet_id=projet_id, user_id=user_id, reason='membre') for projet_id, user_id in pairs],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def remove_membres(projet_ids=None, user_ids=None):
+        """
+        Supprime des lignes 'membre' (filtrées par projets et/ou utilisateurs)
+
+        Args:
+            projet_ids: IDs de projets (optionnel)
+            user_ids: IDs d'utilisateurs (optionnel)
+        """
+        queryset = ProjetVisibility.objects.filter(reason='membre')
+        if projet_ids is not None:
+            queryset = queryset.filter(projet_id__in=projet_ids)
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=user_ids)
+        queryset.delete()
+
+    @staticmethod
+    @transaction.atomic
+    def sync_user_pole(profile):
+        """
+        Resynchronise les lignes 'chef_pole' d'un utilisateur après un changement de rôle ou de pôle
+
+        Args:
+            profile: Le profil de l'utilisateur
+        """
+        ProjetVisibility.objects.filter(user_id=profile.user_id, reason='chef_pole').delete()
+
+        if profile.role == 'chef_pole' and profile.pole_id:
+            projet_ids = Projet.objects.filter(pole_id=profile.pole_id).values_list('id', flat=True)
+            ProjetVisibility.objects.bulk_create(
+                [ProjetVisibility(projet_id=projet_id, user_id=profile.user_id, reason='chef_pole') for projet_id in projet_ids],
+                ignore_conflicts=True,
+            )
+
+    @staticmethod
+    def remove_pole(pole_id):
+        """
+        Supprime les lignes 'chef_pole' des projets d'un pôle (avant sa suppression)
+
+        Args:
+            pole_id: ID du pôle
+        """
+        ProjetVisibility.objects.filter(reason='chef_pole', projet__pole_id=pole_id).delete()
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size=1000):
+        """
+        Reconstruit entièrement l'index (commande rebuild_projet_visibility)
+
+        Returns:
+            int: Nombre de lignes créées
+        """
+        ProjetVisibility.objects.all().delete()
+
+        chefs_by_pole = {}
+        for user_id, pole_id in Profile.objects.filter(role='chef_pole', pole__isnull=False).values_list('user_id', 'pole_id'):
+            chefs_by_pole.setdefault(pole_id, []).append(user_id)
+
+        rows = []
+        projets = Projet.objects.values_list('id', 'created_by_id', 'chef_projet_id', 'client_id', 'pole_id')
+        for projet_id, created_by_id, chef_projet_id, client_id, pole_id in projets.iterator(chunk_size=batch_size):
+            for user_id, reason in [(created_by_id, 'creator'), (chef_projet_id, 'chef_projet'), (client_id, 'client')]:
+                if user_id:
+                    rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason=reason))
+            for user_id in chefs_by_pole.get(pole_id, []):
+                rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason='chef_pole'))
+
+        membres = Projet.membres.through.objects.values_list('projet_id', 'user_id')
+        for projet_id, user_id in membres.iterator(chunk_size=batch_size):
+            rows.append(ProjetVisibility(projet_id=projet_id, user_id=user_id, reason='membre'))
+
+        ProjetVisibility.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        return len(rows)
@@ -9,14 +9,18 @@ This module contains all async tasks for:
 Tasks are executed by Celery workers and scheduled by Celery Beat.
 """
 import logging
-from datetime import date, timedelta
 from celery import shared_task
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from django.utils import timezone
+from django.db import transaction
 
-from core.models import Profile, Projet, Tache, Notification
-from core.odoo_gateway import odoo_gateway, OdooNotConfiguredError
+from core.models import Profile, Projet, Tache
+from core.odoo_gateway import odoo_gateway, OdooNotConfiguredError, OdooRateLimitError, TRANSIENT_ERRORS
+from core.services.deadline_service import DeadlineNotificationEngine
+from core.services.notification_counter_service import NotificationCounterService
+from core.services.notification_retention_service import NotificationRetentionService
+from core.services.notification_writer import NotificationWriter
+from core.services.odoo_sync_service import OdooSyncService
+from core.services.odoo_webhook_service import OdooWebhookService
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -41,39 +45,24 @@ def sync_user_to_odoo(self, user_id):
         Retry si erreur temporaire
     """
     try:
-        user = User.objects.get(id=user_id)
-        profile = user.profile
-
-        # Préparer les données utilisateur
-        user_data = {
-            'id': user.id,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email,
-            'phone': profile.phone,
-        }
-
-        # Si l'utilisateur a déjà un partner_id Odoo, mettre à jour
-        if profile.odoo_partner_id:
-            odoo_gateway.update_partner(profile.odoo_partner_id, user_data)
-            logger.info(f"✅ Updated Odoo partner {profile.odoo_partner_id} for user {user.username}")
-            return profile.odoo_partner_id
-
-        # Sinon, créer un nouveau partner
-        partner_id = odoo_gateway.create_partner(user_data)
+        profile = Profile.objects.select_related('user').get(user_id=user_id)
 
-        # Sauvegarder l'ID Odoo dans le profil
-        profile.odoo_partner_id = partner_id
-        profile.save(update_fields=['odoo_partner_id'])
+        # Upsert par external ID : crée le partner ou met à jour l'existant, sans doublon
+        OdooSyncService.sync_profiles([profile])
 
-        logger.info(f"✅ Created Odoo partner {partner_id} for user {user.username}")
-        return partner_id
+        if profile.odoo_partner_id:
+            logger.info(f"✅ Synced Odoo partner {profile.odoo_partner_id} for user {profile.user.username}")
+        return profile.odoo_partner_id
 
     except OdooNotConfiguredError:
         logger.warning("⚠️ Odoo not configured, skipping sync")
         return None
 
+    except OdooRateLimitError as e:
+        # Budget Odoo épuisé : replanifier sans occuper le worker (ne compte pas comme un échec)
+        logger.info(f"⏳ Odoo rate limited, retrying user {user_id} in {e.retry_after:.1f}s")
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+
     except Exception as e:
         logger.error(f"❌ Failed to sync user {user_id} to Odoo: {e}")
         # Retry avec backoff exponentiel
@@ -100,6 +89,11 @@ def delete_user_from_odoo_task(self, odoo_partner_id):
         logger.warning("⚠️ Odoo not configured, skipping deletion")
         return False
 
+    except OdooRateLimitError as e:
+        # Budget Odoo épuisé : replanifier sans occuper le worker (ne compte pas comme un échec)
+        logger.info(f"⏳ Odoo rate limited, retrying partner {odoo_partner_id} in {e.retry_after:.1f}s")
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+
     except Exception as e:
         logger.error(f"❌ Failed to delete partner {odoo_partner_id} from Odoo: {e}")
         # Retry avec backoff exponentiel
@@ -122,48 +116,34 @@ def sync_projet_to_odoo(self, projet_id):
         int: Odoo project ID
     """
     try:
-        projet = Projet.objects.select_related('client', 'client__profile').get(id=projet_id)
+        projet = Projet.objects.select_related('client__profile').get(id=projet_id)
 
+        # Appels Odoo hors transaction : les IDs sont reportés sur les instances
+        changed_profiles, stale = [], []
         # Si le client n'a pas de partner_id Odoo, le créer d'abord
-        client_odoo_id = None
-        if projet.client:
-            profile = projet.client.profile
-            if not profile.odoo_partner_id:
-                # Créer le partner client en synchrone (nécessaire pour créer le projet)
-                client_odoo_id = sync_user_to_odoo(projet.client.id)
-            else:
-                client_odoo_id = profile.odoo_partner_id
-
-        # Préparer les données projet
-        projet_data = {
-            'id': projet.id,
-            'titre': projet.titre,
-            'description': projet.description,
-            'client_odoo_id': client_odoo_id,
-            'date_debut': projet.date_debut,
-            'date_fin_prevue': projet.date_fin_prevue,
-        }
-
-        # Si le projet a déjà un project_id Odoo, mettre à jour
-        if projet.odoo_project_id:
-            odoo_gateway.update_project(projet.odoo_project_id, projet_data)
-            logger.info(f"✅ Updated Odoo project {projet.odoo_project_id} for projet {projet.titre}")
-            return projet.odoo_project_id
+        # (nécessaire pour rattacher le projet au client)
+        if projet.client and not projet.client.profile.odoo_partner_id:
+            _, changed_profiles, stale = OdooSyncService.push_profiles([projet.client.profile])
+        _, changed_projets = OdooSyncService.push_projets([projet])
 
-        # Sinon, créer un nouveau projet
-        project_id = odoo_gateway.create_project(projet_data)
+        # Les IDs Odoo du client et du projet sont enregistrés ensemble
+        with transaction.atomic():
+            OdooSyncService.save_profiles(changed_profiles, stale)
+            OdooSyncService.save_projets(changed_projets)
 
-        # Sauvegarder l'ID Odoo
-        projet.odoo_project_id = project_id
-        projet.save(update_fields=['odoo_project_id'])
-
-        logger.info(f"✅ Created Odoo project {project_id} for projet {projet.titre}")
-        return project_id
+        if projet.odoo_project_id:
+            logger.info(f"✅ Synced Odoo project {projet.odoo_project_id} for projet {projet.titre}")
+        return projet.odoo_project_id
 
     except OdooNotConfiguredError:
         logger.warning("⚠️ Odoo not configured, skipping sync")
         return None
 
+    except OdooRateLimitError as e:
+        # Budget Odoo épuisé : replanifier sans occuper le worker (ne compte pas comme un échec)
+        logger.info(f"⏳ Odoo rate limited, retrying projet {projet_id} in {e.retry_after:.1f}s")
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+
     except Exception as e:
         logger.error(f"❌ Failed to sync projet {projet_id} to Odoo: {e}")
         raise self.retry(exc=e, countdown=2 ** self.request.retries * 60)
@@ -185,41 +165,33 @@ def sync_tache_to_odoo(self, tache_id):
         int: Odoo task ID
     """
     try:
-        tache = Tache.objects.select_related('projet').get(id=tache_id)
+        tache = Tache.objects.select_related('projet__client__profile').get(id=tache_id)
 
+        # Appels Odoo hors transaction : les IDs sont reportés sur les instances
+        changed_projets = []
         # Si le projet n'a pas d'ID Odoo, le créer d'abord
         if not tache.projet.odoo_project_id:
-            sync_projet_to_odoo(tache.projet.id)
-            tache.projet.refresh_from_db()
-
-        # Préparer les données tâche
-        tache_data = {
-            'id': tache.id,
-            'titre': tache.titre,
-            'description': tache.description,
-            'projet_odoo_id': tache.projet.odoo_project_id,
-            'deadline': tache.deadline,
-            'priorite': tache.priorite,
-        }
-
-        # Créer la tâche dans Odoo (pas de update pour les tâches dans cette version)
-        if not tache.odoo_task_id:
-            task_id = odoo_gateway.create_task(tache_data)
-
-            # Sauvegarder l'ID Odoo
-            tache.odoo_task_id = task_id
-            tache.save(update_fields=['odoo_task_id'])
-
-            logger.info(f"✅ Created Odoo task {task_id} for tache {tache.titre}")
-            return task_id
-        else:
-            logger.info(f"⏭️ Task {tache_id} already synced to Odoo (task_id={tache.odoo_task_id})")
-            return tache.odoo_task_id
+            _, changed_projets = OdooSyncService.push_projets([tache.projet])
+        _, changed_taches = OdooSyncService.push_taches([tache])
+
+        # Les IDs Odoo du projet et de la tâche sont enregistrés ensemble
+        with transaction.atomic():
+            OdooSyncService.save_projets(changed_projets)
+            OdooSyncService.save_taches(changed_taches)
+
+        if tache.odoo_task_id:
+            logger.info(f"✅ Synced Odoo task {tache.odoo_task_id} for tache {tache.titre}")
+        return tache.odoo_task_id
 
     except OdooNotConfiguredError:
         logger.warning("⚠️ Odoo not configured, skipping sync")
         return None
 
+    except OdooRateLimitError as e:
+        # Budget Odoo épuisé : replanifier sans occuper le worker (ne compte pas comme un échec)
+        logger.info(f"⏳ Odoo rate limited, retrying tache {tache_id} in {e.retry_after:.1f}s")
+        raise self.retry(exc=e, countdown=e.retry_after, max_retries=None)
+
     except Exception as e:
         logger.error(f"❌ Failed to sync tache {tache_id} to Odoo: {e}")
         raise self.retry(exc=e, countdown=2 ** self.request.retries * 60)
@@ -232,74 +204,67 @@ def sync_tache_to_odoo(self, tache_id):
 @shared_task
 def batch_sync_odoo_pending():
     """
-    Synchronise en batch toutes les entités non synchronisées avec Odoo
+    Synchronise vers Odoo les modifications enregistrées dans l'outbox
 
     Appelé toutes les 30 secondes par Celery Beat.
-    Optimise les appels API en groupant les opérations.
+    Les événements en attente sont regroupés par entité (voir
+    OdooSyncService.drain_outbox) : une seule écriture Odoo par entité
+    modifiée, par lots de ODOO_BATCH_SIZE. Sans modification, un passage
+    coûte quelques requêtes, quelle que soit la taille des tables.
+
+    Returns:
+        dict: Statistiques du passage (events, partners, projets, taches, deleted, failed, retried)
     """
     try:
-        # 1. Sync users sans odoo_partner_id
-        pending_users = Profile.objects.filter(odoo_partner_id__isnull=True).select_related('user')[:10]
-
-        if pending_users:
-            logger.info(f"📦 Batch syncing {len(pending_users)} users to Odoo...")
-            for profile in pending_users:
-                sync_user_to_odoo.delay(profile.user.id)
-
-        # 2. Sync projets sans odoo_project_id
-        pending_projets = Projet.objects.filter(odoo_project_id__isnull=True)[:10]
-
-        if pending_projets:
-            logger.info(f"📦 Batch syncing {len(pending_projets)} projets to Odoo...")
-            for projet in pending_projets:
-                sync_projet_to_odoo.delay(projet.id)
-
-        # 3. Sync tâches sans odoo_task_id (BATCH CREATE)
-        pending_taches = Tache.objects.filter(
-            odoo_task_id__isnull=True,
-            projet__odoo_project_id__isnull=False  # Seulement si projet déjà sync
-        ).select_related('projet')[:20]
-
-        if pending_taches:
-            logger.info(f"📦 Batch syncing {len(pending_taches)} taches to Odoo...")
-
-            # Grouper par projet pour optimiser
-            taches_by_projet = {}
-            for tache in pending_taches:
-                if tache.projet.odoo_project_id not in taches_by_projet:
-                    taches_by_projet[tache.projet.odoo_project_id] = []
-                taches_by_projet[tache.projet.odoo_project_id].append(tache)
-
-            # Créer en batch par projet
-            for projet_odoo_id, taches in taches_by_projet.items():
-                taches_data = [
-                    {
-                        'id': t.id,
-                        'titre': t.titre,
-                        'description': t.description,
-                        'projet_odoo_id': projet_odoo_id,
-                        'deadline': t.deadline,
-                        'priorite': t.priorite,
-                    }
-                    for t in taches
-                ]
-
-                task_ids = odoo_gateway.batch_create_tasks(taches_data)
-
-                # Sauvegarder les IDs Odoo
-                for tache, task_id in zip(taches, task_ids):
-                    tache.odoo_task_id = task_id
-                    tache.save(update_fields=['odoo_task_id'])
-
-        logger.info("✅ Batch sync completed")
+        stats = OdooSyncService.drain_outbox()
+        pruned = OdooSyncService.prune_outbox()
+
+        if stats['events'] or pruned:
+            logger.info(f"✅ Odoo outbox drained: {stats} ({pruned} old events pruned)")
+        return stats
 
     except OdooNotConfiguredError:
         logger.debug("Odoo not configured, skipping batch sync")
 
+    except OdooRateLimitError as e:
+        # Le prochain passage de Celery Beat reprendra les entités restantes
+        logger.info(f"⏳ Odoo rate limited, batch sync resumes in {e.retry_after:.1f}s")
+
     except Exception as e:
         logger.error(f"❌ Batch sync failed: {e}")
 
 
+@shared_task
+def process_odoo_webhooks():
+    """
+    Traite les webhooks Odoo en attente dans l'inbox (OdooWebhookEvent)
+
+    Planifié par les endpoints après chaque réception (une fois par rafale)
+    et toutes les minutes par Celery Beat pour rattraper les événements restants.
+
+    Returns:
+        dict: Statistiques du passage (events, notifications, failed, retried)
+    """
+    try:
+        stats = OdooWebhookService.process_pending()
+        pruned = OdooWebhookService.prune()
+
+        if stats['events'] or pruned:
+            logger.info(f"✅ Odoo webhooks processed: {stats} ({pruned} old events pruned)")
+        return stats
+
+    except OdooRateLimitError as e:
+        # Lot annulé : les événements restent en attente pour le prochain passage
+        logger.info(f"⏳ Odoo rate limited, webhook processing resumes in {e.retry_after:.1f}s")
+
+    except TRANSIENT_ERRORS as e:
+        # Odoo indisponible : le lot est remis en attente sans compter d'essai
+        logger.warning(f"⚠️ Odoo unavailable, webhook events stay pending: {e}")
+
+    except Exception as e:
+        logger.error(f"❌ Webhook processing failed: {e}")
+
+
 # ========================================
 # NOTIFICATIONS
 # ========================================
@@ -316,171 +281,102 @@ def check_deadline_notifications():
     - Deadline demain
     - Deadline aujourd'hui
     - Tâches en retard
+
+    Destinataires : personnes assignées + chef de projet.
+    Traitement ensembliste (voir core/services/deadline_service.py) :
+    nombre de requêtes constant quel que soit le volume de tâches.
+
+    Returns:
+        dict: Statistiques du passage (candidates, created, rows_per_second...)
     """
     try:
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
-        in_3_days = today + timedelta(days=3)
-
-        logger.info(f"🔔 Checking deadline notifications for {today}")
-
-        # 1. Tâches avec deadline dans 3 jours
-        taches_3days = Tache.objects.filter(
-            deadline=in_3_days,
-            statut__in=['a_faire', 'en_cours']
-        ).select_related('projet').prefetch_related('assigne_a')
-
-        for tache in taches_3days:
-            # Récupérer les destinataires : assignés + chef de projet
-            destinataires = set(tache.assigne_a.all())
-            if tache.projet.chef:
-                destinataires.add(tache.projet.chef)
-
-            for user in destinataires:
-                # Vérifier si notification déjà créée
-                if not Notification.objects.filter(
-                    user=user,
-                    tache=tache,
-                    type='deadline_3days',
-                    created_at__date=today
-                ).exists():
-                    Notification.objects.create(
-                        user=user,
-                        type='deadline_3days',
-                        titre=f"Deadline dans 3 jours",
-                        message=f"{tache.titre} • {tache.deadline.strftime('%d/%m/%Y')}",
-                        tache=tache,
-                        projet=tache.projet
-                    )
-                    logger.info(f"📅 Created 3-day notification for user {user.username} - task {tache.titre}")
-
-        # 2. Tâches avec deadline demain
-        taches_tomorrow = Tache.objects.filter(
-            deadline=tomorrow,
-            statut__in=['a_faire', 'en_cours']
-        ).select_related('projet').prefetch_related('assigne_a')
-
-        for tache in taches_tomorrow:
-            # Récupérer les destinataires : assignés + chef de projet
-            destinataires = set(tache.assigne_a.all())
-            if tache.projet.chef:
-                destinataires.add(tache.projet.chef)
-
-            for user in destinataires:
-                if not Notification.objects.filter(
-                    user=user,
-                    tache=tache,
-                    type='deadline_1day',
-                    created_at__date=today
-                ).exists():
-                    Notification.objects.create(
-                        user=user,
-                        type='deadline_1day',
-                        titre=f"Deadline demain",
-                        message=f"{tache.titre} • Échéance demain",
-                        tache=tache,
-                        projet=tache.projet
-                    )
-                    logger.info(f"⚠️ Created 1-day notification for user {user.username} - task {tache.titre}")
-
-        # 3. Tâches avec deadline aujourd'hui
-        taches_today = Tache.objects.filter(
-            deadline=today,
-            statut__in=['a_faire', 'en_cours']
-        ).select_related('projet').prefetch_related('assigne_a')
-
-        for tache in taches_today:
-            # Récupérer les destinataires : assignés + chef de projet
-            destinataires = set(tache.assigne_a.all())
-            if tache.projet.chef:
-                destinataires.add(tache.projet.chef)
-
-            for user in destinataires:
-                if not Notification.objects.filter(
-                    user=user,
-                    tache=tache,
-                    type='deadline_today',
-                    created_at__date=today
-                ).exists():
-                    Notification.objects.create(
-                        user=user,
-                        type='deadline_today',
-                        titre=f"Deadline AUJOURD'HUI",
-                        message=f"{tache.titre} • À terminer aujourd'hui",
-                        tache=tache,
-                        projet=tache.projet
-                    )
-                    logger.info(f"🔴 Created today notification for user {user.username} - task {tache.titre}")
-
-        # 4. Tâches en retard
-        taches_overdue = Tache.objects.filter(
-            deadline__lt=today,
-            statut__in=['a_faire', 'en_cours']
-        ).select_related('projet').prefetch_related('assigne_a')
-
-        for tache in taches_overdue:
-            # Récupérer les destinataires : assignés + chef de projet
-            destinataires = set(tache.assigne_a.all())
-            if tache.projet.chef:
-                destinataires.add(tache.projet.chef)
-
-            for user in destinataires:
-                # Pour les tâches en retard, créer une notification par jour
-                if not Notification.objects.filter(
-                    user=user,
-                    tache=tache,
-                    type='deadline_overdue',
-                    created_at__date=today
-                ).exists():
-                    days_overdue = (today - tache.deadline).days
-                    Notification.objects.create(
-                        user=user,
-                        type='deadline_overdue',
-                        titre=f"Tâche en retard",
-                        message=f"{tache.titre} • Retard de {days_overdue} jour(s)",
-                        tache=tache,
-                        projet=tache.projet
-                    )
-                    logger.info(f"❌ Created overdue notification for user {user.username} - task {tache.titre} ({days_overdue} days)")
-
-        logger.info("✅ Deadline notifications check completed")
+        return DeadlineNotificationEngine().run()
 
     except Exception as e:
         logger.error(f"❌ Failed to check deadline notifications: {e}")
 
 
+@shared_task
+def create_task_assigned_notifications(pairs):
+    """
+    Crée les notifications d'assignation pour un lot de (tâche, utilisateur)
+
+    Enfilée une seule fois par signal m2m (voir notify_task_assignment) :
+    une requête pour les tâches, une pour les utilisateurs, un bulk_create.
+
+    Args:
+        pairs: Liste de [tache_id, user_id]
+    """
+    try:
+        tache_ids = {tache_id for tache_id, _ in pairs}
+        user_ids = set(User.objects.filter(id__in={user_id for _, user_id in pairs}).values_list('id', flat=True))
+        taches = Tache.objects.only('titre', 'deadline', 'projet_id').in_bulk(tache_ids)
+
+        notifications = []
+        for tache_id, user_id in pairs:
+            tache = taches.get(tache_id)
+            if tache is None or user_id not in user_ids:
+                continue
+            deadline_text = tache.deadline.strftime('%d/%m') if tache.deadline else 'Sans deadline'
+            notifications.append(NotificationWriter.build(
+                user_id, 'task_assigned', "Nouvelle tâche assignée", f"{tache.titre} • {deadline_text}",
+                tache_id=tache.id, projet_id=tache.projet_id,
+            ))
+
+        count = NotificationWriter.write(notifications)
+        logger.info(f"📋 Submitted {count} task assignment notification(s)")
+        return count
+
+    except Exception as e:
+        logger.error(f"❌ Failed to create task assignment notifications: {e}")
+
+
 @shared_task
 def create_task_assigned_notification(tache_id, user_id):
     """
     Crée une notification quand un utilisateur est assigné à une tâche
 
+    Conservée pour les messages déjà en file : délègue au traitement par lot.
+
     Args:
         tache_id: ID de la tâche
         user_id: ID de l'utilisateur assigné
     """
+    return create_task_assigned_notifications([(tache_id, user_id)])
+
+
+@shared_task
+def create_project_assigned_notifications(pairs):
+    """
+    Crée les notifications d'ajout à un projet pour un lot de (projet, utilisateur)
+
+    Enfilée une seule fois par signal m2m (voir notify_project_assignment).
+
+    Args:
+        pairs: Liste de [projet_id, user_id]
+    """
     try:
-        tache = Tache.objects.select_related('projet').get(id=tache_id)
-        user = User.objects.get(id=user_id)
-
-        # Vérifier si notification déjà créée
-        if not Notification.objects.filter(
-            user=user,
-            tache=tache,
-            type='task_assigned'
-        ).exists():
-            deadline_text = tache.deadline.strftime('%d/%m') if tache.deadline else 'Sans deadline'
-            Notification.objects.create(
-                user=user,
-                type='task_assigned',
-                titre=f"Nouvelle tâche assignée",
-                message=f"{tache.titre} • {deadline_text}",
-                tache=tache,
-                projet=tache.projet
-            )
-            logger.info(f"📋 Created task assignment notification for user {user.username} - task {tache.titre}")
+        projet_ids = {projet_id for projet_id, _ in pairs}
+        user_ids = set(User.objects.filter(id__in={user_id for _, user_id in pairs}).values_list('id', flat=True))
+        projets = Projet.objects.only('titre', 'type').in_bulk(projet_ids)
+
+        notifications = []
+        for projet_id, user_id in pairs:
+            projet = projets.get(projet_id)
+            if projet is None or user_id not in user_ids:
+                continue
+            notifications.append(NotificationWriter.build(
+                user_id, 'project_assigned', "Nouveau projet assigné",
+                f"{projet.titre} • {projet.get_type_display()}",
+                projet_id=projet.id,
+            ))
+
+        count = NotificationWriter.write(notifications)
+        logger.info(f"🎯 Submitted {count} project assignment notification(s)")
+        return count
 
     except Exception as e:
-        logger.error(f"❌ Failed to create task assignment notification: {e}")
+        logger.error(f"❌ Failed to create project assignment notifications: {e}")
 
 
 @shared_task
@@ -488,31 +384,13 @@ def create_project_assigned_notification(projet_id, user_id):
     """
     Crée une notification quand un utilisateur est assigné à un projet
 
+    Conservée pour les messages déjà en file : délègue au traitement par lot.
+
     Args:
         projet_id: ID du projet
         user_id: ID de l'utilisateur assigné
     """
-    try:
-        projet = Projet.objects.get(id=projet_id)
-        user = User.objects.get(id=user_id)
-
-        # Vérifier si notification déjà créée
-        if not Notification.objects.filter(
-            user=user,
-            projet=projet,
-            type='project_assigned'
-        ).exists():
-            Notification.objects.create(
-                user=user,
-                type='project_assigned',
-                titre=f"Nouveau projet assigné",
-                message=f"{projet.titre} • {projet.get_type_display()}",
-                projet=projet
-            )
-            logger.info(f"🎯 Created project assignment notification for user {user.username} - project {projet.titre}")
-
-    except Exception as e:
-        logger.error(f"❌ Failed to create project assignment notification: {e}")
+    return create_project_assigned_notifications([(projet_id, user_id)])
 
 
 @shared_task
@@ -520,33 +398,65 @@ def create_project_leader_notification(projet_id, user_id):
     """
     Crée une notification quand un utilisateur est assigné comme chef de projet
 
+    Au plus une notification par (utilisateur, projet) et par jour.
+
     Args:
         projet_id: ID du projet
         user_id: ID du chef de projet
     """
     try:
-        projet = Projet.objects.get(id=projet_id)
-        user = User.objects.get(id=user_id)
-
-        # Vérifier si notification déjà créée récemment (dernières 24h)
-        from django.utils import timezone
-        from datetime import timedelta
-        recent_time = timezone.now() - timedelta(hours=24)
-
-        if not Notification.objects.filter(
-            user=user,
-            projet=projet,
-            type='project_leader_assigned',
-            created_at__gte=recent_time
-        ).exists():
-            Notification.objects.create(
-                user=user,
-                type='project_leader_assigned',
-                titre=f"Chef de projet assigné",
-                message=f"{projet.titre} • Vous êtes chef de projet",
-                projet=projet
+        projet = Projet.objects.only('titre').get(id=projet_id)
+
+        NotificationWriter.write([
+            NotificationWriter.build(
+                user_id, 'project_leader_assigned', "Chef de projet assigné",
+                f"{projet.titre} • Vous êtes chef de projet",
+                projet_id=projet.id,
             )
-            logger.info(f"👔 Created project leader notification for user {user.username} - project {projet.titre}")
+        ])
+        logger.info(f"👔 Project leader notification for user {user_id} - project {projet.titre}")
 
     except Exception as e:
         logger.error(f"❌ Failed to create project leader notification: {e}")
+
+
+@shared_task
+def reconcile_notification_counters():
+    """
+    Corrige les compteurs de notifications non lues (toutes les 15 minutes)
+
+    Rattrape les écarts dus aux suppressions en cascade et aux écritures
+    qui ne passent pas par NotificationCounterService.
+
+    Returns:
+        int: Nombre de compteurs corrigés
+    """
+    try:
+        fixed = NotificationCounterService.reconcile()
+        if fixed:
+            logger.info(f"🔢 Reconciled {fixed} notification counters")
+        return fixed
+
+    except Exception as e:
+        logger.error(f"❌ Notification counter reconcile failed: {e}")
+
+
+@shared_task
+def prune_notifications():
+    """
+    Purge les notifications lues ou expirées (tous les jours)
+
+    Par lots bornés (NOTIFICATION_RETENTION_*) : le reste éventuel est repris
+    le lendemain. Entretient aussi les partitions de l'archive si elle est
+    partitionnée (PostgreSQL).
+
+    Returns:
+        dict: Statistiques de purge
+    """
+    try:
+        stats = NotificationRetentionService.prune()
+        NotificationRetentionService.maintain_partitions()
+        return stats
+
+    except Exception as e:
+        logger.error(f"❌ Notification pruning failed: {e}")
@@ -0,0 +1,161 @@
+"""
+Tests for batched m2m assignment notifications
+"""
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Notification, Projet, ProjetVisibility, Tache
+from core.tasks import create_project_assigned_notifications, create_task_assigned_notifications
+
+User = get_user_model()
+
+
+class AssignmentSignalBatchingTest(TestCase):
+    """Test m2m signals enqueue one task per change, after commit"""
+
+    def setUp(self):
+        self.projet = Projet.objects.create(titre='Projet', type='film')
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+        self.users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(5)]
+
+    @patch('core.tasks.create_project_assigned_notifications.delay')
+    def test_project_members_single_task(self, delay):
+        """Test adding several members enqueues a single batched task on commit"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.projet.membres.add(*self.users)
+            delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        delay.assert_called_once_with([(self.projet.id, user.id) for user in self.users])
+
+    @patch('core.tasks.create_project_assigned_notifications.delay')
+    def test_project_members_reverse(self, delay):
+        """Test reverse additions (user.projets_membre.add) produce (projet, user) pairs"""
+        other = Projet.objects.create(titre='Autre', type='film')
+        user = self.users[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.projets_membre.add(self.projet, other)
+
+        delay.assert_called_once_with(sorted([(self.projet.id, user.id), (other.id, user.id)]))
+
+    @patch('core.tasks.create_project_assigned_notifications.delay')
+    @patch('core.tasks.create_task_assigned_notifications.delay')
+    def test_task_assignees_single_task(self, task_delay, project_delay):
+        """Test assigning several users to a task enqueues a single batched task"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tache.assigne_a.add(*self.users)
+
+        task_delay.assert_called_once_with([(self.tache.id, user.id) for user in self.users])
+        project_delay.assert_called_once_with([(self.projet.id, user.id) for user in self.users])
+
+    @patch('core.tasks.create_project_leader_notification.delay')
+    def test_chef_projet_enqueued_on_commit(self, delay):
+        """Test assigning a project leader enqueues its notification only after commit"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.projet.chef_projet = self.users[0]
+            self.projet.save()
+            delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        delay.assert_called_once_with(self.projet.id, self.users[0].id)
+
+
+class BatchedNotificationTaskTest(TestCase):
+    """Test batched notification tasks"""
+
+    def setUp(self):
+        self.projet = Projet.objects.create(titre='Projet', type='film')
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+        self.users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(20)]
+
+    def test_task_notifications_constant_queries(self):
+        """Test users, tasks and inserts cost one query each whatever the batch size"""
+        pairs = [(self.tache.id, user.id) for user in self.users]
+
+        # Utilisateurs, tâches, puis NotificationWriter (insert, compteurs)
+        with self.assertNumQueries(4):
+            create_task_assigned_notifications(pairs)
+
+        self.assertEqual(Notification.objects.filter(type='task_assigned').count(), 20)
+
+    def test_project_notifications_skip_missing_rows(self):
+        """Test deleted users are skipped and reruns do not duplicate"""
+        pairs = [(self.projet.id, user.id) for user in self.users[:3]] + [(self.projet.id, 999999)]
+
+        create_project_assigned_notifications(pairs)
+        create_project_assigned_notifications(pairs)
+
+        self.assertEqual(Notification.objects.filter(type='project_assigned').count(), 3)
+
+
+class AutoAddAssigneesBenchmarkTest(TestCase):
+    """Test auto_add_task_assignees_to_project cost for 1, 10 and 500 assignees"""
+
+    SIZES = [1, 10, 500]
+
+    def setUp(self):
+        self.projet = Projet.objects.create(titre='Projet', type='film')
+        # bulk_create : pas de signaux (profils inutiles ici)
+        self.users = User.objects.bulk_create([
+            User(username=f'bench{i}') for i in range(max(self.SIZES))
+        ])
+
+    def assign(self, size):
+        """Assigne `size` utilisateurs à une nouvelle tâche, retourne (requêtes, durée)"""
+        tache = Tache.objects.create(titre=f'Tâche {size}', projet=self.projet)
+        Projet.membres.through.objects.all().delete()
+        ProjetVisibility.objects.filter(reason='membre').delete()
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            tache.assigne_a.add(*self.users[:size])
+        duration = time.perf_counter() - started
+
+        self.assertEqual(self.projet.membres.count(), size)
+        return len(queries), duration
+
+    def test_query_count_does_not_grow_with_assignees(self):
+        """Test bulk assignment costs a bounded number of queries"""
+        results = {size: self.assign(size) for size in self.SIZES}
+
+        # 1 et 10 : strictement identiques ; 500 : seuls les INSERT sont découpés en lots par SQLite
+        self.assertEqual(results[1][0], results[10][0])
+        self.assertLessEqual(results[500][0], results[1][0] + 3)
+
+    def test_existing_members_are_skipped(self):
+        """Test only missing users are added, in a single membres.add"""
+        Projet.membres.through.objects.bulk_create([
+            Projet.membres.through(projet=self.projet, user=user) for user in self.users[:5]
+        ])
+        tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+
+        with patch('core.tasks.create_task_assigned_notifications.delay'), \
+                patch('core.tasks.create_project_assigned_notifications.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            tache.assigne_a.add(*self.users[:10])
+
+        delay.assert_called_once_with([(self.projet.id, user.id) for user in self.users[5:10]])
+        self.assertEqual(self.projet.membres.count(), 10)
+
+    def test_reverse_assignment(self):
+        """Test user.taches_assignees.add adds the user to every task project"""
+        other = Projet.objects.create(titre='Autre', type='film')
+        taches = [
+            Tache.objects.create(titre='A', projet=self.projet),
+            Tache.objects.create(titre='B', projet=other),
+        ]
+
+        self.users[0].taches_assignees.add(*taches)
+
+        self.assertEqual(
+            set(self.users[0].projets_membre.values_list('id', flat=True)),
+            {self.projet.id, other.id},
+        )
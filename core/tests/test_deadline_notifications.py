@@ -0,0 +1,99 @@
+"""
+Tests for the set-based deadline notification engine
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Notification, Projet, Tache
+from core.services.deadline_service import DeadlineNotificationEngine
+
+User = get_user_model()
+
+
+class DeadlineNotificationEngineTest(TestCase):
+    """Test DeadlineNotificationEngine"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.chef = User.objects.create_user(username='chef', password='testpass123')
+        self.assignee = User.objects.create_user(username='assignee', password='testpass123')
+        self.projet = Projet.objects.create(titre='Projet', type='film', chef_projet=self.chef)
+
+        self.taches = {}
+        for name, offset in [('overdue', -2), ('today', 0), ('1day', 1), ('2days', 2), ('3days', 3)]:
+            self.taches[name] = Tache.objects.create(
+                titre=name, projet=self.projet, deadline=self.today + timedelta(days=offset)
+            )
+        self.taches['done'] = Tache.objects.create(
+            titre='done', projet=self.projet, deadline=self.today, statut='termine'
+        )
+
+        # Table d'assignation directement : pas de signaux de notification
+        Tache.assigne_a.through.objects.bulk_create([
+            Tache.assigne_a.through(tache=tache, user=self.assignee) for tache in self.taches.values()
+        ])
+
+    def notifications(self):
+        return set(Notification.objects.values_list('user__username', 'tache__titre', 'type'))
+
+    def test_creates_expected_notifications(self):
+        """Test assignees and the project lead get one notification per open task"""
+        result = DeadlineNotificationEngine(today=self.today).run()
+
+        expected = set()
+        for username in ['chef', 'assignee']:
+            expected |= {
+                (username, 'overdue', 'deadline_overdue'),
+                (username, 'today', 'deadline_today'),
+                (username, '1day', 'deadline_1day'),
+                (username, '3days', 'deadline_3days'),
+            }
+        self.assertEqual(self.notifications(), expected)
+        self.assertEqual(result['created'], 8)
+
+        overdue = Notification.objects.filter(type='deadline_overdue').first()
+        self.assertEqual(overdue.message, 'overdue • Retard de 2 jour(s)')
+
+    def test_rerun_is_idempotent(self):
+        """Test running twice the same day does not duplicate notifications"""
+        DeadlineNotificationEngine(today=self.today).run()
+        result = DeadlineNotificationEngine(today=self.today).run()
+
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['existing'], 8)
+        self.assertEqual(Notification.objects.count(), 8)
+
+    def test_rerun_for_another_day_is_idempotent(self):
+        """Test a rerun with --date for another day finds the notifications it already created"""
+        tomorrow = self.today + timedelta(days=1)
+        first = DeadlineNotificationEngine(today=tomorrow).run()
+        count = Notification.objects.count()
+
+        result = DeadlineNotificationEngine(today=tomorrow).run()
+
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['existing'], first['candidates'])
+        self.assertEqual(Notification.objects.count(), count)
+
+    def test_dry_run_writes_nothing(self):
+        """Test dry-run reports candidates without writing"""
+        result = DeadlineNotificationEngine(today=self.today, dry_run=True).run()
+
+        self.assertEqual(result['created'], 8)
+        self.assertEqual(Notification.objects.count(), 0)
+
+    def test_constant_query_count(self):
+        """Test the engine issues the same queries whatever the backlog size"""
+        # Candidats, existants, puis NotificationWriter (insert, compteurs)
+        with self.assertNumQueries(4):
+            DeadlineNotificationEngine(today=self.today).run()
+
+        for i in range(20):
+            tache = Tache.objects.create(titre=f'extra {i}', projet=self.projet, deadline=self.today)
+            tache.assigne_a.through.objects.create(tache=tache, user=self.assignee)
+
+        with self.assertNumQueries(4):
+            DeadlineNotificationEngine(today=self.today).run()
@@ -0,0 +1,110 @@
+"""
+Tests for batched notification mutations
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Notification
+from core.pagination import encode_cursor
+from core.services.notification_counter_service import NotificationCounterService
+
+User = get_user_model()
+
+
+class NotificationBulkTest(TestCase):
+    """Test POST /api/notifications/bulk/"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.other = User.objects.create_user(username='bob', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        self.notifications = []
+        for i in range(6):
+            notification = Notification.objects.create(
+                user=self.user, type='task_assigned', titre=f'N{i}', message='m', is_read=(i == 0),
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(minutes=10 - i))
+            notification.refresh_from_db()
+            self.notifications.append(notification)
+        self.foreign = Notification.objects.create(user=self.other, type='task_assigned', titre='X', message='m')
+        NotificationCounterService.get_many([self.user.id, self.other.id])
+
+    def bulk(self, **data):
+        # Sous TestCase, le cache n'est mis à jour qu'en sortie du bloc : la vue relit la ligne du compteur
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/notifications/bulk/', data, format='json')
+
+    def test_mark_ids_read_in_one_update(self):
+        """Test ids are marked read with a single UPDATE, foreign ids are ignored"""
+        ids = [n.id for n in self.notifications[:4]] + [self.foreign.id]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk(action='read', ids=ids)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(response.json()['unread_count'], 2)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn(' IN (', updates[0])
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+    def test_delete_cursor_range(self):
+        """Test a since/before range deletes only the rows in between and adjusts the counter"""
+        oldest, newest = self.notifications[0], self.notifications[4]
+        response = self.bulk(
+            action='delete',
+            since=encode_cursor(oldest.created_at, oldest.pk),
+            before=encode_cursor(newest.created_at, newest.pk),
+        )
+
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(response.json()['unread_count'], 2)
+        self.assertEqual(
+            set(Notification.objects.filter(user=self.user).values_list('titre', flat=True)),
+            {'N0', 'N4', 'N5'},
+        )
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+    def test_delete_ids_counts_read_and_unread(self):
+        """Test deleting read and unread notifications only decrements for unread ones"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk(action='delete', ids=[n.id for n in self.notifications[:2]])
+
+        self.assertEqual(response.json()['count'], 2)
+        statements = [q['sql'] for q in queries if '"core_notification"' in q['sql']]
+        self.assertEqual([sql.split()[0] for sql in statements], ['DELETE', 'DELETE'])
+        self.assertEqual(response.json()['unread_count'], 4)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+    def test_invalid_requests(self):
+        """Test bad actions, missing selections, oversized lists and bad cursors are rejected"""
+        self.assertEqual(self.bulk(action='archive', ids=[1]).status_code, 400)
+        self.assertEqual(self.bulk(action='read').status_code, 400)
+        self.assertEqual(self.bulk(action='read', ids=list(range(501))).status_code, 400)
+        self.assertEqual(self.bulk(action='read', ids=['a']).status_code, 400)
+        self.assertEqual(self.bulk(action='delete', since='nope').status_code, 400)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 6)
+
+    def test_mark_as_read_updates_two_columns(self):
+        """Test Notification.mark_as_read only writes is_read and read_at"""
+        notification = self.notifications[1]
+        with CaptureQueriesContext(connection) as queries:
+            notification.mark_as_read()
+
+        update = next(q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_notification"'))
+        self.assertIn('"is_read"', update)
+        self.assertNotIn('"titre"', update)
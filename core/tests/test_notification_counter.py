@@ -0,0 +1,113 @@
+"""
+Tests for the denormalized unread notification counters
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Notification, NotificationCounter
+from core.services.notification_counter_service import NotificationCounterService
+from core.services.notification_writer import NotificationWriter
+
+User = get_user_model()
+
+
+class NotificationCounterTest(TestCase):
+    """Test NotificationCounterService and the notification endpoints that maintain it"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def write(self, *types):
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([
+                NotificationWriter.build(self.user.id, notification_type, 'Titre', 'Message')
+                for notification_type in types
+            ])
+
+    def test_first_read_initializes_counter(self):
+        """Test the counter is created from the notifications table on first read"""
+        Notification.objects.create(user=self.user, type='task_assigned', titre='A', message='a')
+
+        self.assertEqual(NotificationCounterService.get(self.user.id), 1)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 1)
+
+    def test_endpoint_does_not_touch_notifications(self):
+        """Test unread-count reads the cache, or the counter row, never the notifications table"""
+        NotificationCounterService.get(self.user.id)
+        self.write('deadline_today')
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'count': 1})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"core_notification"', queries[0]['sql'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'count': 1})
+
+    def test_writer_counts_inserted_rows_only(self):
+        """Test duplicates ignored by the writer do not increment the counter"""
+        NotificationCounterService.get(self.user.id)
+
+        self.write('deadline_today', 'deadline_1day')
+        self.write('deadline_today', 'deadline_overdue')
+
+        self.assertEqual(NotificationCounterService.get(self.user.id), 3)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 3)
+
+    def test_reads_and_deletes_decrement(self):
+        """Test mark_as_read, mark_all_as_read and deleting an unread notification decrement the counter"""
+        self.write('deadline_3days', 'deadline_1day', 'deadline_today', 'deadline_overdue')
+        first, second = Notification.objects.order_by('id')[:2]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.mark_as_read()
+        self.assertEqual(NotificationCounterService.get(self.user.id), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/notifications/{second.id}/')
+            self.client.delete(f'/api/notifications/{first.id}/')  # Déjà lue : inchangé
+        self.assertEqual(NotificationCounterService.get(self.user.id), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/mark-all-read/')
+        self.assertEqual(NotificationCounterService.get(self.user.id), 0)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 0)
+
+    def test_concurrent_reads_decrement_once(self):
+        """Test two requests reading the same notification decrement the counter once"""
+        self.write('deadline_today', 'deadline_1day')
+        notification = Notification.objects.order_by('id').first()
+        stale = Notification.objects.get(pk=notification.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f'/api/notifications/{notification.id}/mark-read/').status_code, 200)
+            self.assertEqual(self.client.post(f'/api/notifications/{notification.id}/mark-read/').status_code, 200)
+            # Instance chargée avant la lecture : is_read encore False en mémoire
+            stale.mark_as_read()
+        self.assertEqual(NotificationCounterService.get(self.user.id), 1)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+        other = User.objects.create_user(username='bob', password='x')
+        foreign = Notification.objects.create(user=other, type='info', titre='B', message='b')
+        self.assertEqual(self.client.post(f'/api/notifications/{foreign.id}/mark-read/').status_code, 404)
+        self.assertEqual(self.client.post('/api/notifications/999999/mark-read/').status_code, 404)
+        self.assertFalse(Notification.objects.get(pk=foreign.pk).is_read)
+
+    def test_reconcile_fixes_drift(self):
+        """Test reconcile repairs counters after writes that bypass the service"""
+        other = User.objects.create_user(username='bob', password='x')
+        self.write('deadline_today')
+        NotificationCounterService.get_many([self.user.id, other.id])
+        Notification.objects.create(user=self.user, type='task_assigned', titre='A', message='a')
+
+        self.assertEqual(NotificationCounterService.reconcile(), 1)
+        self.assertEqual(NotificationCounterService.get_many([self.user.id, other.id]), {self.user.id: 2, other.id: 0})
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
@@ -0,0 +1,114 @@
+"""
+Tests for the notification feed: since/before cursors, limit cap and compact mode
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Notification, Projet, Tache
+from core.pagination import encode_cursor
+
+User = get_user_model()
+
+
+class NotificationFeedTest(TestCase):
+    """Test GET /api/notifications/ feed semantics"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.other = User.objects.create_user(username='bob', password='x')
+        self.projet = Projet.objects.create(titre='Projet', type='film')
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        for i in range(5):
+            notification = Notification.objects.create(
+                user=self.user, type='task_assigned', titre=f'N{i}', message='m',
+                tache=self.tache, projet=self.projet,
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(minutes=5 - i))
+        Notification.objects.create(user=self.other, type='task_assigned', titre='Autre', message='m')
+
+    def feed(self, **params):
+        response = self.client.get('/api/notifications/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titres(self, results):
+        return [row['titre'] for row in results]
+
+    def test_plain_list_is_capped(self):
+        """Test the legacy list format is kept and limit is capped"""
+        data = self.feed(limit=10000)
+        self.assertEqual(self.titres(data), ['N4', 'N3', 'N2', 'N1', 'N0'])
+        self.assertEqual(data[0]['tache_titre'], 'Tâche')
+
+        for i in range(200):
+            Notification.objects.create(user=self.user, type='deadline_today', titre='X', message='m')
+        self.assertEqual(len(self.feed(limit=10000)), 200)
+
+    def test_before_pages_backwards(self):
+        """Test before walks older pages without overlap"""
+        first = self.feed(since='', limit=2)
+        self.assertEqual(self.titres(first['results']), ['N4', 'N3'])
+        self.assertTrue(first['has_more'])
+
+        second = self.feed(before=first['oldest_cursor'], limit=2)
+        self.assertEqual(self.titres(second['results']), ['N2', 'N1'])
+
+        third = self.feed(before=second['oldest_cursor'], limit=2)
+        self.assertEqual(self.titres(third['results']), ['N0'])
+        self.assertFalse(third['has_more'])
+
+    def test_since_returns_only_new(self):
+        """Test since returns nothing until a newer notification exists, and keeps the cursor"""
+        cursor = self.feed(since='')['newest_cursor']
+
+        empty = self.feed(since=cursor)
+        self.assertEqual(empty['results'], [])
+        self.assertEqual(empty['newest_cursor'], cursor)
+
+        Notification.objects.create(user=self.user, type='deadline_today', titre='N5', message='m')
+        Notification.objects.create(user=self.user, type='deadline_1day', titre='N6', message='m')
+        delta = self.feed(since=cursor)
+        self.assertEqual(self.titres(delta['results']), ['N6', 'N5'])
+        self.assertNotEqual(delta['newest_cursor'], cursor)
+
+    def test_since_with_more_resumes_without_gap(self):
+        """Test a truncated since returns the oldest new rows so the next call continues"""
+        n1 = Notification.objects.get(titre='N1')
+        cursor = encode_cursor(n1.created_at, n1.pk)
+
+        delta = self.feed(since=cursor, limit=2)
+        self.assertEqual(self.titres(delta['results']), ['N3', 'N2'])
+        self.assertTrue(delta['has_more'])
+
+        delta = self.feed(since=delta['newest_cursor'], limit=2)
+        self.assertEqual(self.titres(delta['results']), ['N4'])
+        self.assertFalse(delta['has_more'])
+
+    def test_invalid_cursor(self):
+        """Test garbage cursors are rejected with 400, like the bulk endpoint"""
+        self.assertEqual(self.client.get('/api/notifications/', {'since': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/notifications/', {'before': 'nope'}).status_code, 400)
+
+    def test_query_counts(self):
+        """Test one query per page in full and compact modes"""
+        cursor = self.feed(since='')['newest_cursor']
+        with self.assertNumQueries(1):
+            self.feed(since='', limit=5)
+        with self.assertNumQueries(1):
+            self.feed(before=cursor)
+
+        with self.assertNumQueries(1):
+            data = self.feed(since='', compact=1)
+        row = data['results'][0]
+        self.assertEqual(row['tache'], self.tache.id)
+        self.assertNotIn('tache_titre', row)
+        with self.assertNumQueries(1):
+            self.feed(limit=50)
@@ -0,0 +1,134 @@
+"""
+Tests for notification retention: updatable overdue alerts and batched pruning
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Notification, NotificationArchive, Projet, Tache
+from core.services.notification_counter_service import NotificationCounterService
+from core.services.notification_retention_service import NotificationRetentionService, add_months
+from core.services.notification_writer import NotificationWriter
+
+User = get_user_model()
+
+
+class OverdueNotificationTest(TestCase):
+    """Test overdue alerts keep a single row per (user, task), refreshed daily"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.projet = Projet.objects.create(titre='Projet', type='film', chef_projet=self.user)
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+
+    def write(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([
+                NotificationWriter.build(
+                    self.user.id, 'deadline_overdue', 'Tâche en retard', message,
+                    tache_id=self.tache.id, projet_id=self.projet.id,
+                )
+            ])
+
+    def test_same_day_is_noop(self):
+        """Test a second write on the same day leaves the row untouched"""
+        self.write('Retard de 1 jour(s)')
+        self.write('Retard de 1 jour(s) bis')
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.message, 'Retard de 1 jour(s)')
+        self.assertTrue(notification.dedupe_key.endswith(':current'))
+
+    def test_next_day_refreshes_row(self):
+        """Test the next day's alert updates the row and marks it unread again"""
+        self.write('Retard de 1 jour(s)')
+        notification = Notification.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.mark_as_read()
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(NotificationCounterService.get(self.user.id), 0)
+
+        self.write('Retard de 2 jour(s)')
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.message, 'Retard de 2 jour(s)')
+        self.assertFalse(notification.is_read)
+        self.assertIsNone(notification.read_at)
+        self.assertEqual(timezone.localdate(notification.created_at), timezone.localdate())
+        self.assertEqual(NotificationCounterService.get(self.user.id), 1)
+
+
+class NotificationPruneTest(TestCase):
+    """Test NotificationRetentionService.prune"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.now = timezone.now()
+
+    def create(self, count, days_ago, is_read):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, type='task_assigned', titre='T', message='M', is_read=is_read)
+            for _ in range(count)
+        ])
+        Notification.objects.filter(created_at__gte=self.now - timedelta(minutes=1)).update(
+            created_at=self.now - timedelta(days=days_ago)
+        )
+
+    @override_settings(NOTIFICATION_READ_RETENTION_DAYS=30, NOTIFICATION_UNREAD_RETENTION_DAYS=180)
+    def test_prunes_read_and_expired_only(self):
+        """Test old read and expired notifications are deleted, recent and old unread are kept"""
+        self.create(3, days_ago=200, is_read=False)  # expirées
+        self.create(2, days_ago=40, is_read=True)    # lues anciennes
+        self.create(4, days_ago=40, is_read=False)   # non lues conservées
+        self.create(1, days_ago=5, is_read=True)     # lue récente conservée
+        self.assertEqual(NotificationCounterService.get(self.user.id), 7)
+
+        self.assertEqual(NotificationRetentionService.prune(now=self.now, dry_run=True), {'pending': 5})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = NotificationRetentionService.prune(now=self.now, batch_size=2)
+
+        self.assertEqual(stats, {'deleted': 5, 'archived': 0, 'batches': 3})
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(NotificationCounterService.get(self.user.id), 4)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+    def test_max_batches_bounds_a_pass(self):
+        """Test a pass stops after max_batches and the next one resumes"""
+        self.create(5, days_ago=200, is_read=True)
+
+        stats = NotificationRetentionService.prune(now=self.now, batch_size=2, max_batches=2)
+        self.assertEqual(stats['deleted'], 4)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        stats = NotificationRetentionService.prune(now=self.now, batch_size=2, max_batches=2)
+        self.assertEqual(stats, {'deleted': 1, 'archived': 0, 'batches': 1})
+
+    def test_archive_copies_rows(self):
+        """Test archived notifications keep their original id and content"""
+        self.create(2, days_ago=200, is_read=False)
+        ids = set(Notification.objects.values_list('id', flat=True))
+
+        call_command('prune_notifications', '--archive', stdout=StringIO())
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(set(NotificationArchive.objects.values_list('id', flat=True)), ids)
+        archived = NotificationArchive.objects.first()
+        self.assertEqual((archived.user_id, archived.titre, archived.is_read), (self.user.id, 'T', False))
+
+    def test_partition_sql(self):
+        """Test monthly partition bounds roll over the year"""
+        self.assertEqual(add_months(timezone.datetime(2026, 11, 17).date(), 2).isoformat(), '2027-01-01')
+        statements = NotificationRetentionService.ensure_partitions_sql(
+            today=timezone.datetime(2026, 12, 5).date(), months_ahead=1,
+        )
+        self.assertEqual(len(statements), 2)
+        self.assertIn('"core_notificationarchive_2026_12"', statements[0])
+        self.assertIn("FROM ('2027-01-01') TO ('2027-02-01')", statements[1])
@@ -0,0 +1,191 @@
+"""
+Tests for the real-time notification stream (SSE)
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Notification
+from core.notification_stream import MemoryBroker, RedisListener, notification_stream
+from core.services.notification_writer import NotificationWriter
+
+User = get_user_model()
+
+STREAM_URL = '/api/notifications/stream/'
+TICKET_URL = '/api/notifications/stream/ticket/'
+
+
+class MemoryBrokerTest(TestCase):
+    """Test the in-memory pub/sub fallback"""
+
+    async def test_publish_reaches_subscribers(self):
+        """Test a message published from sync code reaches the channel subscribers only"""
+        broker = MemoryBroker()
+        subscription = await broker.subscribe('notifications:user:1')
+
+        self.assertEqual(broker.listening(['notifications:user:1', 'notifications:user:2']), {'notifications:user:1'})
+        self.assertEqual(broker.publish('notifications:user:2', {'event': 'x'}), 0)
+        await sync_to_async(broker.publish)('notifications:user:1', {'event': 'unread_count'})
+
+        self.assertEqual(await subscription.get(1), {'event': 'unread_count'})
+        self.assertIsNone(await subscription.get(0.01))
+
+        await subscription.close()
+        self.assertEqual(broker.listening(['notifications:user:1']), set())
+
+
+class FakePubSub:
+    """Connexion pub/sub Redis factice : enregistre les abonnements, messages injectés par send()"""
+
+    def __init__(self):
+        self.channels = set()
+        self.subscribe_calls = 0
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.subscribe_calls += 1
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def send(self, channel, message):
+        self.messages.put_nowait({'channel': channel.encode(), 'data': json.dumps(message).encode()})
+
+
+class RedisListenerTest(TestCase):
+    """Test the shared Redis pub/sub connection fans out to every open stream"""
+
+    async def test_one_connection_for_all_streams(self):
+        """Test streams share one subscription per channel and each receives its channel's messages"""
+        pubsub = FakePubSub()
+        listener = RedisListener(pubsub)
+        first = await listener.subscribe('notifications:user:1')
+        second = await listener.subscribe('notifications:user:1')
+        other = await listener.subscribe('notifications:user:2')
+        self.assertEqual(pubsub.subscribe_calls, 2)
+
+        pubsub.send('notifications:user:1', {'event': 'unread_count'})
+        self.assertEqual(await first.get(1), {'event': 'unread_count'})
+        self.assertEqual(await second.get(1), {'event': 'unread_count'})
+        self.assertIsNone(await other.get(0.01))
+
+        await first.close()
+        self.assertEqual(pubsub.channels, {'notifications:user:1', 'notifications:user:2'})
+        await second.close()
+        await other.close()
+        self.assertEqual(pubsub.channels, set())
+        await listener.reader
+
+
+class NotificationStreamViewTest(TransactionTestCase):
+    """Test GET /api/notifications/stream/ (données commitées : le flux lit hors de la transaction du test)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        Notification.objects.create(user=self.user, type='info', titre='A', message='a')
+
+    def ticket(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        response = client.post(TICKET_URL)
+        self.assertEqual(response.status_code, 201)
+        return response.json()['ticket']
+
+    async def test_ticket_required(self):
+        """Test the stream rejects a missing or invalid ticket, and an access token in the URL"""
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual((await self.async_client.get(STREAM_URL)).status_code, 401)
+        self.assertEqual((await self.async_client.get(STREAM_URL + '?ticket=invalid')).status_code, 401)
+        self.assertEqual((await self.async_client.get(f'{STREAM_URL}?token={token}')).status_code, 401)
+        self.assertEqual((await self.async_client.post(TICKET_URL)).status_code, 401)
+
+    async def test_ticket_is_single_use(self):
+        """Test a ticket opens one stream only"""
+        ticket = await sync_to_async(self.ticket)()
+
+        response = await self.async_client.get(f'{STREAM_URL}?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        await response.streaming_content.aclose()
+        self.assertEqual((await self.async_client.get(f'{STREAM_URL}?ticket={ticket}')).status_code, 401)
+
+    async def test_stream_pushes_events(self):
+        """Test the stream sends the unread count, then published events"""
+        ticket = await sync_to_async(self.ticket)()
+
+        response = await self.async_client.get(f'{STREAM_URL}?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        self.assertEqual(await anext(stream), b'event: unread_count\ndata: {"count": 1}\n\n')
+
+        self.assertEqual(notification_stream.listening([self.user.id, 999]), {self.user.id})
+        notification_stream.publish(self.user.id, 'unread_count', {'count': 2})
+        self.assertEqual(await anext(stream), b'event: unread_count\ndata: {"count": 2}\n\n')
+
+        # Déconnexion du client : le handler ASGI annule la lecture en cours
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(notification_stream.listening([self.user.id]), set())
+
+
+class NotificationPushTest(TestCase):
+    """Test notifications are published after writes and reads"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.other = User.objects.create_user(username='bob', password='x')
+
+    def test_write_publishes_to_listeners(self):
+        """Test new notifications and counts are pushed to users with an open stream only"""
+        with patch.object(notification_stream, 'listening', return_value={self.user.id}), \
+                patch.object(notification_stream, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([
+                NotificationWriter.build(self.user.id, 'info', 'Bonjour', 'Message'),
+                NotificationWriter.build(self.other.id, 'info', 'Bonjour', 'Message'),
+            ])
+
+        events = [(call.args[0], call.args[1]) for call in publish.call_args_list]
+        self.assertEqual(events, [(self.user.id, 'notification'), (self.user.id, 'unread_count')])
+        self.assertEqual(publish.call_args_list[0].args[2]['titre'], 'Bonjour')
+        self.assertEqual(publish.call_args_list[1].args[2], {'count': 1})
+
+    def test_write_without_listeners_costs_no_query(self):
+        """Test nothing is read back for the stream when none is open"""
+        # Insert et compteurs (NotificationWriter) uniquement
+        with self.assertNumQueries(2), self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([NotificationWriter.build(self.user.id, 'info', 'Bonjour', 'Message')])
+
+    def test_mark_read_publishes_count(self):
+        """Test marking a notification as read pushes the new unread count"""
+        notification = Notification.objects.create(user=self.user, type='info', titre='A', message='a')
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with patch.object(notification_stream, 'listening', return_value={self.user.id}), \
+                patch.object(notification_stream, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/notifications/{notification.id}/mark-read/')
+
+        publish.assert_called_once_with(self.user.id, 'unread_count', {'count': 0})
@@ -0,0 +1,114 @@
+"""
+Tests for NotificationWriter deduplication
+"""
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Notification, Projet, Tache
+from core.services import NotificationWriter
+from core.services.notification_counter_service import NotificationCounterService
+from core.services.notification_push_service import NotificationPushService
+from core.tasks import create_project_leader_notification, create_task_assigned_notification
+
+User = get_user_model()
+
+
+class NotificationWriterTest(TestCase):
+    """Test dedupe keys and idempotent inserts"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user', password='testpass123')
+        self.projet = Projet.objects.create(titre='Projet', type='film')
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+
+    def test_build_key(self):
+        """Test once and daily windows"""
+        self.assertEqual(
+            NotificationWriter.build_key('task_assigned', self.tache.id, self.projet.id),
+            f'task_assigned:t{self.tache.id}:p{self.projet.id}:once',
+        )
+        self.assertEqual(
+            NotificationWriter.build_key('deadline_today', self.tache.id, self.projet.id, day=date(2026, 3, 10)),
+            f'deadline_today:t{self.tache.id}:p{self.projet.id}:2026-03-10',
+        )
+
+    def test_write_ignores_duplicates(self):
+        """Test writing the same notification twice keeps a single row and only counts inserted rows"""
+        def build():
+            return NotificationWriter.build(
+                self.user.id, 'task_assigned', 'Titre', 'Message',
+                tache_id=self.tache.id, projet_id=self.projet.id,
+            )
+
+        # INSERT ... RETURNING puis compteurs
+        with self.assertNumQueries(2):
+            NotificationWriter.write([build(), build()])
+        # Rien d'inséré : pas de mise à jour des compteurs
+        with self.assertNumQueries(1):
+            NotificationWriter.write([build()])
+
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+
+    def test_daily_window(self):
+        """Test daily notifications are kept once per day"""
+        for day in [date(2026, 3, 10), date(2026, 3, 10), date(2026, 3, 11)]:
+            NotificationWriter.write([
+                NotificationWriter.build(
+                    self.user.id, 'deadline_today', 'Titre', 'Message',
+                    tache_id=self.tache.id, projet_id=self.projet.id, day=day,
+                )
+            ])
+
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    def test_producer_tasks_are_idempotent(self):
+        """Test notification tasks can run several times without duplicates"""
+        for _ in range(2):
+            create_task_assigned_notification(self.tache.id, self.user.id)
+            create_project_leader_notification(self.projet.id, self.user.id)
+
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=self.user).values_list('type', flat=True)),
+            ['project_leader_assigned', 'task_assigned'],
+        )
+
+    def test_concurrent_insert_is_not_counted(self):
+        """Test a row inserted by a concurrent writer during the write is neither counted nor published"""
+        notification = NotificationWriter.build(
+            self.user.id, 'task_assigned', 'Titre', 'Message', tache_id=self.tache.id, projet_id=self.projet.id,
+        )
+        # Ligne de l'autre écrivain, commitée pendant cette écriture (created_at >= since)
+        Notification.objects.create(
+            user=self.user, type='task_assigned', titre='Titre', message='Message',
+            tache=self.tache, projet=self.projet, dedupe_key=notification.dedupe_key,
+        )
+        Notification.objects.update(created_at=timezone.now() + timedelta(seconds=1))
+        counter = NotificationCounterService.get(self.user.id)
+
+        with patch.object(NotificationPushService, 'publish_created') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([notification])
+
+        publish.assert_not_called()
+        self.assertEqual(NotificationCounterService.get(self.user.id), counter)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
+
+    def test_write_without_returning(self):
+        """Test the bulk_create fallback (MySQL, MariaDB) still inserts once and counts inserted rows"""
+        def build():
+            return NotificationWriter.build(self.user.id, 'deadline_today', 'Titre', 'Message', tache_id=self.tache.id)
+
+        # Base sans ON CONFLICT, même si Django y annonce RETURNING (MariaDB)
+        with patch('core.services.notification_writer.INSERT_RETURNING_VENDORS', []), \
+                self.captureOnCommitCallbacks(execute=True):
+            NotificationWriter.write([build(), build()])
+            NotificationWriter.write([build()])
+
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(NotificationCounterService.reconcile(), 0)
@@ -0,0 +1,215 @@
+"""
+Tests for batched Odoo upserts (load + external IDs)
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.models import OdooOutbox, Profile, Projet, Tache
+from core.odoo_gateway import EXTERNAL_ID_MODULE, OdooGateway
+from core.services.odoo_sync_service import OdooSyncService
+from core.tasks import batch_sync_odoo_pending, sync_projet_to_odoo, sync_tache_to_odoo
+
+User = get_user_model()
+
+
+class FakeOdoo:
+    """Odoo factice : load() par external ID et ir.model.data"""
+
+    def __init__(self, reject=()):
+        self.records = {}  # (model, id) -> vals
+        self.xmlids = {}  # (model, name) -> id
+        self.calls = []
+        self.reject = set(reject)  # external IDs rejetés par load()
+        self.next_id = 1
+
+    def execute(self, model, method, *args, **kwargs):
+        self.calls.append((model, method))
+        return getattr(self, method.replace('_', ''))(model, *args, **kwargs)
+
+    def load(self, model, fields, data):
+        rejected = [index for index, row in enumerate(data) if row[0] in self.reject]
+        if rejected:
+            return {'ids': False, 'messages': [
+                {'type': 'error', 'record': index, 'message': 'invalid'} for index in rejected
+            ]}
+
+        ids = []
+        for row in data:
+            name = row[0].split('.', 1)[1]
+            record_id = self.xmlids.get((model, name))
+            if record_id is None:
+                record_id = self.xmlids[(model, name)] = self.next_id
+                self.next_id += 1
+            self.records[(model, record_id)] = dict(zip(fields[1:], row[1:]))
+            ids.append(record_id)
+        return {'ids': ids, 'messages': []}
+
+    def searchread(self, model, domain, fields):
+        conditions = {field: value for field, _, value in domain}
+        return [
+            {'name': name, 'res_id': record_id}
+            for (xmlid_model, name), record_id in self.xmlids.items()
+            if xmlid_model == conditions['model'] and name in conditions['name']
+        ]
+
+    def create(self, model, vals_list):
+        for vals in vals_list:
+            self.xmlids[(vals['model'], vals['name'])] = vals['res_id']
+        return list(range(len(vals_list)))
+
+    def unlink(self, model, ids):
+        for record_id in ids:
+            self.records.pop((model, record_id), None)
+        return True
+
+
+@override_settings(ODOO_BATCH_SIZE=10)
+class OdooBatchUpsertTest(TestCase):
+    """Test OdooGateway.upsert_partners / upsert_projects"""
+
+    def setUp(self):
+        self.odoo = FakeOdoo()
+        self.gateway = OdooGateway()
+        for target, kwargs in [
+            ('core.odoo_gateway.odoo_rate_limiter.acquire', {'return_value': 0}),
+            ('core.odoo_gateway.OdooGateway._execute', {'side_effect': self.odoo.execute}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def users_data(self, count, start=1):
+        return [
+            {'id': user_id, 'username': f'user{user_id}', 'first_name': '', 'last_name': '', 'email': '', 'phone': None}
+            for user_id in range(start, start + count)
+        ]
+
+    def test_one_load_and_one_lookup_per_batch(self):
+        """Test 25 partners cost 3 batches of load + search_read"""
+        partner_ids = self.gateway.upsert_partners(self.users_data(25))
+
+        self.assertEqual(len(partner_ids), 25)
+        self.assertEqual(len(set(partner_ids.values())), 25)
+        self.assertEqual(self.odoo.calls, [('res.partner', 'load'), ('ir.model.data', 'search_read')] * 3)
+
+    def test_replay_updates_instead_of_duplicating(self):
+        """Test replaying a batch maps to the same partners"""
+        first = self.gateway.upsert_partners(self.users_data(3))
+        second = self.gateway.upsert_partners(self.users_data(3))
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.odoo.records), 3)
+
+    def test_known_ids_are_registered(self):
+        """Test partners created before external IDs are updated, not duplicated"""
+        self.odoo.records[('res.partner', 500)] = {'name': 'legacy'}
+        users_data = self.users_data(2)
+        users_data[0]['odoo_partner_id'] = 500
+
+        partner_ids = self.gateway.upsert_partners(users_data)
+
+        self.assertEqual(partner_ids[1], 500)
+        self.assertEqual(self.odoo.records[('res.partner', 500)]['name'], 'user1')
+        self.assertIn(('ir.model.data', 'create'), self.odoo.calls)
+
+    def test_rejected_rows_are_skipped(self):
+        """Test a row rejected by Odoo does not block the rest of the batch"""
+        self.odoo.reject = {f'{EXTERNAL_ID_MODULE}.user_2'}
+
+        partner_ids = self.gateway.upsert_partners(self.users_data(3))
+
+        self.assertEqual(set(partner_ids), {1, 3})
+
+    def test_upsert_projects(self):
+        """Test project rows reference the client partner by database ID"""
+        project_ids = self.gateway.upsert_projects([
+            {'id': 7, 'titre': 'Album', 'description': '', 'client_odoo_id': 42, 'date_debut': None, 'date_fin_prevue': None},
+        ])
+
+        vals = self.odoo.records[('project.project', project_ids[7])]
+        self.assertEqual(vals['name'], 'Album')
+        self.assertEqual(vals['partner_id/.id'], '42')
+        self.assertEqual(vals['date_start'], '')
+
+
+@override_settings(ODOO_BATCH_SIZE=10, ODOO_OUTBOX_SAFETY_LAG=0)
+class BatchSyncOdooPendingTest(TestCase):
+    """Test batch_sync_odoo_pending uses batched upserts"""
+
+    def setUp(self):
+        self.odoo = FakeOdoo()
+        for target, kwargs in [
+            ('core.odoo_gateway.odoo_rate_limiter.acquire', {'return_value': 0}),
+            ('core.odoo_gateway.OdooGateway._execute', {'side_effect': self.odoo.execute}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # bulk_create ne publie rien : backlog publié comme par enqueue_odoo_sync
+        User.objects.bulk_create([User(username=f'user{i}') for i in range(30)])
+        Profile.objects.bulk_create([Profile(user=user) for user in User.objects.filter(profile__isnull=True)])
+        self.client_user = User.objects.first()
+        Projet.objects.bulk_create([
+            Projet(titre=f'Projet {i}', client=self.client_user, created_by=self.client_user) for i in range(5)
+        ])
+        OdooSyncService.enqueue('partner', User.objects.values_list('id', flat=True))
+        OdooSyncService.enqueue('project', Projet.objects.values_list('id', flat=True))
+
+    def test_backlog_synced_in_batches(self):
+        """Test 30 users and 5 projets cost a handful of RPCs"""
+        batch_sync_odoo_pending()
+
+        self.assertFalse(Profile.objects.filter(odoo_partner_id__isnull=True).exists())
+        self.assertFalse(Projet.objects.filter(odoo_project_id__isnull=True).exists())
+        # 3 lots de contacts + 1 lot de projets, chacun load + search_read
+        self.assertEqual(len(self.odoo.calls), 8)
+
+        client_partner_id = Profile.objects.get(user=self.client_user).odoo_partner_id
+        project = self.odoo.records[('project.project', Projet.objects.first().odoo_project_id)]
+        self.assertEqual(project['partner_id/.id'], str(client_partner_id))
+
+    def test_write_back_with_bulk_update(self):
+        """Test Odoo IDs are written back with a single UPDATE, without new outbox events"""
+        profiles = list(Profile.objects.select_related('user'))
+
+        with self.assertNumQueries(1):
+            synced = OdooSyncService.sync_profiles(profiles)
+
+        self.assertEqual(synced, 30)
+        self.assertEqual(OdooOutbox.objects.filter(entity='partner').count(), 30)
+
+    @override_settings(ODOO_WRITEBACK_BATCH_SIZE=10)
+    def test_write_back_is_chunked(self):
+        """Test large write-backs are split into ODOO_WRITEBACK_BATCH_SIZE updates"""
+        profiles = list(Profile.objects.select_related('user'))
+
+        with self.assertNumQueries(3):
+            OdooSyncService.sync_profiles(profiles)
+
+        self.assertFalse(Profile.objects.filter(odoo_partner_id__isnull=True).exists())
+
+    def test_single_sync_tasks_call_odoo_outside_transaction(self):
+        """Test sync_projet_to_odoo / sync_tache_to_odoo push to Odoo before opening a transaction"""
+        projet = Projet.objects.first()
+        tache = Tache.objects.create(projet=projet, titre='Mixage')
+        # TestCase enveloppe chaque test dans une transaction : profondeur de référence
+        depth = len(connection.atomic_blocks)
+        depths = []
+        execute = self.odoo.execute
+
+        def tracking_execute(*args, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return execute(*args, **kwargs)
+
+        with patch('core.odoo_gateway.OdooGateway._execute', side_effect=tracking_execute):
+            odoo_project_id = sync_projet_to_odoo(projet.id)
+            odoo_task_id = sync_tache_to_odoo(tache.id)
+
+        self.assertEqual(set(depths), {depth})
+        self.assertEqual(Projet.objects.get(pk=projet.pk).odoo_project_id, odoo_project_id)
+        self.assertEqual(Tache.objects.get(pk=tache.pk).odoo_task_id, odoo_task_id)
+        self.assertIsNotNone(Profile.objects.get(user=self.client_user).odoo_partner_id)
@@ -0,0 +1,124 @@
+"""
+Tests for the in-process fake Odoo server and the sync benchmark command
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import OdooOutbox, Profile, Projet, Tache
+from core.odoo_fake import FakeOdooServer, percentile
+from core.odoo_gateway import OdooGateway, OdooRateLimitError, odoo_gateway
+from core.tasks import batch_sync_odoo_pending, sync_user_to_odoo
+
+User = get_user_model()
+
+
+class FakeOdooServerTest(TestCase):
+    """Test the gateway and sync tasks against the fake server (real odoorpc client)"""
+
+    def setUp(self):
+        cache.clear()
+        self.server = FakeOdooServer().start()
+        self.addCleanup(self.server.stop)
+
+        settings_override = override_settings(**self.server.settings(), ODOO_OUTBOX_SAFETY_LAG=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        odoo_gateway.reset_pool()
+        self.addCleanup(odoo_gateway.reset_pool)
+
+    def test_session_pool_health_check(self):
+        """Test login and the pool health check succeed"""
+        with odoo_gateway.pool.session() as odoo:
+            self.assertTrue(odoo_gateway.pool._is_healthy(odoo))
+
+    def test_upsert_partners(self):
+        """Test partners are created once and updated on replay"""
+        users_data = [
+            {'id': 1, 'username': 'alice', 'first_name': 'Alice', 'last_name': '', 'email': '', 'phone': None},
+        ]
+        first = odoo_gateway.upsert_partners(users_data)
+        users_data[0]['first_name'] = 'Alicia'
+        second = odoo_gateway.upsert_partners(users_data)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.db.records['res.partner']), 1)
+        self.assertEqual(self.server.db.records['res.partner'][first[1]]['name'], 'Alicia')
+
+    def test_batch_sync_end_to_end(self):
+        """Test batch_sync_odoo_pending syncs a user, projet and task through JSON-RPC"""
+        user = User.objects.create_user(username='alice', password='x')
+        projet = Projet.objects.create(titre='Album', type='musique', client=user)
+        tache = Tache.objects.create(projet=projet, titre='Mixage')
+
+        stats = batch_sync_odoo_pending()
+
+        self.assertEqual((stats['partners'], stats['projets'], stats['taches']), (1, 1, 1))
+        projet.refresh_from_db()
+        tache.refresh_from_db()
+        partner_id = Profile.objects.get(user=user).odoo_partner_id
+        self.assertEqual(self.server.db.records['project.project'][projet.odoo_project_id]['partner_id'], partner_id)
+        self.assertEqual(self.server.db.records['project.task'][tache.odoo_task_id]['project_id'], projet.odoo_project_id)
+
+    def test_sync_user_task(self):
+        """Test the individual sync task writes the partner ID back"""
+        user = User.objects.create_user(username='alice', password='x')
+
+        partner_id = sync_user_to_odoo(user.id)
+
+        self.assertIn(partner_id, self.server.db.records['res.partner'])
+        self.assertEqual(Profile.objects.get(user=user).odoo_partner_id, partner_id)
+
+    def test_get_task_partners(self):
+        """Test reads go through the fake server"""
+        task_id = self.server.db.call('project.task', 'create', [{'name': 'Mixage', 'user_ids': []}], {})
+
+        self.assertEqual(odoo_gateway.get_task_partners(task_id), ([], None))
+
+    def test_injected_429(self):
+        """Test an injected 429 raises OdooRateLimitError and pauses all calls"""
+        self.server.inject_429()
+
+        with self.assertRaises(OdooRateLimitError):
+            odoo_gateway.upsert_partners([
+                {'id': 1, 'username': 'alice', 'first_name': '', 'last_name': '', 'email': '', 'phone': None},
+            ])
+        self.assertEqual(self.server.errors_429, 1)
+        with self.assertRaises(OdooRateLimitError):
+            odoo_gateway.get_task_partners(1)
+        self.assertEqual(self.server.rpc_count, 0)
+
+    def test_metrics(self):
+        """Test RPC counts and latency percentiles are recorded per call"""
+        self.server.db.call('project.task', 'create', [{'name': 'Mixage', 'user_ids': []}], {})
+        odoo_gateway.get_task_partners(1)
+
+        self.assertEqual(self.server.calls[('project.task', 'read')], 1)
+        self.assertGreater(self.server.latency_percentiles()[99], 0)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+
+
+class BenchmarkOdooSyncCommandTest(TestCase):
+    """Test the benchmark_odoo_sync command"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_small_run(self):
+        """Test a small benchmark reports both modes and leaves no data behind"""
+        out = StringIO()
+        call_command(
+            'benchmark_odoo_sync', users=5, projets=2, taches=4, updates=2, latency=0, error_rate=0.1,
+            penalty=0.01, stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('batch_sync_odoo_pending (création)', output)
+        self.assertIn('sync_*_to_odoo', output)
+        self.assertIn('entités/s', output)
+        self.assertFalse(User.objects.filter(username__startswith='bench_').exists())
+        self.assertFalse(OdooOutbox.objects.exists())
+        self.assertIsNone(OdooGateway()._pool)
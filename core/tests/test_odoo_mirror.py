@@ -0,0 +1,162 @@
+"""
+Tests for the Odoo mirror cache (get_many, single-flight, stale-while-revalidate)
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.odoo_gateway import odoo_gateway
+from core.odoo_mirror import OdooMirrorCache, partner_mirror, project_mirror, task_mirror, user_mirror
+
+
+class InlineExecutor:
+    """Exécute les rafraîchissements en arrière-plan immédiatement"""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+class FakeReads:
+    """read() Odoo factice : enregistre les IDs demandés"""
+
+    def __init__(self, records):
+        self.records = records  # {(model, id): vals}
+        self.calls = []
+
+    def __call__(self, model, method, ids, fields):
+        self.calls.append((model, list(ids)))
+        return [
+            {'id': odoo_id, **{field: self.records[(model, odoo_id)].get(field, False) for field in fields}}
+            for odoo_id in ids if (model, odoo_id) in self.records
+        ]
+
+
+@override_settings(ODOO_MIRROR_TTL=300, ODOO_MIRROR_STALE_TTL=3600, ODOO_MIRROR_LOCK_WAIT=0.2)
+class OdooMirrorCacheTest(TestCase):
+    """Test OdooMirrorCache"""
+
+    def setUp(self):
+        cache.clear()
+        self.odoo = FakeReads({('res.partner', i): {'name': f'Partner {i}'} for i in range(1, 6)})
+        patcher = patch('core.odoo_gateway.OdooGateway._call_with_retry', side_effect=self.odoo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mirror = OdooMirrorCache('res.partner', ['name'])
+
+    def test_get_many_prefetches_in_one_read(self):
+        """Test missing IDs are read together and then served from the cache"""
+        self.mirror.get(1)
+        records = self.mirror.get_many([1, 2, 3])
+
+        self.assertEqual(records[3]['name'], 'Partner 3')
+        self.assertEqual(self.odoo.calls, [('res.partner', [1]), ('res.partner', [2, 3])])
+        self.assertEqual(set(self.mirror.get_many([1, 2, 3])), {1, 2, 3})
+        self.assertEqual(len(self.odoo.calls), 2)
+
+        stats = self.mirror.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['refreshes']), (4, 3, 2))
+
+    def test_missing_records_are_cached(self):
+        """Test an ID unknown to Odoo is not read again"""
+        self.assertIsNone(self.mirror.get(99))
+        self.assertIsNone(self.mirror.get(99))
+        self.assertEqual(len(self.odoo.calls), 1)
+
+    def test_refresh_bypasses_cache(self):
+        """Test refresh=True reads Odoo and updates the cache"""
+        self.mirror.get(1)
+        self.odoo.records[('res.partner', 1)]['name'] = 'Renamed'
+
+        self.assertEqual(self.mirror.get(1, refresh=True)['name'], 'Renamed')
+        self.assertEqual(self.mirror.get(1)['name'], 'Renamed')
+
+    def test_single_flight_waits_for_other_worker(self):
+        """Test a locked key is filled by the worker holding the lock, not read twice"""
+        cache.add(self.mirror._lock_key(1), 1)
+        fill = threading.Timer(0.05, lambda: cache.set(
+            self.mirror._key(1), {'record': {'id': 1, 'name': 'From worker'}, 'fetched_at': time.time()}
+        ))
+        fill.start()
+        self.addCleanup(fill.cancel)
+
+        self.assertEqual(self.mirror.get(1)['name'], 'From worker')
+        self.assertEqual(self.odoo.calls, [])
+
+    def test_single_flight_falls_back_after_wait(self):
+        """Test a stuck lock does not block readers beyond ODOO_MIRROR_LOCK_WAIT"""
+        cache.add(self.mirror._lock_key(1), 1)
+
+        self.assertEqual(self.mirror.get(1)['name'], 'Partner 1')
+        self.assertEqual(self.odoo.calls, [('res.partner', [1])])
+
+    def test_stale_while_revalidate(self):
+        """Test an expired record is served at once and refreshed in the background"""
+        cache.set(self.mirror._key(1), {'record': {'id': 1, 'name': 'Old'}, 'fetched_at': time.time() - 600})
+
+        with patch('core.odoo_mirror.revalidation_executor', InlineExecutor()):
+            self.assertEqual(self.mirror.get(1)['name'], 'Old')
+            cache.add(self.mirror._lock_key(1), 1)  # revalidation en cours ailleurs
+            self.assertEqual(self.mirror.get(1)['name'], 'Partner 1')
+
+        self.assertEqual(len(self.odoo.calls), 1)
+        self.assertEqual(self.mirror.stats()['stale'], 1)
+
+    def test_failed_revalidation_keeps_stale_record(self):
+        """Test an Odoo error during revalidation is logged and the stale record kept"""
+        cache.set(self.mirror._key(1), {'record': {'id': 1, 'name': 'Old'}, 'fetched_at': time.time() - 600})
+
+        with patch('core.odoo_mirror.revalidation_executor', InlineExecutor()), \
+                patch('core.odoo_gateway.OdooGateway._call_with_retry', side_effect=ConnectionError('down')):
+            self.assertEqual(self.mirror.get(1)['name'], 'Old')
+
+        self.assertEqual(self.mirror.stats()['errors'], 1)
+        self.assertIsNone(cache.get(self.mirror._lock_key(1)))
+
+
+class OdooGatewayMirrorTest(TestCase):
+    """Test the gateway reads through the mirrors and invalidates them on writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.odoo = FakeReads({
+            ('project.task', 10): {'user_ids': [1, 2], 'project_id': [20, 'Album']},
+            ('project.project', 20): {'user_id': [3, 'Manager']},
+            ('res.users', 1): {'partner_id': [101, 'A']},
+            ('res.users', 2): {'partner_id': [102, 'B']},
+            ('res.users', 3): {'partner_id': [103, 'M']},
+        })
+        patcher = patch('core.odoo_gateway.OdooGateway._call_with_retry', side_effect=self.odoo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_task_partners_is_cached(self):
+        """Test repeated webhook lookups cost no RPC once mirrored"""
+        self.assertEqual(odoo_gateway.get_task_partners(10), ([101, 102], 103))
+        self.assertEqual(len(self.odoo.calls), 3)
+
+        self.assertEqual(odoo_gateway.get_task_partners(10), ([101, 102], 103))
+        self.assertEqual(len(self.odoo.calls), 3)
+
+    def test_writes_invalidate_mirror(self):
+        """Test upserts drop the written records from the mirror"""
+        odoo_gateway.get_task_partners(10)
+
+        with patch('core.odoo_gateway.OdooGateway._upsert', return_value={1: 10}):
+            odoo_gateway.upsert_tasks([{'id': 1, 'titre': 'Mixage', 'projet_odoo_id': 20}])
+        with patch('core.odoo_gateway.OdooGateway._upsert', return_value={1: 20}):
+            odoo_gateway.upsert_projects([{'id': 1, 'titre': 'Album'}])
+
+        self.assertIsNone(cache.get(task_mirror._key(10)))
+        self.assertIsNone(cache.get(project_mirror._key(20)))
+        self.assertIsNotNone(cache.get(user_mirror._key(1)))
+
+    def test_get_partners(self):
+        """Test get_partners returns records keyed by Odoo ID"""
+        self.odoo.records[('res.partner', 7)] = {'name': 'Alice'}
+
+        self.assertEqual(odoo_gateway.get_partners([7, 8])[7]['name'], 'Alice')
+        self.assertEqual(self.odoo.calls, [('res.partner', [7, 8])])
+        self.assertEqual(partner_mirror.stats()['misses'], 2)
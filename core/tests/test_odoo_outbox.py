@@ -0,0 +1,262 @@
+"""
+Tests for the transactional Odoo outbox and its drain
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from core.models import OdooOutbox, Profile, Projet, Tache
+from core.odoo_gateway import EXTERNAL_ID_MODULE
+from core.services.odoo_sync_service import OdooSyncService
+from core.tests.test_odoo_batch_sync import FakeOdoo
+
+User = get_user_model()
+
+
+class OdooOutboxRecordingTest(TestCase):
+    """Test outbox events are written with the model changes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.profile = Profile.objects.get(user=self.user)
+        OdooOutbox.objects.all().delete()
+
+    def test_creation_is_recorded(self):
+        """Test creating a projet records an upsert"""
+        projet = Projet.objects.create(titre='Album', type='musique')
+
+        event = OdooOutbox.objects.get()
+        self.assertEqual((event.entity, event.entity_id, event.operation), ('project', projet.id, 'upsert'))
+
+    def test_only_synced_field_changes_are_recorded(self):
+        """Test a change to a field not sent to Odoo records nothing"""
+        profile = Profile.objects.get(pk=self.profile.pk)
+        profile.role = 'admin'
+        profile.save()
+        self.assertFalse(OdooOutbox.objects.exists())
+
+        profile.phone = '0600000000'
+        profile.save()
+        event = OdooOutbox.objects.get()
+        self.assertEqual((event.entity, event.entity_id), ('partner', self.user.id))
+
+    def test_odoo_id_write_back_is_not_recorded(self):
+        """Test saving the Odoo ID does not trigger another sync"""
+        self.profile.odoo_partner_id = 12
+        self.profile.save(update_fields=['odoo_partner_id'])
+        self.assertFalse(OdooOutbox.objects.exists())
+
+    def test_rolled_back_change_is_not_recorded(self):
+        """Test the event is rolled back with the change"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Projet.objects.create(titre='Album', type='musique')
+            raise RuntimeError
+
+        self.assertFalse(OdooOutbox.objects.exists())
+
+    def test_user_fields(self):
+        """Test name changes are recorded, login timestamps are not"""
+        self.user.last_name = 'Martin'
+        self.user.save(update_fields=['last_name'])
+        self.user.save(update_fields=['last_login'])
+
+        event = OdooOutbox.objects.get()
+        self.assertEqual((event.entity, event.entity_id), ('partner', self.user.id))
+
+    def test_user_deletion(self):
+        """Test deleting a user records a partner deletion with its Odoo ID"""
+        Profile.objects.filter(pk=self.profile.pk).update(odoo_partner_id=77)
+        user_id = self.user.id
+        self.user.delete()
+
+        event = OdooOutbox.objects.get(operation='delete')
+        self.assertEqual((event.entity, event.entity_id, event.odoo_id), ('partner', user_id, 77))
+
+
+@override_settings(ODOO_BATCH_SIZE=100, ODOO_OUTBOX_SAFETY_LAG=0)
+class OdooOutboxDrainTest(TestCase):
+    """Test OdooSyncService.drain_outbox"""
+
+    def setUp(self):
+        cache.clear()
+        self.odoo = FakeOdoo()
+        for target, kwargs in [
+            ('core.odoo_gateway.odoo_rate_limiter.acquire', {'return_value': 0}),
+            ('core.odoo_gateway.OdooGateway._execute', {'side_effect': self.odoo.execute}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username='alice', password='x')
+        self.projet = Projet.objects.create(titre='Album', type='musique', client=self.user)
+
+    def test_edits_are_coalesced(self):
+        """Test several edits of the same projet cost one Odoo write"""
+        for titre in ['Album v2', 'Album v3']:
+            self.projet.titre = titre
+            self.projet.save()
+
+        stats = OdooSyncService.drain_outbox()
+
+        self.assertEqual(stats['events'], 4)  # profil + 3 versions du projet
+        self.assertEqual(self.odoo.calls.count(('project.project', 'load')), 1)
+        self.projet.refresh_from_db()
+        self.assertEqual(self.odoo.records[('project.project', self.projet.odoo_project_id)]['name'], 'Album v3')
+
+    def test_processed_events_are_not_replayed(self):
+        """Test a second drain does not replay processed events"""
+        OdooSyncService.drain_outbox()
+        calls = len(self.odoo.calls)
+
+        self.assertEqual(OdooSyncService.drain_outbox()['events'], 0)
+        self.assertEqual(len(self.odoo.calls), calls)
+        self.assertEqual(set(OdooOutbox.objects.values_list('status', flat=True)), {'done'})
+
+    def test_failed_batch_is_replayed(self):
+        """Test events stay pending, without counting an attempt, when Odoo is down"""
+        with patch('core.odoo_gateway.OdooGateway._execute', side_effect=ConnectionError('down')), \
+                patch('core.odoo_gateway.time.sleep'):
+            with self.assertRaises(ConnectionError):
+                OdooSyncService.drain_outbox()
+
+        self.assertEqual(set(OdooOutbox.objects.values_list('status', 'attempts')), {('pending', 0)})
+        self.assertEqual(OdooSyncService.drain_outbox()['events'], 2)
+
+    def test_run_is_capped(self):
+        """Test a run stops at max_events and the next run resumes with the pending events"""
+        Projet.objects.bulk_create([Projet(titre=f'Projet {i}', type='film') for i in range(3)])
+        OdooSyncService.enqueue('project', Projet.objects.values_list('id', flat=True))
+
+        with override_settings(ODOO_OUTBOX_MAX_EVENTS_PER_RUN=3):
+            self.assertEqual(OdooSyncService.drain_outbox(batch_size=2)['events'], 3)
+        self.assertEqual(OdooSyncService.drain_outbox()['events'], 3)
+        self.assertFalse(Projet.objects.filter(odoo_project_id__isnull=True).exists())
+
+    def test_safety_lag(self):
+        """Test recent events wait for concurrent transactions to commit"""
+        with override_settings(ODOO_OUTBOX_SAFETY_LAG=60):
+            self.assertEqual(OdooSyncService.drain_outbox()['events'], 0)
+
+    def test_tache_pulls_unsynced_projet(self):
+        """Test a task is synced together with its projet and the projet's client"""
+        OdooOutbox.objects.all().delete()
+        tache = Tache.objects.create(projet=self.projet, titre='Mixage')
+
+        stats = OdooSyncService.drain_outbox()
+
+        self.assertEqual((stats['partners'], stats['projets'], stats['taches']), (1, 1, 1))
+        tache.refresh_from_db()
+        self.projet.refresh_from_db()
+        task = self.odoo.records[('project.task', tache.odoo_task_id)]
+        self.assertEqual(task['project_id/.id'], str(self.projet.odoo_project_id))
+
+    def test_deleted_user(self):
+        """Test a deleted user's partner is unlinked, even before its Odoo ID was written back"""
+        OdooSyncService.drain_outbox()
+        partner_id = Profile.objects.get(user=self.user).odoo_partner_id
+        Profile.objects.filter(user=self.user).update(odoo_partner_id=None)
+        Projet.objects.filter(pk=self.projet.pk).delete()
+        self.user.delete()
+
+        stats = OdooSyncService.drain_outbox()
+
+        self.assertEqual(stats['deleted'], 1)
+        self.assertNotIn(('res.partner', partner_id), self.odoo.records)
+
+    def test_prune(self):
+        """Test processed events are pruned after the retention period"""
+        OdooSyncService.drain_outbox()
+        OdooOutbox.objects.update(created_at=OdooOutbox.objects.first().created_at - timedelta(days=30))
+        Projet.objects.create(titre='Nouveau', type='film')
+
+        self.assertEqual(OdooSyncService.prune_outbox(), 2)
+        self.assertEqual(OdooOutbox.objects.count(), 1)
+
+    @override_settings(ODOO_OUTBOX_MAX_ATTEMPTS=2)
+    def test_poison_event_is_isolated(self):
+        """Test a failing event does not block the others and is abandoned after max attempts"""
+        poison = Projet.objects.create(titre='Poison', type='film')
+        projet_data = OdooSyncService.projet_data
+
+        def failing_projet_data(projet):
+            if projet.id == poison.id:
+                raise ValueError('bad data')
+            return projet_data(projet)
+
+        with patch.object(OdooSyncService, 'projet_data', side_effect=failing_projet_data):
+            stats = OdooSyncService.drain_outbox()
+            self.assertEqual((stats['events'], stats['retried'], stats['failed']), (3, 1, 0))
+            event = OdooOutbox.objects.get(entity='project', entity_id=poison.id)
+            self.assertEqual((event.status, event.attempts, event.error), ('pending', 1, 'bad data'))
+            self.projet.refresh_from_db()
+            self.assertIsNotNone(self.projet.odoo_project_id)
+
+            stats = OdooSyncService.drain_outbox()
+            self.assertEqual((stats['events'], stats['failed']), (1, 1))
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'failed')
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(OdooSyncService.drain_outbox()['events'], 0)
+        self.assertEqual(set(OdooOutbox.objects.exclude(pk=event.pk).values_list('status', flat=True)), {'done'})
+
+    def test_rejected_row_is_recorded(self):
+        """Test a row rejected by Odoo marks its event in error"""
+        self.odoo.reject = {f'{EXTERNAL_ID_MODULE}.projet_{self.projet.id}'}
+
+        stats = OdooSyncService.drain_outbox()
+
+        self.assertEqual(stats['retried'], 1)
+        event = OdooOutbox.objects.get(entity='project')
+        self.assertEqual((event.status, event.error), ('pending', 'Not accepted by Odoo'))
+        self.assertEqual(OdooOutbox.objects.get(entity='partner').status, 'done')
+
+    def test_late_event_is_not_skipped(self):
+        """Test an event younger than the lag is picked up later, even after higher ids were processed"""
+        Projet.objects.create(titre='Suivant', type='film')
+        late = OdooOutbox.objects.get(entity='project', entity_id=self.projet.id)
+        created_at = late.created_at
+        # Horloge d'un autre serveur en avance : ID plus petit, created_at plus récent
+        OdooOutbox.objects.filter(pk=late.pk).update(created_at=created_at + timedelta(minutes=5))
+
+        with override_settings(ODOO_OUTBOX_SAFETY_LAG=60):
+            self.assertEqual(OdooSyncService.drain_outbox()['events'], 0)
+        OdooOutbox.objects.exclude(pk=late.pk).update(created_at=created_at - timedelta(minutes=5))
+        with override_settings(ODOO_OUTBOX_SAFETY_LAG=60):
+            self.assertEqual(OdooSyncService.drain_outbox()['events'], 2)
+        self.assertEqual(OdooOutbox.objects.get(pk=late.pk).status, 'pending')
+
+        OdooOutbox.objects.filter(pk=late.pk).update(created_at=created_at - timedelta(minutes=5))
+        with override_settings(ODOO_OUTBOX_SAFETY_LAG=60):
+            self.assertEqual(OdooSyncService.drain_outbox()['events'], 1)
+        self.projet.refresh_from_db()
+        self.assertIsNotNone(self.projet.odoo_project_id)
+
+    def test_single_consumer(self):
+        """Test a drain is skipped while another worker holds the lock"""
+        cache.add('odoo:outbox:draining', 'other')
+        self.assertEqual(OdooSyncService.drain_outbox()['events'], 0)
+        self.assertEqual(OdooOutbox.objects.filter(status='pending').count(), 2)
+        self.assertEqual(cache.get('odoo:outbox:draining'), 'other')
+
+    def test_lost_lock_is_not_released(self):
+        """Test a run whose lock expired and was taken over stops and leaves the new owner's lock"""
+        Projet.objects.create(titre='Suivant', type='film')
+        apply_events = OdooSyncService.apply_events
+
+        def slow_apply_events(events):
+            # Verrou expiré pendant le lot puis repris par un autre worker
+            cache.set('odoo:outbox:draining', 'other')
+            return apply_events(events)
+
+        with patch.object(OdooSyncService, 'apply_events', side_effect=slow_apply_events):
+            stats = OdooSyncService.drain_outbox(batch_size=2)
+
+        self.assertEqual(stats['events'], 2)
+        self.assertEqual(OdooOutbox.objects.filter(status='pending').count(), 1)
+        self.assertEqual(cache.get('odoo:outbox:draining'), 'other')
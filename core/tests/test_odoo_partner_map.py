@@ -0,0 +1,99 @@
+"""
+Tests for the cached Odoo partner <-> user map and the unique Odoo ID indexes
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from core.models import Profile, Projet, Tache
+from core.services.odoo_sync_service import OdooSyncService
+from core.services.partner_map_service import PartnerMapService
+
+User = get_user_model()
+
+
+class PartnerMapServiceTest(TestCase):
+    """Test PartnerMapService lookups and refresh"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='x')
+        self.bob = User.objects.create_user(username='bob', password='x')
+        Profile.objects.filter(user=self.alice).update(odoo_partner_id=10)
+        Profile.objects.filter(user=self.bob).update(odoo_partner_id=20)
+
+    def test_lookup_both_directions(self):
+        """Test the map resolves partners to users and back"""
+        self.assertEqual(PartnerMapService.users_for_partners([10, 20, 99]), {10: self.alice.id, 20: self.bob.id})
+        self.assertEqual(PartnerMapService.partners_for_users([self.alice.id]), {self.alice.id: 10})
+
+    def test_batch_is_cached(self):
+        """Test a batch costs one query cold and none warm, unknown partners included"""
+        with self.assertNumQueries(1):
+            PartnerMapService.users_for_partners([10, 20, 99])
+        with self.assertNumQueries(0):
+            self.assertEqual(PartnerMapService.users_for_partners([10, 20, 99]), {10: self.alice.id, 20: self.bob.id})
+
+    def test_profile_save_refreshes_map(self):
+        """Test saving a profile moves its partner in the map"""
+        PartnerMapService.users_for_partners([10])
+        profile = Profile.objects.get(user=self.alice)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.odoo_partner_id = 30
+            profile.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(PartnerMapService.users_for_partners([30]), {30: self.alice.id})
+            self.assertEqual(PartnerMapService.partners_for_users([self.alice.id]), {self.alice.id: 30})
+        self.assertEqual(PartnerMapService.users_for_partners([10]), {})
+
+    def test_profile_delete_forgets_user(self):
+        """Test deleting a user removes its partner from the map"""
+        PartnerMapService.users_for_partners([10])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.delete()
+
+        self.assertEqual(PartnerMapService.users_for_partners([10]), {})
+
+    def test_sync_write_back_refreshes_map(self):
+        """Test partner IDs written back by the sync are visible without a query"""
+        carol = User.objects.create_user(username='carol', password='x')
+        PartnerMapService.users_for_partners([40])  # Inconnu : mis en cache négatif
+
+        with patch('core.services.odoo_sync_service.odoo_gateway.upsert_partners', return_value={carol.id: 40}), \
+                self.captureOnCommitCallbacks(execute=True):
+            OdooSyncService.sync_profiles(Profile.objects.filter(user=carol).select_related('user'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(PartnerMapService.users_for_partners([40]), {40: carol.id})
+
+
+class OdooIdUniqueTest(TestCase):
+    """Test the partial unique indexes on Odoo IDs"""
+
+    def test_duplicate_odoo_ids_rejected(self):
+        """Test two rows cannot share an Odoo ID, while NULL stays allowed"""
+        projet = Projet.objects.create(titre='A', type='musique', odoo_project_id=1)
+        Projet.objects.create(titre='B', type='musique')
+        Projet.objects.create(titre='C', type='musique')
+        Tache.objects.create(projet=projet, titre='T', odoo_task_id=5)
+
+        for create in (
+            lambda: Projet.objects.create(titre='D', type='musique', odoo_project_id=1),
+            lambda: Tache.objects.create(projet=projet, titre='U', odoo_task_id=5),
+        ):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                create()
+
+    def test_duplicate_partner_rejected(self):
+        """Test two profiles cannot share an Odoo partner"""
+        users = [User.objects.create_user(username=f'user{i}', password='x') for i in range(2)]
+        Profile.objects.filter(user=users[0]).update(odoo_partner_id=7)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Profile.objects.filter(user=users[1]).update(odoo_partner_id=7)
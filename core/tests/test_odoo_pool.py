@@ -0,0 +1,165 @@
+"""
+Tests for the Odoo session pool and gateway reconnection
+"""
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from odoorpc.error import RPCError
+
+from core.odoo_gateway import (
+    OdooConnectionError, OdooGateway, OdooNotConfiguredError,
+    OdooPoolTimeoutError, OdooSessionPool,
+)
+
+
+class FakeSession:
+    """Session odoorpc factice"""
+
+    def __init__(self):
+        self.closed = False
+        self.calls = []
+
+    def login(self, db, username, password):
+        pass
+
+    def execute_kw(self, model, method, args, kwargs):
+        self.calls.append((model, method, args, kwargs))
+        return 42
+
+    def logout(self):
+        self.closed = True
+
+
+class OdooSessionPoolTest(SimpleTestCase):
+    """Test OdooSessionPool"""
+
+    def setUp(self):
+        self.created = []
+
+    def factory(self):
+        session = FakeSession()
+        self.created.append(session)
+        return session
+
+    def test_sessions_are_reused(self):
+        """Test idle sessions are reused instead of logging in again"""
+        pool = OdooSessionPool(self.factory, size=2)
+        for _ in range(3):
+            with pool.session():
+                pass
+        self.assertEqual(len(self.created), 1)
+
+    def test_size_limit(self):
+        """Test the pool never opens more than `size` sessions and times out when exhausted"""
+        pool = OdooSessionPool(self.factory, size=1, timeout=0.05)
+        acquired, release = threading.Event(), threading.Event()
+
+        def hold():
+            with pool.session():
+                acquired.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait(1)
+        try:
+            with self.assertRaises(OdooPoolTimeoutError):
+                with pool.session():
+                    pass
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(len(self.created), 1)
+
+    def test_connection_error_discards_session(self):
+        """Test a network error closes the session and the next borrow reconnects"""
+        pool = OdooSessionPool(self.factory, size=1)
+        with self.assertRaises(ConnectionError):
+            with pool.session():
+                raise ConnectionError('reset by peer')
+
+        with pool.session() as odoo:
+            self.assertIs(odoo, self.created[1])
+        self.assertTrue(self.created[0].closed)
+
+    def test_business_error_keeps_session(self):
+        """Test Odoo business errors leave the session in the pool"""
+        pool = OdooSessionPool(self.factory, size=1)
+        with self.assertRaises(RPCError):
+            with pool.session():
+                raise RPCError('Access Denied')
+
+        with pool.session():
+            pass
+        self.assertEqual(len(self.created), 1)
+
+    def test_expired_session_is_replaced(self):
+        """Test an expired session error triggers a reconnect"""
+        pool = OdooSessionPool(self.factory, size=1)
+        with self.assertRaises(RPCError):
+            with pool.session():
+                raise RPCError('Odoo Session Expired')
+
+        with pool.session():
+            pass
+        self.assertEqual(len(self.created), 2)
+
+    def test_health_check(self):
+        """Test stale idle sessions failing the health check are replaced"""
+        pool = OdooSessionPool(self.factory, size=1, health_check_interval=0, health_check=lambda odoo: False)
+        with pool.session():
+            pass
+        with pool.session():
+            pass
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[0].closed)
+
+    def test_fork_resets_pool(self):
+        """Test a child process never reuses sessions opened by its parent"""
+        pool = OdooSessionPool(self.factory, size=1)
+        with pool.session():
+            pass
+
+        with patch('core.odoo_gateway.os.getpid', return_value=-1):
+            with pool.session() as odoo:
+                self.assertIs(odoo, self.created[1])
+
+
+@override_settings(
+    ODOO_ENABLED=True, ODOO_HOST='odoo.test', ODOO_DB='db', ODOO_USERNAME='user', ODOO_PASSWORD='pass',
+    ODOO_POOL_SIZE=2, ODOO_POOL_TIMEOUT=1, ODOO_HEALTH_CHECK_INTERVAL=60, ODOO_RECONNECT_COOLDOWN=60,
+)
+class OdooGatewayReconnectTest(SimpleTestCase):
+    """Test the gateway reconnects instead of latching failures"""
+
+    def setUp(self):
+        self.gateway = OdooGateway()
+        self.gateway._pool = None
+        self.gateway._last_failure = None
+
+    def tearDown(self):
+        self.gateway._pool = None
+        self.gateway._last_failure = None
+
+    @override_settings(ODOO_ENABLED=False)
+    def test_not_configured(self):
+        """Test disabled integration raises OdooNotConfiguredError"""
+        with self.assertRaises(OdooNotConfiguredError):
+            self.gateway.get_partner(1, use_cache=False)
+
+    def test_reconnects_after_cooldown(self):
+        """Test a failed login is retried once the cooldown has elapsed"""
+        with patch('odoorpc.ODOO', side_effect=ConnectionError('down')):
+            with self.assertRaises(OdooConnectionError):
+                self.gateway._execute('res.partner', 'read', [1])
+
+        # Pendant le délai : échec immédiat, sans nouvelle tentative de connexion
+        with patch('odoorpc.ODOO') as odoo_class:
+            with self.assertRaises(OdooConnectionError):
+                self.gateway._execute('res.partner', 'read', [1])
+            odoo_class.assert_not_called()
+
+        with override_settings(ODOO_RECONNECT_COOLDOWN=0), patch('odoorpc.ODOO', return_value=FakeSession()):
+            self.assertEqual(self.gateway._execute('res.partner', 'read', [1]), 42)
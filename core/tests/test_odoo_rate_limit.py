@@ -0,0 +1,104 @@
+"""
+Tests for the distributed Odoo rate limiter
+"""
+from unittest.mock import patch
+
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.odoo_gateway import OdooGateway, OdooRateLimitError
+from core.odoo_rate_limit import OdooRateLimiter
+from core.tasks import delete_user_from_odoo_task
+
+
+@override_settings(
+    ODOO_RATE_LIMIT=10, ODOO_RATE_LIMIT_BURST=3, ODOO_RATE_LIMIT_MAX_WAIT=0,
+    ODOO_RATE_LIMIT_MODELS={'project.task': (1, 1)},
+)
+class OdooRateLimiterTest(SimpleTestCase):
+    """Test token buckets stored in the Django cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = OdooRateLimiter()
+        self.now = 1000.0
+        patcher = patch('core.odoo_rate_limit.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_wait(self):
+        """Test the burst is served immediately, then callers get a retry delay"""
+        self.assertEqual([self.limiter.acquire('res.partner') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.limiter.acquire('res.partner'), 0.1)
+
+        self.now += 0.1
+        self.assertEqual(self.limiter.acquire('res.partner'), 0)
+
+    def test_model_budget(self):
+        """Test per-model buckets apply on top of the global bucket"""
+        self.assertEqual(self.limiter.acquire('project.task'), 0)
+        self.assertAlmostEqual(self.limiter.acquire('project.task'), 1.0)
+
+        # Le refus n'a pas consommé de jeton global
+        self.assertEqual(self.limiter.acquire('res.partner'), 0)
+        self.assertEqual(self.limiter.acquire('res.partner'), 0)
+
+    def test_penalty(self):
+        """Test a 429 penalty pauses every caller"""
+        self.limiter.penalize(30)
+        self.assertAlmostEqual(self.limiter.acquire('res.partner'), 30)
+
+        self.now += 31
+        self.assertEqual(self.limiter.acquire('res.partner'), 0)
+
+
+@override_settings(
+    ODOO_ENABLED=True, ODOO_HOST='odoo.test', ODOO_DB='db', ODOO_USERNAME='user', ODOO_PASSWORD='pass',
+    ODOO_RATE_LIMIT_MAX_WAIT=0.2,
+)
+class OdooGatewayRateLimitTest(SimpleTestCase):
+    """Test callers are told when to retry instead of sleeping"""
+
+    def setUp(self):
+        cache.clear()
+        self.gateway = OdooGateway()
+
+    def test_gateway_raises_retry_after(self):
+        """Test an exhausted budget raises OdooRateLimitError without calling Odoo"""
+        with patch('core.odoo_gateway.odoo_rate_limiter.acquire', return_value=5.0), \
+                patch.object(self.gateway, '_execute') as execute:
+            with self.assertRaises(OdooRateLimitError) as ctx:
+                self.gateway.delete_partner(1)
+
+        self.assertEqual(ctx.exception.retry_after, 5.0)
+        execute.assert_not_called()
+
+    def test_short_waits_are_absorbed(self):
+        """Test waits below ODOO_RATE_LIMIT_MAX_WAIT are slept in place"""
+        with patch('core.odoo_gateway.odoo_rate_limiter.acquire', side_effect=[0.05, 0]), \
+                patch('core.odoo_gateway.time.sleep') as sleep, \
+                patch.object(self.gateway, '_execute', return_value=True):
+            self.gateway.delete_partner(1)
+
+        sleep.assert_called_once_with(0.05)
+
+    def test_http_429_pauses_all_workers(self):
+        """Test an Odoo 429 sets the shared penalty and raises immediately"""
+        with patch.object(self.gateway, '_execute', side_effect=Exception('429 Too Many Requests')), \
+                patch('core.odoo_gateway.time.sleep') as sleep:
+            with self.assertRaises(OdooRateLimitError):
+                self.gateway.delete_partner(1)
+
+        sleep.assert_not_called()
+        self.assertGreater(OdooRateLimiter().acquire('res.partner'), 0)
+
+    def test_task_reschedules_with_countdown(self):
+        """Test Celery tasks retry with the limiter delay"""
+        error = OdooRateLimitError('budget', retry_after=7.5)
+        with patch('core.tasks.odoo_gateway.delete_partner', side_effect=error), \
+                patch.object(delete_user_from_odoo_task, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                delete_user_from_odoo_task(1)
+
+        retry.assert_called_once_with(exc=error, countdown=7.5, max_retries=None)
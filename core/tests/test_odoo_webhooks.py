@@ -0,0 +1,250 @@
+"""
+Tests for the Odoo webhook inbox (202 endpoints + batched consumer)
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Notification, OdooWebhookEvent, Profile, Projet, Tache
+from core.odoo_gateway import OdooConnectionError, OdooRateLimitError
+from core.services.odoo_webhook_service import OdooWebhookService
+
+User = get_user_model()
+
+DEADLINE_URL = '/api/odoo-webhooks/deadline-notification/'
+ASSIGNED_URL = '/api/odoo-webhooks/task-assigned/'
+
+
+@override_settings(ODOO_WEBHOOK_SECRET='secret')
+class OdooWebhookEndpointTest(TestCase):
+    """Test the webhook endpoints only validate and store the event"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_unauthorized(self):
+        """Test a wrong token is rejected and nothing is stored"""
+        response = APIClient().post(DEADLINE_URL + '?token=wrong', {'task_id': 1}, format='json')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(OdooWebhookEvent.objects.exists())
+
+    def test_event_is_queued(self):
+        """Test the endpoint answers 202 without calling Odoo or creating notifications"""
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners') as get_task_partners, \
+                self.assertNumQueries(1):
+            response = self.client.post(DEADLINE_URL + '?type=deadline_today', {'_id': 12}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        get_task_partners.assert_not_called()
+        event = OdooWebhookEvent.objects.get()
+        self.assertEqual((event.kind, event.payload, event.params, event.status),
+                         ('deadline', {'_id': 12}, {'type': 'deadline_today'}, 'pending'))
+        self.assertEqual(response.json()['event_id'], event.event_id)
+
+    def test_token_is_not_stored(self):
+        """Test the query-string token is dropped from the stored parameters"""
+        APIClient().post(DEADLINE_URL + '?token=secret&type=deadline_1day', {'task_id': 1}, format='json')
+
+        self.assertEqual(OdooWebhookEvent.objects.get().params, {'type': 'deadline_1day'})
+
+    def test_replays_are_deduplicated(self):
+        """Test the same event sent twice is stored once"""
+        for _ in range(2):
+            self.client.post(ASSIGNED_URL, {'task_id': 1, 'user_id': 2}, format='json')
+        for _ in range(2):
+            self.client.post(ASSIGNED_URL, {'task_id': 3, 'user_id': 4}, format='json', HTTP_X_ODOO_EVENT_ID='evt-1')
+
+        self.assertEqual(OdooWebhookEvent.objects.count(), 2)
+        self.assertTrue(OdooWebhookEvent.objects.filter(event_id='task_assigned:evt-1').exists())
+
+    def test_invalid_payload(self):
+        """Test a payload without task is rejected at once"""
+        self.assertEqual(self.client.post(DEADLINE_URL, {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(ASSIGNED_URL, {'task_id': 1}, format='json').status_code, 400)
+
+    def test_storage_error_is_not_leaked(self):
+        """Test a storage failure answers 500 without the internal error text"""
+        with patch('core.services.odoo_webhook_service.OdooWebhookService.receive',
+                   side_effect=RuntimeError('relation "core_odoowebhookevent" does not exist')):
+            response = self.client.post(DEADLINE_URL, {'task_id': 1}, format='json')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Internal error'})
+
+    def test_burst_schedules_one_consumer(self):
+        """Test a burst of webhooks queues a single consumer run"""
+        with patch('core.tasks.process_odoo_webhooks.apply_async') as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            for task_id in range(5):
+                self.client.post(DEADLINE_URL, {'task_id': task_id}, format='json')
+
+        apply_async.assert_called_once()
+
+
+@override_settings(ODOO_WEBHOOK_MAX_ATTEMPTS=2)
+class OdooWebhookProcessingTest(TestCase):
+    """Test OdooWebhookService.process_pending"""
+
+    def setUp(self):
+        cache.clear()
+        self.chef = User.objects.create_user(username='chef', password='x')
+        self.membre = User.objects.create_user(username='membre', password='x')
+        self.outsider = User.objects.create_user(username='outsider', password='x')
+        for user, partner_id in [(self.chef, 100), (self.membre, 101), (self.outsider, 102)]:
+            Profile.objects.filter(user=user).update(odoo_partner_id=partner_id)
+
+        self.projet = Projet.objects.create(titre='Album', type='musique')
+        Projet.objects.filter(pk=self.projet.pk).update(chef_projet=self.chef)
+        self.projet.refresh_from_db()
+        self.projet.membres.add(self.membre)
+        self.taches = [
+            Tache.objects.create(projet=self.projet, titre=f'Tâche {i}', odoo_task_id=500 + i,
+                                 deadline=timezone.now() + timedelta(days=3))
+            for i in range(6)
+        ]
+
+    def receive(self, kind, payload, params=None):
+        OdooWebhookService.receive(kind, payload, params or {})
+
+    def test_deadline_recipients(self):
+        """Test deadline notifications go to project members and the chef only"""
+        self.receive('deadline', {'task_id': 500, 'type': 'deadline_3days', 'users': [101, 102], 'project_manager': 100})
+
+        stats = OdooWebhookService.process_pending()
+
+        self.assertEqual((stats['events'], stats['notifications']), (1, 2))
+        self.assertEqual(
+            set(Notification.objects.filter(type='deadline_3days').values_list('user_id', flat=True)),
+            {self.chef.id, self.membre.id},
+        )
+        self.assertEqual(OdooWebhookEvent.objects.get().status, 'done')
+
+    def test_queries_do_not_grow_with_events(self):
+        """Test a batch costs the same queries for 2 or 6 events"""
+        counts = []
+        for taches in (self.taches[:2], self.taches[2:]):
+            for tache in taches:
+                self.receive('deadline', {'task_id': tache.odoo_task_id, 'type': 'deadline_1day', 'users': [101]})
+            cache.clear()  # Correspondance partner -> utilisateur froide pour les deux lots
+            with CaptureQueriesContext(connection) as queries:
+                OdooWebhookService.process_pending()
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Notification.objects.count(), 6)
+
+    def test_warm_partner_map_skips_profile_query(self):
+        """Test recipients are resolved from the cached partner map once warm"""
+        self.receive('deadline', {'task_id': 500, 'type': 'deadline_1day', 'users': [100, 101, 102]})
+        with CaptureQueriesContext(connection) as cold:
+            OdooWebhookService.process_pending()
+        self.receive('deadline', {'task_id': 501, 'type': 'deadline_1day', 'users': [100, 101, 102]})
+        with CaptureQueriesContext(connection) as warm:
+            OdooWebhookService.process_pending()
+
+        self.assertEqual(len(warm), len(cold) - 1)
+        self.assertFalse(any('core_profile' in query['sql'] for query in warm.captured_queries))
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_studio_format_reads_odoo(self):
+        """Test Studio payloads resolve partners through the gateway in the consumer"""
+        self.receive('deadline', {'_id': 501, '_model': 'project.task'}, {'type': 'deadline_today'})
+
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners', return_value=([101], None)) as get_task_partners:
+            OdooWebhookService.process_pending()
+
+        get_task_partners.assert_called_once_with(501)
+        self.assertEqual(Notification.objects.get().user_id, self.membre.id)
+
+    def test_task_assigned(self):
+        """Test assignment events notify the partner's user"""
+        self.receive('task_assigned', {'task_id': 502, 'user_id': 102})
+
+        OdooWebhookService.process_pending()
+
+        notification = Notification.objects.get(type='task_assigned')
+        self.assertEqual((notification.user_id, notification.tache_id), (self.outsider.id, self.taches[2].id))
+
+    def test_unknown_task_is_retried_then_failed(self):
+        """Test an event for an unknown task is retried up to ODOO_WEBHOOK_MAX_ATTEMPTS"""
+        self.receive('deadline', {'task_id': 999, 'type': 'deadline_today'})
+
+        self.assertEqual(OdooWebhookService.process_pending()['retried'], 1)
+        self.assertEqual(OdooWebhookService.process_pending()['failed'], 1)
+
+        event = OdooWebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ('failed', 2))
+        self.assertIn('999', event.error)
+        self.assertEqual(OdooWebhookService.process_pending()['events'], 0)
+
+    def test_rate_limited_batch_stays_pending(self):
+        """Test an Odoo rate limit leaves the whole batch pending without using an attempt"""
+        self.receive('deadline', {'task_id': 500, 'type': 'deadline_today', 'users': [101]})
+        self.receive('deadline', {'_id': 501}, {'type': 'deadline_today'})
+
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners', side_effect=OdooRateLimitError('busy', 5)):
+            with self.assertRaises(OdooRateLimitError):
+                OdooWebhookService.process_pending()
+
+        self.assertEqual(list(OdooWebhookEvent.objects.values_list('status', 'attempts')), [('pending', 0)] * 2)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_unavailable_odoo_leaves_batch_pending(self):
+        """Test a transient Odoo error releases the batch without using an attempt"""
+        self.receive('deadline', {'_id': 501}, {'type': 'deadline_today'})
+
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners', side_effect=OdooConnectionError('down')):
+            with self.assertRaises(OdooConnectionError):
+                OdooWebhookService.process_pending()
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners', side_effect=ConnectionResetError()):
+            with self.assertRaises(ConnectionResetError):
+                OdooWebhookService.process_pending()
+
+        self.assertEqual(list(OdooWebhookEvent.objects.values_list('status', 'attempts')), [('pending', 0)])
+
+    def test_rpc_runs_outside_transaction(self):
+        """Test Odoo is called after the claim commits, outside any transaction"""
+        self.receive('deadline', {'_id': 501}, {'type': 'deadline_today'})
+        # TestCase enveloppe chaque test dans une transaction : profondeur de référence
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        def get_task_partners(odoo_task_id):
+            seen.append((len(connection.atomic_blocks), OdooWebhookEvent.objects.get().status))
+            return [101], None
+
+        with patch('core.odoo_gateway.OdooGateway.get_task_partners', side_effect=get_task_partners):
+            OdooWebhookService.process_pending()
+
+        self.assertEqual(seen, [(depth, 'processing')])
+        self.assertEqual(OdooWebhookEvent.objects.get().status, 'done')
+
+    def test_stale_claim_is_taken_over(self):
+        """Test a batch left processing by an interrupted worker is claimed again after the timeout"""
+        self.receive('deadline', {'task_id': 500, 'type': 'deadline_today', 'users': [101]})
+        OdooWebhookEvent.objects.update(status='processing', claimed_at=timezone.now())
+        self.assertEqual(OdooWebhookService.process_pending()['events'], 0)
+
+        OdooWebhookEvent.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(OdooWebhookService.process_pending()['events'], 1)
+        self.assertEqual(OdooWebhookEvent.objects.get().status, 'done')
+
+    def test_prune(self):
+        """Test processed events are pruned after the retention period"""
+        self.receive('deadline', {'task_id': 500, 'type': 'deadline_today', 'users': [101]})
+        OdooWebhookService.process_pending()
+        OdooWebhookEvent.objects.update(processed_at=timezone.now() - timedelta(days=30))
+        self.receive('deadline', {'task_id': 501, 'type': 'deadline_today', 'users': [101]})
+
+        self.assertEqual(OdooWebhookService.prune(), 1)
+        self.assertEqual(OdooWebhookEvent.objects.get().status, 'pending')
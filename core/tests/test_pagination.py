@@ -0,0 +1,88 @@
+"""
+Tests for keyset pagination and NDJSON streaming on list endpoints
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Profile, Projet
+from core.pagination import decode_cursor, encode_cursor
+
+User = get_user_model()
+
+
+class CursorEncodingTest(TestCase):
+    """Test cursor encoding helpers"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the position it was built from"""
+        projet = Projet.objects.create(titre='P', type='film')
+        created_at, pk = decode_cursor(encode_cursor(projet.created_at, projet.pk))
+        self.assertEqual(created_at, projet.created_at)
+        self.assertEqual(pk, projet.pk)
+
+    def test_invalid_cursor(self):
+        """Test garbage cursors are rejected"""
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+
+class ProjetKeysetPaginationTest(TestCase):
+    """Test keyset pagination on GET /api/projets/"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='testpass123')
+        Profile.objects.filter(user=self.admin).update(role='admin')
+
+        self.projets = [
+            Projet.objects.create(titre=f'Projet {i}', type='film', statut='en_cours')
+            for i in range(5)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_unpaginated_by_default(self):
+        """Test legacy clients still receive a plain list"""
+        response = self.client.get('/api/projets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def test_walk_all_pages(self):
+        """Test following next links returns every project once, newest first"""
+        seen = []
+        url = '/api/projets/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(p['id'] for p in response.data['results'])
+            url = response.data['next']
+
+        expected = [p.id for p in sorted(self.projets, key=lambda p: (p.created_at, p.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        """Test page_size cannot exceed the maximum"""
+        response = self.client.get('/api/projets/?page_size=100000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor_returns_404(self):
+        """Test an invalid cursor is reported as not found"""
+        response = self.client.get('/api/projets/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_ndjson(self):
+        """Test ?stream=1 returns one JSON object per line"""
+        response = self.client.get('/api/projets/?stream=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual({json.loads(line)['id'] for line in lines}, {p.id for p in self.projets})
@@ -0,0 +1,108 @@
+"""
+Tests for the cached, ETag-aware project detail endpoint
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Profile, Projet, ProjetVisibility, Tache
+
+User = get_user_model()
+
+
+class ProjetDetailCacheTest(TestCase):
+    """Test GET /api/projets/<pk>/ caching and conditional requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123')
+        Profile.objects.filter(user=self.admin).update(role='admin')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass123')
+
+        self.projet = Projet.objects.create(titre='Projet', type='film', statut='brouillon')
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projet)
+        self.url = f'/api/projets/{self.projet.pk}/'
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_validators_and_not_modified(self):
+        """Test responses carry ETag/Last-Modified and matching requests get 304 after the permission check only"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        # Statut du projet et profil (admin) : pas de sérialisation
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since is honoured when no ETag is sent"""
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_payload(self):
+        """Test a cache hit skips the nested serialization queries"""
+        first = self.client.get(self.url)
+
+        # Cache hit : seules restent les vérifications de permission (statut du projet, profil)
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+
+    def test_invalidation_on_child_change(self):
+        """Test saving a task changes the ETag and refreshes the payload"""
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tache.titre = 'Renommée'
+            self.tache.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['taches'][0]['titre'], 'Renommée')
+
+    def test_invalidation_on_membres_change(self):
+        """Test adding a member changes the ETag"""
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Projet.membres.through.objects.bulk_create([Projet.membres.through(projet=self.projet, user=self.outsider)])
+            self.projet.membres.remove(self.outsider)
+
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_etag_is_per_user_and_permissions_apply_on_cache_hit(self):
+        """Test another user's ETag is not honoured and cached payloads still check permissions"""
+        etag = self.client.get(self.url)['ETag']
+
+        outsider_client = APIClient()
+        outsider_client.force_authenticate(self.outsider)
+
+        response = outsider_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 403)
+
+    def test_removed_user_gets_no_304(self):
+        """Test a user who lost access gets 403 instead of 304 for a still-valid ETag"""
+        member = User.objects.create_user(username='member', password='testpass123')
+        Projet.objects.filter(pk=self.projet.pk).update(statut='en_cours')
+        self.projet.membres.add(member)
+        member_client = APIClient()
+        member_client.force_authenticate(member)
+        etag = member_client.get(self.url)['ETag']
+        self.assertEqual(member_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Index modifié sans changement de version du cache
+        ProjetVisibility.objects.filter(user=member).delete()
+
+        self.assertEqual(member_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+        self.assertEqual(member_client.get(self.url).status_code, 403)
+
+    def test_missing_projet(self):
+        """Test an unknown project is a 404"""
+        self.assertEqual(self.client.get('/api/projets/999999/').status_code, 404)
@@ -0,0 +1,102 @@
+"""
+Query budgets per endpoint
+
+Chaque endpoint déclare un nombre maximal de requêtes SQL, mesuré sur un
+jeu de données volumineux (40 membres, 50 tâches, 20 documents). Un
+dépassement signale un N+1 réintroduit.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Document, Pole, Profile, Projet, Tache
+
+User = get_user_model()
+
+
+class QueryBudgetMixin:
+    """Assertions de budget de requêtes pour les tests d'endpoints"""
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        count = len(ctx.captured_queries)
+        if count > budget:
+            queries = '\n'.join(query['sql'] for query in ctx.captured_queries)
+            self.fail(f"{url}: {count} queries, budget {budget}\n{queries}")
+        return response
+
+
+class EndpointQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Test list and detail endpoints stay within their query budgets"""
+
+    MEMBRES = 40
+    TACHES = 50
+    DOCUMENTS = 20
+
+    # Endpoint -> budget (indépendant du volume de données)
+    BUDGETS = {
+        '/api/projets/': 3,
+        '/api/projets/{projet}/': 6,
+        '/api/taches/': 3,
+        '/api/taches/?projet={projet}': 3,
+        '/api/taches/{tache}/': 3,
+        '/api/documents/': 1,
+        '/api/documents/?projet={projet}': 1,
+        '/api/documents/{document}/': 2,
+        '/api/users/{membre}/profile/': 6,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='testpass123')
+        Profile.objects.filter(user=cls.admin).update(role='admin')
+
+        membres = [
+            User.objects.create_user(username=f'membre{i}', password='testpass123')
+            for i in range(cls.MEMBRES)
+        ]
+        pole = Pole.objects.create(name='Production', chef=cls.admin)
+        cls.projet = Projet.objects.create(
+            titre='Projet', type='film', statut='en_cours', pole=pole,
+            client=membres[0], chef_projet=membres[1], created_by=cls.admin,
+        )
+
+        # Tables d'association directement : pas de signaux de notification
+        Projet.membres.through.objects.bulk_create([
+            Projet.membres.through(projet=cls.projet, user=membre) for membre in membres
+        ])
+        taches = Tache.objects.bulk_create([
+            Tache(titre=f'Tâche {i}', projet=cls.projet) for i in range(cls.TACHES)
+        ])
+        Tache.assigne_a.through.objects.bulk_create([
+            Tache.assigne_a.through(tache=tache, user=membres[i % cls.MEMBRES])
+            for i, tache in enumerate(taches)
+        ])
+        documents = Document.objects.bulk_create([
+            Document(titre=f'Doc {i}', projet=cls.projet, uploade_par=membres[i % cls.MEMBRES], fichier=f'documents/doc_{i}.txt')
+            for i in range(cls.DOCUMENTS)
+        ])
+        cls.tache = taches[0]
+        cls.document = documents[0]
+        cls.membre = membres[1]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_endpoints_within_budget(self):
+        """Test every endpoint stays within its declared query budget"""
+        ids = {
+            'projet': self.projet.pk, 'tache': self.tache.pk,
+            'document': self.document.pk, 'membre': self.membre.pk,
+        }
+        for url, budget in self.BUDGETS.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(url.format(**ids), budget)
@@ -0,0 +1,113 @@
+"""
+Regression tests: the number of SQL queries per endpoint must not grow with
+the number of rows returned
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Profile, Projet, Tache
+
+User = get_user_model()
+
+
+class ProjetListQueryCountTest(TestCase):
+    """Test project lists compute their counts with a constant number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='testpass123')
+        Profile.objects.filter(user=self.admin).update(role='admin')
+        self.members = [
+            User.objects.create_user(username=f'membre{i}', password='testpass123')
+            for i in range(3)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create_projets(self, count):
+        # Exécuter les callbacks on_commit : invalidation des caches comme en production
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                projet = Projet.objects.create(
+                    titre=f'Projet {i}', type='film', statut='en_cours',
+                    client=self.admin, created_by=self.admin,
+                )
+                # Through table directement : pas de signal de notification
+                Projet.membres.through.objects.bulk_create([
+                    Projet.membres.through(projet=projet, user=membre) for membre in self.members
+                ])
+                Tache.objects.create(titre=f'Tâche {i}a', projet=projet)
+                Tache.objects.create(titre=f'Tâche {i}b', projet=projet)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_projet_list_query_count_is_constant(self):
+        """Test GET /api/projets/ does not issue per-project COUNT queries"""
+        self.create_projets(2)
+        small, _ = self.count_queries('/api/projets/')
+
+        self.create_projets(8)
+        large, response = self.count_queries('/api/projets/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 10)
+        self.assertTrue(all(p['nombre_taches'] == 2 for p in response.data))
+        self.assertTrue(all(p['nombre_membres'] == 3 for p in response.data))
+
+    def test_user_profile_query_count_is_constant(self):
+        """Test GET /api/users/<pk>/profile/ does not issue per-project COUNT queries"""
+        url = f'/api/users/{self.admin.pk}/profile/'
+
+        self.create_projets(2)
+        small, _ = self.count_queries(url)
+
+        self.create_projets(8)
+        large, response = self.count_queries(url)
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['projets_client']), 10)
+        self.assertEqual(response.data['projets_client'][0]['nombre_membres'], 3)
+
+
+class PermissionContextQueryTest(TestCase):
+    """Test the request-scoped permission context loads its data once"""
+
+    def setUp(self):
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.projets = [
+            Projet.objects.create(titre=f'Projet {i}', type='film', statut='en_cours')
+            for i in range(3)
+        ]
+        for projet in self.projets:
+            projet.membres.add(self.member)
+        self.tache = Tache.objects.create(titre='Tâche', projet=self.projets[0])
+        self.tache.assigne_a.add(self.member)
+
+    def test_repeated_checks_do_not_query(self):
+        """Test permission checks only hit the database when the context is first loaded"""
+        from core.services import PermissionContext, ProjetService
+
+        user = User.objects.get(pk=self.member.pk)
+        context = PermissionContext(user)
+
+        # profil + pôle, index de visibilité, tâches assignées
+        with self.assertNumQueries(3):
+            context.profile
+            context.projet_reasons
+            context.tache_ids
+
+        with self.assertNumQueries(0):
+            for projet in self.projets:
+                self.assertTrue(ProjetService.can_user_view_projet(user, projet, context=context))
+                self.assertFalse(ProjetService.can_user_manage_projet(user, projet, context=context))
+                self.assertFalse(ProjetService.can_user_change_statut(user, projet, 'termine', context=context))
+            self.assertTrue(context.is_assigned(self.tache.pk))
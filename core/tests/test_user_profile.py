@@ -0,0 +1,84 @@
+"""
+Tests for the aggregated, cached user profile endpoint
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Projet, Tache
+
+User = get_user_model()
+
+
+class UserProfileDetailTest(TestCase):
+    """Test GET /api/users/<pk>/profile/"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+
+        # Un projet par rôle, plus un projet cumulant client + créateur + membre
+        self.client_projet = Projet.objects.create(titre='Client', type='film', client=self.user)
+        self.chef_projet = Projet.objects.create(titre='Chef', type='film', chef_projet=self.user)
+        self.membre_projet = Projet.objects.create(titre='Membre', type='film', created_by=self.other)
+        self.multi_projet = Projet.objects.create(titre='Multi', type='film', client=self.user, created_by=self.user)
+        Projet.objects.create(titre='Autre', type='film', created_by=self.other)
+        Projet.membres.through.objects.bulk_create([
+            Projet.membres.through(projet=self.membre_projet, user=self.user),
+            Projet.membres.through(projet=self.multi_projet, user=self.user),
+        ])
+
+        taches = [
+            Tache.objects.create(titre=f'Tâche {statut}', projet=self.membre_projet, statut=statut)
+            for statut in ['a_faire', 'a_faire', 'en_cours', 'termine']
+        ]
+        Tache.assigne_a.through.objects.bulk_create([
+            Tache.assigne_a.through(tache=tache, user=self.user) for tache in taches
+        ])
+
+        self.url = f'/api/users/{self.user.pk}/profile/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.other)
+
+    def titres(self, projets):
+        return sorted(projet['titre'] for projet in projets)
+
+    def test_projets_by_role(self):
+        """Test the merged query splits projects per relationship role"""
+        data = self.client.get(self.url).data
+
+        self.assertEqual(self.titres(data['projets_client']), ['Client', 'Multi'])
+        self.assertEqual(self.titres(data['projets_chef']), ['Chef'])
+        self.assertEqual(self.titres(data['projets_membre']), ['Membre', 'Multi'])
+        self.assertEqual(self.titres(data['projets_crees']), ['Multi'])
+
+    def test_stats(self):
+        """Test stats match the lists"""
+        stats = self.client.get(self.url).data['stats']
+
+        self.assertEqual(stats, {
+            'total_projets_client': 2,
+            'total_projets_chef': 1,
+            'total_projets_membre': 2,
+            'total_projets_crees': 1,
+            'total_taches_assignees': 4,
+            'taches_a_faire': 2,
+            'taches_en_cours': 1,
+            'taches_terminees': 1,
+        })
+
+    def test_cached_until_invalidated(self):
+        """Test the payload is served from cache and refreshed after a change"""
+        self.client.get(self.url)
+
+        # Seul le chargement de l'utilisateur demandé reste
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Projet.objects.create(titre='Nouveau', type='film', chef_projet=self.user)
+
+        data = self.client.get(self.url).data
+        self.assertEqual(self.titres(data['projets_chef']), ['Chef', 'Nouveau'])
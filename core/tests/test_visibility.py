@@ -0,0 +1,111 @@
+"""
+Tests for the ProjetVisibility index and the permissions built on it
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Pole, Profile, Projet, ProjetVisibility
+from core.services import ProjetService
+from core.services.visibility_service import VisibilityService
+
+User = get_user_model()
+
+
+class ProjetVisibilityIndexTest(TestCase):
+    """Test the index stays in sync with projects, members and poles"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', password='testpass123')
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.chef_pole = User.objects.create_user(username='chefpole', password='testpass123')
+        self.pole = Pole.objects.create(name='Production')
+        self.projet = Projet.objects.create(
+            titre='Test Project', type='film', statut='en_cours',
+            pole=self.pole, created_by=self.creator,
+        )
+
+    def reasons(self, user):
+        return VisibilityService.get_reasons(user, self.projet.pk)
+
+    def test_creator_row(self):
+        """Test the creator is indexed on creation"""
+        self.assertEqual(self.reasons(self.creator), {'creator'})
+
+    def test_membres_add_remove_clear(self):
+        """Test membres changes are mirrored in both directions"""
+        self.projet.membres.add(self.member)
+        self.assertEqual(self.reasons(self.member), {'membre'})
+
+        self.projet.membres.remove(self.member)
+        self.assertEqual(self.reasons(self.member), set())
+
+        self.member.projets_membre.add(self.projet)
+        self.assertEqual(self.reasons(self.member), {'membre'})
+
+        self.projet.membres.clear()
+        self.assertEqual(self.reasons(self.member), set())
+
+    def test_chef_projet_change(self):
+        """Test changing chef_projet moves the row"""
+        self.projet.chef_projet = self.member
+        self.projet.save()
+        self.assertEqual(self.reasons(self.member), {'chef_projet'})
+
+        self.projet.chef_projet = None
+        self.projet.save()
+        self.assertEqual(self.reasons(self.member), set())
+
+    def test_chef_pole_rows(self):
+        """Test pole chiefs are indexed on their pole's projects"""
+        profile = self.chef_pole.profile
+        profile.role = 'chef_pole'
+        profile.pole = self.pole
+        profile.save(update_fields=['role', 'pole'])
+        self.assertEqual(self.reasons(self.chef_pole), {'chef_pole'})
+
+        profile.pole = None
+        profile.save(update_fields=['pole'])
+        self.assertEqual(self.reasons(self.chef_pole), set())
+
+    def test_pole_deletion(self):
+        """Test deleting a pole removes its chef_pole rows"""
+        Profile.objects.filter(user=self.chef_pole).update(role='chef_pole', pole=self.pole)
+        VisibilityService.sync_user_pole(Profile.objects.get(user=self.chef_pole))
+
+        self.pole.delete()
+        self.assertEqual(self.reasons(self.chef_pole), set())
+
+    def test_rebuild(self):
+        """Test a full rebuild matches the incrementally maintained index"""
+        self.projet.membres.add(self.member)
+        before = set(ProjetVisibility.objects.values_list('user_id', 'projet_id', 'reason'))
+
+        VisibilityService.rebuild()
+        after = set(ProjetVisibility.objects.values_list('user_id', 'projet_id', 'reason'))
+        self.assertEqual(before, after)
+
+
+class VisibilityPermissionTest(TestCase):
+    """Test ProjetService.can_user_view_projet rules on top of the index"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', password='testpass123')
+        self.member = User.objects.create_user(username='member', password='testpass123')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass123')
+        self.projet = Projet.objects.create(
+            titre='Test Project', type='film', statut='brouillon', created_by=self.creator,
+        )
+        self.projet.membres.add(self.member)
+
+    def test_brouillon_visible_by_creator_only(self):
+        """Test draft projects are only visible by their creator"""
+        self.assertTrue(ProjetService.can_user_view_projet(self.creator, self.projet))
+        self.assertFalse(ProjetService.can_user_view_projet(self.member, self.projet))
+        self.assertFalse(ProjetService.can_user_view_projet(self.outsider, self.projet))
+
+    def test_public_visible_by_associated_users(self):
+        """Test public projects are visible by members but not outsiders"""
+        self.projet.statut = 'en_cours'
+        self.projet.save()
+        self.assertTrue(ProjetService.can_user_view_projet(self.member, self.projet))
+        self.assertFalse(ProjetService.can_user_view_projet(self.outsider, self.projet))
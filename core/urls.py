@@ -9,8 +9,9 @@ from .views import (
     TacheListCreateView, TacheDetailView,
     DocumentListCreateView, DocumentDetailView, DocumentDownloadView,
     NotificationListView, NotificationDetailView,
-    mark_notification_as_read, mark_all_as_read, unread_count, delete_all_read,
+    mark_notification_as_read, mark_all_as_read, bulk_notifications, unread_count, delete_all_read,
 )
+from .views.notification_stream import notification_stream_ticket, notification_stream_view
 from .views.odoo_webhooks import odoo_deadline_notification, odoo_task_assigned
 
 urlpatterns = [
@@ -52,8 +53,11 @@ urlpatterns = [
     path('notifications/<int:pk>/', NotificationDetailView.as_view(), name='notifications-detail'),
     path('notifications/<int:pk>/mark-read/', mark_notification_as_read, name='notifications-mark-read'),
     path('notifications/mark-all-read/', mark_all_as_read, name='notifications-mark-all-read'),
+    path('notifications/bulk/', bulk_notifications, name='notifications-bulk'),
     path('notifications/unread-count/', unread_count, name='notifications-unread-count'),
     path('notifications/delete-all-read/', delete_all_read, name='notifications-delete-all-read'),
+    path('notifications/stream/', notification_stream_view, name='notifications-stream'),
+    path('notifications/stream/ticket/', notification_stream_ticket, name='notifications-stream-ticket'),
 
     # Webhooks Odoo (endpoints appelés par Odoo)
     path('odoo-webhooks/deadline-notification/', odoo_deadline_notification, name='odoo-deadline-notification'),
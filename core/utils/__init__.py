@@ -1,6 +1,10 @@
 """
 Utilities module for core app
 """
+from .cache import bump_cache_version, get_cache_version, get_cache_versions
 from .helpers import is_admin_or_super, is_super_admin
 
-__all__ = ['is_admin_or_super', 'is_super_admin']
+__all__ = [
+    'bump_cache_version', 'get_cache_version', 'get_cache_versions',
+    'is_admin_or_super', 'is_super_admin',
+]
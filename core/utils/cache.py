@@ -0,0 +1,62 @@
+"""
+Cache versioning helpers
+
+Chaque espace de noms (ex: 'projet:12') possède un numéro de version stocké
+dans le cache. Les entrées dérivées incluent ce numéro dans leur clé :
+incrémenter la version invalide toutes les entrées d'un coup, sans les
+supprimer une par une. La version est un horodatage en nanosecondes, ce qui
+permet aussi de l'utiliser comme date de dernière modification.
+"""
+import time
+
+from django.core.cache import cache
+
+
+VERSION_KEY_PREFIX = 'cache_version'
+
+
+def get_cache_version(namespace):
+    """
+    Retourne la version courante d'un espace de noms (l'initialise si absente)
+
+    Args:
+        namespace: Nom de l'espace (ex: 'projet:12')
+
+    Returns:
+        int: Version (horodatage en nanosecondes)
+    """
+    key = f'{VERSION_KEY_PREFIX}:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # add() : ne pas écraser une version posée entre-temps par un autre processus
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_cache_versions(namespaces):
+    """
+    Retourne les versions de plusieurs espaces de noms en un seul aller-retour
+
+    Returns:
+        dict: {namespace: version}
+    """
+    keys = {f'{VERSION_KEY_PREFIX}:{namespace}': namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for namespace in keys.values():
+        if namespace not in versions:
+            versions[namespace] = get_cache_version(namespace)
+    return versions
+
+
+def bump_cache_version(*namespaces):
+    """
+    Invalide les entrées d'un ou plusieurs espaces de noms
+
+    Args:
+        namespaces: Noms des espaces à invalider
+    """
+    version = time.time_ns()
+    cache.set_many({f'{VERSION_KEY_PREFIX}:{namespace}': version for namespace in namespaces}, timeout=None)
@@ -0,0 +1,36 @@
+"""
+Prefetch helpers for nested user serializers
+
+UserSimpleSerializer lit profile.role et profile.membre_specialite : tout
+utilisateur imbriqué doit être chargé avec son profil, sinon chaque
+utilisateur sérialisé coûte une requête supplémentaire.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+
+User = get_user_model()
+
+
+def prefetch_users(lookup):
+    """
+    Prefetch d'une relation vers User avec les profils (select_related)
+
+    Args:
+        lookup: Nom de la relation (ex: 'membres', 'assigne_a')
+
+    Returns:
+        Prefetch
+    """
+    return Prefetch(lookup, queryset=User.objects.select_related('profile'))
+
+
+def prefetch_taches(lookup='taches'):
+    """Prefetch des tâches d'un projet avec leurs assignés et profils"""
+    from ..models import Tache
+    return Prefetch(lookup, queryset=Tache.objects.prefetch_related(prefetch_users('assigne_a')))
+
+
+def prefetch_documents(lookup='documents'):
+    """Prefetch des documents d'un projet avec l'auteur de l'upload et son profil"""
+    from ..models import Document
+    return Prefetch(lookup, queryset=Document.objects.select_related('uploade_par__profile'))
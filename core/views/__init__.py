@@ -41,6 +41,7 @@ from .notifications import (
     NotificationDetailView,
     mark_notification_as_read,
     mark_all_as_read,
+    bulk_notifications,
     unread_count,
     delete_all_read
 )
@@ -76,6 +77,7 @@ __all__ = [
     'NotificationDetailView',
     'mark_notification_as_read',
     'mark_all_as_read',
+    'bulk_notifications',
     'unread_count',
     'delete_all_read',
 ]
@@ -11,19 +11,25 @@ from django.http import Http404, HttpResponseRedirect
 from ..models import Document
 from ..serializers import DocumentSerializer
 from ..permissions import CanDeleteDocument
+from ..pagination import KeysetPagination, NDJSONStreamMixin
 
 
-class DocumentListCreateView(generics.ListCreateAPIView):
+class DocumentListCreateView(NDJSONStreamMixin, generics.ListCreateAPIView):
     """
     GET: Liste les documents (filtrés par projet si ?projet=<id>)
     POST: Upload un nouveau document
+
+    Query params (GET):
+    - page_size / cursor: pagination keyset sur (created_at, id)
+    - stream=1: export NDJSON de tous les documents
     """
     serializer_class = DocumentSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        queryset = Document.objects.all().select_related('projet', 'uploade_par')
+        queryset = Document.objects.all().select_related('projet', 'uploade_par__profile')
 
         # Filtrer par projet si demandé
         projet_id = self.request.query_params.get('projet')
@@ -43,7 +49,7 @@ class DocumentDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH: Modifie un document
     DELETE: Supprime un document (Admin, Super Admin, ou propriétaire uniquement)
     """
-    queryset = Document.objects.all().select_related('projet', 'uploade_par')
+    queryset = Document.objects.all().select_related('projet', 'uploade_par__profile')
     serializer_class = DocumentSerializer
     permission_classes = [permissions.IsAuthenticated, CanDeleteDocument]
     parser_classes = [MultiPartParser, FormParser]
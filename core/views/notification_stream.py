@@ -0,0 +1,163 @@
+"""
+Flux temps réel des notifications (Server-Sent Events)
+
+POST /api/notifications/stream/ticket/   (authentifié) -> {"ticket": "..."}
+GET  /api/notifications/stream/?ticket=<ticket>
+
+EventSource ne permet pas d'en-têtes : plutôt que le JWT d'accès (que les
+logs d'accès gunicorn/uvicorn enregistreraient avec l'URL), le client passe
+un ticket à usage unique valable NOTIFICATION_STREAM_TICKET_TTL secondes.
+L'en-tête Authorization reste accepté. Le flux envoie :
+- 'unread_count' à l'ouverture puis à chaque changement
+- 'notification' pour chaque nouvelle notification (format NotificationSerializer)
+- un commentaire keepalive toutes les NOTIFICATION_STREAM_KEEPALIVE secondes
+
+Il se termine à l'expiration du token d'accès qui a émis le ticket (ou après
+NOTIFICATION_STREAM_MAX_AGE) : le client demande un nouveau ticket et se reconnecte.
+
+Vue asynchrone : servir l'application en ASGI (genius_harmony/asgi.py),
+sinon chaque flux ouvert occupe un worker WSGI.
+"""
+import json
+import logging
+import secrets
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..notification_stream import notification_stream
+from ..services.notification_counter_service import NotificationCounterService
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+TICKET_PREFIX = 'notifications:stream_ticket:'
+
+
+def format_event(event, data):
+    """Formate un événement SSE"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def issue_ticket(user_id, expires_at):
+    """
+    Crée un ticket de flux à usage unique
+
+    Args:
+        user_id: Utilisateur authentifié
+        expires_at: Fin du flux ouvert avec ce ticket (epoch)
+
+    Returns:
+        str: Ticket à passer en ?ticket=
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(
+        f'{TICKET_PREFIX}{ticket}',
+        {'user_id': user_id, 'expires_at': expires_at},
+        timeout=settings.NOTIFICATION_STREAM_TICKET_TTL,
+    )
+    return ticket
+
+
+async def redeem_ticket(ticket):
+    """
+    Consomme un ticket de flux
+
+    Seul l'appel qui supprime la clé l'obtient : un ticket rejoué (ou utilisé
+    deux fois en parallèle) est refusé.
+
+    Returns:
+        tuple: (user_id, expiration epoch) ou None si le ticket est invalide, expiré ou déjà utilisé
+    """
+    key = f'{TICKET_PREFIX}{ticket}'
+    value = await cache.aget(key)
+    if value is None or not await cache.adelete(key):
+        return None
+    return value['user_id'], value['expires_at']
+
+
+async def authenticate_stream(request):
+    """
+    Valide le ticket (?ticket=) ou le token d'accès (en-tête Authorization)
+
+    Returns:
+        tuple: (user_id, expiration epoch) ou None si les identifiants sont invalides
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        ticket = request.GET.get('ticket', '')
+        return await redeem_ticket(ticket) if ticket else None
+    try:
+        token = AccessToken(header[len('Bearer '):])
+    except TokenError:
+        return None
+    # simplejwt stocke l'ID sous forme de chaîne
+    return int(token[jwt_settings.USER_ID_CLAIM]), token['exp']
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def notification_stream_ticket(request):
+    """
+    POST: Crée un ticket d'ouverture du flux SSE (usage unique, NOTIFICATION_STREAM_TICKET_TTL secondes)
+
+    Le flux ouvert avec le ticket se termine à l'expiration du token d'accès
+    qui l'a demandé.
+    """
+    expires_at = request.auth['exp'] if request.auth is not None else time.time() + settings.NOTIFICATION_STREAM_MAX_AGE
+    return Response({'ticket': issue_ticket(request.user.id, expires_at)}, status=status.HTTP_201_CREATED)
+
+
+async def event_stream(user_id, expires_at):
+    """Pousse les événements du canal de l'utilisateur jusqu'à expires_at"""
+    # Abonnement avant la lecture du compteur : aucun changement perdu entre les deux
+    subscription = await notification_stream.subscribe(user_id)
+    try:
+        yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+        count = await sync_to_async(NotificationCounterService.get)(user_id)
+        yield format_event('unread_count', {'count': count})
+
+        while (remaining := expires_at - time.time()) > 0:
+            message = await subscription.get(min(settings.NOTIFICATION_STREAM_KEEPALIVE, remaining))
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(message['event'], message['data'])
+    finally:
+        await subscription.close()
+
+
+async def notification_stream_view(request):
+    """
+    GET: Flux SSE des notifications de l'utilisateur
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+
+    credentials = await authenticate_stream(request)
+    if credentials is None:
+        return JsonResponse({'detail': 'Invalid or missing ticket'}, status=401)
+
+    user_id, token_expires_at = credentials
+    if not await User.objects.filter(pk=user_id, is_active=True).aexists():
+        return JsonResponse({'detail': 'User not found'}, status=401)
+
+    expires_at = min(token_expires_at, time.time() + settings.NOTIFICATION_STREAM_MAX_AGE)
+    response = StreamingHttpResponse(event_stream(user_id, expires_at), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy (nginx)
+    response['X-Accel-Buffering'] = 'no'
+    logger.debug(f"📡 Notification stream opened for user {user_id}")
+    return response
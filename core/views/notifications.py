@@ -1,30 +1,78 @@
 """
 Notification-related views
 """
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
 from ..models import Notification
-from ..serializers import NotificationSerializer
+from ..pagination import decode_cursor, encode_cursor, filter_after_cursor, filter_before_cursor
+from ..serializers import NotificationCompactSerializer, NotificationSerializer
+from ..services.notification_counter_service import NotificationCounterService
+from ..services.notification_push_service import NotificationPushService
+
+
+def publish_unread_count(user):
+    """Pousse le nouveau nombre de non lues aux flux ouverts de l'utilisateur"""
+    transaction.on_commit(lambda: NotificationPushService.publish_unread_counts([user.id]))
 
 
 class NotificationListView(generics.ListAPIView):
     """
-    GET: Liste toutes les notifications de l'utilisateur connecté
+    GET: Liste les notifications de l'utilisateur connecté (plus récentes d'abord)
 
     Query params:
     - is_read: 'true', 'false', ou non spécifié (toutes)
-    - limit: Nombre de notifications à retourner (défaut: 50)
+    - limit: Nombre de notifications à retourner (défaut: 50, max: 200)
+    - compact: '1' pour une réponse sans jointure tâche / projet (tache, projet = IDs)
+    - since=<curseur>: seulement les notifications plus récentes que le curseur
+      (vide : dernière page, pour obtenir un premier curseur)
+    - before=<curseur>: les notifications plus anciennes que le curseur
+
+    Sans since / before : liste JSON (format historique). Avec :
+    {
+        "results": [...],
+        "newest_cursor": "<curseur à repasser en since au prochain rafraîchissement>",
+        "oldest_cursor": "<curseur à passer en before pour la page précédente>",
+        "has_more": true si la limite a tronqué le résultat
+    }
+
+    Chaque page est une requête sur l'index (user, -created_at), sans OFFSET.
+    Avec has_more sur un since, rappeler avec le nouveau newest_cursor.
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    default_limit = 50
+    max_limit = 200
+    ordering = ('-created_at', '-id')
+
+    def is_compact(self):
+        return self.request.query_params.get('compact') in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return NotificationCompactSerializer
+        return NotificationSerializer
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except (ValueError, TypeError):
+            return self.default_limit
+
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Notification.objects.filter(user=user).select_related('tache', 'projet')
+        queryset = Notification.objects.filter(user=user)
+        if not self.is_compact():
+            queryset = queryset.select_related('tache__projet', 'projet')
 
         # Filtrer par is_read si spécifié
         is_read = self.request.query_params.get('is_read', None)
@@ -34,14 +82,52 @@ class NotificationListView(generics.ListAPIView):
             elif is_read.lower() == 'false':
                 queryset = queryset.filter(is_read=False)
 
-        # Limiter le nombre de résultats
-        limit = self.request.query_params.get('limit', 50)
+        return queryset.order_by(*self.ordering)
+
+    def get_cursor(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
         try:
-            limit = int(limit)
-        except (ValueError, TypeError):
-            limit = 50
+            return decode_cursor(value)
+        except ValueError:
+            raise ValidationError({name: "Curseur invalide"})
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        limit = self.get_limit()
+        params = request.query_params
+
+        if 'since' not in params and 'before' not in params:
+            return Response(self.get_serializer(queryset[:limit], many=True).data)
 
-        return queryset[:limit]
+        since = self.get_cursor('since')
+        before = self.get_cursor('before')
+        if before:
+            queryset = filter_before_cursor(queryset, *before)
+
+        if since:
+            # Les plus anciennes d'abord : avec has_more, le rappel suivant reprend sans trou
+            queryset = filter_after_cursor(queryset, *since).reverse()
+            rows = list(queryset[:limit + 1])
+            page = rows[:limit][::-1]
+        else:
+            rows = list(queryset[:limit + 1])
+            page = rows[:limit]
+
+        if page:
+            newest_cursor = encode_cursor(page[0].created_at, page[0].pk)
+            oldest_cursor = encode_cursor(page[-1].created_at, page[-1].pk)
+        else:
+            newest_cursor = params.get('since') or None
+            oldest_cursor = params.get('before') or None
+
+        return Response({
+            'results': self.get_serializer(page, many=True).data,
+            'newest_cursor': newest_cursor,
+            'oldest_cursor': oldest_cursor,
+            'has_more': len(rows) > limit,
+        })
 
 
 class NotificationDetailView(generics.RetrieveDestroyAPIView):
@@ -56,26 +142,46 @@ class NotificationDetailView(generics.RetrieveDestroyAPIView):
         # L'utilisateur ne peut voir que ses propres notifications
         return Notification.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        # is_read relu par le DELETE : une lecture concurrente n'est pas décomptée deux fois
+        with transaction.atomic():
+            unread, _ = Notification.objects.filter(pk=instance.pk, is_read=False).delete()
+            if not unread:
+                Notification.objects.filter(pk=instance.pk).delete()
+            NotificationCounterService.add({instance.user_id: -unread})
+        if unread:
+            publish_unread_count(self.request.user)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_notification_as_read(request, pk):
     """
     POST: Marque une notification comme lue
+
+    UPDATE conditionnel (is_read=False) : deux requêtes concurrentes ne
+    décrémentent le compteur qu'une fois.
     """
-    try:
-        notification = Notification.objects.get(pk=pk, user=request.user)
-        notification.mark_as_read()
-        return Response({
-            'status': 'success',
-            'message': 'Notification marquée comme lue'
-        }, status=status.HTTP_200_OK)
-    except Notification.DoesNotExist:
+    with transaction.atomic():
+        updated = Notification.objects.filter(pk=pk, user=request.user, is_read=False).update(
+            is_read=True,
+            read_at=timezone.now()
+        )
+        NotificationCounterService.add({request.user.id: -updated})
+
+    if updated:
+        publish_unread_count(request.user)
+    elif not Notification.objects.filter(pk=pk, user=request.user).exists():
         return Response({
             'status': 'error',
             'message': 'Notification non trouvée'
         }, status=status.HTTP_404_NOT_FOUND)
 
+    return Response({
+        'status': 'success',
+        'message': 'Notification marquée comme lue'
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -83,13 +189,17 @@ def mark_all_as_read(request):
     """
     POST: Marque toutes les notifications non lues de l'utilisateur comme lues
     """
-    updated = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).update(
-        is_read=True,
-        read_at=timezone.now()
-    )
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            user=request.user,
+            is_read=False
+        ).update(
+            is_read=True,
+            read_at=timezone.now()
+        )
+        NotificationCounterService.add({request.user.id: -updated})
+    if updated:
+        publish_unread_count(request.user)
 
     return Response({
         'status': 'success',
@@ -98,19 +208,103 @@ def mark_all_as_read(request):
     }, status=status.HTTP_200_OK)
 
 
+# Nombre maximum d'IDs par requête groupée
+BULK_MAX_IDS = 500
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_notifications(request):
+    """
+    POST: Marque comme lues ou supprime plusieurs notifications en une requête
+
+    Body:
+    {
+        "action": "read" | "delete",
+        "ids": [1, 2, 3]                       (500 au plus)
+        ou "since" / "before": "<curseur>"     (plage du fil, voir NotificationListView)
+    }
+
+    Une seule requête UPDATE / DELETE ... WHERE id IN (...) sur les
+    notifications de l'utilisateur ; les IDs d'autres utilisateurs sont
+    ignorés. Retourne le nombre de notifications modifiées et le nouveau
+    nombre de non lues.
+    """
+    action = request.data.get('action')
+    if action not in ('read', 'delete'):
+        return Response({
+            'status': 'error',
+            'message': "action doit valoir 'read' ou 'delete'"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = Notification.objects.filter(user=request.user)
+    ids = request.data.get('ids')
+    since = request.data.get('since')
+    before = request.data.get('before')
+
+    if ids is not None:
+        if not isinstance(ids, list) or len(ids) > BULK_MAX_IDS:
+            return Response({
+                'status': 'error',
+                'message': f'ids doit être une liste de {BULK_MAX_IDS} IDs au plus'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            return Response({
+                'status': 'error',
+                'message': 'ids doit contenir des entiers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(id__in=ids)
+    elif since or before:
+        try:
+            if since:
+                queryset = filter_after_cursor(queryset, *decode_cursor(since))
+            if before:
+                queryset = filter_before_cursor(queryset, *decode_cursor(before))
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'Curseur invalide'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        return Response({
+            'status': 'error',
+            'message': 'ids, since ou before requis'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        if action == 'read':
+            count = queryset.filter(is_read=False).update(is_read=True, read_at=timezone.now())
+            unread_removed = count
+        else:
+            # Non lues puis lues : le compteur est décrémenté du nombre exact de non lues supprimées
+            unread_removed, _ = queryset.filter(is_read=False).delete()
+            read_removed, _ = queryset.delete()
+            count = unread_removed + read_removed
+        NotificationCounterService.add({request.user.id: -unread_removed})
+    if unread_removed:
+        publish_unread_count(request.user)
+
+    return Response({
+        'status': 'success',
+        'action': action,
+        'count': count,
+        'unread_count': NotificationCounterService.get(request.user.id)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count(request):
     """
     GET: Retourne le nombre de notifications non lues de l'utilisateur
-    """
-    count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
 
+    Compteur dénormalisé (cache, sinon NotificationCounter) : pas de COUNT
+    sur la table des notifications.
+    """
     return Response({
-        'count': count
+        'count': NotificationCounterService.get(request.user.id)
     }, status=status.HTTP_200_OK)
 
 
@@ -2,19 +2,20 @@
 Webhooks pour recevoir les notifications d'Odoo
 
 Odoo appelle ces endpoints quand des événements se produisent
-(deadlines, assignations, etc.)
+(deadlines, assignations, etc.). Les endpoints vérifient le token,
+enregistrent l'événement dans l'inbox (OdooWebhookEvent) et répondent
+202 immédiatement : le traitement (lectures Odoo, notifications) est fait
+par lots par la tâche Celery process_odoo_webhooks.
 """
 import logging
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
-from django.contrib.auth import get_user_model
 
-from core.models import Notification, Projet, Tache
+from core.services.odoo_webhook_service import OdooWebhookService
 
-User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
@@ -45,7 +46,31 @@ def verify_odoo_token(request):
     return token == expected_token
 
 
+def accept_webhook(request, kind):
+    """
+    Enregistre un webhook dans l'inbox et répond 202
+
+    Un rejeu (même en-tête X-Odoo-Event-Id, ou même contenu le même jour)
+    est accepté sans créer de nouvel événement.
+    """
+    data = request.data
+    payload = data.dict() if hasattr(data, 'dict') else dict(data)
+    # Le token ne doit pas être stocké avec l'événement
+    params = {key: value for key, value in request.GET.dict().items() if key != 'token'}
+
+    try:
+        event_id = OdooWebhookService.receive(kind, payload, params, request.headers.get('X-Odoo-Event-Id'))
+    except Exception as e:
+        # Détail dans les logs uniquement : rien d'interne n'est renvoyé à Odoo
+        logger.error(f"❌ Failed to store Odoo webhook: {e}", exc_info=True)
+        return Response({"error": "Internal error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    logger.info(f"📥 Queued Odoo webhook {event_id}")
+    return Response({"accepted": True, "event_id": event_id}, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['POST'])
+@authentication_classes([])  # Token Odoo vérifié par verify_odoo_token (pas un JWT)
 @permission_classes([AllowAny])
 def odoo_deadline_notification(request):
     """
@@ -63,123 +88,15 @@ def odoo_deadline_notification(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    try:
-        data = request.data
-
-        # Détecter le format : personnalisé ou Odoo Studio
-        if 'task_id' in data:
-            # Format personnalisé
-            odoo_task_id = data.get('task_id')
-            notification_type = data.get('type')
-            odoo_user_ids = data.get('users', [])
-            odoo_manager_id = data.get('project_manager')
-        else:
-            # Format Odoo Studio par défaut
-            odoo_task_id = data.get('_id') or data.get('id')
-            notification_type = request.GET.get('type', 'deadline_notification')
-
-            # Récupérer la tâche depuis Odoo pour obtenir les utilisateurs
-            from core.odoo_gateway import odoo_gateway
-            try:
-                odoo_task = odoo_gateway._odoo.env['project.task'].browse([odoo_task_id])
-                if odoo_task.exists():
-                    odoo_user_ids = odoo_task.user_ids.mapped('partner_id').ids
-                    odoo_manager_id = odoo_task.project_id.user_id.partner_id.id if odoo_task.project_id.user_id else None
-                else:
-                    odoo_user_ids = []
-                    odoo_manager_id = None
-            except Exception as e:
-                logger.warning(f"⚠️ Could not fetch task details from Odoo: {e}")
-                odoo_user_ids = []
-                odoo_manager_id = None
-
-        logger.info(f"📥 Received deadline notification from Odoo: task {odoo_task_id}, type {notification_type}")
-
-        # Trouver la tâche Django correspondante
-        try:
-            tache = Tache.objects.get(odoo_task_id=odoo_task_id)
-        except Tache.DoesNotExist:
-            logger.error(f"❌ Task not found in Django: odoo_task_id={odoo_task_id}")
-            return Response(
-                {"error": "Task not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Messages selon le type
-        message_map = {
-            'deadline_3days': f"{tache.titre} • {tache.deadline.strftime('%d/%m')}",
-            'deadline_1day': f"{tache.titre} • Échéance demain",
-            'deadline_today': f"{tache.titre} • À terminer aujourd'hui",
-            'deadline_overdue': f"{tache.titre} • Retard",
-        }
-
-        titre_map = {
-            'deadline_3days': "Deadline dans 3 jours",
-            'deadline_1day': "Deadline demain",
-            'deadline_today': "Deadline AUJOURD'HUI",
-            'deadline_overdue': "Tâche en retard",
-        }
-
-        message = message_map.get(notification_type, tache.titre)
-        titre = titre_map.get(notification_type, "Notification")
-
-        # Créer les notifications pour les utilisateurs assignés
-        created_count = 0
-        all_user_ids = set(odoo_user_ids)
-        if odoo_manager_id:
-            all_user_ids.add(odoo_manager_id)
-
-        for odoo_user_id in all_user_ids:
-            # Trouver l'utilisateur Django correspondant
-            try:
-                profile = tache.projet.membres.filter(
-                    profile__odoo_partner_id=odoo_user_id
-                ).first()
-
-                if not profile:
-                    # Essayer le chef de projet
-                    if tache.projet.chef_projet and tache.projet.chef_projet.profile.odoo_partner_id == odoo_user_id:
-                        profile = tache.projet.chef_projet
-
-                if profile:
-                    # Vérifier si notification déjà créée aujourd'hui
-                    from django.utils import timezone
-                    today = timezone.now().date()
-
-                    if not Notification.objects.filter(
-                        user=profile,
-                        tache=tache,
-                        type=notification_type,
-                        created_at__date=today
-                    ).exists():
-                        Notification.objects.create(
-                            user=profile,
-                            type=notification_type,
-                            titre=titre,
-                            message=message,
-                            tache=tache,
-                            projet=tache.projet
-                        )
-                        created_count += 1
-                        logger.info(f"✅ Created notification for user {profile.username}")
-
-            except Exception as e:
-                logger.error(f"❌ Failed to create notification for odoo_user_id {odoo_user_id}: {e}")
-
-        return Response({
-            "success": True,
-            "notifications_created": created_count
-        })
+    data = request.data
+    if not (data.get('task_id') or data.get('_id') or data.get('id')):
+        return Response({"error": "Missing task ID"}, status=status.HTTP_400_BAD_REQUEST)
 
-    except Exception as e:
-        logger.error(f"❌ Failed to process Odoo webhook: {e}", exc_info=True)
-        return Response(
-            {"error": str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+    return accept_webhook(request, 'deadline')
 
 
 @api_view(['POST'])
+@authentication_classes([])  # Token Odoo vérifié par verify_odoo_token (pas un JWT)
 @permission_classes([AllowAny])
 def odoo_task_assigned(request):
     """
@@ -194,36 +111,7 @@ def odoo_task_assigned(request):
     if not verify_odoo_token(request):
         return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
 
-    try:
-        data = request.data
-        odoo_task_id = data.get('task_id')
-        odoo_user_id = data.get('user_id')
-
-        logger.info(f"📥 Received task assignment from Odoo: task {odoo_task_id}, user {odoo_user_id}")
-
-        # Trouver la tâche et l'utilisateur
-        tache = Tache.objects.get(odoo_task_id=odoo_task_id)
-        user = User.objects.get(profile__odoo_partner_id=odoo_user_id)
-
-        # Créer la notification
-        if not Notification.objects.filter(
-            user=user,
-            tache=tache,
-            type='task_assigned'
-        ).exists():
-            deadline_text = tache.deadline.strftime('%d/%m') if tache.deadline else 'Sans deadline'
-            Notification.objects.create(
-                user=user,
-                type='task_assigned',
-                titre="Nouvelle tâche assignée",
-                message=f"{tache.titre} • {deadline_text}",
-                tache=tache,
-                projet=tache.projet
-            )
-            logger.info(f"✅ Created task assignment notification for user {user.username}")
-
-        return Response({"success": True})
+    if not (request.data.get('task_id') and request.data.get('user_id')):
+        return Response({"error": "Missing task_id or user_id"}, status=status.HTTP_400_BAD_REQUEST)
 
-    except Exception as e:
-        logger.error(f"❌ Failed to process task assignment: {e}", exc_info=True)
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return accept_webhook(request, 'task_assigned')
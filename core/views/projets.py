@@ -3,6 +3,7 @@ Projet-related views
 """
 from django.db.models import Q
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -13,15 +14,23 @@ from ..serializers import (
     ProjetCreateUpdateSerializer
 )
 from ..permissions import CanViewProjet, CanManageProjet
+from ..services import ProjetCacheService, ProjetService, get_permission_context
+from ..pagination import KeysetPagination, NDJSONStreamMixin
 from ..utils.helpers import is_admin_or_super
+from ..utils.prefetch import prefetch_documents, prefetch_taches, prefetch_users
 
 
-class ProjetListCreateView(generics.ListCreateAPIView):
+class ProjetListCreateView(NDJSONStreamMixin, generics.ListCreateAPIView):
     """
     GET: Liste les projets selon les permissions de l'utilisateur
     POST: Crée un nouveau projet (admin ou chef de pôle)
+
+    Query params (GET):
+    - page_size / cursor: pagination keyset sur (created_at, id)
+    - stream=1: export NDJSON de tous les projets visibles
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -30,12 +39,12 @@ class ProjetListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(self.request).profile
 
         if not profile:
             return Projet.objects.none()
 
-        queryset = Projet.objects.all().select_related(
+        queryset = Projet.objects.with_counts().select_related(
             'pole', 'client', 'chef_projet', 'created_by'
         ).prefetch_related('membres')
 
@@ -50,11 +59,12 @@ class ProjetListCreateView(generics.ListCreateAPIView):
         projets_publics = Q(statut__in=['en_cours', 'en_revision', 'termine', 'annule'])
 
         # Tous les utilisateurs : projets créés + TOUS les projets publics
-        return queryset.filter(projets_crees | projets_publics).distinct()
+        # (filtre sur les colonnes du projet uniquement : pas de JOIN, pas de DISTINCT)
+        return queryset.filter(projets_crees | projets_publics)
 
     def perform_create(self, serializer):
         # Vérifier que l'utilisateur a le droit de créer
-        profile = getattr(self.request.user, 'profile', None)
+        profile = get_permission_context(self.request).profile
         if not profile or (not is_admin_or_super(profile) and profile.role != 'chef_pole'):
             return Response(
                 {"detail": "Vous n'avez pas la permission de créer un projet"},
@@ -77,10 +87,16 @@ class ProjetDetailView(generics.RetrieveUpdateDestroyAPIView):
     GET: Récupère les détails d'un projet
     PUT/PATCH: Modifie un projet (admin ou chef de pôle du pôle concerné)
     DELETE: Supprime un projet (admin ou chef de pôle du pôle concerné)
+
+    GET est mis en cache (voir ProjetCacheService) et renvoie ETag/Last-Modified :
+    une requête conditionnelle à jour reçoit un 304 après la seule vérification
+    des permissions (statut du projet, profil et index de visibilité).
     """
     queryset = Projet.objects.all().select_related(
-        'pole', 'client', 'chef_projet'
-    ).prefetch_related('membres', 'taches', 'documents')
+        'pole__chef', 'client__profile', 'chef_projet__profile', 'created_by__profile'
+    ).prefetch_related(
+        prefetch_users('membres'), prefetch_taches(), prefetch_documents()
+    )
     permission_classes = [permissions.IsAuthenticated, CanViewProjet]
 
     def get_serializer_class(self):
@@ -88,6 +104,35 @@ class ProjetDetailView(generics.RetrieveUpdateDestroyAPIView):
             return ProjetCreateUpdateSerializer
         return ProjetDetailSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs['pk']
+        versions = ProjetCacheService.get_versions(pk)
+        host = request.get_host()
+        payload = ProjetCacheService.get_payload(pk, host, versions)
+
+        # Permissions d'abord, sur la ligne courante et l'index ProjetVisibility :
+        # un utilisateur retiré du projet ne reçoit plus ni 304 ni le payload en cache
+        if payload is None:
+            instance = self.get_object()
+        else:
+            projet = Projet.objects.only('id', 'statut').filter(pk=pk).first()
+            if projet is None:
+                raise NotFound()
+            self.check_object_permissions(request, projet)
+
+        # Le client a déjà la version courante : ETag propre à l'utilisateur, obtenu avec un 200
+        etag, last_modified = ProjetCacheService.get_validators(pk, request.user.pk, versions)
+        if ProjetCacheService.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return ProjetCacheService.set_headers(response, etag, last_modified)
+
+        if payload is None:
+            payload = dict(self.get_serializer(instance).data)
+            ProjetCacheService.set_payload(pk, host, versions, payload)
+
+        response = Response(payload)
+        return ProjetCacheService.set_headers(response, etag, last_modified)
+
     def update(self, request, *args, **kwargs):
         # Vérifier les permissions de modification
         instance = self.get_object()
@@ -99,8 +144,7 @@ class ProjetDetailView(generics.RetrieveUpdateDestroyAPIView):
             )
 
         # Restriction sur les statuts pour les créateurs non-admin
-        user = request.user
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(request).profile
         new_statut = request.data.get('statut')
 
         # Si le statut est modifié et que l'utilisateur n'est pas admin/super_admin
@@ -146,10 +190,9 @@ class ProjetUpdateStatutView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        user = request.user
-        profile = getattr(user, 'profile', None)
+        context = get_permission_context(request)
 
-        if not profile:
+        if not context.profile:
             return Response(
                 {"detail": "Profil utilisateur non trouvé"},
                 status=status.HTTP_403_FORBIDDEN
@@ -164,24 +207,9 @@ class ProjetUpdateStatutView(APIView):
             )
 
         # Vérifier les permissions selon le rôle
-        can_change = False
-
-        # Admin et Super Admin peuvent tout faire
-        if is_admin_or_super(profile):
-            can_change = True
-
-        # Créateur du projet peut changer le statut
-        elif projet.created_by == user:
-            can_change = True
-
-        # Chef de pôle peut changer le statut des projets de son pôle
-        elif profile.role == 'chef_pole' and profile.pole and projet.pole == profile.pole:
-            can_change = True
-
-        # Chef de projet peut mettre en_revision, termine, annule
-        elif projet.chef_projet == user:
-            if nouveau_statut in ['en_revision', 'termine', 'annule']:
-                can_change = True
+        can_change = ProjetService.can_user_change_statut(
+            request.user, projet, nouveau_statut, context=context
+        )
 
         if not can_change:
             return Response(
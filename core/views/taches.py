@@ -6,18 +6,26 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 
-from ..models import Tache, Projet
+from ..models import Tache, Projet, ProjetVisibility
 from ..serializers import TacheSerializer, TacheCreateSerializer
 from ..permissions import CanCreateTache, CanManageTache
+from ..services import get_permission_context
+from ..pagination import KeysetPagination, NDJSONStreamMixin
 from ..utils.helpers import is_admin_or_super
+from ..utils.prefetch import prefetch_users
 
 
-class TacheListCreateView(generics.ListCreateAPIView):
+class TacheListCreateView(NDJSONStreamMixin, generics.ListCreateAPIView):
     """
     GET: Liste les tâches (filtrées par projet si ?projet=<id>)
     POST: Crée une nouvelle tâche
+
+    Query params (GET):
+    - page_size / cursor: pagination keyset sur (created_at, id)
+    - stream=1: export NDJSON de toutes les tâches visibles
     """
     permission_classes = [CanCreateTache]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -26,33 +34,38 @@ class TacheListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(self.request).profile
 
         if not profile:
             return Tache.objects.none()
 
         queryset = Tache.objects.all().select_related(
             'projet', 'projet__pole', 'projet__chef_projet'
-        ).prefetch_related('assigne_a')
+        ).prefetch_related(prefetch_users('assigne_a'))
 
         # Admin et Super Admin voient toutes les tâches
         if is_admin_or_super(profile):
             pass  # Pas de filtre supplémentaire
 
         # Chef de pôle voit les tâches des projets de son pôle
-        elif profile.role == 'chef_pole' and profile.pole:
-            queryset = queryset.filter(projet__pole=profile.pole)
+        elif profile.role == 'chef_pole' and profile.pole_id:
+            queryset = queryset.filter(projet__pole_id=profile.pole_id)
 
         # Autres utilisateurs voient :
         # - Les tâches des projets dont ils sont membres
         # - Les tâches des projets dont ils sont chef de projet
         # - Les tâches qui leur sont assignées
+        # (sous-requêtes sur l'index de visibilité et la table d'assignation :
+        # pas de JOIN multiplicateur, donc pas de DISTINCT)
         else:
+            projets_associes = ProjetVisibility.objects.filter(
+                user=user, reason__in=['membre', 'chef_projet']
+            ).values('projet_id')
+            taches_assignees = Tache.assigne_a.through.objects.filter(user=user).values('tache_id')
             queryset = queryset.filter(
-                Q(projet__membres=user) |
-                Q(projet__chef_projet=user) |
-                Q(assigne_a=user)
-            ).distinct()
+                Q(projet_id__in=projets_associes) |
+                Q(id__in=taches_assignees)
+            )
 
         # Filtrer par projet si demandé
         projet_id = self.request.query_params.get('projet')
@@ -73,7 +86,7 @@ class TacheListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         user = self.request.user
-        profile = getattr(user, 'profile', None)
+        profile = get_permission_context(self.request).profile
         projet_id = serializer.validated_data.get('projet').id
 
         # Récupérer le projet pour vérifier les permissions
@@ -88,7 +101,7 @@ class TacheListCreateView(generics.ListCreateAPIView):
             return
 
         # Chef de projet peut créer seulement s'il a accepté
-        if projet.chef_projet == user and projet.chef_projet_status == 'accepted':
+        if projet.chef_projet_id == user.id and projet.chef_projet_status == 'accepted':
             serializer.save()
             return
 
@@ -102,7 +115,7 @@ class TacheDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH: Modifie une tâche (selon permissions)
     DELETE: Supprime une tâche (selon permissions)
     """
-    queryset = Tache.objects.all().select_related('projet').prefetch_related('assigne_a')
+    queryset = Tache.objects.all().select_related('projet').prefetch_related(prefetch_users('assigne_a'))
     permission_classes = [permissions.IsAuthenticated, CanManageTache]
 
     def get_serializer_class(self):
@@ -113,7 +126,8 @@ class TacheDetailView(generics.RetrieveUpdateDestroyAPIView):
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         user = request.user
-        profile = getattr(user, 'profile', None)
+        context = get_permission_context(request)
+        profile = context.profile
 
         if not profile:
             return Response(
@@ -123,10 +137,10 @@ class TacheDetailView(generics.RetrieveUpdateDestroyAPIView):
 
         # Si c'est la personne assignée (mais pas admin, super_admin, chef de pôle ou chef de projet)
         # alors elle peut seulement modifier le statut
-        is_assigned = instance.assigne_a.filter(id=user.id).exists()
-        is_admin = is_admin_or_super(profile)
-        is_chef_pole = profile.role == 'chef_pole' and profile.pole and instance.projet.pole == profile.pole
-        is_chef_projet = instance.projet.chef_projet == user
+        is_assigned = context.is_assigned(instance.pk)
+        is_admin = context.is_admin
+        is_chef_pole = context.is_chef_pole_of(instance.projet.pole_id)
+        is_chef_projet = instance.projet.chef_projet_id == user.id
 
         if is_assigned and not (is_admin or is_chef_pole or is_chef_projet):
             # Autoriser uniquement la modification du statut
@@ -7,9 +7,9 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import get_user_model
 
-from ..serializers import UserProfileSerializer, TacheSerializer, ProjetListSerializer
+from ..serializers import UserProfileSerializer
 from ..permissions import IsAdminUserProfile, CanEditOwnProfile, CanViewUsers
-from ..models import Projet, Tache
+from ..services import UserProfileService, get_permission_context
 
 User = get_user_model()
 
@@ -46,7 +46,7 @@ class UserUploadPhotoView(APIView):
 
         # Vérifier que l'utilisateur peut modifier cette photo
         # Soit c'est son propre profil, soit c'est un admin ou super_admin
-        profile = getattr(request.user, 'profile', None)
+        profile = get_permission_context(request).profile
         if request.user.id != pk and (not profile or profile.role not in ['admin', 'super_admin']):
             return Response(
                 {"detail": "Vous n'avez pas la permission de modifier cette photo"},
@@ -82,6 +82,12 @@ class UserProfileDetailView(APIView):
         except User.DoesNotExist:
             return Response({"detail": "Utilisateur introuvable"}, status=status.HTTP_404_NOT_FOUND)
 
+        # Payload complet en cache par utilisateur (invalidé par les signaux)
+        cache_key = UserProfileService.cache_key(user.pk, request.get_host())
+        user_data = UserProfileService.get_cached(cache_key)
+        if user_data is not None:
+            return Response(user_data)
+
         # Informations de base
         profile = getattr(user, 'profile', None)
 
@@ -114,36 +120,8 @@ class UserProfileDetailView(APIView):
             "tiktok": profile.tiktok if profile else None,
         }
 
-        # Projets où l'utilisateur est client
-        projets_client = Projet.objects.filter(client=user).select_related('pole', 'chef_projet', 'created_by')
-        user_data["projets_client"] = ProjetListSerializer(projets_client, many=True).data
-
-        # Projets où l'utilisateur est chef de projet
-        projets_chef = Projet.objects.filter(chef_projet=user).select_related('pole', 'client', 'created_by')
-        user_data["projets_chef"] = ProjetListSerializer(projets_chef, many=True).data
-
-        # Projets où l'utilisateur est membre
-        projets_membre = Projet.objects.filter(membres=user).select_related('pole', 'client', 'chef_projet', 'created_by')
-        user_data["projets_membre"] = ProjetListSerializer(projets_membre, many=True).data
-
-        # Projets créés par l'utilisateur
-        projets_crees = Projet.objects.filter(created_by=user).select_related('pole', 'client', 'chef_projet')
-        user_data["projets_crees"] = ProjetListSerializer(projets_crees, many=True).data
-
-        # Tâches assignées à l'utilisateur
-        taches_assignees = Tache.objects.filter(assigne_a=user).select_related('projet', 'projet__pole')
-        user_data["taches_assignees"] = TacheSerializer(taches_assignees, many=True).data
-
-        # Statistiques
-        user_data["stats"] = {
-            "total_projets_client": projets_client.count(),
-            "total_projets_chef": projets_chef.count(),
-            "total_projets_membre": projets_membre.count(),
-            "total_projets_crees": projets_crees.count(),
-            "total_taches_assignees": taches_assignees.count(),
-            "taches_a_faire": taches_assignees.filter(statut='a_faire').count(),
-            "taches_en_cours": taches_assignees.filter(statut='en_cours').count(),
-            "taches_terminees": taches_assignees.filter(statut='termine').count(),
-        }
+        # Projets (client, chef, membre, créateur) en une requête, tâches assignées et statistiques
+        user_data.update(UserProfileService.build_relations(user))
 
+        UserProfileService.set_cached(cache_key, user_data)
         return Response(user_data)
@@ -5,16 +5,95 @@
  * - Cache intelligent de 5 minutes (pas de requêtes inutiles)
  * - Déduplication automatique des requêtes
  * - Refetch uniquement quand l'onglet est visible
- * - Polling intelligent toutes les 60 secondes (seulement si onglet actif)
+ * - Flux temps réel (SSE /notifications/stream/) : nouvelles notifications et
+ *   compteur poussés par le serveur, polling désactivé tant que le flux est ouvert
+ * - Polling de secours toutes les 60 secondes (seulement si onglet actif),
+ *   incrémental : seules les notifications plus récentes que le dernier
+ *   curseur (?since=) sont téléchargées
  * - Réduction de 50-70% des commandes Redis
  */
+import { useEffect, useRef, useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import api from '../api/axios';
+import { API_URL } from '../config';
 
 const POLL_INTERVAL = 60000; // 60 secondes (réduit de 30s)
+const STREAM_RETRY_DELAY = 5000; // reconnexion après une erreur du flux
+const MAX_NOTIFICATIONS = 50;
+
+/**
+ * Ouvre le flux SSE des notifications et met à jour le cache React Query
+ *
+ * EventSource ne permet pas d'en-têtes : un ticket à usage unique est demandé
+ * (POST /notifications/stream/ticket/) avant chaque ouverture, le token d'accès
+ * ne passe jamais dans l'URL. Après une erreur (token expiré, serveur
+ * indisponible), le flux est rouvert avec un nouveau ticket ; le polling
+ * reprend entre-temps.
+ *
+ * @returns {boolean} true tant que le flux est ouvert
+ */
+function useNotificationStream(queryClient) {
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    let source = null;
+    let retryTimer = null;
+    let stopped = false;
+
+    const retry = () => {
+      retryTimer = setTimeout(connect, STREAM_RETRY_DELAY);
+    };
+
+    const connect = async () => {
+      if (stopped || !localStorage.getItem('access')) return;
+
+      let ticket;
+      try {
+        // Via axios : le token d'accès est rafraîchi si besoin
+        ticket = (await api.post('/notifications/stream/ticket/')).data.ticket;
+      } catch {
+        retry();
+        return;
+      }
+      if (stopped) return;
+
+      source = new EventSource(`${API_URL}/notifications/stream/?ticket=${encodeURIComponent(ticket)}`);
+      source.onopen = () => setConnected(true);
+      source.addEventListener('unread_count', (event) => {
+        queryClient.setQueryData(['notifications', 'unread-count'], JSON.parse(event.data).count);
+      });
+      source.addEventListener('notification', (event) => {
+        const notification = JSON.parse(event.data);
+        queryClient.setQueryData(['notifications'], (old = []) =>
+          old.some((notif) => notif.id === notification.id)
+            ? old
+            : [notification, ...old].slice(0, MAX_NOTIFICATIONS)
+        );
+      });
+      source.onerror = () => {
+        setConnected(false);
+        source.close();
+        retry();
+      };
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  }, [queryClient]);
+
+  return connected;
+}
 
 export default function useNotifications() {
   const queryClient = useQueryClient();
+  const streamConnected = useNotificationStream(queryClient);
+  const feedCursor = useRef(null);
 
   // Fetch toutes les notifications avec React Query
   const {
@@ -25,12 +104,32 @@ export default function useNotifications() {
   } = useQuery({
     queryKey: ['notifications'],
     queryFn: async () => {
-      const response = await api.get('/notifications/?limit=50');
-      return response.data;
+      const cached = queryClient.getQueryData(['notifications']);
+      const since = cached ? feedCursor.current : null;
+      const response = await api.get('/notifications/', {
+        params: { since: since ?? '', limit: MAX_NOTIFICATIONS },
+      });
+      const { results, newest_cursor: newestCursor, has_more: hasMore } = response.data;
+
+      if (since && hasMore) {
+        // Trop de nouveautés depuis le dernier rafraîchissement : on recharge la liste
+        feedCursor.current = null;
+        const full = await api.get('/notifications/', { params: { since: '', limit: MAX_NOTIFICATIONS } });
+        feedCursor.current = full.data.newest_cursor;
+        return full.data.results;
+      }
+
+      feedCursor.current = newestCursor;
+      if (!since) return results;
+
+      // Nouvelles notifications (ou alertes de retard rafraîchies) en tête
+      const freshIds = new Set(results.map((notif) => notif.id));
+      return [...results, ...cached.filter((notif) => !freshIds.has(notif.id))].slice(0, MAX_NOTIFICATIONS);
     },
     staleTime: 5 * 60 * 1000, // Cache 5 minutes
     refetchInterval: (data) => {
-      // Refetch seulement si l'onglet est visible
+      // Pas de polling avec le flux ouvert ; sinon seulement si l'onglet est visible
+      if (streamConnected) return false;
       return document.visibilityState === 'visible' ? POLL_INTERVAL : false;
     },
     refetchIntervalInBackground: false, // Pas de refetch en arrière-plan
@@ -45,6 +144,7 @@ export default function useNotifications() {
     },
     staleTime: 5 * 60 * 1000,
     refetchInterval: (data) => {
+      if (streamConnected) return false;
       return document.visibilityState === 'visible' ? POLL_INTERVAL : false;
     },
     refetchIntervalInBackground: false,
@@ -107,6 +207,27 @@ export default function useNotifications() {
     },
   });
 
+  // Marquer comme lues ou supprimer plusieurs notifications en une requête
+  const bulkMutation = useMutation({
+    mutationFn: async ({ action, ids }) => {
+      const response = await api.post('/notifications/bulk/', { action, ids });
+      return { action, ids, unreadCount: response.data.unread_count };
+    },
+    onSuccess: ({ action, ids, unreadCount }) => {
+      const selected = new Set(ids);
+      queryClient.setQueryData(['notifications'], (old) =>
+        action === 'delete'
+          ? old?.filter((notif) => !selected.has(notif.id))
+          : old?.map((notif) =>
+              selected.has(notif.id) && !notif.is_read
+                ? { ...notif, is_read: true, read_at: new Date().toISOString() }
+                : notif
+            )
+      );
+      queryClient.setQueryData(['notifications', 'unread-count'], unreadCount);
+    },
+  });
+
   // Supprimer toutes les notifications lues
   const deleteAllReadMutation = useMutation({
     mutationFn: async () => {
@@ -128,6 +249,8 @@ export default function useNotifications() {
     fetchUnreadCount,
     markAsRead: (id) => markAsReadMutation.mutateAsync(id),
     markAllAsRead: () => markAllAsReadMutation.mutateAsync(),
+    markManyAsRead: (ids) => bulkMutation.mutateAsync({ action: 'read', ids }),
+    deleteMany: (ids) => bulkMutation.mutateAsync({ action: 'delete', ids }),
     deleteNotification: (id) => deleteNotificationMutation.mutateAsync(id),
     deleteAllRead: () => deleteAllReadMutation.mutateAsync(),
   };
@@ -34,6 +34,21 @@ app.conf.beat_schedule = {
         'task': 'core.tasks.batch_sync_odoo_pending',
         'schedule': 30.0,  # Every 30 seconds
     },
+    # Catch up on Odoo webhook events (normally processed right after receipt)
+    'process-odoo-webhooks': {
+        'task': 'core.tasks.process_odoo_webhooks',
+        'schedule': 60.0,  # Every minute
+    },
+    # Fix drift of the denormalized unread notification counters
+    'reconcile-notification-counters': {
+        'task': 'core.tasks.reconcile_notification_counters',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+    # Prune read and expired notifications in bounded batches
+    'prune-notifications': {
+        'task': 'core.tasks.prune_notifications',
+        'schedule': crontab(hour=3, minute=30),  # Every day at 03:30
+    },
 }
 
 
@@ -193,10 +193,56 @@ ODOO_DB = config('ODOO_DB', default='')
 ODOO_USERNAME = config('ODOO_USERNAME', default='')
 ODOO_PASSWORD = config('ODOO_PASSWORD', default='')
 
+# Pool de sessions Odoo (par processus worker)
+ODOO_POOL_SIZE = config('ODOO_POOL_SIZE', default=4, cast=int)
+ODOO_POOL_TIMEOUT = config('ODOO_POOL_TIMEOUT', default=30, cast=int)  # attente max d'une session libre (s)
+ODOO_HEALTH_CHECK_INTERVAL = config('ODOO_HEALTH_CHECK_INTERVAL', default=60, cast=int)  # session inactive revérifiée après (s)
+ODOO_RECONNECT_COOLDOWN = config('ODOO_RECONNECT_COOLDOWN', default=30, cast=int)  # délai après un échec de connexion (s)
+
+# Rate limiting Odoo partagé par tous les workers (token bucket dans le cache)
+ODOO_RATE_LIMIT = config('ODOO_RATE_LIMIT', default=10, cast=float)  # requêtes/s, tous workers confondus
+ODOO_RATE_LIMIT_BURST = config('ODOO_RATE_LIMIT_BURST', default=20, cast=int)
+ODOO_RATE_LIMIT_MAX_WAIT = config('ODOO_RATE_LIMIT_MAX_WAIT', default=0.2, cast=float)  # attente absorbée sur place (s)
+# Budgets supplémentaires par modèle : (requêtes/s, rafale)
+ODOO_RATE_LIMIT_MODELS = {
+    'res.partner': (5, 10),
+    'project.project': (5, 10),
+    'project.task': (8, 16),
+}
+
+# Taille des lots d'upsert Odoo (un load() + un search_read par lot)
+ODOO_BATCH_SIZE = config('ODOO_BATCH_SIZE', default=100, cast=int)
+# Taille des lots de bulk_update des IDs Odoo côté Django
+ODOO_WRITEBACK_BATCH_SIZE = config('ODOO_WRITEBACK_BATCH_SIZE', default=500, cast=int)
+
+# Outbox de synchronisation Odoo (voir OdooSyncService.drain_outbox)
+ODOO_OUTBOX_BATCH_SIZE = config('ODOO_OUTBOX_BATCH_SIZE', default=500, cast=int)  # événements par lot
+ODOO_OUTBOX_MAX_EVENTS_PER_RUN = config('ODOO_OUTBOX_MAX_EVENTS_PER_RUN', default=10000, cast=int)  # plafond par passage
+ODOO_OUTBOX_SAFETY_LAG = config('ODOO_OUTBOX_SAFETY_LAG', default=5, cast=int)  # âge minimal d'un événement lu (s)
+ODOO_OUTBOX_MAX_ATTEMPTS = config('ODOO_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)  # essais avant abandon d'un événement
+ODOO_OUTBOX_LOCK_TIMEOUT = config('ODOO_OUTBOX_LOCK_TIMEOUT', default=600, cast=int)  # expiration du verrou consommateur (s)
+ODOO_OUTBOX_RETENTION_DAYS = config('ODOO_OUTBOX_RETENTION_DAYS', default=7, cast=int)  # conservation après traitement
+
+# Miroir en cache des lectures Odoo (voir core/odoo_mirror.py)
+ODOO_MIRROR_TTL = config('ODOO_MIRROR_TTL', default=300, cast=int)  # fraîcheur d'un enregistrement (s)
+ODOO_MIRROR_STALE_TTL = config('ODOO_MIRROR_STALE_TTL', default=3600, cast=int)  # servi périmé pendant le rafraîchissement (s)
+ODOO_MIRROR_LOCK_WAIT = config('ODOO_MIRROR_LOCK_WAIT', default=2.0, cast=float)  # attente du rafraîchissement d'un autre worker (s)
+ODOO_MIRROR_LOCK_TIMEOUT = config('ODOO_MIRROR_LOCK_TIMEOUT', default=10, cast=int)  # expiration du verrou single-flight (s)
+
+# Correspondance partner Odoo <-> utilisateur en cache (voir core/services/partner_map_service.py)
+ODOO_PARTNER_MAP_TTL = config('ODOO_PARTNER_MAP_TTL', default=86400, cast=int)  # filet de sécurité (s)
+
 # Token secret pour sécuriser les webhooks Odoo → Django
 # Générer avec: python -c "import secrets; print(secrets.token_urlsafe(32))"
 ODOO_WEBHOOK_SECRET = config('ODOO_WEBHOOK_SECRET', default='')
 
+# Inbox des webhooks Odoo (voir OdooWebhookService)
+ODOO_WEBHOOK_BATCH_SIZE = config('ODOO_WEBHOOK_BATCH_SIZE', default=200, cast=int)  # événements par lot
+ODOO_WEBHOOK_MAX_ATTEMPTS = config('ODOO_WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)  # essais avant abandon
+ODOO_WEBHOOK_SCHEDULE_DELAY = config('ODOO_WEBHOOK_SCHEDULE_DELAY', default=1, cast=int)  # regroupe les rafales (s)
+ODOO_WEBHOOK_RETENTION_DAYS = config('ODOO_WEBHOOK_RETENTION_DAYS', default=7, cast=int)  # conservation après traitement
+ODOO_WEBHOOK_CLAIM_TIMEOUT = config('ODOO_WEBHOOK_CLAIM_TIMEOUT', default=300, cast=int)  # lot réclamé puis abandonné (s)
+
 # ========================================
 # REDIS CONFIGURATION (Cache + Celery Broker)
 # ========================================
@@ -228,6 +274,25 @@ else:
     }
     print("⚠️ [WARNING] Redis not configured, using local memory cache (not suitable for production)")
 
+# Flux SSE des notifications (voir core/notification_stream.py) : Redis pub/sub si
+# REDIS_URL est configuré, sinon en mémoire (événements du même processus uniquement)
+NOTIFICATION_STREAM_KEEPALIVE = config('NOTIFICATION_STREAM_KEEPALIVE', default=25, cast=int)  # commentaire keepalive (s)
+NOTIFICATION_STREAM_MAX_AGE = config('NOTIFICATION_STREAM_MAX_AGE', default=3600, cast=int)  # durée max d'un flux (s)
+NOTIFICATION_STREAM_RETRY_MS = config('NOTIFICATION_STREAM_RETRY_MS', default=5000, cast=int)  # délai de reconnexion client (ms)
+NOTIFICATION_STREAM_TICKET_TTL = config('NOTIFICATION_STREAM_TICKET_TTL', default=30, cast=int)  # validité d'un ticket de flux (s)
+
+# Compteurs de notifications non lues (voir core/services/notification_counter_service.py)
+NOTIFICATION_COUNTER_TTL = config('NOTIFICATION_COUNTER_TTL', default=86400, cast=int)  # durée en cache (s)
+
+# Rétention des notifications (voir core/services/notification_retention_service.py)
+NOTIFICATION_READ_RETENTION_DAYS = config('NOTIFICATION_READ_RETENTION_DAYS', default=30, cast=int)  # lues (jours)
+NOTIFICATION_UNREAD_RETENTION_DAYS = config('NOTIFICATION_UNREAD_RETENTION_DAYS', default=180, cast=int)  # toutes (jours)
+NOTIFICATION_RETENTION_BATCH_SIZE = config('NOTIFICATION_RETENTION_BATCH_SIZE', default=1000, cast=int)  # lignes par lot
+NOTIFICATION_RETENTION_MAX_BATCHES = config('NOTIFICATION_RETENTION_MAX_BATCHES', default=100, cast=int)  # lots par passage
+NOTIFICATION_ARCHIVE_ENABLED = config('NOTIFICATION_ARCHIVE_ENABLED', default=False, cast=bool)  # copie avant purge
+NOTIFICATION_ARCHIVE_PARTITIONS_AHEAD = config('NOTIFICATION_ARCHIVE_PARTITIONS_AHEAD', default=2, cast=int)  # mois créés d'avance
+NOTIFICATION_ARCHIVE_RETENTION_MONTHS = config('NOTIFICATION_ARCHIVE_RETENTION_MONTHS', default=12, cast=int)  # partitions conservées
+
 # ========================================
 # CELERY CONFIGURATION (Async Tasks)
 # ========================================